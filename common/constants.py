@@ -1,10 +1,42 @@
 import smartpy as sp
 
+# Constants shared by the contracts and their scenarios. Each value is defined once, here,
+# and the contracts use them through the `Constants` module below with `import Constants`.
+
 # The fixed point number representing 1 in the system, 10^18
-PRECISION = sp.nat(1_000_000_000_000_000_000)
+PRECISION = 10 ** 18
 
 # The asset pair reported by Harbinger.
 ASSET_CODE = "XTZ-USD"
 
-# The type of data returned in Harbinger's Normalizer callback.
-HARBINGER_DATA_TYPE = sp.TPair(sp.TString, sp.TPair(sp.TTimestamp, sp.TNat))
+# The XTZUSDT asset pair reported by Youves.
+XTZ_ASSET_CODE = "XTZUSDT"
+
+# The USDTUSD asset pair reported by Youves.
+USDT_ASSET_CODE = "USDTUSD"
+
+# The most DEX calls a single `voteBatch` or `vetoBatch` can emit, keeping the operation within gas limits.
+MAX_BATCH_SIZE = 20
+
+# Where the fund's TZIP-16 metadata written at compilation is pinned. Set this before deploying.
+FUND_METADATA_URL = "ipfs://"
+
+# SmartPy parses a module from its source rather than running it, so the module is written
+# out with the values above.
+Constants = sp.Module.make_inline_module(__file__, 0, 0, """@sp.module
+def Constants():
+    PRECISION = sp.nat(%(PRECISION)d)
+    ASSET_CODE = %(ASSET_CODE)r
+    XTZ_ASSET_CODE = %(XTZ_ASSET_CODE)r
+    USDT_ASSET_CODE = %(USDT_ASSET_CODE)r
+    MAX_BATCH_SIZE = sp.nat(%(MAX_BATCH_SIZE)d)
+
+    # The type of data returned in Harbinger's Normalizer callback.
+    HARBINGER_DATA_TYPE: type = sp.pair[sp.string, sp.pair[sp.timestamp, sp.nat]]
+""" % {
+    "PRECISION": PRECISION,
+    "ASSET_CODE": ASSET_CODE,
+    "XTZ_ASSET_CODE": XTZ_ASSET_CODE,
+    "USDT_ASSET_CODE": USDT_ASSET_CODE,
+    "MAX_BATCH_SIZE": MAX_BATCH_SIZE,
+})
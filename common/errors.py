@@ -1,72 +1,93 @@
-# The sender of a contract invocation was required to be the Governor contract.
-NOT_GOVERNOR = 1
+import smartpy as sp
 
-# The sender of an operation was required to be the Administrator of the contract.
-NOT_EXECUTOR = 2
+# Error codes shared by the contracts. Contract modules use them with `import Errors`,
+# and scenarios can expect them with `_exception = Errors.NOT_GOVERNOR`.
+# A code identifies its error within a contract. The maker keeps the codes it was deployed with,
+# so its USDT_PEG and RATE_LIMITED share their numbers with the fund's SLIPPAGE and VWAP_VIEW_ERROR.
 
-# The sender of an operation was required to be the Pause Guardian.
-NOT_PAUSE_GUARDIAN = 3
+@sp.module
+def Errors():
+    # The sender of a contract invocation was required to be the Governor contract.
+    NOT_GOVERNOR = 1
 
-# The data provided was too old.
-STALE_DATA = 4
+    # The sender of an operation was required to be the Administrator of the contract.
+    NOT_EXECUTOR = 2
 
-# The system is paused.
-PAUSED = 5
+    # The sender of an operation was required to be the Pause Guardian.
+    NOT_PAUSE_GUARDIAN = 3
 
-# Cannot receive funds.
-CANNOT_RECEIVE_FUNDS = 6
+    # The data provided was too old.
+    STALE_DATA = 4
 
-# The swap was attempted before min delay time
-TRADE_TIME = 7
+    # The system is paused.
+    PAUSED = 5
 
-# VWAP vs input price difference is too great
-SLIPPAGE = 8
+    # Cannot receive funds.
+    CANNOT_RECEIVE_FUNDS = 6
 
-# Not enough tokens to perform swap
-NOT_ENOUGH_TOKENS = 9
+    # The swap was attempted before min delay time
+    TRADE_TIME = 7
 
-# The sender was not the expected contract
-BAD_SENDER = 10
+    # VWAP vs input price difference is too great
+    SLIPPAGE = 8
 
-# Error calling view on Harbinger Normalizer
-VWAP_VIEW_ERROR = 11
+    # USDT does not equal USD
+    USDT_PEG = 8
 
-# Error calling view on Harbinger spot
-SPOT_VIEW_ERROR = 12
+    # Not enough tokens to perform swap
+    NOT_ENOUGH_TOKENS = 9
 
-# Error while interacting with DEX contract
-DEX_CONTRACT_ERROR = 13
+    # The sender was not the expected contract
+    BAD_SENDER = 10
 
-# Wrong state while interacting with function
-BAD_STATE = 14
+    # Error calling view on Harbinger Normalizer
+    VWAP_VIEW_ERROR = 11
 
-# Error while calling approve on token
-APPROVAL = 15
+    # The trade amount is more than the rate limit bucket holds
+    RATE_LIMITED = 11
 
-# Difference between spot and normalizer prices is too great
-VOLATILITY = 16
+    # Error calling view on the spot price oracle
+    SPOT_VIEW_ERROR = 12
 
-# Error while executing the transfer function in token
-TOKEN_TRANSFER = 17
+    # Error while interacting with DEX contract
+    DEX_CONTRACT_ERROR = 13
 
-# Error while retrieving balance of token
-BALANCE_REQUEST = 18
+    # Wrong state while interacting with function
+    BAD_STATE = 14
 
-## BELOW ARE ONLY USED IN TESTS ##
-# The user did not have a sufficient token balance to complete the operation.
-TOKEN_INSUFFICIENT_BALANCE = 19
+    # Error while calling approve on token
+    APPROVAL = 15
 
-# The allowance change was unsafe. Please reset the allowance to zero before trying to operation again.
-TOKEN_UNSAFE_ALLOWANCE_CHANGE = 20
+    # Spot price deviates too far from its moving average
+    VOLATILITY = 16
 
-# The operation was not performed by the token administrator.
-TOKEN_NOT_ADMINISTRATOR = 21
+    # Error while executing the transfer function in token
+    TOKEN_TRANSFER = 17
 
-# The debt ceiling would be exceeded if the operation were completed. 
-DEBT_CEILING = 22
+    # Error while retrieving balance of token
+    BALANCE_REQUEST = 18
 
-# The user was not allowed to perform a token transfer.
-TOKEN_NO_TRANSFER_PERMISSION = 23
+    # A batch had more entries than allowed
+    BATCH_TOO_LARGE = 25
 
-# The sender of an operation was required to be Executor or Governor
-NOT_AUTHORIZED = 24
+    # A trade was requested for no tokens
+    ZERO_TOKEN_AMOUNT = 26
+
+    ## BELOW ARE ONLY USED IN TESTS ##
+    # The user did not have a sufficient token balance to complete the operation.
+    TOKEN_INSUFFICIENT_BALANCE = 19
+
+    # The allowance change was unsafe. Please reset the allowance to zero before trying to operation again.
+    TOKEN_UNSAFE_ALLOWANCE_CHANGE = 20
+
+    # The operation was not performed by the token administrator.
+    TOKEN_NOT_ADMINISTRATOR = 21
+
+    # The debt ceiling would be exceeded if the operation were completed.
+    DEBT_CEILING = 22
+
+    # The user was not allowed to perform a token transfer.
+    TOKEN_NO_TRANSFER_PERMISSION = 23
+
+    # The sender of an operation was required to be Executor or Governor
+    NOT_AUTHORIZED = 24
@@ -1,506 +1,647 @@
-import smartpy as sp
-
-Addresses = sp.io.import_script_from_url("file:common/addresses.py")
-Constants = sp.io.import_script_from_url("file:common/constants.py")
-Errors = sp.io.import_script_from_url("file:common/errors.py")
+import json
+import os
 
-################################################################
-# State Machine
-################################################################
+import smartpy as sp
 
-IDLE = 0
-WAITING_FOR_TOKEN_BALANCE = 1
+import common.addresses as Addresses
+from common.constants import ASSET_CODE, FUND_METADATA_URL, MAX_BATCH_SIZE, PRECISION, Constants
+from common.errors import Errors
 
 ################################################################
 # Contract
 ################################################################
 
-# Creates a liquidity fund contract for managing liquidity on a Quipuswap pair.
-# Allows the "Executor" address to add liquidity to Quipuswap and veto.
-# Allows the "Governor" address to remove liquidity, claim rewards, vote, 
-#   transfer tokens or XTZ, and change addresses.
-
-class LiquidityFundContract(sp.Contract):
-    def __init__(
-        self,
-        governorContractAddress = Addresses.GOVERNOR_ADDRESS,
-        executorContractAddress = Addresses.EXECUTOR_ADDRESS,
-        tokenContractAddress = Addresses.TOKEN_ADDRESS,
-        quipuswapContractAddress = Addresses.QUIPUSWAP_ADDRESS,
-        harbingerContractAddress = Addresses.HARBINGER_VWAP_ADDRESS,
-
-        slippageTolerance = sp.nat(5), # 5%
-        maxDataDelaySec = sp.nat(60 * 5), # 5 minutes
-        
-        state = IDLE,
-        sendAllTokens_destination = sp.none,
-
-    ):
-        self.exception_optimization_level = "DefaultUnit"
-
-        self.init(
-            governorContractAddress = governorContractAddress,
-            executorContractAddress = executorContractAddress,
-            tokenContractAddress = tokenContractAddress,
-            quipuswapContractAddress = quipuswapContractAddress,
-            harbingerContractAddress = harbingerContractAddress,
-
-            slippageTolerance = slippageTolerance,
-            maxDataDelaySec = maxDataDelaySec,
+@sp.module
+def proxy():
+    import Constants
+    import Errors
+    import smartpy.stdlib.utils as utils
+
+    # State Machine
+    IDLE = 0
+    WAITING_FOR_TOKEN_BALANCE = 1
+
+    # The parameter of an FA1.2 `transfer`.
+    FA12_TRANSFER_TYPE: type = sp.record(
+        from_ = sp.address,
+        to_ = sp.address,
+        value = sp.nat,
+    ).layout(("from_ as from", ("to_ as to", "value")))
+
+    # Creates a liquidity fund contract for managing liquidity on a Quipuswap pair.
+    # Allows the "Executor" address to add liquidity to Quipuswap and veto.
+    # Allows the "Governor" address to remove liquidity, claim rewards, vote,
+    #   transfer tokens or XTZ, and change addresses.
+    class LiquidityFundContract(sp.Contract):
+        def __init__(
+            self,
+            governorContractAddress,
+            executorContractAddress,
+            tokenContractAddress,
+            quipuswapContractAddress,
+            harbingerContractAddress,
+            slippageTolerance,  # In percent
+            maxDataDelaySec,
+            state,
+            sendAllTokens_destination,
+            metadata,  # TZIP-16 metadata, with the URL of the JSON under the empty key
+        ):
+            self.data.governorContractAddress = sp.cast(governorContractAddress, sp.address)
+            self.data.executorContractAddress = sp.cast(executorContractAddress, sp.address)
+            self.data.tokenContractAddress = sp.cast(tokenContractAddress, sp.address)
+            self.data.quipuswapContractAddress = sp.cast(quipuswapContractAddress, sp.address)
+            self.data.harbingerContractAddress = sp.cast(harbingerContractAddress, sp.address)
+
+            self.data.slippageTolerance = sp.cast(slippageTolerance, sp.nat)
+            self.data.maxDataDelaySec = sp.cast(maxDataDelaySec, sp.nat)
 
             # State machine
-            state = state,
-            sendAllTokens_destination = sendAllTokens_destination,
-
-        )
-
-    ################################################################
-    # Public API
-    ################################################################
-
-    # Allow XTZ transfers into the fund.
-    @sp.entry_point
-    def default(self):
-        pass
-
-    ################################################################
-    # Quipuswap API
-    ################################################################
-
-    @sp.entry_point(check_no_incoming_transfer=True)
-    def addLiquidity(self, param):
-        sp.set_type(param, sp.TRecord(tokens = sp.TNat, mutez = sp.TNat).layout(("tokens", "mutez")))
-
-        # Verify the caller is the permissioned executor account.
-        sp.verify(sp.sender == self.data.executorContractAddress, message = Errors.NOT_EXECUTOR)
-
-        # Read vwap from Harbinger Normalizer views
-        harbingerVwap = sp.local('harbingerVwap', sp.view(
-            "getPrice",
-            self.data.harbingerContractAddress,
-            Constants.ASSET_CODE,
-            sp.TPair(sp.TTimestamp, sp.TNat)
-        ).open_some(message = Errors.VWAP_VIEW_ERROR))
-
-        harbingerPrice = sp.local('harbingerPrice', sp.snd(harbingerVwap.value))
-
-        # Calculate input price to compare to Harbinger
-        inputPrice = param.tokens // param.mutez // 1_000_000
-
-        # Calculate percentage difference between Harbinger and function input
-        percentageDifference = abs(harbingerPrice.value - inputPrice) * 100 // harbingerPrice.value
-        # Assert that difference is within range of slippageTolerance
-        sp.verify(self.data.slippageTolerance > percentageDifference, Errors.SLIPPAGE)
-
-        # Assert that the Harbinger data is newer than max data delay
-        dataAge = sp.as_nat(sp.now - sp.fst(harbingerVwap.value))
-        sp.verify(dataAge <= self.data.maxDataDelaySec, Errors.STALE_DATA)
-        
-        # Approve Quipuswap contract to spend on token contract
-        approveHandle = sp.contract(
-            sp.TPair(sp.TAddress, sp.TNat),
-            self.data.tokenContractAddress,
-            "approve"
-        ).open_some(message = Errors.APPROVAL)
-        approveArg = sp.pair(self.data.quipuswapContractAddress, param.tokens)
-        sp.transfer(approveArg, sp.mutez(0), approveHandle)
-
-        # Add the liquidity to the Quipuswap contract.
-        addHandle = sp.contract(
-            sp.TNat,
-            self.data.quipuswapContractAddress,
-            "investLiquidity"
-        ).open_some(message = Errors.DEX_CONTRACT_ERROR)
-        sp.transfer(param.tokens, sp.utils.nat_to_mutez(param.mutez), addHandle)
-        
-        # Set Quipuswap contract approval back to 0
-        approveHandle = sp.contract(
-            sp.TPair(sp.TAddress, sp.TNat),
-            self.data.tokenContractAddress,
-            "approve"
-        ).open_some(message = Errors.APPROVAL)
-        approveArg = sp.pair(self.data.quipuswapContractAddress, 0)
-        sp.transfer(approveArg, sp.mutez(0), approveHandle)
-        
-    @sp.entry_point(check_no_incoming_transfer=True)
-    def removeLiquidity(self, param):
-        sp.set_type(param, sp.TRecord(
-            min_mutez_out = sp.TNat, 
-            min_tokens_out = sp.TNat, 
-            lp_to_remove = sp.TNat
-            ).layout((("min_mutez_out", "min_tokens_out"), ("lp_to_remove"))))
-
-        # Verify the caller is the governor address
-        sp.verify(sp.sender == self.data.governorContractAddress, message = Errors.NOT_GOVERNOR)
-
-        # Remove liquidity from the Quipuswap contract
-        divestHandle = sp.contract(
-            sp.TPair(sp.TPair(sp.TNat, sp.TNat), sp.TNat),
-            self.data.quipuswapContractAddress,
-            "divestLiquidity"
-        ).open_some(message = Errors.DEX_CONTRACT_ERROR)
-        arg = sp.pair(sp.pair(param.min_mutez_out, param.min_tokens_out), param.lp_to_remove)
-        sp.transfer(arg, sp.mutez(0), divestHandle)
-
-    @sp.entry_point(check_no_incoming_transfer=True)
-    def claimRewards(self):
-
-        # Verify the caller is the governor address
-        sp.verify(sp.sender == self.data.governorContractAddress, message = Errors.NOT_GOVERNOR)
-
-        # Claim rewards from the Quipuswap contract
-        claimHandle = sp.contract(
-            sp.TAddress,
-            self.data.quipuswapContractAddress,
-            "withdrawProfit"
-        ).open_some(message = Errors.DEX_CONTRACT_ERROR)
-        sp.transfer(sp.self_address, sp.mutez(0), claimHandle) 
-
-    @sp.entry_point(check_no_incoming_transfer=True)
-    def vote(self, param):
-        sp.set_type(param, sp.TRecord(
-            candidate = sp.TKeyHash,
-            value = sp.TNat,
-            voter = sp.TAddress
-        ).layout((("candidate", "value"), ("voter"))))
-        
-        # Verify the caller is the governor address
-        sp.verify(sp.sender == self.data.governorContractAddress, message = Errors.NOT_GOVERNOR)
-
-        # Call vote() on Quipuswap AMM
-        voteHandle = sp.contract(
-            sp.TPair(sp.TPair(sp.TKeyHash, sp.TNat), sp.TAddress),
-            self.data.quipuswapContractAddress,
-            "vote"
-        ).open_some(message = Errors.DEX_CONTRACT_ERROR)
-        arg = sp.pair(sp.pair(param.candidate, param.value), param.voter)
-        sp.transfer(arg, sp.mutez(0), voteHandle)
-    
-    @sp.entry_point(check_no_incoming_transfer=True)
-    def veto(self, param):
-        sp.set_type(param, sp.TRecord(
-            value = sp.TNat,
-            voter = sp.TAddress
-        ).layout(("value", "voter")))
-
-        # Verify the caller is the executor address
-        sp.verify(sp.sender == self.data.executorContractAddress, message = Errors.NOT_EXECUTOR)
-
-        # Call veto() on Quipuswap AMM
-        vetoHandle = sp.contract(
-            sp.TPair(sp.TNat, sp.TAddress),
-            self.data.quipuswapContractAddress,
-            "veto"
-        ).open_some(message = Errors.DEX_CONTRACT_ERROR)
-        arg = sp.pair(param.value,param.voter)
-        sp.transfer(arg, sp.mutez(0), vetoHandle) 
-
-
-    ################################################################
-    # Governance
-    ################################################################
-
-    @sp.entry_point(check_no_incoming_transfer=True)
-    def setDelegate(self, newDelegate):
-        sp.set_type(newDelegate, sp.TOption(sp.TKeyHash))
-
-        # Verify the caller is the governor.
-        sp.verify(sp.sender == self.data.governorContractAddress, message = Errors.NOT_GOVERNOR)
-
-        sp.set_delegate(newDelegate)
-
-    # Governance is timelocked and can always transfer funds.
-    @sp.entry_point(check_no_incoming_transfer=True)
-    def send(self, param):
-        sp.set_type(param, sp.TPair(sp.TMutez, sp.TAddress))
-
-        sp.verify(sp.sender == self.data.governorContractAddress, message = Errors.NOT_GOVERNOR)
-        sp.send(sp.snd(param), sp.fst(param))
-
-    # Governance is timelocked and can always transfer funds.
-    @sp.entry_point(check_no_incoming_transfer=True)
-    def sendAll(self, destination):
-        sp.set_type(destination, sp.TAddress)
-
-        sp.verify(sp.sender == self.data.governorContractAddress, message = Errors.NOT_GOVERNOR)
-        sp.send(destination, sp.balance)        
-
-    # Governance is timelocked and can always transfer funds.
-    @sp.entry_point(check_no_incoming_transfer=True)
-    def sendTokens(self, param):
-        sp.set_type(param, sp.TPair(sp.TNat, sp.TAddress))
-
-        # Verify sender is governor.
-        sp.verify(sp.sender == self.data.governorContractAddress, message = Errors.NOT_GOVERNOR)
-
-        # Destructure parameters.
-        amount = sp.fst(param)
-        destination = sp.snd(param)
+            self.data.state = sp.cast(state, sp.int)
+            self.data.sendAllTokens_destination = sp.cast(sendAllTokens_destination, sp.option[sp.address])
+
+            self.data.metadata = sp.cast(metadata, sp.big_map[sp.string, sp.bytes])
+
+        ################################################################
+        # Public API
+        ################################################################
+
+        # Allow XTZ transfers into the fund.
+        @sp.entrypoint
+        def default(self):
+            pass
+
+        ################################################################
+        # Quipuswap API
+        ################################################################
+
+        @sp.entrypoint
+        def addLiquidity(self, param):
+            assert sp.amount == sp.tez(0)
+            sp.cast(param, sp.record(tokens = sp.nat, mutez = sp.nat).layout(("tokens", "mutez")))
+
+            # Verify the caller is the permissioned executor account.
+            assert sp.sender == self.data.executorContractAddress, Errors.NOT_EXECUTOR
+
+            # Read vwap from Harbinger Normalizer views
+            harbingerVwap = sp.view(
+                "getPrice",
+                self.data.harbingerContractAddress,
+                Constants.ASSET_CODE,
+                sp.pair[
+                    sp.timestamp,  # Time
+                    sp.nat,  # Price
+                ]
+            ).unwrap_some(error = Errors.VWAP_VIEW_ERROR)
+
+            harbingerPrice = sp.snd(harbingerVwap)
+
+            # Calculate input price to compare to Harbinger
+            inputPrice = param.tokens / param.mutez / 1_000_000
+
+            # Calculate percentage difference between Harbinger and function input
+            percentageDifference = abs(harbingerPrice - inputPrice) * 100 / harbingerPrice
+            # Assert that difference is within range of slippageTolerance
+            assert self.data.slippageTolerance > percentageDifference, Errors.SLIPPAGE
+
+            # Assert that the Harbinger data is newer than max data delay
+            dataAge = sp.as_nat(sp.now - sp.fst(harbingerVwap))
+            assert dataAge <= self.data.maxDataDelaySec, Errors.STALE_DATA
+
+            # Approve Quipuswap contract to spend on token contract
+            approveHandle = sp.contract(
+                sp.pair[sp.address, sp.nat], self.data.tokenContractAddress, "approve"
+            ).unwrap_some(error = Errors.APPROVAL)
+            approveArg = (self.data.quipuswapContractAddress, param.tokens)
+            sp.transfer(approveArg, sp.mutez(0), approveHandle)
+
+            # Add the liquidity to the Quipuswap contract.
+            addHandle = sp.contract(
+                sp.nat, self.data.quipuswapContractAddress, "investLiquidity"
+            ).unwrap_some(error = Errors.DEX_CONTRACT_ERROR)
+            sp.transfer(param.tokens, utils.nat_to_mutez(param.mutez), addHandle)
+
+            # Set Quipuswap contract approval back to 0
+            approveArg = (self.data.quipuswapContractAddress, 0)
+            sp.transfer(approveArg, sp.mutez(0), approveHandle)
+
+        @sp.entrypoint
+        def removeLiquidity(self, param):
+            assert sp.amount == sp.tez(0)
+            sp.cast(param, sp.record(
+                min_mutez_out = sp.nat,
+                min_tokens_out = sp.nat,
+                lp_to_remove = sp.nat,
+            ).layout((("min_mutez_out", "min_tokens_out"), "lp_to_remove")))
+
+            # Verify the caller is the governor address
+            assert sp.sender == self.data.governorContractAddress, Errors.NOT_GOVERNOR
+
+            # Remove liquidity from the Quipuswap contract
+            divestHandle = sp.contract(
+                sp.pair[sp.pair[sp.nat, sp.nat], sp.nat],
+                self.data.quipuswapContractAddress,
+                "divestLiquidity",
+            ).unwrap_some(error = Errors.DEX_CONTRACT_ERROR)
+            arg = ((param.min_mutez_out, param.min_tokens_out), param.lp_to_remove)
+            sp.transfer(arg, sp.mutez(0), divestHandle)
+
+        @sp.entrypoint
+        def claimRewards(self):
+            assert sp.amount == sp.tez(0)
+
+            # Verify the caller is the governor address
+            assert sp.sender == self.data.governorContractAddress, Errors.NOT_GOVERNOR
+
+            # Claim rewards from the Quipuswap contract
+            claimHandle = sp.contract(
+                sp.address, self.data.quipuswapContractAddress, "withdrawProfit"
+            ).unwrap_some(error = Errors.DEX_CONTRACT_ERROR)
+            sp.transfer(sp.self_address, sp.mutez(0), claimHandle)
+
+        @sp.entrypoint
+        def vote(self, param):
+            assert sp.amount == sp.tez(0)
+            sp.cast(param, sp.record(
+                candidate = sp.key_hash,
+                value = sp.nat,
+                voter = sp.address,
+            ).layout((("candidate", "value"), "voter")))
+
+            # Verify the caller is the governor address
+            assert sp.sender == self.data.governorContractAddress, Errors.NOT_GOVERNOR
+
+            # Call vote() on Quipuswap AMM
+            voteHandle = sp.contract(
+                sp.pair[sp.pair[sp.key_hash, sp.nat], sp.address],
+                self.data.quipuswapContractAddress,
+                "vote",
+            ).unwrap_some(error = Errors.DEX_CONTRACT_ERROR)
+            arg = ((param.candidate, param.value), param.voter)
+            sp.transfer(arg, sp.mutez(0), voteHandle)
+
+        @sp.entrypoint
+        def veto(self, param):
+            assert sp.amount == sp.tez(0)
+            sp.cast(param, sp.record(
+                value = sp.nat,
+                voter = sp.address,
+            ).layout(("value", "voter")))
+
+            # Verify the caller is the executor address
+            assert sp.sender == self.data.executorContractAddress, Errors.NOT_EXECUTOR
+
+            # Call veto() on Quipuswap AMM
+            vetoHandle = sp.contract(
+                sp.pair[sp.nat, sp.address],
+                self.data.quipuswapContractAddress,
+                "veto",
+            ).unwrap_some(error = Errors.DEX_CONTRACT_ERROR)
+            arg = (param.value, param.voter)
+            sp.transfer(arg, sp.mutez(0), vetoHandle)
+
+        # Call vote() on several Quipuswap pools in one operation.
+        @sp.entrypoint
+        def voteBatch(self, params):
+            assert sp.amount == sp.tez(0)
+            sp.cast(params, sp.list[sp.record(
+                pool = sp.address,
+                candidate = sp.key_hash,
+                value = sp.nat,
+                voter = sp.address,
+            ).layout(("pool", (("candidate", "value"), "voter")))])
+
+            # Verify the caller is the governor address
+            assert sp.sender == self.data.governorContractAddress, Errors.NOT_GOVERNOR
+
+            # Verify the batch fits in an operation
+            assert sp.len(params) <= Constants.MAX_BATCH_SIZE, Errors.BATCH_TOO_LARGE
+
+            # Call vote() on each pool
+            for param in params:
+                voteHandle = sp.contract(
+                    sp.pair[sp.pair[sp.key_hash, sp.nat], sp.address],
+                    param.pool,
+                    "vote",
+                ).unwrap_some(error = Errors.DEX_CONTRACT_ERROR)
+                arg = ((param.candidate, param.value), param.voter)
+                sp.transfer(arg, sp.mutez(0), voteHandle)
+
+        # Call veto() on several Quipuswap pools in one operation.
+        @sp.entrypoint
+        def vetoBatch(self, params):
+            assert sp.amount == sp.tez(0)
+            sp.cast(params, sp.list[sp.record(
+                pool = sp.address,
+                value = sp.nat,
+                voter = sp.address,
+            ).layout(("pool", ("value", "voter")))])
+
+            # Verify the caller is the executor address
+            assert sp.sender == self.data.executorContractAddress, Errors.NOT_EXECUTOR
+
+            # Verify the batch fits in an operation
+            assert sp.len(params) <= Constants.MAX_BATCH_SIZE, Errors.BATCH_TOO_LARGE
+
+            # Call veto() on each pool
+            for param in params:
+                vetoHandle = sp.contract(
+                    sp.pair[sp.nat, sp.address],
+                    param.pool,
+                    "veto",
+                ).unwrap_some(error = Errors.DEX_CONTRACT_ERROR)
+                arg = (param.value, param.voter)
+                sp.transfer(arg, sp.mutez(0), vetoHandle)
+
+        ################################################################
+        # Governance
+        ################################################################
+
+        @sp.entrypoint
+        def setDelegate(self, newDelegate):
+            assert sp.amount == sp.tez(0)
+            sp.cast(newDelegate, sp.option[sp.key_hash])
+
+            # Verify the caller is the governor.
+            assert sp.sender == self.data.governorContractAddress, Errors.NOT_GOVERNOR
+
+            sp.set_delegate(newDelegate)
+
+        # Governance is timelocked and can always transfer funds.
+        @sp.entrypoint
+        def send(self, param):
+            assert sp.amount == sp.tez(0)
+            sp.cast(param, sp.pair[sp.mutez, sp.address])
+
+            assert sp.sender == self.data.governorContractAddress, Errors.NOT_GOVERNOR
+            sp.send(sp.snd(param), sp.fst(param))
+
+        # Governance is timelocked and can always transfer funds.
+        @sp.entrypoint
+        def sendAll(self, destination):
+            assert sp.amount == sp.tez(0)
+            sp.cast(destination, sp.address)
+
+            assert sp.sender == self.data.governorContractAddress, Errors.NOT_GOVERNOR
+            sp.send(destination, sp.balance)
+
+        # Governance is timelocked and can always transfer funds.
+        @sp.entrypoint
+        def sendTokens(self, param):
+            assert sp.amount == sp.tez(0)
+            sp.cast(param, sp.pair[sp.nat, sp.address])
+
+            # Verify sender is governor.
+            assert sp.sender == self.data.governorContractAddress, Errors.NOT_GOVERNOR
+
+            # Destructure parameters.
+            (amount, destination) = param
+
+            # Invoke token contract
+            tokenContractParam = sp.record(
+                from_ = sp.self_address,
+                to_ = destination,
+                value = amount,
+            )
+            contractHandle = sp.contract(
+                FA12_TRANSFER_TYPE, self.data.tokenContractAddress, "transfer"
+            ).unwrap_some(error = Errors.TOKEN_TRANSFER)
+            sp.transfer(tokenContractParam, sp.mutez(0), contractHandle)
+
+        # Transfer the entire balance of kUSD
+        @sp.entrypoint
+        def sendAllTokens(self, destination):
+            assert sp.amount == sp.tez(0)
+            sp.cast(destination, sp.address)
+
+            # Verify sender is governor.
+            assert sp.sender == self.data.governorContractAddress, Errors.NOT_GOVERNOR
+
+            # Verify state is correct.
+            assert self.data.state == IDLE, Errors.BAD_STATE
+
+            # Call token contract to get the balance
+            tokenContractHandle = sp.contract(
+                sp.pair[sp.address, sp.contract[sp.nat]],
+                self.data.tokenContractAddress,
+                "getBalance",
+            ).unwrap_some(error = Errors.BALANCE_REQUEST)
+            tokenContractArg = (
+                sp.self_address,
+                sp.self_entrypoint("sendAllTokens_callback"),
+            )
+            sp.transfer(tokenContractArg, sp.mutez(0), tokenContractHandle)
 
-        # Invoke token contract
-        tokenContractParam = sp.record(
-            to_ = destination,
-            from_ = sp.self_address,
-            value = amount
-        )
-        contractHandle = sp.contract(
-            sp.TRecord(from_ = sp.TAddress, to_ = sp.TAddress, value = sp.TNat).layout(("from_ as from", ("to_ as to", "value"))),
-            self.data.tokenContractAddress,
-            "transfer"
-        ).open_some(message = Errors.TOKEN_TRANSFER)
-        sp.transfer(tokenContractParam, sp.mutez(0), contractHandle)
+            # Save state to state machine
+            self.data.state = WAITING_FOR_TOKEN_BALANCE
+            self.data.sendAllTokens_destination = sp.Some(destination)
 
-    # Transfer the entire balance of kUSD
-    @sp.entry_point(check_no_incoming_transfer=True)
-    def sendAllTokens(self, destination):
-        sp.set_type(destination, sp.TAddress)
+        # Private callback for `sendAllTokens`
+        @sp.entrypoint
+        def sendAllTokens_callback(self, tokenBalance):
+            assert sp.amount == sp.tez(0)
+            sp.cast(tokenBalance, sp.nat)
 
-        # Verify sender is governor.
-        sp.verify(sp.sender == self.data.governorContractAddress, message = Errors.NOT_GOVERNOR)
+            # Verify sender is the token contract
+            assert sp.sender == self.data.tokenContractAddress, Errors.BAD_SENDER
 
-        # Verify state is correct.
-        sp.verify(self.data.state == IDLE, message = Errors.BAD_STATE)
+            # Verify state is correct.
+            assert self.data.state == WAITING_FOR_TOKEN_BALANCE, Errors.BAD_STATE
 
-        # Call token contract to get the balance
-        tokenContractHandle = sp.contract(
-            sp.TPair(
-                sp.TAddress,
-                sp.TContract(sp.TNat),
-            ),
-            self.data.tokenContractAddress,
-            "getBalance"
-        ).open_some(message = Errors.BALANCE_REQUEST)
-        tokenContractArg = (
-            sp.self_address,
-            sp.self_entry_point(entry_point = "sendAllTokens_callback")
-        )
-        sp.transfer(tokenContractArg, sp.mutez(0), tokenContractHandle)
-
-        # Save state to state machine
-        self.data.state = WAITING_FOR_TOKEN_BALANCE
-        self.data.sendAllTokens_destination = sp.some(destination)      
-
-    # Private callback for `sendAllTokens`
-    @sp.entry_point(check_no_incoming_transfer=True)
-    def sendAllTokens_callback(self, tokenBalance):
-        sp.set_type(tokenBalance, sp.TNat)
-
-        # Verify sender is the token contract
-        sp.verify(sp.sender == self.data.tokenContractAddress, message = Errors.BAD_SENDER)
-
-        # Verify state is correct.
-        sp.verify(self.data.state == WAITING_FOR_TOKEN_BALANCE, message = Errors.BAD_STATE)
-
-        # Unwrap saved parameters.
-        destination = self.data.sendAllTokens_destination.open_some()
-
-        # Invoke token contract
-        tokenContractParam = sp.record(
-            to_ = destination,
-            from_ = sp.self_address,
-            value = tokenBalance
-        )
-        contractHandle = sp.contract(
-            sp.TRecord(from_ = sp.TAddress, to_ = sp.TAddress, value = sp.TNat).layout(("from_ as from", ("to_ as to", "value"))),
-            self.data.tokenContractAddress,
-            "transfer"
-        ).open_some(message = Errors.TOKEN_TRANSFER)
-        sp.transfer(tokenContractParam, sp.mutez(0), contractHandle)
-
-        # Reset state
-        self.data.state = IDLE
-        self.data.sendAllTokens_destination = sp.none      
-
-    # Rescue FA1.2 Tokens
-    @sp.entry_point(check_no_incoming_transfer=True)
-    def rescueFA12(self, params):
-        sp.set_type(params, sp.TRecord(
-            tokenContractAddress = sp.TAddress,
-            amount = sp.TNat,
-            destination = sp.TAddress,
-        ).layout(("tokenContractAddress", ("amount", "destination"))))
-
-        # Verify sender is governor.
-        sp.verify(sp.sender == self.data.governorContractAddress, message = Errors.NOT_GOVERNOR)
-
-        # Transfer the tokens
-        handle = sp.contract(
-            sp.TRecord(
-                from_ = sp.TAddress,
-                to_ = sp.TAddress, 
-                value = sp.TNat
-            ).layout(("from_ as from", ("to_ as to", "value"))),
-            params.tokenContractAddress,
-            "transfer"
-        ).open_some(message = Errors.TOKEN_TRANSFER)
-        arg = sp.record(from_ = sp.self_address, to_ = params.destination, value = params.amount)
-        sp.transfer(arg, sp.mutez(0), handle)
-
-    # Rescue FA2 tokens
-    @sp.entry_point(check_no_incoming_transfer=True)
-    def rescueFA2(self, params):
-        sp.set_type(params, sp.TRecord(
-            tokenContractAddress = sp.TAddress,
-            tokenId = sp.TNat,
-            amount = sp.TNat,
-            destination = sp.TAddress,
-        ).layout(("tokenContractAddress", ("tokenId", ("amount", "destination")))))
-
-        # Verify sender is governor.
-        sp.verify(sp.sender == self.data.governorContractAddress, message = Errors.NOT_GOVERNOR)
-
-        # Transfer the tokens
-        handle = sp.contract(
-            sp.TList(
-                sp.TRecord(
-                    from_ = sp.TAddress,
-                    txs = sp.TList(
-                        sp.TRecord(
-                            amount = sp.TNat,
-                            to_ = sp.TAddress, 
-                            token_id = sp.TNat,
-                        ).layout(("to_", ("token_id", "amount")))
-                    )
-                ).layout(("from_", "txs"))
-            ),
-            params.tokenContractAddress,
-            "transfer"
-        ).open_some(message = Errors.TOKEN_TRANSFER)
+            # Unwrap saved parameters.
+            destination = self.data.sendAllTokens_destination.unwrap_some()
 
-        arg = [
-            sp.record(
-            from_ = sp.self_address,
-            txs = [
+            # Invoke token contract
+            tokenContractParam = sp.record(
+                from_ = sp.self_address,
+                to_ = destination,
+                value = tokenBalance,
+            )
+            contractHandle = sp.contract(
+                FA12_TRANSFER_TYPE, self.data.tokenContractAddress, "transfer"
+            ).unwrap_some(error = Errors.TOKEN_TRANSFER)
+            sp.transfer(tokenContractParam, sp.mutez(0), contractHandle)
+
+            # Reset state
+            self.data.state = IDLE
+            self.data.sendAllTokens_destination = None
+
+        # Rescue FA1.2 Tokens
+        @sp.entrypoint
+        def rescueFA12(self, params):
+            assert sp.amount == sp.tez(0)
+            sp.cast(params, sp.record(
+                tokenContractAddress = sp.address,
+                amount = sp.nat,
+                destination = sp.address,
+            ).layout(("tokenContractAddress", ("amount", "destination"))))
+
+            # Verify sender is governor.
+            assert sp.sender == self.data.governorContractAddress, Errors.NOT_GOVERNOR
+
+            # Transfer the tokens
+            handle = sp.contract(
+                FA12_TRANSFER_TYPE, params.tokenContractAddress, "transfer"
+            ).unwrap_some(error = Errors.TOKEN_TRANSFER)
+            arg = sp.record(from_ = sp.self_address, to_ = params.destination, value = params.amount)
+            sp.transfer(arg, sp.mutez(0), handle)
+
+        # Rescue FA2 tokens
+        @sp.entrypoint
+        def rescueFA2(self, params):
+            assert sp.amount == sp.tez(0)
+            sp.cast(params, sp.record(
+                tokenContractAddress = sp.address,
+                tokenId = sp.nat,
+                amount = sp.nat,
+                destination = sp.address,
+            ).layout(("tokenContractAddress", ("tokenId", ("amount", "destination")))))
+
+            # Verify sender is governor.
+            assert sp.sender == self.data.governorContractAddress, Errors.NOT_GOVERNOR
+
+            # Transfer the tokens
+            handle = sp.contract(
+                sp.list[
+                    sp.record(
+                        from_ = sp.address,
+                        txs = sp.list[
+                            sp.record(
+                                amount = sp.nat,
+                                to_ = sp.address,
+                                token_id = sp.nat,
+                            ).layout(("to_", ("token_id", "amount")))
+                        ],
+                    ).layout(("from_", "txs"))
+                ],
+                params.tokenContractAddress,
+                "transfer",
+            ).unwrap_some(error = Errors.TOKEN_TRANSFER)
+
+            arg = [
                 sp.record(
-                    amount = params.amount,
-                    to_ = params.destination,
-                    token_id = params.tokenId
+                    from_ = sp.self_address,
+                    txs = [
+                        sp.record(
+                            amount = params.amount,
+                            to_ = params.destination,
+                            token_id = params.tokenId,
+                        )
+                    ],
                 )
             ]
+            sp.transfer(arg, sp.mutez(0), handle)
+
+        # Update the governor contract.
+        @sp.entrypoint
+        def setGovernorContract(self, newGovernorContractAddress):
+            assert sp.amount == sp.tez(0)
+            sp.cast(newGovernorContractAddress, sp.address)
+
+            assert sp.sender == self.data.governorContractAddress, Errors.NOT_GOVERNOR
+            self.data.governorContractAddress = newGovernorContractAddress
+
+        # Update the executor contract.
+        @sp.entrypoint
+        def setExecutorContract(self, newExecutorContractAddress):
+            assert sp.amount == sp.tez(0)
+            sp.cast(newExecutorContractAddress, sp.address)
+
+            assert sp.sender == self.data.governorContractAddress, Errors.NOT_GOVERNOR
+            self.data.executorContractAddress = newExecutorContractAddress
+
+        # Set slippage tolerance (in percent)
+        @sp.entrypoint
+        def setSlippageTolerance(self, newSlippageTolerance):
+            assert sp.amount == sp.tez(0)
+            sp.cast(newSlippageTolerance, sp.nat)
+
+            assert sp.sender == self.data.governorContractAddress, Errors.NOT_GOVERNOR
+            self.data.slippageTolerance = newSlippageTolerance
+
+        # Set maximum oracle data delay in seconds
+        @sp.entrypoint
+        def setMaxDataDelaySec(self, newMaxDataDelaySec):
+            assert sp.amount == sp.tez(0)
+            sp.cast(newMaxDataDelaySec, sp.nat)
+
+            assert sp.sender == self.data.governorContractAddress, Errors.NOT_GOVERNOR
+            self.data.maxDataDelaySec = newMaxDataDelaySec
+
+        # Update the harbinger normalizer contract.
+        @sp.entrypoint
+        def setHarbingerContract(self, newHarbingerContractAddress):
+            assert sp.amount == sp.tez(0)
+            sp.cast(newHarbingerContractAddress, sp.address)
+
+            assert sp.sender == self.data.governorContractAddress, Errors.NOT_GOVERNOR
+            self.data.harbingerContractAddress = newHarbingerContractAddress
+
+        ################################################################
+        # Views
+        ################################################################
+
+        # The settings and state of the fund in one call (TZIP-16 off-chain view).
+        @sp.offchain_view()
+        def getConfig(self):
+            return sp.record(
+                governorContractAddress = self.data.governorContractAddress,
+                executorContractAddress = self.data.executorContractAddress,
+                tokenContractAddress = self.data.tokenContractAddress,
+                quipuswapContractAddress = self.data.quipuswapContractAddress,
+                harbingerContractAddress = self.data.harbingerContractAddress,
+                slippageTolerance = self.data.slippageTolerance,
+                maxDataDelaySec = self.data.maxDataDelaySec,
+                state = self.data.state,
             )
-        ]
-        sp.transfer(arg, sp.mutez(0), handle)                
-
-    # Update the governor contract.
-    @sp.entry_point(check_no_incoming_transfer=True)
-    def setGovernorContract(self, newGovernorContractAddress):
-        sp.set_type(newGovernorContractAddress, sp.TAddress)
-
-        sp.verify(sp.sender == self.data.governorContractAddress, message = Errors.NOT_GOVERNOR)
-        self.data.governorContractAddress = newGovernorContractAddress
-
-    # Update the executor contract.
-    @sp.entry_point(check_no_incoming_transfer=True)
-    def setExecutorContract(self, newExecutorContractAddress):
-        sp.set_type(newExecutorContractAddress, sp.TAddress)
-
-        sp.verify(sp.sender == self.data.governorContractAddress, message = Errors.NOT_GOVERNOR)
-        self.data.executorContractAddress = newExecutorContractAddress
-    
-    # Set slippage tolerance (in percent)
-    @sp.entry_point(check_no_incoming_transfer=True)
-    def setSlippageTolerance(self, newSlippageTolerance):
-        sp.set_type(newSlippageTolerance, sp.TNat)
 
-        sp.verify(sp.sender == self.data.governorContractAddress, message = Errors.NOT_GOVERNOR)
-        self.data.slippageTolerance = newSlippageTolerance
-
-    # Set maximum oracle data delay in seconds
-    @sp.entry_point(check_no_incoming_transfer=True)
-    def setMaxDataDelaySec(self, newMaxDataDelaySec):
-        sp.set_type(newMaxDataDelaySec, sp.TNat)
-
-        sp.verify(sp.sender == self.data.governorContractAddress, message = Errors.NOT_GOVERNOR)
-        self.data.maxDataDelaySec = newMaxDataDelaySec
-
-    # Update the harbinger normalizer contract.
-    @sp.entry_point(check_no_incoming_transfer=True)
-    def setHarbingerContract(self, newHarbingerContractAddress):
-        sp.set_type(newHarbingerContractAddress, sp.TAddress)
-
-        sp.verify(sp.sender == self.data.governorContractAddress, message = Errors.NOT_GOVERNOR)
-        self.data.harbingerContractAddress = newHarbingerContractAddress
+# A LiquidityFundContract with the deployment settings, overridden by the keyword arguments.
+def fundContract(
+    governorContractAddress = Addresses.GOVERNOR_ADDRESS,
+    executorContractAddress = Addresses.EXECUTOR_ADDRESS,
+    tokenContractAddress = Addresses.TOKEN_ADDRESS,
+    quipuswapContractAddress = Addresses.QUIPUSWAP_ADDRESS,
+    harbingerContractAddress = Addresses.HARBINGER_VWAP_ADDRESS,
+
+    slippageTolerance = 5, # 5%
+    maxDataDelaySec = 60 * 5, # 5 minutes
+
+    state = 0, # IDLE
+    sendAllTokens_destination = None,
+):
+    return proxy.LiquidityFundContract(
+        governorContractAddress = governorContractAddress,
+        executorContractAddress = executorContractAddress,
+        tokenContractAddress = tokenContractAddress,
+        quipuswapContractAddress = quipuswapContractAddress,
+        harbingerContractAddress = harbingerContractAddress,
+        slippageTolerance = slippageTolerance,
+        maxDataDelaySec = maxDataDelaySec,
+        state = state,
+        sendAllTokens_destination = sendAllTokens_destination,
+        metadata = sp.scenario_utils.metadata_of_url(FUND_METADATA_URL),
+    )
+
+# Descriptions of the off-chain views in the TZIP-16 metadata.
+VIEW_DESCRIPTIONS = {
+    "getConfig": "The settings and state of the fund.",
+}
 
 # Only run tests if this file is main.
 if __name__ == "__main__":
+    from test_helpers.dummy_contract import dummyContract
+    from test_helpers.fa12 import fa12
+    from test_helpers.kusd_token import kusdToken, kusdTokenContract
+    from test_helpers.fake_harbinger_normalizer import fakeHarbinger
+    from test_helpers.fake_quipuswap import fakeQuipuswap
+    from test_helpers.fake_replay_oracle import fakeReplayOracle, replayOracle
+    from test_helpers.harbinger_vwap_normalizer import harbingerVwapNormalizer
+    from test_helpers.slim_fa2 import slimFa2
+    import test_helpers.fa2 as fullFa2
+
+    # The modules the scenarios use.
+    MODULES = [
+        proxy,
+        dummyContract,
+        fa12,
+        kusdToken,
+        fakeHarbinger,
+        fakeQuipuswap,
+        fakeReplayOracle,
+        harbingerVwapNormalizer,
+        slimFa2,
+    ]
+
+    @sp.add_test()
+    def compilation():
+        scenario = sp.test_scenario("liquidity-fund", proxy)
+        # Failures without an error code fail with unit rather than a message.
+        scenario.add_flag("exceptions", "default-unit")
+        fund = fundContract()
+        scenario += fund
 
-    # ################################################################
-    # ################################################################
-    # # Tests
-    # ################################################################
-    # ################################################################
+        # Write the TZIP-16 metadata next to the compiled contract, to be pinned at FUND_METADATA_URL.
+        metadata = sp.create_tzip16_metadata(
+            name = "Quipuswap Liquidity Fund",
+            description = "Holds kUSD and XTZ and provides liquidity to Quipuswap on behalf of governance.",
+            interfaces = ["TZIP-016"],
+            offchain_views = fund.get_offchain_views(),
+        )
+        for view in metadata["views"]:
+            view["description"] = VIEW_DESCRIPTIONS[view["name"]]
+            for implementation in view["implementations"]:
+                # TZIP-16 leaves out the parameter of a view which takes none.
+                if implementation["michelsonStorageView"]["parameter"] is None:
+                    del implementation["michelsonStorageView"]["parameter"]
+        with open(os.path.join("liquidity-fund", "metadata.json"), "w") as file:
+            json.dump(metadata, file, indent = 2)
+            file.write("\n")
 
-    DummyContract = sp.io.import_script_from_url("file:test-helpers/dummy-contract.py")
-    FA12 = sp.io.import_script_from_url("file:test-helpers/fa12.py")
-    FA2 = sp.io.import_script_from_url("file:test-helpers/fa2.py")
-    Token = sp.io.import_script_from_url("file:test-helpers/token.py")
-    FakeQuipuswap = sp.io.import_script_from_url("file:test-helpers/fake-quipuswap.py")
-    FakeHarbinger = sp.io.import_script_from_url("file:test-helpers/fake-harbinger-normalizer.py")
+    ################################################################
+    ################################################################
+    # Tests
+    ################################################################
+    ################################################################
 
     ################################################################
     # default
     ################################################################
 
-    @sp.add_test(name="default - can receive funds")
+    @sp.add_test()
     def test():
-      # GIVEN a LiquidityFund contract
-      scenario = sp.test_scenario()
+        # GIVEN a LiquidityFund contract
+        scenario = sp.test_scenario("default - can receive funds", MODULES)
 
-      fund = LiquidityFundContract()
-      scenario += fund
+        fund = fundContract()
+        scenario += fund
 
-      # WHEN the default entry point is called
-      amount = sp.mutez(1)
-      scenario += fund.default(sp.unit).run(
-        amount = amount,
-      )
+        # WHEN the default entry point is called
+        amount = sp.mutez(1)
+        fund.default(_amount = amount)
 
-      # THEN the funds are accepted.
-      scenario.verify(fund.balance == amount)
+        # THEN the funds are accepted.
+        scenario.verify(fund.balance == amount)
 
     ################################################################
     # addLiquidity
     ################################################################
-    @sp.add_test(name="addLiquidity - fails when not called by executor")
+
+    @sp.add_test()
     def test():
         # GIVEN a LiquidityFund with an executor
-        scenario = sp.test_scenario()
+        scenario = sp.test_scenario("addLiquidity - fails when not called by executor", MODULES)
         executor = Addresses.EXECUTOR_ADDRESS
 
-        fund = LiquidityFundContract(
+        fund = fundContract(
             executorContractAddress = executor
         )
         scenario += fund
 
         # WHEN addLiquidity is called by someone other than the executor THEN the invocation fails.
-        tokens = 2 * Constants.PRECISION
+        tokens = 2 * PRECISION
         mutez = 1000000
         notExecutor = Addresses.NULL_ADDRESS
-        scenario += fund.addLiquidity(mutez=mutez,tokens=tokens).run(
-            sender = notExecutor,
-            valid = False
-        )
+        fund.addLiquidity(sp.record(tokens = tokens, mutez = mutez), _sender = notExecutor, _valid = False)
 
-    @sp.add_test(name="addLiquidity - fails when oracle data is stale")
+    @sp.add_test()
     def test():
-        
+
         # GIVEN a moment in time
-        scenario = sp.test_scenario()
+        scenario = sp.test_scenario("addLiquidity - fails when oracle data is stale", MODULES)
         currentTime = sp.timestamp(1000)
         delay = sp.nat(60)
-        
+
         # AND a Harbinger Normalizer contract with timestamp older than (current time - max delay - 1)
-        normalizer = FakeHarbinger.FakeHarbingerContract(
+        normalizer = fakeHarbinger.FakeHarbingerContract(
             harbingerUpdateTime = sp.timestamp(939), # currentTime - delay - 1
             harbingerValue = sp.nat(2000000))
         scenario += normalizer
 
         # AND a LiquidityFund with an executor and max data delay of 60 seconds
-        
+
         executor = Addresses.EXECUTOR_ADDRESS
 
 
-        fund = LiquidityFundContract(
+        fund = fundContract(
             executorContractAddress = executor,
             harbingerContractAddress = normalizer.address,
             slippageTolerance = 5,
@@ -509,78 +650,66 @@ if __name__ == "__main__":
         scenario += fund
 
         # WHEN addLiquidity is called by the executor THEN the invocation fails.
-        tokens = 2 * Constants.PRECISION
+        tokens = 2 * PRECISION
         mutez = 1000000
-        scenario += fund.addLiquidity(mutez=mutez,tokens=tokens).run(
-            sender = executor,
-            now = currentTime,
-            valid = False,
-            exception = Errors.STALE_DATA
-        )    
+        fund.addLiquidity(sp.record(tokens = tokens, mutez = mutez), _sender = executor, _now = currentTime, _valid = False, _exception = Errors.STALE_DATA)
 
-
-    @sp.add_test(name="addLiquidity - fails when input ratio is outside of bounds")
+    @sp.add_test()
     def test():
-        
+
         # GIVEN a moment in time
-        scenario = sp.test_scenario()
+        scenario = sp.test_scenario("addLiquidity - fails when input ratio is outside of bounds", MODULES)
         currentTime = sp.timestamp(1000)
         delay = sp.nat(60)
-        
+
         # AND a Harbinger Normalizer contract with current timestamp and price of $5.00
-        normalizer = FakeHarbinger.FakeHarbingerContract(
+        normalizer = fakeHarbinger.FakeHarbingerContract(
             harbingerUpdateTime = currentTime,
             harbingerValue = sp.nat(5000000))
         scenario += normalizer
 
         # AND a LiquidityFund with a slippageTolerance of 5%
         executor = Addresses.EXECUTOR_ADDRESS
-        fund = LiquidityFundContract(
+        fund = fundContract(
             harbingerContractAddress = normalizer.address,
             slippageTolerance = 5
         )
 
         scenario += fund
 
-        # WHEN addLiquidity is called by the executor with a price of $2.00 THEN the invocation fails.       
-        tokens = 2 * Constants.PRECISION
+        # WHEN addLiquidity is called by the executor with a price of $2.00 THEN the invocation fails.
+        tokens = 2 * PRECISION
         mutez = 1000000
-        scenario += fund.addLiquidity(mutez=mutez,tokens=tokens).run(
-            sender = executor,
-            now = currentTime,
-            valid = False,
-            exception = Errors.SLIPPAGE
-        )
+        fund.addLiquidity(sp.record(tokens = tokens, mutez = mutez), _sender = executor, _now = currentTime, _valid = False, _exception = Errors.SLIPPAGE)
 
-    @sp.add_test(name="addLiquidity - calls the Quipuswap AMM when input ratio is within bounds")
+    @sp.add_test()
     def test():
-        
+
         # GIVEN a moment in time
-        scenario = sp.test_scenario()
+        scenario = sp.test_scenario("addLiquidity - calls the Quipuswap AMM when input ratio is within bounds", MODULES)
         currentTime = sp.timestamp(1000)
         delay = sp.nat(60)
-        
+
         # AND a Harbinger Normalizer contract with current timestamp and price of $2.00
-        normalizer = FakeHarbinger.FakeHarbingerContract(
+        normalizer = fakeHarbinger.FakeHarbingerContract(
             harbingerUpdateTime = currentTime,
             harbingerValue = sp.nat(2000000))
         scenario += normalizer
-    
+
         # AND a Token contract.
         governorAddress = Addresses.GOVERNOR_ADDRESS
-        token = Token.FA12(
-          admin = governorAddress
-        )
+        token = kusdTokenContract(admin = governorAddress)
         scenario += token
 
         # AND a Quipuswap AMM contract
-        quipuswap = FakeQuipuswap.FakeQuipuswapContract()
+        quipuswap = fakeQuipuswap.FakeQuipuswapContract()
         scenario += quipuswap
 
         # AND a LiquidityFund with a slippageTolerance of 5%,a balance of 1000000 mutez, and an executor.
         balance = sp.mutez(1000000)
         executor = Addresses.EXECUTOR_ADDRESS
-        fund = LiquidityFundContract(
+        fund = fundContract(
+            tokenContractAddress = token.address,
             harbingerContractAddress = normalizer.address,
             quipuswapContractAddress = quipuswap.address,
             executorContractAddress = executor,
@@ -590,58 +719,294 @@ if __name__ == "__main__":
         scenario += fund
 
         # AND the fund has $2 of tokens.
-        fundTokens = 2 * Constants.PRECISION 
+        fundTokens = 2 * PRECISION
         mintForFundParam = sp.record(address = fund.address, value = fundTokens)
-        scenario += token.mint(mintForFundParam).run(
-          sender = governorAddress
-        )
+        token.mint(mintForFundParam, _sender = governorAddress)
 
         # WHEN addLiquidity is called by the executor with a price of $2.00 THEN the invocation succeeds.
-        
-        tokens = 2 * Constants.PRECISION
+
+        tokens = 2 * PRECISION
         mutez = 1000000
 
-        scenario += fund.addLiquidity(mutez=mutez,tokens=tokens).run(
-            sender = executor,
-            now = currentTime,
-            valid = True
-        )
+        fund.addLiquidity(sp.record(tokens = tokens, mutez = mutez), _sender = executor, _now = currentTime, _valid = True)
         # Verify parameters were sent
         scenario.verify(quipuswap.balance == sp.mutez(mutez))
         scenario.verify(quipuswap.data.amountInvested == tokens)
 
+    @sp.add_test()
+    def test():
+
+        # GIVEN a price path sampled every 60 seconds: $2.00, $2.05, then $5.00
+        scenario = sp.test_scenario("addLiquidity - checks each step of a replayed price path", MODULES)
+        startTime = 1000
+        interval = sp.nat(60)
+        normalizer = replayOracle(
+            series = {
+                ASSET_CODE: [sp.nat(2000000), sp.nat(2050000), sp.nat(5000000)]
+            },
+            startTime = sp.timestamp(startTime),
+            intervalSec = interval
+        )
+        scenario += normalizer
+
+        # AND a Token contract.
+        governorAddress = Addresses.GOVERNOR_ADDRESS
+        token = kusdTokenContract(admin = governorAddress)
+        scenario += token
+
+        # AND a Quipuswap AMM contract
+        quipuswap = fakeQuipuswap.FakeQuipuswapContract()
+        scenario += quipuswap
+
+        # AND a LiquidityFund with a slippageTolerance of 5%, a max data delay of 60 seconds and an executor.
+        executor = Addresses.EXECUTOR_ADDRESS
+        fund = fundContract(
+            tokenContractAddress = token.address,
+            harbingerContractAddress = normalizer.address,
+            quipuswapContractAddress = quipuswap.address,
+            executorContractAddress = executor,
+            slippageTolerance = 5,
+            maxDataDelaySec = interval
+        )
+        fund.set_initial_balance(sp.mutez(3000000))
+        scenario += fund
+
+        # AND the fund has $6 of tokens.
+        fundTokens = 6 * PRECISION
+        token.mint(sp.record(address = fund.address, value = fundTokens), _sender = governorAddress)
+
+        # WHEN addLiquidity is called at a price of $2.00 during the first two samples THEN the invocations succeed.
+        tokens = 2 * PRECISION
+        mutez = 1000000
+        fund.addLiquidity(sp.record(tokens = tokens, mutez = mutez), _sender = executor, _now = sp.timestamp(startTime + 30))
+        fund.addLiquidity(sp.record(tokens = tokens, mutez = mutez), _sender = executor, _now = sp.timestamp(startTime + 90))
+
+        # WHEN addLiquidity is called at a price of $2.00 during the $5.00 sample THEN the invocation fails.
+        fund.addLiquidity(sp.record(tokens = tokens, mutez = mutez), _sender = executor, _now = sp.timestamp(startTime + 150), _valid = False, _exception = Errors.SLIPPAGE)
+
+        # WHEN addLiquidity is called more than 60 seconds after the last sample THEN the invocation fails.
+        fund.addLiquidity(sp.record(tokens = 5 * PRECISION, mutez = mutez), _sender = executor, _now = sp.timestamp(startTime + 181), _valid = False, _exception = Errors.STALE_DATA)
+
+        # THEN only the first two invocations reached the Quipuswap AMM.
+        scenario.verify(quipuswap.balance == sp.mutez(2 * mutez))
+
+    @sp.add_test()
+    def test():
+
+        # GIVEN a Harbinger Normalizer averaging the last 3 candles
+        scenario = sp.test_scenario("addLiquidity - follows a lagging VWAP after a price jump", MODULES)
+        normalizer = harbingerVwapNormalizer.HarbingerVwapNormalizerContract(
+            assetCodes = [ASSET_CODE],
+            numDataPoints = sp.nat(3)
+        )
+        scenario += normalizer
+
+        # AND a Token contract.
+        governorAddress = Addresses.GOVERNOR_ADDRESS
+        token = kusdTokenContract(admin = governorAddress)
+        scenario += token
+
+        # AND a Quipuswap AMM contract
+        quipuswap = fakeQuipuswap.FakeQuipuswapContract()
+        scenario += quipuswap
+
+        # AND a LiquidityFund with a slippageTolerance of 5%, a max data delay of 60 seconds and an executor.
+        executor = Addresses.EXECUTOR_ADDRESS
+        fund = fundContract(
+            tokenContractAddress = token.address,
+            harbingerContractAddress = normalizer.address,
+            quipuswapContractAddress = quipuswap.address,
+            executorContractAddress = executor,
+            slippageTolerance = 5,
+            maxDataDelaySec = 60
+        )
+        fund.set_initial_balance(sp.mutez(3000000))
+        scenario += fund
+
+        # AND the fund has $7 of tokens.
+        token.mint(sp.record(address = fund.address, value = 7 * PRECISION), _sender = governorAddress)
+
+        # AND one minute candles, three at $2.00 then one at $5.00, all with the same volume.
+        startTime = 1000
+        prices = [2000000, 2000000, 2000000, 5000000]
+        for index, price in enumerate(prices):
+            normalizer.update(sp.record(
+                assetCode = ASSET_CODE,
+                start = sp.timestamp(startTime + 60 * index),
+                end = sp.timestamp(startTime + 60 * (index + 1)),
+                open = sp.nat(price),
+                high = sp.nat(price),
+                low = sp.nat(price),
+                close = sp.nat(price),
+                volume = sp.nat(100)
+            ),
+                _now = sp.timestamp(startTime + 60 * (index + 1)),
+            )
+
+        # THEN the VWAP only moved a third of the way to $5.00.
+        lastUpdate = startTime + 60 * len(prices)
+        scenario.verify(normalizer.data.assets[ASSET_CODE].computedPrice == 3000000)
+
+        # WHEN addLiquidity is called at the spot price of $5.00 THEN the invocation fails.
+        mutez = 1000000
+        fund.addLiquidity(sp.record(tokens = 5 * PRECISION, mutez = mutez), _sender = executor, _now = sp.timestamp(lastUpdate), _valid = False, _exception = Errors.SLIPPAGE)
+
+        # WHEN two more candles at $5.00 arrive THEN addLiquidity succeeds at $5.00.
+        for index in range(len(prices), len(prices) + 2):
+            normalizer.update(sp.record(
+                assetCode = ASSET_CODE,
+                start = sp.timestamp(startTime + 60 * index),
+                end = sp.timestamp(startTime + 60 * (index + 1)),
+                open = sp.nat(5000000),
+                high = sp.nat(5000000),
+                low = sp.nat(5000000),
+                close = sp.nat(5000000),
+                volume = sp.nat(100)
+            ),
+                _now = sp.timestamp(startTime + 60 * (index + 1)),
+            )
+        lastUpdate = startTime + 60 * (len(prices) + 2)
+        scenario.verify(normalizer.data.assets[ASSET_CODE].computedPrice == 5000000)
+        fund.addLiquidity(sp.record(tokens = 5 * PRECISION, mutez = mutez), _sender = executor, _now = sp.timestamp(lastUpdate))
+
+        # WHEN addLiquidity is called more than 60 seconds after the last candle THEN the invocation fails.
+        fund.addLiquidity(sp.record(tokens = 5 * PRECISION, mutez = mutez), _sender = executor, _now = sp.timestamp(lastUpdate + 61), _valid = False, _exception = Errors.STALE_DATA)
+
+    @sp.add_test()
+    def test():
+
+        # GIVEN a Harbinger Normalizer contract with a price of $2.00
+        scenario = sp.test_scenario("addLiquidity - deposits both sides into a constant-product pool", MODULES)
+        currentTime = sp.timestamp(1000)
+        normalizer = fakeHarbinger.FakeHarbingerContract(
+            harbingerUpdateTime = currentTime,
+            harbingerValue = sp.nat(2000000))
+        scenario += normalizer
+
+        # AND a Token contract.
+        governorAddress = Addresses.GOVERNOR_ADDRESS
+        token = kusdTokenContract(admin = governorAddress)
+        scenario += token
+
+        # AND a Quipuswap pool holding 10 XTZ and $20 of tokens.
+        tezPool = 10000000
+        tokenPool = 20 * PRECISION
+        quipuswap = fakeQuipuswap.FakeConstantProductQuipuswapContract(
+            tokenAddress = token.address,
+            tezPool = tezPool,
+            tokenPool = tokenPool
+        )
+        quipuswap.set_initial_balance(sp.mutez(tezPool))
+        scenario += quipuswap
+        token.mint(sp.record(address = quipuswap.address, value = tokenPool), _sender = governorAddress)
+
+        # AND a LiquidityFund with $6 of tokens.
+        executor = Addresses.EXECUTOR_ADDRESS
+        fund = fundContract(
+            tokenContractAddress = token.address,
+            harbingerContractAddress = normalizer.address,
+            quipuswapContractAddress = quipuswap.address,
+            executorContractAddress = executor,
+        )
+        fund.set_initial_balance(sp.mutez(3000000))
+        scenario += fund
+
+        fundTokens = 6 * PRECISION
+        token.mint(sp.record(address = fund.address, value = fundTokens), _sender = governorAddress)
+
+        # WHEN addLiquidity is called with 1 XTZ and up to $2.05 of tokens
+        mutez = 1000000
+        fund.addLiquidity(sp.record(tokens = 2050000000000000000, mutez = mutez), _sender = executor, _now = currentTime)
+
+        # THEN the pool took 1 XTZ and the $2.00 of tokens matching its ratio.
+        tokensRequired = 2 * PRECISION
+        scenario.verify(quipuswap.balance == sp.mutez(tezPool + mutez))
+        scenario.verify(quipuswap.data.tezPool == tezPool + mutez)
+        scenario.verify(quipuswap.data.tokenPool == tokenPool + tokensRequired)
+        scenario.verify(token.data.balances[quipuswap.address].balance == tokenPool + tokensRequired)
+        scenario.verify(token.data.balances[fund.address].balance == fundTokens - tokensRequired)
+
+        # AND the pool's allowance was reset.
+        scenario.verify(token.data.balances[fund.address].approvals[quipuswap.address] == 0)
+
+    @sp.add_test()
+    def test():
+
+        # GIVEN a Harbinger Normalizer contract with a price of $2.00
+        scenario = sp.test_scenario("addLiquidity - fails when the pool requires more tokens than offered", MODULES)
+        currentTime = sp.timestamp(1000)
+        normalizer = fakeHarbinger.FakeHarbingerContract(
+            harbingerUpdateTime = currentTime,
+            harbingerValue = sp.nat(2000000))
+        scenario += normalizer
+
+        # AND a Token contract.
+        governorAddress = Addresses.GOVERNOR_ADDRESS
+        token = kusdTokenContract(admin = governorAddress)
+        scenario += token
+
+        # AND a Quipuswap pool whose price has moved to $2.50.
+        tezPool = 10000000
+        tokenPool = 25 * PRECISION
+        quipuswap = fakeQuipuswap.FakeConstantProductQuipuswapContract(
+            tokenAddress = token.address,
+            tezPool = tezPool,
+            tokenPool = tokenPool
+        )
+        quipuswap.set_initial_balance(sp.mutez(tezPool))
+        scenario += quipuswap
+        token.mint(sp.record(address = quipuswap.address, value = tokenPool), _sender = governorAddress)
+
+        # AND a LiquidityFund with $6 of tokens.
+        executor = Addresses.EXECUTOR_ADDRESS
+        fund = fundContract(
+            tokenContractAddress = token.address,
+            harbingerContractAddress = normalizer.address,
+            quipuswapContractAddress = quipuswap.address,
+            executorContractAddress = executor,
+        )
+        fund.set_initial_balance(sp.mutez(3000000))
+        scenario += fund
+
+        fundTokens = 6 * PRECISION
+        token.mint(sp.record(address = fund.address, value = fundTokens), _sender = governorAddress)
+
+        # WHEN addLiquidity is called with 1 XTZ and up to $2.05 of tokens THEN the invocation fails.
+        fund.addLiquidity(sp.record(tokens = 2050000000000000000, mutez = 1000000), _sender = executor, _now = currentTime, _valid = False, _exception = "Dex/low-max-token-in")
+
+        # AND no funds moved.
+        scenario.verify(quipuswap.balance == sp.mutez(tezPool))
+        scenario.verify(token.data.balances[fund.address].balance == fundTokens)
+
     ################################################################
     # removeLiquidity
     ################################################################
-    @sp.add_test(name="removeLiquidity - fails when not called by governor")
 
+    @sp.add_test()
     def test():
         # GIVEN a LiquidityFund with a governor
-        scenario = sp.test_scenario()
+        scenario = sp.test_scenario("removeLiquidity - fails when not called by governor", MODULES)
         governor = Addresses.GOVERNOR_ADDRESS
 
-        fund = LiquidityFundContract(
+        fund = fundContract(
             governorContractAddress = governor
         )
         scenario += fund
 
         # WHEN removeLiquidity is called by someone other than the governor THEN the invocation fails.
-        tokens = 2 * Constants.PRECISION
+        tokens = 2 * PRECISION
         mutez = 1000000
         lp = 100000000
         notGovernor = Addresses.NULL_ADDRESS
-        scenario += fund.removeLiquidity(lp_to_remove=lp,min_mutez_out=mutez,min_tokens_out=tokens).run(
-            sender = notGovernor,
-            valid = False
-        )
+        fund.removeLiquidity(sp.record(min_mutez_out = mutez, min_tokens_out = tokens, lp_to_remove = lp), _sender = notGovernor, _valid = False)
 
-    @sp.add_test(name="removeLiquidity - succeeds when called by governor")
+    @sp.add_test()
     def test():
         # GIVEN a LiquidityFund with a governor
-        scenario = sp.test_scenario()
+        scenario = sp.test_scenario("removeLiquidity - succeeds when called by governor", MODULES)
         governor = Addresses.GOVERNOR_ADDRESS
 
-        fund = LiquidityFundContract(
+        fund = fundContract(
             governorContractAddress = governor
         )
         scenario += fund
@@ -650,60 +1015,52 @@ if __name__ == "__main__":
         tokens = 2000000000000000000
         mutez = 1000000
         lp = 100000000
-        scenario += fund.removeLiquidity(lp_to_remove=lp,min_mutez_out=mutez,min_tokens_out=tokens).run(
-            sender = governor,
-            valid = True
-        )
+        fund.removeLiquidity(sp.record(min_mutez_out = mutez, min_tokens_out = tokens, lp_to_remove = lp), _sender = governor, _valid = True)
 
     ################################################################
     # claimRewards
     ################################################################
 
-    @sp.add_test(name="claimRewards - fails when not called by governor")
+    @sp.add_test()
     def test():
         # GIVEN a LiquidityFund with a governor
-        scenario = sp.test_scenario()
+        scenario = sp.test_scenario("claimRewards - fails when not called by governor", MODULES)
         governor = Addresses.GOVERNOR_ADDRESS
 
-        fund = LiquidityFundContract(
+        fund = fundContract(
             governorContractAddress = governor
         )
         scenario += fund
 
         # WHEN claimRewards is called by someone other than the governor THEN the invocation fails.
         notGovernor = Addresses.NULL_ADDRESS
-        scenario += fund.claimRewards().run(
-            sender = notGovernor,
-            valid = False
-        )
+        fund.claimRewards(_sender = notGovernor, _valid = False)
 
-    @sp.add_test(name="claimRewards - succeeds when called by governor")
+    @sp.add_test()
     def test():
         # GIVEN a LiquidityFund with a governor
-        scenario = sp.test_scenario()
+        scenario = sp.test_scenario("claimRewards - succeeds when called by governor", MODULES)
         governor = Addresses.GOVERNOR_ADDRESS
 
-        fund = LiquidityFundContract(
+        fund = fundContract(
             governorContractAddress = governor
         )
         scenario += fund
 
         # WHEN claimRewards is called by  the governor THEN the invocation succeeds.
-        scenario += fund.claimRewards().run(
-            sender = governor,
-            valid = True
-        )
+        fund.claimRewards(_sender = governor, _valid = True)
 
     ################################################################
     # vote
     ################################################################
-    @sp.add_test(name="vote - fails when not called by governor")
+
+    @sp.add_test()
     def test():
         # GIVEN a LiquidityFund with a governor
-        scenario = sp.test_scenario()
+        scenario = sp.test_scenario("vote - fails when not called by governor", MODULES)
         governor = Addresses.GOVERNOR_ADDRESS
 
-        fund = LiquidityFundContract(
+        fund = fundContract(
             governorContractAddress = governor
         )
         scenario += fund
@@ -714,52 +1071,46 @@ if __name__ == "__main__":
         some_value = sp.nat(1000000)
         self_addr = governor
         param = sp.record(
-            candidate = some_key_hash, 
+            candidate = some_key_hash,
             value = some_value,
             voter = self_addr
             )
-        scenario += fund.vote(param).run(
-            sender = notGovernor,
-            valid = False
-        )
+        fund.vote(param, _sender = notGovernor, _valid = False)
 
-    @sp.add_test(name="vote - succeeds when called by governor")
+    @sp.add_test()
     def test():
         # GIVEN a LiquidityFund with a governor
-        scenario = sp.test_scenario()
+        scenario = sp.test_scenario("vote - succeeds when called by governor", MODULES)
         governor = Addresses.GOVERNOR_ADDRESS
 
-        fund = LiquidityFundContract(
+        fund = fundContract(
             governorContractAddress = governor
         )
         scenario += fund
 
         # WHEN vote is called by the governor THEN the invocation succeeds.
-        
+
         some_key_hash = Addresses.BAKER_KEY_HASH
         some_value = sp.nat(1000000)
         self_addr = governor
         param = sp.record(
-            candidate = some_key_hash, 
+            candidate = some_key_hash,
             value = some_value,
             voter = self_addr
             )
-        scenario += fund.vote(param).run(
-            sender = governor,
-            valid = True
-        )
+        fund.vote(param, _sender = governor, _valid = True)
 
-    @sp.add_test(name="vote - passes correct parameters")
+    @sp.add_test()
     def test():
-        scenario = sp.test_scenario()
+        scenario = sp.test_scenario("vote - passes correct parameters", MODULES)
 
         # GIVEN a Quipuswap AMM contract
-        quipuswap = FakeQuipuswap.FakeQuipuswapContract()
+        quipuswap = fakeQuipuswap.FakeQuipuswapContract()
         scenario += quipuswap
 
         # AND a LiquidityFund with a governor
         governor = Addresses.GOVERNOR_ADDRESS
-        fund = LiquidityFundContract(
+        fund = fundContract(
             governorContractAddress = governor,
             quipuswapContractAddress = quipuswap.address
         )
@@ -769,14 +1120,12 @@ if __name__ == "__main__":
         someValue = sp.nat(1000000)
         selfAddr = governor
         bakerHash = Addresses.BAKER_KEY_HASH
-        param = sp.record( 
+        param = sp.record(
             candidate = bakerHash,
             value = someValue,
             voter = selfAddr
-            )         
-        scenario += fund.vote(param).run(
-            sender = governor,
-        )
+            )
+        fund.vote(param, _sender = governor)
         scenario.verify(quipuswap.data.voteAmount == someValue)
         scenario.verify(quipuswap.data.voteCandidate == bakerHash)
         scenario.verify(quipuswap.data.voteAddress == selfAddr)
@@ -784,13 +1133,14 @@ if __name__ == "__main__":
     ################################################################
     # veto
     ################################################################
-    @sp.add_test(name="veto - fails when not called by executor")
+
+    @sp.add_test()
     def test():
         # GIVEN a LiquidityFund with an executor
-        scenario = sp.test_scenario()
+        scenario = sp.test_scenario("veto - fails when not called by executor", MODULES)
         executor = Addresses.EXECUTOR_ADDRESS
 
-        fund = LiquidityFundContract(
+        fund = fundContract(
             executorContractAddress = executor
         )
         scenario += fund
@@ -799,22 +1149,19 @@ if __name__ == "__main__":
         notExecutor = Addresses.NULL_ADDRESS
         some_value = sp.nat(1000000)
         self_addr = executor
-        param = sp.record( 
+        param = sp.record(
             value = some_value,
             voter = self_addr
-            )                
-        scenario += fund.veto(param).run(
-            sender = notExecutor,
-            valid = False
-        )
+            )
+        fund.veto(param, _sender = notExecutor, _valid = False)
 
-    @sp.add_test(name="veto - succeeds when called by executor")
+    @sp.add_test()
     def test():
         # GIVEN a LiquidityFund with a executor
-        scenario = sp.test_scenario()
+        scenario = sp.test_scenario("veto - succeeds when called by executor", MODULES)
         executor = Addresses.EXECUTOR_ADDRESS
 
-        fund = LiquidityFundContract(
+        fund = fundContract(
             executorContractAddress = executor
         )
         scenario += fund
@@ -822,26 +1169,23 @@ if __name__ == "__main__":
         # WHEN veto is called by  the executor THEN the invocation succeeds.
         some_value = sp.nat(1000000)
         self_addr = executor
-        param = sp.record( 
+        param = sp.record(
             value = some_value,
             voter = self_addr
-            )         
-        scenario += fund.veto(param).run(
-            sender = executor,
-            valid = True
-        )
+            )
+        fund.veto(param, _sender = executor, _valid = True)
 
-    @sp.add_test(name="veto - passes correct parameters")
+    @sp.add_test()
     def test():
-        scenario = sp.test_scenario()
+        scenario = sp.test_scenario("veto - passes correct parameters", MODULES)
 
         # GIVEN a Quipuswap AMM contract
-        quipuswap = FakeQuipuswap.FakeQuipuswapContract()
+        quipuswap = fakeQuipuswap.FakeQuipuswapContract()
         scenario += quipuswap
 
         # AND a LiquidityFund with a executor
         executor = Addresses.EXECUTOR_ADDRESS
-        fund = LiquidityFundContract(
+        fund = fundContract(
             executorContractAddress = executor,
             quipuswapContractAddress = quipuswap.address
         )
@@ -850,950 +1194,1075 @@ if __name__ == "__main__":
         # WHEN veto is called by  the executor THEN the invocation passes parameters to the Quipuswap AMM.
         someValue = sp.nat(1000000)
         selfAddr = executor
-        param = sp.record( 
+        param = sp.record(
             value = someValue,
             voter = selfAddr
-            )         
-        scenario += fund.veto(param).run(
-            sender = executor,
-        )
+            )
+        fund.veto(param, _sender = executor)
         scenario.verify(quipuswap.data.vetoAmount == someValue)
         scenario.verify(quipuswap.data.vetoAddress == selfAddr)
-        
+
     ################################################################
-    # setDelegate
+    # voteBatch
     ################################################################
 
-    @sp.add_test(name="setDelegate - fails when not called by governor")
-    def test():
-      # GIVEN a LiquidityFund without a delegate and a governor.
-      scenario = sp.test_scenario()
-      governor = Addresses.GOVERNOR_ADDRESS
-
-      fund = LiquidityFundContract(
-        governorContractAddress = governor
-      )
-      scenario += fund
-
-      # WHEN setDelegate is called by someone other than the governor THEN the invocation fails.
-      notGovernor = Addresses.NULL_ADDRESS
-      delegate = sp.some(Addresses.BAKER_KEY_HASH)
-      scenario += fund.setDelegate(delegate).run(
-        sender = notGovernor,
-        voting_powers = Addresses.VOTING_POWERS,
-        valid = False
-      )
-
-    @sp.add_test(name="setDelegate - updates delegate")
+    @sp.add_test()
     def test():
-      # GIVEN a LiquidityFund contract without a delegate and a governor.
-      scenario = sp.test_scenario()
-      governor = Addresses.GOVERNOR_ADDRESS
+        scenario = sp.test_scenario("voteBatch - fails when not called by governor", MODULES)
 
-      fund = LiquidityFundContract(
-        governorContractAddress = governor
-      )
-      scenario += fund
-
-      # WHEN setDelegate is called by the governor
-      delegate = sp.some(Addresses.BAKER_KEY_HASH)
-      scenario += fund.setDelegate(delegate).run(
-        sender = governor,
-        voting_powers = Addresses.VOTING_POWERS
-      )
+        # GIVEN a Quipuswap AMM contract
+        quipuswap = fakeQuipuswap.FakeQuipuswapContract()
+        scenario += quipuswap
 
-      # THEN the delegate is updated.
-      scenario.verify(fund.baker.open_some() == delegate.open_some())
+        # AND a LiquidityFund with a governor
+        governor = Addresses.GOVERNOR_ADDRESS
+        fund = fundContract(
+            governorContractAddress = governor
+        )
+        scenario += fund
 
-    ################################################################
-    # send
-    ################################################################
+        # WHEN voteBatch is called by someone other than the governor THEN the invocation fails.
+        param = sp.record(
+            pool = quipuswap.address,
+            candidate = Addresses.BAKER_KEY_HASH,
+            value = sp.nat(1000000),
+            voter = governor
+        )
+        fund.voteBatch([param], _sender = Addresses.NULL_ADDRESS, _valid = False, _exception = Errors.NOT_GOVERNOR)
 
-    @sp.add_test(name="send - succeeds when called by governor")
-    def test():
-      scenario = sp.test_scenario()
-
-      # GIVEN a LiquidityFund contract with some balance
-      balance = sp.mutez(10)
-      governorContractAddress = Addresses.GOVERNOR_ADDRESS
-      fund = LiquidityFundContract(
-        governorContractAddress = governorContractAddress
-      )
-      fund.set_initial_balance(balance)
-      scenario += fund
-
-      # AND a dummy contract to receive funds
-      dummyContract = DummyContract.DummyContract()
-      scenario += dummyContract
-
-      # WHEN send is called
-      param = (balance, dummyContract.address)
-      scenario += fund.send(param).run(
-        sender = governorContractAddress,
-      )
-
-      # THEN the funds are sent.
-      scenario.verify(fund.balance == sp.mutez(0))
-      scenario.verify(dummyContract.balance == balance)
-
-    @sp.add_test(name="send - succeeds when with less than the entire amount")
+    @sp.add_test()
     def test():
-      scenario = sp.test_scenario()
-
-      # GIVEN a LiquidityFund contract with some balance
-      balance = sp.mutez(10)
-      governorContractAddress = Addresses.GOVERNOR_ADDRESS
-      fund = LiquidityFundContract(
-        governorContractAddress = governorContractAddress
-      )
-      fund.set_initial_balance(balance)
-      scenario += fund
-
-      # AND a dummy contract to receive funds
-      dummyContract = DummyContract.DummyContract()
-      scenario += dummyContract
-
-      # WHEN send is called with less than the full amount
-      sendAmount = sp.mutez(2)
-      param = (sendAmount, dummyContract.address)
-      scenario += fund.send(param).run(
-        sender = governorContractAddress,
-      )
-
-      # THEN the funds are sent.
-      scenario.verify(fund.balance == (balance - sendAmount))
-      scenario.verify(dummyContract.balance == sendAmount)        
-
-    @sp.add_test(name="send - fails when not called by governor")
-    def test():
-      scenario = sp.test_scenario()
-
-      # GIVEN a LiquidityFund contract
-      balance = sp.mutez(10)
-      governorContractAddress = Addresses.GOVERNOR_ADDRESS
-      fund = LiquidityFundContract(
-        governorContractAddress = governorContractAddress
-      )
-      fund.set_initial_balance(balance)
-      scenario += fund
-
-      # WHEN send is called by someone who isn't the governor THEN the call fails
-      notGovernor = Addresses.NULL_ADDRESS
-      param = (balance, notGovernor)
-      scenario += fund.send(param).run(
-        sender = notGovernor,
-        valid = False,
-        exception = Errors.NOT_GOVERNOR
-      )    
-
-    ################################################################
-    # sendAll
-    ################################################################
+        scenario = sp.test_scenario("voteBatch - votes in every pool", MODULES)
 
-    @sp.add_test(name="sendAll - succeeds when called by governor")
-    def test():
-      scenario = sp.test_scenario()
-
-      # GIVEN a LiquidityFund contract with some balance
-      balance = sp.mutez(10)
-      governorContractAddress = Addresses.GOVERNOR_ADDRESS
-      fund = LiquidityFundContract(
-        governorContractAddress = governorContractAddress
-      )
-      fund.set_initial_balance(balance)
-      scenario += fund
-
-      # AND a dummy contract to receive funds
-      dummyContract = DummyContract.DummyContract()
-      scenario += dummyContract
-
-      # WHEN sendAll is called
-      scenario += fund.sendAll(dummyContract.address).run(
-        sender = governorContractAddress,
-      )
-
-      # THEN the funds are sent.
-      scenario.verify(fund.balance == sp.mutez(0))
-      scenario.verify(dummyContract.balance == balance)
-     
-    @sp.add_test(name="sendAll - fails when not called by governor")
-    def test():
-      scenario = sp.test_scenario()
-
-      # GIVEN a LiquidityFund contract
-      balance = sp.mutez(10)
-      governorContractAddress = Addresses.GOVERNOR_ADDRESS
-      fund = LiquidityFundContract(
-        governorContractAddress = governorContractAddress
-      )
-      fund.set_initial_balance(balance)
-      scenario += fund
-
-      # WHEN send is called by someone who isn't the governor THEN the call fails
-      notGovernor = Addresses.NULL_ADDRESS
-      scenario += fund.sendAll(notGovernor).run(
-        sender = notGovernor,
-        valid = False,
-        exception = Errors.NOT_GOVERNOR
-      )    
+        # GIVEN two Quipuswap AMM contracts
+        firstPool = fakeQuipuswap.FakeQuipuswapContract()
+        scenario += firstPool
+        secondPool = fakeQuipuswap.FakeQuipuswapContract()
+        scenario += secondPool
 
-    ################################################################
-    # sendTokens
-    ################################################################
+        # AND a LiquidityFund with a governor
+        governor = Addresses.GOVERNOR_ADDRESS
+        fund = fundContract(
+            governorContractAddress = governor
+        )
+        scenario += fund
 
-    @sp.add_test(name="sendTokens - succeeds when called by governor")
-    def test():
-      scenario = sp.test_scenario()
-
-      # GIVEN a Token contract.
-      governorAddress = Addresses.GOVERNOR_ADDRESS
-      token = Token.FA12(
-        admin = governorAddress
-      )
-      scenario += token
-
-      # AND a LiquidityFund contract
-      fund = LiquidityFundContract(
-        governorContractAddress = governorAddress,
-        tokenContractAddress = token.address
-      )
-      scenario += fund
-
-      # And a dummy contract to send to.
-      dummyContract = DummyContract.DummyContract()
-      scenario += dummyContract
-
-      # AND the fund has $1000 of tokens.
-      fundTokens = 1000 * Constants.PRECISION 
-      mintForFundParam = sp.record(address = fund.address, value = fundTokens)
-      scenario += token.mint(mintForFundParam).run(
-        sender = governorAddress
-      )
-
-      # WHEN sendTokens is called
-      amount = sp.nat(200)
-      param = (amount, dummyContract.address)
-      scenario += fund.sendTokens(param).run(
-        sender = governorAddress,
-      )
-
-      # THEN the fund is debited tokens
-      scenario.verify(token.data.balances[fund.address].balance == sp.as_nat(fundTokens - amount))
-
-      # AND the receiver was credited the tokens.
-      scenario.verify(token.data.balances[dummyContract.address].balance == amount)
-
-    @sp.add_test(name="sendTokens - fails when not called by governor")
-    def test():
-      scenario = sp.test_scenario()
-
-      # GIVEN a Token contract.
-      governorAddress = Addresses.GOVERNOR_ADDRESS
-      token = Token.FA12(
-        admin = governorAddress
-      )
-      scenario += token
-
-      # AND a LiquidityFund contract
-      fund = LiquidityFundContract(
-        governorContractAddress = governorAddress,
-        tokenContractAddress = token.address
-      )
-      scenario += fund
-
-      # AND the fund has $1000 of tokens.
-      fundTokens = 1000 * Constants.PRECISION 
-      mintForFundParam = sp.record(address = fund.address, value = fundTokens)
-      scenario += token.mint(mintForFundParam).run(
-        sender = governorAddress
-      )
-
-      # WHEN sendTokens is called by someone who isn't the governor THEN the call fails.
-      notGovernor = Addresses.NULL_ADDRESS
-      amount = sp.nat(200)
-      param = (amount, Addresses.ROTATED_ADDRESS)
-      scenario += fund.sendTokens(param).run(
-        sender = notGovernor,
-        valid = False
-      )
+        # WHEN voteBatch is called by the governor with an entry for each pool
+        firstValue = sp.nat(1000000)
+        secondValue = sp.nat(2000000)
+        fund.voteBatch([
+            sp.record(
+                pool = firstPool.address,
+                candidate = Addresses.BAKER_KEY_HASH,
+                value = firstValue,
+                voter = governor
+            ),
+            sp.record(
+                pool = secondPool.address,
+                candidate = Addresses.BAKER_KEY_HASH,
+                value = secondValue,
+                voter = Addresses.ALICE_ADDRESS
+            ),
+        ],
+            _sender = governor,
+        )
 
-    ################################################################
-    # setGovernorContract
-    ################################################################
+        # THEN each pool received its own parameters.
+        scenario.verify(firstPool.data.voteAmount == firstValue)
+        scenario.verify(firstPool.data.voteCandidate == Addresses.BAKER_KEY_HASH)
+        scenario.verify(firstPool.data.voteAddress == governor)
+        scenario.verify(secondPool.data.voteAmount == secondValue)
+        scenario.verify(secondPool.data.voteCandidate == Addresses.BAKER_KEY_HASH)
+        scenario.verify(secondPool.data.voteAddress == Addresses.ALICE_ADDRESS)
 
-    @sp.add_test(name="setGovernorContract - succeeds when called by governor")
+    @sp.add_test()
     def test():
-      # GIVEN a LiquidityFund contract
-      scenario = sp.test_scenario()
-
-      governorContractAddress = Addresses.GOVERNOR_ADDRESS
-      fund = LiquidityFundContract(
-        governorContractAddress = governorContractAddress
-      )
-      scenario += fund
+        scenario = sp.test_scenario("voteBatch - fails when the batch is too large", MODULES)
 
-      # WHEN the setGovernorContract is called with a new contract
-      rotatedAddress = Addresses.ROTATED_ADDRESS
-      scenario += fund.setGovernorContract(rotatedAddress).run(
-        sender = governorContractAddress,
-      )
+        # GIVEN a Quipuswap AMM contract
+        quipuswap = fakeQuipuswap.FakeQuipuswapContract()
+        scenario += quipuswap
 
-      # THEN the contract is updated.
-      scenario.verify(fund.data.governorContractAddress == rotatedAddress)
+        # AND a LiquidityFund with a governor
+        governor = Addresses.GOVERNOR_ADDRESS
+        fund = fundContract(
+            governorContractAddress = governor
+        )
+        scenario += fund
 
-    @sp.add_test(name="setGovernorContract - fails when not called by governor")
-    def test():
-      # GIVEN a LiquidityFund contract
-      scenario = sp.test_scenario()
-
-      governorContractAddress = Addresses.GOVERNOR_ADDRESS
-      fund = LiquidityFundContract(
-        governorContractAddress = governorContractAddress
-      )
-      scenario += fund
-
-      # WHEN the setGovernorContract is called by someone who isn't the governor THEN the call fails
-      rotatedAddress = Addresses.ROTATED_ADDRESS
-      scenario += fund.setGovernorContract(rotatedAddress).run(
-        sender = Addresses.NULL_ADDRESS,
-        valid = False
-      )    
+        # WHEN voteBatch is called with more entries than allowed THEN the invocation fails.
+        param = sp.record(
+            pool = quipuswap.address,
+            candidate = Addresses.BAKER_KEY_HASH,
+            value = sp.nat(1000000),
+            voter = governor
+        )
+        fund.voteBatch([param] * (MAX_BATCH_SIZE + 1), _sender = governor, _valid = False, _exception = Errors.BATCH_TOO_LARGE)
 
     ################################################################
-    # setExecutorContract
+    # vetoBatch
     ################################################################
 
-    @sp.add_test(name="setExecutorContract - succeeds when called by governor")
+    @sp.add_test()
     def test():
-      # GIVEN an LiquidityFund contract
-      scenario = sp.test_scenario()
+        scenario = sp.test_scenario("vetoBatch - fails when not called by executor", MODULES)
 
-      governorContractAddress = Addresses.GOVERNOR_ADDRESS
-      fund = LiquidityFundContract(
-        governorContractAddress = governorContractAddress
-      )
-      scenario += fund
+        # GIVEN a Quipuswap AMM contract
+        quipuswap = fakeQuipuswap.FakeQuipuswapContract()
+        scenario += quipuswap
 
-      # WHEN the setExecutorContract is called with a new contract
-      rotatedAddress= Addresses.ROTATED_ADDRESS
-      scenario += fund.setExecutorContract(rotatedAddress).run(
-        sender = governorContractAddress,
-      )
+        # AND a LiquidityFund with an executor
+        executor = Addresses.EXECUTOR_ADDRESS
+        fund = fundContract(
+            executorContractAddress = executor
+        )
+        scenario += fund
 
-      # THEN the contract is updated.
-      scenario.verify(fund.data.executorContractAddress == rotatedAddress)
+        # WHEN vetoBatch is called by someone other than the executor THEN the invocation fails.
+        param = sp.record(
+            pool = quipuswap.address,
+            value = sp.nat(1000000),
+            voter = executor
+        )
+        fund.vetoBatch([param], _sender = Addresses.NULL_ADDRESS, _valid = False, _exception = Errors.NOT_EXECUTOR)
 
-    @sp.add_test(name="setExecutorContract - fails when not called by governor")
+    @sp.add_test()
     def test():
-      # GIVEN a LiquidityFund contract
-      scenario = sp.test_scenario()
-
-      governorContractAddress = Addresses.GOVERNOR_ADDRESS
-      fund = LiquidityFundContract(
-        governorContractAddress = governorContractAddress
-      )
-      scenario += fund
-
-      # WHEN the setExecutorContract is called by someone who isn't the governor THEN the call fails
-      rotatedAddress = Addresses.ROTATED_ADDRESS
-      scenario += fund.setExecutorContract(rotatedAddress).run(
-        sender = Addresses.NULL_ADDRESS,
-        valid = False
-      )    
-    ################################################################
+        scenario = sp.test_scenario("vetoBatch - vetoes in every pool", MODULES)
+
+        # GIVEN two Quipuswap AMM contracts
+        firstPool = fakeQuipuswap.FakeQuipuswapContract()
+        scenario += firstPool
+        secondPool = fakeQuipuswap.FakeQuipuswapContract()
+        scenario += secondPool
+
+        # AND a LiquidityFund with an executor
+        executor = Addresses.EXECUTOR_ADDRESS
+        fund = fundContract(
+            executorContractAddress = executor
+        )
+        scenario += fund
+
+        # WHEN vetoBatch is called by the executor with an entry for each pool
+        firstValue = sp.nat(1000000)
+        secondValue = sp.nat(2000000)
+        fund.vetoBatch([
+            sp.record(
+                pool = firstPool.address,
+                value = firstValue,
+                voter = executor
+            ),
+            sp.record(
+                pool = secondPool.address,
+                value = secondValue,
+                voter = Addresses.ALICE_ADDRESS
+            ),
+        ],
+            _sender = executor,
+        )
+
+        # THEN each pool received its own parameters.
+        scenario.verify(firstPool.data.vetoAmount == firstValue)
+        scenario.verify(firstPool.data.vetoAddress == executor)
+        scenario.verify(secondPool.data.vetoAmount == secondValue)
+        scenario.verify(secondPool.data.vetoAddress == Addresses.ALICE_ADDRESS)
+
+    @sp.add_test()
+    def test():
+        scenario = sp.test_scenario("vetoBatch - fails when the batch is too large", MODULES)
+
+        # GIVEN a Quipuswap AMM contract
+        quipuswap = fakeQuipuswap.FakeQuipuswapContract()
+        scenario += quipuswap
+
+        # AND a LiquidityFund with an executor
+        executor = Addresses.EXECUTOR_ADDRESS
+        fund = fundContract(
+            executorContractAddress = executor
+        )
+        scenario += fund
+
+        # WHEN vetoBatch is called with more entries than allowed THEN the invocation fails.
+        param = sp.record(
+            pool = quipuswap.address,
+            value = sp.nat(1000000),
+            voter = executor
+        )
+        fund.vetoBatch([param] * (MAX_BATCH_SIZE + 1), _sender = executor, _valid = False, _exception = Errors.BATCH_TOO_LARGE)
+
+    ################################################################
+    # setDelegate
+    ################################################################
+
+    @sp.add_test()
+    def test():
+        # GIVEN a LiquidityFund without a delegate and a governor.
+        scenario = sp.test_scenario("setDelegate - fails when not called by governor", MODULES)
+        governor = Addresses.GOVERNOR_ADDRESS
+
+        fund = fundContract(
+            governorContractAddress = governor
+        )
+        scenario += fund
+
+        # WHEN setDelegate is called by someone other than the governor THEN the invocation fails.
+        notGovernor = Addresses.NULL_ADDRESS
+        delegate = sp.Some(Addresses.BAKER_KEY_HASH)
+        fund.setDelegate(delegate, _sender = notGovernor, _voting_powers = Addresses.VOTING_POWERS, _valid = False)
+
+    @sp.add_test()
+    def test():
+        # GIVEN a LiquidityFund contract without a delegate and a governor.
+        scenario = sp.test_scenario("setDelegate - updates delegate", MODULES)
+        governor = Addresses.GOVERNOR_ADDRESS
+
+        fund = fundContract(
+            governorContractAddress = governor
+        )
+        scenario += fund
+
+        # WHEN setDelegate is called by the governor
+        delegate = sp.Some(Addresses.BAKER_KEY_HASH)
+        fund.setDelegate(delegate, _sender = governor, _voting_powers = Addresses.VOTING_POWERS)
+
+        # THEN the delegate is updated.
+        scenario.verify(fund.baker.unwrap_some() == delegate.unwrap_some())
+
+    ################################################################
+    # send
+    ################################################################
+
+    @sp.add_test()
+    def test():
+        scenario = sp.test_scenario("send - succeeds when called by governor", MODULES)
+
+        # GIVEN a LiquidityFund contract with some balance
+        balance = sp.mutez(10)
+        governorContractAddress = Addresses.GOVERNOR_ADDRESS
+        fund = fundContract(
+            governorContractAddress = governorContractAddress
+        )
+        fund.set_initial_balance(balance)
+        scenario += fund
+
+        # AND a dummy contract to receive funds
+        dummy = dummyContract.DummyContract()
+        scenario += dummy
+
+        # WHEN send is called
+        param = (balance, dummy.address)
+        fund.send(param, _sender = governorContractAddress)
+
+        # THEN the funds are sent.
+        scenario.verify(fund.balance == sp.mutez(0))
+        scenario.verify(dummy.balance == balance)
+
+    @sp.add_test()
+    def test():
+        scenario = sp.test_scenario("send - succeeds when with less than the entire amount", MODULES)
+
+        # GIVEN a LiquidityFund contract with some balance
+        balance = sp.mutez(10)
+        governorContractAddress = Addresses.GOVERNOR_ADDRESS
+        fund = fundContract(
+            governorContractAddress = governorContractAddress
+        )
+        fund.set_initial_balance(balance)
+        scenario += fund
+
+        # AND a dummy contract to receive funds
+        dummy = dummyContract.DummyContract()
+        scenario += dummy
+
+        # WHEN send is called with less than the full amount
+        sendAmount = sp.mutez(2)
+        param = (sendAmount, dummy.address)
+        fund.send(param, _sender = governorContractAddress)
+
+        # THEN the funds are sent.
+        scenario.verify(fund.balance == (balance - sendAmount))
+        scenario.verify(dummy.balance == sendAmount)
+
+    @sp.add_test()
+    def test():
+        scenario = sp.test_scenario("send - fails when not called by governor", MODULES)
+
+        # GIVEN a LiquidityFund contract
+        balance = sp.mutez(10)
+        governorContractAddress = Addresses.GOVERNOR_ADDRESS
+        fund = fundContract(
+            governorContractAddress = governorContractAddress
+        )
+        fund.set_initial_balance(balance)
+        scenario += fund
+
+        # WHEN send is called by someone who isn't the governor THEN the call fails
+        notGovernor = Addresses.NULL_ADDRESS
+        param = (balance, notGovernor)
+        fund.send(param, _sender = notGovernor, _valid = False, _exception = Errors.NOT_GOVERNOR)
+
+    ################################################################
+    # sendAll
+    ################################################################
+
+    @sp.add_test()
+    def test():
+        scenario = sp.test_scenario("sendAll - succeeds when called by governor", MODULES)
+
+        # GIVEN a LiquidityFund contract with some balance
+        balance = sp.mutez(10)
+        governorContractAddress = Addresses.GOVERNOR_ADDRESS
+        fund = fundContract(
+            governorContractAddress = governorContractAddress
+        )
+        fund.set_initial_balance(balance)
+        scenario += fund
+
+        # AND a dummy contract to receive funds
+        dummy = dummyContract.DummyContract()
+        scenario += dummy
+
+        # WHEN sendAll is called
+        fund.sendAll(dummy.address, _sender = governorContractAddress)
+
+        # THEN the funds are sent.
+        scenario.verify(fund.balance == sp.mutez(0))
+        scenario.verify(dummy.balance == balance)
+
+    @sp.add_test()
+    def test():
+        scenario = sp.test_scenario("sendAll - fails when not called by governor", MODULES)
+
+        # GIVEN a LiquidityFund contract
+        balance = sp.mutez(10)
+        governorContractAddress = Addresses.GOVERNOR_ADDRESS
+        fund = fundContract(
+            governorContractAddress = governorContractAddress
+        )
+        fund.set_initial_balance(balance)
+        scenario += fund
+
+        # WHEN send is called by someone who isn't the governor THEN the call fails
+        notGovernor = Addresses.NULL_ADDRESS
+        fund.sendAll(notGovernor, _sender = notGovernor, _valid = False, _exception = Errors.NOT_GOVERNOR)
+
+    ################################################################
+    # sendTokens
+    ################################################################
+
+    @sp.add_test()
+    def test():
+        scenario = sp.test_scenario("sendTokens - succeeds when called by governor", MODULES)
+
+        # GIVEN a Token contract.
+        governorAddress = Addresses.GOVERNOR_ADDRESS
+        token = kusdTokenContract(admin = governorAddress)
+        scenario += token
+
+        # AND a LiquidityFund contract
+        fund = fundContract(
+            governorContractAddress = governorAddress,
+            tokenContractAddress = token.address
+        )
+        scenario += fund
+
+        # And a dummy contract to send to.
+        dummy = dummyContract.DummyContract()
+        scenario += dummy
+
+        # AND the fund has $1000 of tokens.
+        fundTokens = 1000 * PRECISION
+        mintForFundParam = sp.record(address = fund.address, value = fundTokens)
+        token.mint(mintForFundParam, _sender = governorAddress)
+
+        # WHEN sendTokens is called
+        amount = sp.nat(200)
+        param = (amount, dummy.address)
+        fund.sendTokens(param, _sender = governorAddress)
+
+        # THEN the fund is debited tokens
+        scenario.verify(token.data.balances[fund.address].balance == sp.as_nat(fundTokens - amount))
+
+        # AND the receiver was credited the tokens.
+        scenario.verify(token.data.balances[dummy.address].balance == amount)
+
+    @sp.add_test()
+    def test():
+        scenario = sp.test_scenario("sendTokens - fails when not called by governor", MODULES)
+
+        # GIVEN a Token contract.
+        governorAddress = Addresses.GOVERNOR_ADDRESS
+        token = kusdTokenContract(admin = governorAddress)
+        scenario += token
+
+        # AND a LiquidityFund contract
+        fund = fundContract(
+            governorContractAddress = governorAddress,
+            tokenContractAddress = token.address
+        )
+        scenario += fund
+
+        # AND the fund has $1000 of tokens.
+        fundTokens = 1000 * PRECISION
+        mintForFundParam = sp.record(address = fund.address, value = fundTokens)
+        token.mint(mintForFundParam, _sender = governorAddress)
+
+        # WHEN sendTokens is called by someone who isn't the governor THEN the call fails.
+        notGovernor = Addresses.NULL_ADDRESS
+        amount = sp.nat(200)
+        param = (amount, Addresses.ROTATED_ADDRESS)
+        fund.sendTokens(param, _sender = notGovernor, _valid = False)
+
+    ################################################################
+    # setGovernorContract
+    ################################################################
+
+    @sp.add_test()
+    def test():
+        # GIVEN a LiquidityFund contract
+        scenario = sp.test_scenario("setGovernorContract - succeeds when called by governor", MODULES)
+
+        governorContractAddress = Addresses.GOVERNOR_ADDRESS
+        fund = fundContract(
+            governorContractAddress = governorContractAddress
+        )
+        scenario += fund
+
+        # WHEN the setGovernorContract is called with a new contract
+        rotatedAddress = Addresses.ROTATED_ADDRESS
+        fund.setGovernorContract(rotatedAddress, _sender = governorContractAddress)
+
+        # THEN the contract is updated.
+        scenario.verify(fund.data.governorContractAddress == rotatedAddress)
+
+    @sp.add_test()
+    def test():
+        # GIVEN a LiquidityFund contract
+        scenario = sp.test_scenario("setGovernorContract - fails when not called by governor", MODULES)
+
+        governorContractAddress = Addresses.GOVERNOR_ADDRESS
+        fund = fundContract(
+            governorContractAddress = governorContractAddress
+        )
+        scenario += fund
+
+        # WHEN the setGovernorContract is called by someone who isn't the governor THEN the call fails
+        rotatedAddress = Addresses.ROTATED_ADDRESS
+        fund.setGovernorContract(rotatedAddress, _sender = Addresses.NULL_ADDRESS, _valid = False)
+
+    ################################################################
+    # setExecutorContract
+    ################################################################
+
+    @sp.add_test()
+    def test():
+        # GIVEN an LiquidityFund contract
+        scenario = sp.test_scenario("setExecutorContract - succeeds when called by governor", MODULES)
+
+        governorContractAddress = Addresses.GOVERNOR_ADDRESS
+        fund = fundContract(
+            governorContractAddress = governorContractAddress
+        )
+        scenario += fund
+
+        # WHEN the setExecutorContract is called with a new contract
+        rotatedAddress= Addresses.ROTATED_ADDRESS
+        fund.setExecutorContract(rotatedAddress, _sender = governorContractAddress)
+
+        # THEN the contract is updated.
+        scenario.verify(fund.data.executorContractAddress == rotatedAddress)
+
+    @sp.add_test()
+    def test():
+        # GIVEN a LiquidityFund contract
+        scenario = sp.test_scenario("setExecutorContract - fails when not called by governor", MODULES)
+
+        governorContractAddress = Addresses.GOVERNOR_ADDRESS
+        fund = fundContract(
+            governorContractAddress = governorContractAddress
+        )
+        scenario += fund
+
+        # WHEN the setExecutorContract is called by someone who isn't the governor THEN the call fails
+        rotatedAddress = Addresses.ROTATED_ADDRESS
+        fund.setExecutorContract(rotatedAddress, _sender = Addresses.NULL_ADDRESS, _valid = False)
+
+    ################################################################
     # setSlippageTolerance
     ################################################################
 
-    @sp.add_test(name="setSlippageTolerance - succeeds when called by governor")
+    @sp.add_test()
     def test():
-      # GIVEN a LiquidityFund contract
-      scenario = sp.test_scenario()
+        # GIVEN a LiquidityFund contract
+        scenario = sp.test_scenario("setSlippageTolerance - succeeds when called by governor", MODULES)
 
-      governorContractAddress = Addresses.GOVERNOR_ADDRESS
-      fund = LiquidityFundContract(
-        governorContractAddress = governorContractAddress
-      )
-      scenario += fund
+        governorContractAddress = Addresses.GOVERNOR_ADDRESS
+        fund = fundContract(
+            governorContractAddress = governorContractAddress
+        )
+        scenario += fund
 
-      # WHEN the setSlippageTolerance is called with some number
-      someNumber = 8
-      scenario += fund.setSlippageTolerance(someNumber).run(
-        sender = governorContractAddress,
-      )
+        # WHEN the setSlippageTolerance is called with some number
+        someNumber = 8
+        fund.setSlippageTolerance(someNumber, _sender = governorContractAddress)
 
-      # THEN the contract is updated.
-      scenario.verify(fund.data.slippageTolerance == someNumber)
+        # THEN the contract is updated.
+        scenario.verify(fund.data.slippageTolerance == someNumber)
 
-    @sp.add_test(name="setSlippageTolerance - fails when not called by governor")
+    @sp.add_test()
     def test():
-      # GIVEN a LiquidityFund contract
-      scenario = sp.test_scenario()
-
-      governorContractAddress = Addresses.GOVERNOR_ADDRESS
-      fund = LiquidityFundContract(
-        governorContractAddress = governorContractAddress
-      )
-      scenario += fund
-
-      # WHEN the setSlippageTolerance is called by someone who isn't the governor THEN the call fails
-      someNumber = 8
-      scenario += fund.setSlippageTolerance(someNumber).run(
-        sender = Addresses.NULL_ADDRESS,
-        valid = False
-      )    
+        # GIVEN a LiquidityFund contract
+        scenario = sp.test_scenario("setSlippageTolerance - fails when not called by governor", MODULES)
+
+        governorContractAddress = Addresses.GOVERNOR_ADDRESS
+        fund = fundContract(
+            governorContractAddress = governorContractAddress
+        )
+        scenario += fund
+
+        # WHEN the setSlippageTolerance is called by someone who isn't the governor THEN the call fails
+        someNumber = 8
+        fund.setSlippageTolerance(someNumber, _sender = Addresses.NULL_ADDRESS, _valid = False)
 
     ################################################################
     # setMaxDataDelaySec
     ################################################################
 
-    @sp.add_test(name="setMaxDataDelaySec - succeeds when called by governor")
+    @sp.add_test()
     def test():
-      # GIVEN a LiquidityFund contract
-      scenario = sp.test_scenario()
+        # GIVEN a LiquidityFund contract
+        scenario = sp.test_scenario("setMaxDataDelaySec - succeeds when called by governor", MODULES)
 
-      governorContractAddress = Addresses.GOVERNOR_ADDRESS
-      fund = LiquidityFundContract(
-        governorContractAddress = governorContractAddress
-      )
-      scenario += fund
+        governorContractAddress = Addresses.GOVERNOR_ADDRESS
+        fund = fundContract(
+            governorContractAddress = governorContractAddress
+        )
+        scenario += fund
 
-      # WHEN setMaxDataDelaySec is called with some number
-      someNumber = 8
-      scenario += fund.setMaxDataDelaySec(someNumber).run(
-        sender = governorContractAddress,
-      )
+        # WHEN setMaxDataDelaySec is called with some number
+        someNumber = 8
+        fund.setMaxDataDelaySec(someNumber, _sender = governorContractAddress)
 
-      # THEN the contract is updated.
-      scenario.verify(fund.data.maxDataDelaySec == someNumber)
+        # THEN the contract is updated.
+        scenario.verify(fund.data.maxDataDelaySec == someNumber)
 
-    @sp.add_test(name="setMaxDataDelaySec - fails when not called by governor")
+    @sp.add_test()
     def test():
-      # GIVEN a LiquidityFund contract
-      scenario = sp.test_scenario()
-
-      governorContractAddress = Addresses.GOVERNOR_ADDRESS
-      fund = LiquidityFundContract(
-        governorContractAddress = governorContractAddress
-      )
-      scenario += fund
-
-      # WHEN the setMaxDataDelaySec is called by someone who isn't the governor THEN the call fails
-      someNumber = 8
-      scenario += fund.setMaxDataDelaySec(someNumber).run(
-        sender = Addresses.NULL_ADDRESS,
-        valid = False
-      )  
+        # GIVEN a LiquidityFund contract
+        scenario = sp.test_scenario("setMaxDataDelaySec - fails when not called by governor", MODULES)
+
+        governorContractAddress = Addresses.GOVERNOR_ADDRESS
+        fund = fundContract(
+            governorContractAddress = governorContractAddress
+        )
+        scenario += fund
+
+        # WHEN the setMaxDataDelaySec is called by someone who isn't the governor THEN the call fails
+        someNumber = 8
+        fund.setMaxDataDelaySec(someNumber, _sender = Addresses.NULL_ADDRESS, _valid = False)
 
     ################################################################
     # setHarbingerContract
     ################################################################
 
-    @sp.add_test(name="setHarbingerContract - succeeds when called by governor")
+    @sp.add_test()
     def test():
-      # GIVEN a LiquidityFund contract
-      scenario = sp.test_scenario()
+        # GIVEN a LiquidityFund contract
+        scenario = sp.test_scenario("setHarbingerContract - succeeds when called by governor", MODULES)
 
-      governorContractAddress = Addresses.GOVERNOR_ADDRESS
-      fund = LiquidityFundContract(
-        governorContractAddress = governorContractAddress
-      )
-      scenario += fund
+        governorContractAddress = Addresses.GOVERNOR_ADDRESS
+        fund = fundContract(
+            governorContractAddress = governorContractAddress
+        )
+        scenario += fund
 
-      # WHEN setHarbingerContract is called with some address
-      rotatedAddress = Addresses.ROTATED_ADDRESS
-      scenario += fund.setHarbingerContract(rotatedAddress).run(
-        sender = governorContractAddress,
-      )
+        # WHEN setHarbingerContract is called with some address
+        rotatedAddress = Addresses.ROTATED_ADDRESS
+        fund.setHarbingerContract(rotatedAddress, _sender = governorContractAddress)
 
-      # THEN the contract is updated.
-      scenario.verify(fund.data.harbingerContractAddress == rotatedAddress)
+        # THEN the contract is updated.
+        scenario.verify(fund.data.harbingerContractAddress == rotatedAddress)
 
-    @sp.add_test(name="setHarbingerContract - fails when not called by governor")
+    @sp.add_test()
     def test():
-      # GIVEN a LiquidityFund contract
-      scenario = sp.test_scenario()
-
-      governorContractAddress = Addresses.GOVERNOR_ADDRESS
-      fund = LiquidityFundContract(
-        governorContractAddress = governorContractAddress
-      )
-      scenario += fund
-
-      # WHEN the setHarbingerContract is called by someone who isn't the governor THEN the call fails
-      rotatedAddress = Addresses.ROTATED_ADDRESS
-      scenario += fund.setHarbingerContract(rotatedAddress).run(
-        sender = Addresses.NULL_ADDRESS,
-        valid = False
-      )  
+        # GIVEN a LiquidityFund contract
+        scenario = sp.test_scenario("setHarbingerContract - fails when not called by governor", MODULES)
+
+        governorContractAddress = Addresses.GOVERNOR_ADDRESS
+        fund = fundContract(
+            governorContractAddress = governorContractAddress
+        )
+        scenario += fund
+
+        # WHEN the setHarbingerContract is called by someone who isn't the governor THEN the call fails
+        rotatedAddress = Addresses.ROTATED_ADDRESS
+        fund.setHarbingerContract(rotatedAddress, _sender = Addresses.NULL_ADDRESS, _valid = False)
+
     ################################################################
     # rescueFA2
     ################################################################
 
-    @sp.add_test(name="rescueFA2 - rescues tokens")
+    @sp.add_test()
+    def test():
+        scenario = sp.test_scenario("rescueFA2 - rescues tokens", MODULES)
+
+        # GIVEN an FA2 token contract
+        token = slimFa2.SlimFA2(
+            admin = Addresses.GOVERNOR_ADDRESS
+        )
+        scenario += token
+
+        # AND a liquidity fund contract
+        governorContractAddress = Addresses.GOVERNOR_ADDRESS
+        fund = fundContract(
+            governorContractAddress = governorContractAddress
+        )
+        scenario += fund
+
+        # AND the liquidity fund has tokens given to it.
+        value = sp.nat(100)
+        tokenId = 0
+        token.mint(
+            address = fund.address,
+            amount = value,
+            token_id = tokenId,
+            _sender = Addresses.GOVERNOR_ADDRESS,
+        )
+
+        # WHEN rescueFA2 is called.
+        fund.rescueFA2(
+            sp.record(
+                destination = Addresses.ALICE_ADDRESS,
+                amount = value,
+                tokenId = tokenId,
+                tokenContractAddress = token.address
+            ),
+            _sender = Addresses.GOVERNOR_ADDRESS,
+        )
+
+        # THEN the tokens are rescued.
+        scenario.verify(token.data.ledger[(fund.address, tokenId)] == sp.nat(0))
+        scenario.verify(token.data.ledger[(Addresses.ALICE_ADDRESS, tokenId)] == value)
+
+    @sp.add_test()
     def test():
-      scenario = sp.test_scenario()
-
-      # GIVEN an FA2 token contract
-      config = FA2.FA2_config()
-      token = FA2.FA2(
-        config = config,
-        metadata = sp.utils.metadata_of_url("https://example.com"),      
-        admin = Addresses.GOVERNOR_ADDRESS
-      )
-      scenario += token
-
-      # AND a liquidity fund contract
-      governorContractAddress = Addresses.GOVERNOR_ADDRESS
-      fund = LiquidityFundContract(
-        governorContractAddress = governorContractAddress
-      )
-      scenario += fund
-
-      # AND the liquidity fund has tokens given to it.
-      value = sp.nat(100)
-      tokenId = 0
-      scenario += token.mint(    
-        address = fund.address,
-        amount = value,
-        metadata = FA2.FA2.make_metadata(
-          name = "SomeToken",
-          decimals = 18,
-          symbol= "ST"
-        ),
-        token_id = tokenId
-      ).run(
-        sender = Addresses.GOVERNOR_ADDRESS
-      )
-        
-      # WHEN rescueFA2 is called.
-      scenario += fund.rescueFA2(
-        sp.record(
-          destination = Addresses.ALICE_ADDRESS,
-          amount = value,
-          tokenId = tokenId,
-          tokenContractAddress = token.address
-        )
-      ).run(
-        sender = Addresses.GOVERNOR_ADDRESS,
-      )    
-
-      # THEN the tokens are rescued.
-      scenario.verify(token.data.ledger[(fund.address, tokenId)].balance == sp.nat(0))
-      scenario.verify(token.data.ledger[(Addresses.ALICE_ADDRESS, tokenId)].balance == value)
-
-    @sp.add_test(name="rescueFA2 - fails if not called by govenror")
+        scenario = sp.test_scenario("rescueFA2 - fails if not called by govenror", MODULES)
+
+        # GIVEN an FA2 token contract
+        token = slimFa2.SlimFA2(
+            admin = Addresses.GOVERNOR_ADDRESS
+        )
+        scenario += token
+
+
+        # AND a liquidity fund contract
+        governorContractAddress = Addresses.GOVERNOR_ADDRESS
+        fund = fundContract(
+            governorContractAddress = governorContractAddress
+        )
+        scenario += fund
+
+        # AND the liquidity fund has tokens given to it.
+        value = sp.nat(100)
+        tokenId = 0
+        token.mint(
+            address = fund.address,
+            amount = value,
+            token_id = tokenId,
+            _sender = Addresses.GOVERNOR_ADDRESS,
+        )
+
+        # WHEN rescueFA2 is called by someone other than the governor
+        # THEN the call fails
+        notGovernor = Addresses.NULL_ADDRESS
+        fund.rescueFA2(
+            sp.record(
+                destination = Addresses.ALICE_ADDRESS,
+                amount = value,
+                tokenId = tokenId,
+                tokenContractAddress = token.address
+            ),
+            _sender = notGovernor,
+            _valid = False,
+            _exception = Errors.NOT_GOVERNOR,
+        )
+
+    @sp.add_test()
     def test():
-      scenario = sp.test_scenario()
-
-      # GIVEN an FA2 token contract
-      config = FA2.FA2_config()
-      token = FA2.FA2(
-        config = config,
-        metadata = sp.utils.metadata_of_url("https://example.com"),      
-        admin = Addresses.GOVERNOR_ADDRESS
-      )
-      scenario += token
-
-
-      # AND a liquidity fund contract
-      governorContractAddress = Addresses.GOVERNOR_ADDRESS
-      fund = LiquidityFundContract(
-        governorContractAddress = governorContractAddress
-      )
-      scenario += fund
-
-      # AND the liquidity fund has tokens given to it.
-      value = sp.nat(100)
-      tokenId = 0
-      scenario += token.mint(    
-        address = fund.address,
-        amount = value,
-        metadata = FA2.FA2.make_metadata(
-          name = "SomeToken",
-          decimals = 18,
-          symbol= "ST"
-        ),
-        token_id = tokenId
-      ).run(
-        sender = Addresses.GOVERNOR_ADDRESS
-      )
-        
-      # WHEN rescueFA2 is called by someone other than the governor
-      # THEN the call fails
-      notGovernor = Addresses.NULL_ADDRESS
-      scenario += fund.rescueFA2(
-        sp.record(
-          destination = Addresses.ALICE_ADDRESS,
-          amount = value,
-          tokenId = tokenId,
-          tokenContractAddress = token.address
-        )
-      ).run(
-        sender = notGovernor,
-        valid = False,
-        exception = Errors.NOT_GOVERNOR
-      )    
+        # The full FA2 template is only loaded by this scenario, the others use the slim one.
+        scenario = sp.test_scenario("rescueFA2 - rescues tokens from the full FA2 template", MODULES + [fullFa2.t, fullFa2.main, fullFa2.fa2])
+
+        # GIVEN an FA2 token contract with operators, pausing and metadata
+        token = fullFa2.fa2.FA2(
+            administrator = Addresses.GOVERNOR_ADDRESS,
+            metadata = sp.big_map(),
+            ledger = {},
+            token_metadata = [],
+        )
+        scenario += token
+
+        # AND a liquidity fund contract
+        governorContractAddress = Addresses.GOVERNOR_ADDRESS
+        fund = fundContract(
+            governorContractAddress = governorContractAddress
+        )
+        scenario += fund
+
+        # AND the liquidity fund has tokens given to it.
+        value = sp.nat(100)
+        tokenId = 0
+        token.mint(
+            [
+                sp.record(
+                    to_ = fund.address,
+                    token = sp.variant.new(fullFa2.make_metadata(symbol = "TKN", name = "Token", decimals = 6)),
+                    amount = value,
+                ),
+            ],
+            _sender = Addresses.GOVERNOR_ADDRESS,
+        )
+
+        # WHEN rescueFA2 is called.
+        fund.rescueFA2(
+            sp.record(
+                destination = Addresses.ALICE_ADDRESS,
+                amount = value,
+                tokenId = tokenId,
+                tokenContractAddress = token.address
+            ),
+            _sender = Addresses.GOVERNOR_ADDRESS,
+        )
+
+        # THEN the tokens are rescued.
+        scenario.verify(token.data.ledger[(fund.address, tokenId)] == sp.nat(0))
+        scenario.verify(token.data.ledger[(Addresses.ALICE_ADDRESS, tokenId)] == value)
 
     ################################################################
     # rescueFA12
     ################################################################
 
-    @sp.add_test(name="rescueFA12 - rescues tokens")
+    @sp.add_test()
     def test():
-      scenario = sp.test_scenario()
-
-      # GIVEN an FA1.2 token contract
-      token_metadata = {
-        "decimals" : "18",
-        "name" : "SomeToken",
-        "symbol" : "ST",
-      }
-      contract_metadata = {
-        "" : "tezos-storage:data",
-      }
-      token = FA12.FA12(
-        admin = Addresses.GOVERNOR_ADDRESS,
-        token_metadata = token_metadata,
-        contract_metadata = contract_metadata,
-        config = FA12.FA12_config(use_token_metadata_offchain_view = False)
-      )
-      scenario += token
-
-      # AND a liquidity fund contract
-      governorContractAddress = Addresses.GOVERNOR_ADDRESS
-      fund = LiquidityFundContract(
-        governorContractAddress = governorContractAddress
-      )
-      scenario += fund
-
-      # AND the liquidity fund has tokens given to it.
-      value = sp.nat(100)
-      scenario += token.mint(
-        sp.record(
-          address = fund.address,
-          value = value
-        )
-      ).run(
-        sender = Addresses.GOVERNOR_ADDRESS
-      )
-
-      # WHEN rescueFA12 is called
-      scenario += fund.rescueFA12(
-        sp.record(
-          destination = Addresses.ALICE_ADDRESS,
-          amount = value,
-          tokenContractAddress = token.address
-        )
-      ).run(
-        sender = Addresses.GOVERNOR_ADDRESS,
-      )    
-
-      # THEN the tokens are rescued.
-      scenario.verify(token.data.balances[fund.address].balance == sp.nat(0))
-      scenario.verify(token.data.balances[Addresses.ALICE_ADDRESS].balance == value)
-
-    @sp.add_test(name="rescueFA12 - fails to rescue if not called by governor")
+        scenario = sp.test_scenario("rescueFA12 - rescues tokens", MODULES)
+
+        # GIVEN an FA1.2 token contract
+        token = fa12.Fa1_2TestFull(
+            administrator = Addresses.GOVERNOR_ADDRESS,
+            metadata = sp.big_map({"": sp.scenario_utils.bytes_of_string("tezos-storage:data")}),
+            ledger = {},
+            token_metadata = {
+                "decimals": sp.scenario_utils.bytes_of_string("18"),
+                "name": sp.scenario_utils.bytes_of_string("SomeToken"),
+                "symbol": sp.scenario_utils.bytes_of_string("ST"),
+            },
+        )
+        scenario += token
+
+        # AND a liquidity fund contract
+        governorContractAddress = Addresses.GOVERNOR_ADDRESS
+        fund = fundContract(
+            governorContractAddress = governorContractAddress
+        )
+        scenario += fund
+
+        # AND the liquidity fund has tokens given to it.
+        value = sp.nat(100)
+        token.mint(
+            sp.record(
+                address = fund.address,
+                value = value
+            ),
+            _sender = Addresses.GOVERNOR_ADDRESS,
+        )
+
+        # WHEN rescueFA12 is called
+        fund.rescueFA12(
+            sp.record(
+                destination = Addresses.ALICE_ADDRESS,
+                amount = value,
+                tokenContractAddress = token.address
+            ),
+            _sender = Addresses.GOVERNOR_ADDRESS,
+        )
+
+        # THEN the tokens are rescued.
+        scenario.verify(token.data.ledger[fund.address].balance == sp.nat(0))
+        scenario.verify(token.data.ledger[Addresses.ALICE_ADDRESS].balance == value)
+
+    @sp.add_test()
     def test():
-      scenario = sp.test_scenario()
-
-      # GIVEN an FA1.2 token contract
-      token_metadata = {
-        "decimals" : "18",
-        "name" : "SomeToken",
-        "symbol" : "ST",
-      }
-      contract_metadata = {
-        "" : "tezos-storage:data",
-      }
-      token = FA12.FA12(
-        admin = Addresses.GOVERNOR_ADDRESS,
-        token_metadata = token_metadata,
-        contract_metadata = contract_metadata,
-        config = FA12.FA12_config(use_token_metadata_offchain_view = False)
-      )
-      scenario += token
-
-      # AND a liquidity fund contract
-      governorContractAddress = Addresses.GOVERNOR_ADDRESS
-      fund = LiquidityFundContract(
-        governorContractAddress = governorContractAddress
-      )
-      scenario += fund
-
-      # AND the liquidity fund has tokens given to it.
-      value = sp.nat(100)
-      scenario += token.mint(
-        sp.record(
-          address = fund.address,
-          value = value
-        )
-      ).run(
-        sender = Addresses.GOVERNOR_ADDRESS
-      )
-
-      # WHEN rescueFA12 is called by someone other than the governor.
-      # THEN the call fails
-      notGovernor = Addresses.NULL_ADDRESS
-      scenario += fund.rescueFA12(
-        sp.record(
-          destination = Addresses.ALICE_ADDRESS,
-          amount = value,
-          tokenContractAddress = token.address
-        )
-      ).run(
-        sender = notGovernor,
-        valid = False,
-        exception = Errors.NOT_GOVERNOR
-      )    
+        scenario = sp.test_scenario("rescueFA12 - fails to rescue if not called by governor", MODULES)
+
+        # GIVEN an FA1.2 token contract
+        token = fa12.Fa1_2TestFull(
+            administrator = Addresses.GOVERNOR_ADDRESS,
+            metadata = sp.big_map({"": sp.scenario_utils.bytes_of_string("tezos-storage:data")}),
+            ledger = {},
+            token_metadata = {
+                "decimals": sp.scenario_utils.bytes_of_string("18"),
+                "name": sp.scenario_utils.bytes_of_string("SomeToken"),
+                "symbol": sp.scenario_utils.bytes_of_string("ST"),
+            },
+        )
+        scenario += token
+
+        # AND a liquidity fund contract
+        governorContractAddress = Addresses.GOVERNOR_ADDRESS
+        fund = fundContract(
+            governorContractAddress = governorContractAddress
+        )
+        scenario += fund
+
+        # AND the liquidity fund has tokens given to it.
+        value = sp.nat(100)
+        token.mint(
+            sp.record(
+                address = fund.address,
+                value = value
+            ),
+            _sender = Addresses.GOVERNOR_ADDRESS,
+        )
+
+        # WHEN rescueFA12 is called by someone other than the governor.
+        # THEN the call fails
+        notGovernor = Addresses.NULL_ADDRESS
+        fund.rescueFA12(
+            sp.record(
+                destination = Addresses.ALICE_ADDRESS,
+                amount = value,
+                tokenContractAddress = token.address
+            ),
+            _sender = notGovernor,
+            _valid = False,
+            _exception = Errors.NOT_GOVERNOR,
+        )
 
     ################################################################
     # sendAllTokens
     ################################################################
 
-    @sp.add_test(name="sendAllTokens - succeeds when called by governor")
+    @sp.add_test()
     def test():
-      scenario = sp.test_scenario()
-
-      # GIVEN a Token contract in the idle state
-      governorAddress = Addresses.GOVERNOR_ADDRESS
-      token = Token.FA12(
-        admin = governorAddress
-      )
-      scenario += token
-
-      # AND a LiquidityFund contract in the IDLE state
-      fund = LiquidityFundContract(
-        governorContractAddress = governorAddress,
-        tokenContractAddress = token.address,
-
-        state = IDLE,
-        sendAllTokens_destination = sp.none
-      )
-      scenario += fund
-
-      # AND the fund has $1000 of tokens.
-      fundTokens = 1000 * Constants.PRECISION 
-      mintForFundParam = sp.record(address = fund.address, value = fundTokens)
-      scenario += token.mint(mintForFundParam).run(
-        sender = governorAddress
-      )
-
-      # WHEN sendAllTokens is called
-      destination = Addresses.ALICE_ADDRESS
-      scenario += fund.sendAllTokens(destination).run(
-        sender = governorAddress,
-      )
-
-      # THEN the fund is zero'ed
-      scenario.verify(token.data.balances[fund.address].balance == 0)
-
-      # AND the receiver was credited all of the tokens.
-      scenario.verify(token.data.balances[destination].balance == fundTokens)
-
-      # AND the state is reset
-      scenario.verify(fund.data.state == IDLE)
-      scenario.verify(fund.data.sendAllTokens_destination == sp.none)
-
-    @sp.add_test(name="sendAllTokens - fails when not called by governor")
+        scenario = sp.test_scenario("sendAllTokens - succeeds when called by governor", MODULES)
+
+        # GIVEN a Token contract in the idle state
+        governorAddress = Addresses.GOVERNOR_ADDRESS
+        token = kusdTokenContract(admin = governorAddress)
+        scenario += token
+
+        # AND a LiquidityFund contract in the proxy.IDLE state
+        fund = fundContract(
+            governorContractAddress = governorAddress,
+            tokenContractAddress = token.address,
+
+            state = proxy.IDLE,
+            sendAllTokens_destination = None
+        )
+        scenario += fund
+
+        # AND the fund has $1000 of tokens.
+        fundTokens = 1000 * PRECISION
+        mintForFundParam = sp.record(address = fund.address, value = fundTokens)
+        token.mint(mintForFundParam, _sender = governorAddress)
+
+        # WHEN sendAllTokens is called
+        destination = Addresses.ALICE_ADDRESS
+        fund.sendAllTokens(destination, _sender = governorAddress)
+
+        # THEN the fund is zero'ed
+        scenario.verify(token.data.balances[fund.address].balance == 0)
+
+        # AND the receiver was credited all of the tokens.
+        scenario.verify(token.data.balances[destination].balance == fundTokens)
+
+        # AND the state is reset
+        scenario.verify(fund.data.state == proxy.IDLE)
+        scenario.verify(fund.data.sendAllTokens_destination == None)
+
+    @sp.add_test()
     def test():
-      scenario = sp.test_scenario()
-
-      # GIVEN a Token contract in the idle state
-      governorAddress = Addresses.GOVERNOR_ADDRESS
-      token = Token.FA12(
-        admin = governorAddress
-      )
-      scenario += token
-
-      # AND a LiquidityFund contract in the IDLE state
-      fund = LiquidityFundContract(
-        governorContractAddress = governorAddress,
-        tokenContractAddress = token.address,
-
-        state = IDLE,
-        sendAllTokens_destination = sp.none
-      )
-      scenario += fund
-
-      # AND the fund has $1000 of tokens.
-      fundTokens = 1000 * Constants.PRECISION 
-      mintForFundParam = sp.record(address = fund.address, value = fundTokens)
-      scenario += token.mint(mintForFundParam).run(
-        sender = governorAddress
-      )
-
-      # WHEN sendAllTokens is called by someone other than the governor
-      # THEN the call fails with NOT_GOVERNOR
-      destination = Addresses.ALICE_ADDRESS
-      notGovernor = Addresses.NULL_ADDRESS
-      scenario += fund.sendAllTokens(destination).run(
-        sender = notGovernor,
-
-        valid = False,
-        exception = Errors.NOT_GOVERNOR
-      )
-
-    @sp.add_test(name="sendAllTokens - fails in bad state")
+        scenario = sp.test_scenario("sendAllTokens - fails when not called by governor", MODULES)
+
+        # GIVEN a Token contract in the idle state
+        governorAddress = Addresses.GOVERNOR_ADDRESS
+        token = kusdTokenContract(admin = governorAddress)
+        scenario += token
+
+        # AND a LiquidityFund contract in the proxy.IDLE state
+        fund = fundContract(
+            governorContractAddress = governorAddress,
+            tokenContractAddress = token.address,
+
+            state = proxy.IDLE,
+            sendAllTokens_destination = None
+        )
+        scenario += fund
+
+        # AND the fund has $1000 of tokens.
+        fundTokens = 1000 * PRECISION
+        mintForFundParam = sp.record(address = fund.address, value = fundTokens)
+        token.mint(mintForFundParam, _sender = governorAddress)
+
+        # WHEN sendAllTokens is called by someone other than the governor
+        # THEN the call fails with NOT_GOVERNOR
+        destination = Addresses.ALICE_ADDRESS
+        notGovernor = Addresses.NULL_ADDRESS
+        fund.sendAllTokens(destination, _sender = notGovernor, _valid = False, _exception = Errors.NOT_GOVERNOR)
+
+    @sp.add_test()
     def test():
-      scenario = sp.test_scenario()
-
-      # GIVEN a Token contract in the idle state
-      governorAddress = Addresses.GOVERNOR_ADDRESS
-      token = Token.FA12(
-        admin = governorAddress
-      )
-      scenario += token
-
-      # AND a LiquidityFund contract in the WAITING_FOR_TOKEN_BALANCE state
-      destination = Addresses.ALICE_ADDRESS
-      fund = LiquidityFundContract(
-        governorContractAddress = governorAddress,
-        tokenContractAddress = token.address,
-
-        state = WAITING_FOR_TOKEN_BALANCE,
-        sendAllTokens_destination = sp.some(destination)
-      )
-      scenario += fund
-
-      # AND the fund has $1000 of tokens.
-      fundTokens = 1000 * Constants.PRECISION 
-      mintForFundParam = sp.record(address = fund.address, value = fundTokens)
-      scenario += token.mint(mintForFundParam).run(
-        sender = governorAddress
-      )
-
-      # WHEN sendAllTokens is called
-      # THEN the call fails with BAD_STATE
-      scenario += fund.sendAllTokens(destination).run(
-        sender = governorAddress,
-
-        valid = False,
-        exception = Errors.BAD_STATE
-      ) 
+        scenario = sp.test_scenario("sendAllTokens - fails in bad state", MODULES)
+
+        # GIVEN a Token contract in the idle state
+        governorAddress = Addresses.GOVERNOR_ADDRESS
+        token = kusdTokenContract(admin = governorAddress)
+        scenario += token
+
+        # AND a LiquidityFund contract in the proxy.WAITING_FOR_TOKEN_BALANCE state
+        destination = Addresses.ALICE_ADDRESS
+        fund = fundContract(
+            governorContractAddress = governorAddress,
+            tokenContractAddress = token.address,
+
+            state = proxy.WAITING_FOR_TOKEN_BALANCE,
+            sendAllTokens_destination = sp.Some(destination)
+        )
+        scenario += fund
+
+        # AND the fund has $1000 of tokens.
+        fundTokens = 1000 * PRECISION
+        mintForFundParam = sp.record(address = fund.address, value = fundTokens)
+        token.mint(mintForFundParam, _sender = governorAddress)
+
+        # WHEN sendAllTokens is called
+        # THEN the call fails with BAD_STATE
+        fund.sendAllTokens(destination, _sender = governorAddress, _valid = False, _exception = Errors.BAD_STATE)
 
     ################################################################
     # sendAllTokens_callback
     ################################################################
 
-    @sp.add_test(name="sendAllTokens_callback - sends the token balance")
+    @sp.add_test()
+    def test():
+        scenario = sp.test_scenario("sendAllTokens_callback - sends the token balance", MODULES)
+
+        # GIVEN a Token contract.
+        governorAddress = Addresses.GOVERNOR_ADDRESS
+        token = kusdTokenContract(admin = governorAddress)
+        scenario += token
+
+        # AND a LiquidityFund contract that is waiting to send a balance to Alice
+        recipientAddress = Addresses.ALICE_ADDRESS
+        fund = fundContract(
+            governorContractAddress = governorAddress,
+            tokenContractAddress = token.address,
+
+            state = proxy.WAITING_FOR_TOKEN_BALANCE,
+            sendAllTokens_destination = sp.Some(recipientAddress)
+        )
+        scenario += fund
+
+        # AND the fund has $1000 of tokens.
+        fundTokens = 1000 * PRECISION
+        mintForFundParam = sp.record(address = fund.address, value = fundTokens)
+        token.mint(mintForFundParam, _sender = governorAddress)
+
+        # WHEN sendAllTokens_callback is called by the token contract
+        fund.sendAllTokens_callback(fundTokens, _sender = token.address)
+
+        # THEN the fund is zero'ed
+        scenario.verify(token.data.balances[fund.address].balance == 0)
+
+        # AND the recipient was credited the tokens.
+        scenario.verify(token.data.balances[recipientAddress].balance == fundTokens)
+
+        # AND the state is reset
+        scenario.verify(fund.data.state == proxy.IDLE)
+        scenario.verify(fund.data.sendAllTokens_destination == None)
+
+    @sp.add_test()
     def test():
-      scenario = sp.test_scenario()
-
-      # GIVEN a Token contract.
-      governorAddress = Addresses.GOVERNOR_ADDRESS
-      token = Token.FA12(
-        admin = governorAddress
-      )
-      scenario += token
-
-      # AND a LiquidityFund contract that is waiting to send a balance to Alice
-      recipientAddress = Addresses.ALICE_ADDRESS 
-      fund = LiquidityFundContract(
-        governorContractAddress = governorAddress,
-        tokenContractAddress = token.address,
-
-        state = WAITING_FOR_TOKEN_BALANCE,
-        sendAllTokens_destination = sp.some(recipientAddress)
-      )
-      scenario += fund
-
-      # AND the fund has $1000 of tokens.
-      fundTokens = 1000 * Constants.PRECISION 
-      mintForFundParam = sp.record(address = fund.address, value = fundTokens)
-      scenario += token.mint(mintForFundParam).run(
-        sender = governorAddress
-      )
-
-      # WHEN sendAllTokens_callback is called by the token contract
-      scenario += fund.sendAllTokens_callback(fundTokens).run(
-        sender = token.address,
-      )
-
-      # THEN the fund is zero'ed
-      scenario.verify(token.data.balances[fund.address].balance == 0)
-
-      # AND the recipient was credited the tokens.
-      scenario.verify(token.data.balances[recipientAddress].balance == fundTokens)
-
-      # AND the state is reset
-      scenario.verify(fund.data.state == IDLE)
-      scenario.verify(fund.data.sendAllTokens_destination == sp.none)
-
-    @sp.add_test(name="sendAllTokens_callback - fails if sender is not the token contract")
+        scenario = sp.test_scenario("sendAllTokens_callback - fails if sender is not the token contract", MODULES)
+
+        # GIVEN a Token contract.
+        governorAddress = Addresses.GOVERNOR_ADDRESS
+        token = kusdTokenContract(admin = governorAddress)
+        scenario += token
+
+        # AND a LiquidityFund contract that is waiting to send a balance to Alice
+        recipientAddress = Addresses.ALICE_ADDRESS
+        fund = fundContract(
+            governorContractAddress = governorAddress,
+            tokenContractAddress = token.address,
+
+            state = proxy.WAITING_FOR_TOKEN_BALANCE,
+            sendAllTokens_destination = sp.Some(recipientAddress)
+        )
+        scenario += fund
+
+        # AND the fund has $1000 of tokens.
+        fundTokens = 1000 * PRECISION
+        mintForFundParam = sp.record(address = fund.address, value = fundTokens)
+        token.mint(mintForFundParam, _sender = governorAddress)
+
+        # WHEN sendAllTokens_callback is called by someone other than the token contract
+        # THEN the call fails with BAD_SENDER
+        notToken = Addresses.NULL_ADDRESS
+        fund.sendAllTokens_callback(fundTokens, _sender = notToken, _valid = False, _exception = Errors.BAD_SENDER)
+
+    @sp.add_test()
     def test():
-      scenario = sp.test_scenario()
-
-      # GIVEN a Token contract.
-      governorAddress = Addresses.GOVERNOR_ADDRESS
-      token = Token.FA12(
-        admin = governorAddress
-      )
-      scenario += token
-
-      # AND a LiquidityFund contract that is waiting to send a balance to Alice
-      recipientAddress = Addresses.ALICE_ADDRESS 
-      fund = LiquidityFundContract(
-        governorContractAddress = governorAddress,
-        tokenContractAddress = token.address,
-
-        state = WAITING_FOR_TOKEN_BALANCE,
-        sendAllTokens_destination = sp.some(recipientAddress)
-      )
-      scenario += fund
-
-      # AND the fund has $1000 of tokens.
-      fundTokens = 1000 * Constants.PRECISION 
-      mintForFundParam = sp.record(address = fund.address, value = fundTokens)
-      scenario += token.mint(mintForFundParam).run(
-        sender = governorAddress
-      )
-
-      # WHEN sendAllTokens_callback is called by someone other than the token contract
-      # THEN the call fails with BAD_SENDER
-      notToken = Addresses.NULL_ADDRESS
-      scenario += fund.sendAllTokens_callback(fundTokens).run(
-        sender = notToken,
-
-        valid = False,
-        exception = Errors.BAD_SENDER
-      )
-
-    @sp.add_test(name="sendAllTokens_callback - fails in wrong state")
+        scenario = sp.test_scenario("sendAllTokens_callback - fails in wrong state", MODULES)
+
+        # GIVEN a Token contract.
+        governorAddress = Addresses.GOVERNOR_ADDRESS
+        token = kusdTokenContract(admin = governorAddress)
+        scenario += token
+
+        # AND a LiquidityFund contract that is in the idle state
+        recipientAddress = Addresses.ALICE_ADDRESS
+        fund = fundContract(
+            governorContractAddress = governorAddress,
+            tokenContractAddress = token.address,
+
+            state = proxy.IDLE,
+            sendAllTokens_destination = None
+        )
+        scenario += fund
+
+        # AND the fund has $1000 of tokens.
+        fundTokens = 1000 * PRECISION
+        mintForFundParam = sp.record(address = fund.address, value = fundTokens)
+        token.mint(mintForFundParam, _sender = governorAddress)
+
+        # WHEN sendAllTokens_callback is called by the token contract
+        # THEN the call fails with BAD_STATE
+        fund.sendAllTokens_callback(fundTokens, _sender = token.address, _valid = False, _exception = Errors.BAD_STATE)
+
+    ################################################################
+    # getConfig
+    ################################################################
+
+    @sp.add_test()
     def test():
-      scenario = sp.test_scenario()
-
-      # GIVEN a Token contract.
-      governorAddress = Addresses.GOVERNOR_ADDRESS
-      token = Token.FA12(
-        admin = governorAddress
-      )
-      scenario += token
-
-      # AND a LiquidityFund contract that is in the idle state
-      recipientAddress = Addresses.ALICE_ADDRESS 
-      fund = LiquidityFundContract(
-        governorContractAddress = governorAddress,
-        tokenContractAddress = token.address,
-
-        state = IDLE,
-        sendAllTokens_destination = sp.none
-      )
-      scenario += fund
-
-      # AND the fund has $1000 of tokens.
-      fundTokens = 1000 * Constants.PRECISION 
-      mintForFundParam = sp.record(address = fund.address, value = fundTokens)
-      scenario += token.mint(mintForFundParam).run(
-        sender = governorAddress
-      )
-
-      # WHEN sendAllTokens_callback is called by the token contract
-      # THEN the call fails with BAD_STATE
-      scenario += fund.sendAllTokens_callback(fundTokens).run(
-        sender = token.address,
-
-        valid = False,
-        exception = Errors.BAD_STATE
-      )          
-
-    sp.add_compilation_target("liquidity-fund", LiquidityFundContract())
+        # GIVEN a LiquidityFund contract waiting for a token balance
+        scenario = sp.test_scenario("getConfig - returns the settings and state", MODULES)
+
+        fund = fundContract(
+            governorContractAddress = Addresses.GOVERNOR_ADDRESS,
+            executorContractAddress = Addresses.EXECUTOR_ADDRESS,
+            slippageTolerance = sp.nat(7),
+            maxDataDelaySec = sp.nat(120),
+            state = proxy.WAITING_FOR_TOKEN_BALANCE,
+        )
+        scenario += fund
+
+        # WHEN getConfig is run against its storage
+        config = fund.getConfig()
+
+        # THEN it returns the settings and state
+        scenario.verify(config.governorContractAddress == Addresses.GOVERNOR_ADDRESS)
+        scenario.verify(config.executorContractAddress == Addresses.EXECUTOR_ADDRESS)
+        scenario.verify(config.slippageTolerance == 7)
+        scenario.verify(config.maxDataDelaySec == 120)
+        scenario.verify(config.state == proxy.WAITING_FOR_TOKEN_BALANCE)
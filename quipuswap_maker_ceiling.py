@@ -1,5 +1,11 @@
+import json
+import os
+
 import smartpy as sp
 
+from common.constants import Constants
+from common.errors import Errors
+
 # Define addresses
 
 # The address which acts as the Governor
@@ -32,6 +38,9 @@ PAUSE_GUARDIAN_ADDRESS = sp.address("tz1YYnf7vGXqCmB1shNg4rHiTz5gwWTDYceB")
 # An address which will receive the swapped tokens
 RECEIVER_ADDRESS = sp.address("tz1YYnf7vGXqCmB1shNg4rHiTz5gwWTDYceB")
 
+# Where the TZIP-16 metadata written at compilation is pinned. Set this before deploying.
+METADATA_URL = "ipfs://"
+
 # An address of a Baker
 BAKER_PUBLIC_KEY_HASH = "tz3RDC3Jdn4j15J7bBHZd29EUee9gVB1CxD9"
 BAKER_ADDRESS = sp.address(BAKER_PUBLIC_KEY_HASH)
@@ -46,103 +55,6 @@ ALICE_ADDRESS = sp.address("tz1VQnqCCqX4K5sP3FNkVSNKTdCAMJDd3E1n")
 BOB_ADDRESS = sp.address("tz2FCNBrERXtaTtNX6iimR1UJ5JSDxvdHM93")
 CHARLIE_ADDRESS = sp.address("tz3S6BBeKgJGXxvLyZ1xzXzMPn11nnFtq5L9")
 
-# from test_helpers.addresses import addresses as Addresses
-# from common.constants import constants as Constants
-# from common.errors import errors as Errors
-
-
-################################################################
-# Constants
-################################################################
-
-
-@sp.module
-def Constants():
-    # The fixed point number representing 1 in the system, 10^18
-    PRECISION = sp.nat(1000000000000000000)
-
-    # The XTZUSDT asset pair reported by Youves.
-    XTZ_ASSET_CODE = "XTZUSDT"
-
-    # The USDTUSD asset pair reported by Youves.
-    USDT_ASSET_CODE = "USDTUSD"
-
-
-################################################################
-# Errors
-################################################################
-
-
-@sp.module
-def Errors():
-    # The sender of a contract invocation was required to be the Governor contract.
-    NOT_GOVERNOR = 1
-
-    # The sender of an operation was required to be the Administrator of the contract.
-    NOT_EXECUTOR = 2
-
-    # The sender of an operation was required to be the Pause Guardian.
-    NOT_PAUSE_GUARDIAN = 3
-
-    # The data provided was too old.
-    STALE_DATA = 4
-
-    # The system is paused.
-    PAUSED = 5
-
-    # Cannot receive funds.
-    CANNOT_RECEIVE_FUNDS = 6
-
-    # The swap was attempted before min delay time
-    TRADE_TIME = 7
-
-    # USDT does not equal USD
-    USDT_PEG = 8
-
-    # Not enough tokens to perform swap
-    NOT_ENOUGH_TOKENS = 9
-
-    # The sender was not the expected contract
-    BAD_SENDER = 10
-
-    # Error calling view on Youves spot
-    SPOT_VIEW_ERROR = 12
-
-    # Error while interacting with DEX contract
-    DEX_CONTRACT_ERROR = 13
-
-    # Wrong state while interacting with function
-    BAD_STATE = 14
-
-    # Error while calling approve on token
-    APPROVAL = 15
-
-    # Error while executing the transfer function in token
-    TOKEN_TRANSFER = 17
-
-    # Error while retrieving balance of token
-    BALANCE_REQUEST = 18
-
-    ## BELOW ARE ONLY USED IN TESTS ##
-    # The user did not have a sufficient token balance to complete the operation.
-    TOKEN_INSUFFICIENT_BALANCE = 19
-
-    # The allowance change was unsafe. Please reset the allowance to zero before trying to operation again.
-    TOKEN_UNSAFE_ALLOWANCE_CHANGE = 20
-
-    # The operation was not performed by the token administrator.
-    TOKEN_NOT_ADMINISTRATOR = 21
-
-    # The debt ceiling would be exceeded if the operation were completed.
-    DEBT_CEILING = 22
-
-    # The user was not allowed to perform a token transfer.
-    TOKEN_NO_TRANSFER_PERMISSION = 23
-
-    # The sender of an operation was required to be Executor or Governor
-    NOT_AUTHORIZED = 24
-
-
 ################################################################
 # Contract
 ################################################################
@@ -152,12 +64,20 @@ def Errors():
 def quipu():
     import Constants
     import Errors
-    import smartpy.utils as utils
+    import smartpy.stdlib.utils as utils
 
     # State Machine
     IDLE = 0
     WAITING_FOR_TOKEN_BALANCE = 1
 
+    # A trade kept in the ring buffer of recent trades.
+    TRADE_TYPE: type = sp.record(
+        time = sp.timestamp,
+        tokenAmount = sp.nat,  # Normalized tokens sold
+        spotPrice = sp.nat,
+        requiredOut = sp.nat,  # The least mutez Quipuswap had to pay out
+    )
+
     class MakerContract(sp.Contract):
         def __init__(
             self,
@@ -169,12 +89,20 @@ def quipu():
             tokenAddress,
             paused,
             maxDataDelaySec,  
-            minTradeDelaySec,  # Time to wait in seconds between allowing swaps (use 0 to allow batch transactions)
+            refillRatePerSec,  # Normalized tokens added to the rate limit bucket each second
+            bucketCapacity,  # The most normalized tokens the bucket holds, which is the largest possible burst
             spreadAmount,  # How far below the oracle price the exchange price must be in percent before allowing a swap. Scale 1-1000, 10=1%
-            tradeAmount,
+            volatilityTolerance,  # How far the spot price may be from its moving average before swaps are rejected. Scale 1-1000, 10=1%
+            emaWeight,  # Weight of each new spot price in the moving average. Scale 1-1000, 100=10%
+            bucketLevel,  # Normalized tokens in the bucket at lastRefillTime
+            emaPrice,  # Moving average of the spot price, 0 until the first poke
             tokenBalance,  # this should be 0 when deployed
             lastTradeTime,
+            lastRefillTime,
+            emaSpotTime,  # Time of the last spot price in the moving average, in milliseconds like Youves
             state,
+            tradeHistorySize,  # Trades kept in the ring buffer of recent trades
+            metadata,  # TZIP-16 metadata, with the URL of the JSON under the empty key
         ):
             self.data.governorContractAddress = governorContractAddress
             self.data.pauseGuardianContractAddress = pauseGuardianContractAddress
@@ -184,26 +112,113 @@ def quipu():
             self.data.tokenAddress = tokenAddress
             self.data.paused = paused
             self.data.maxDataDelaySec = maxDataDelaySec
-            self.data.minTradeDelaySec = minTradeDelaySec
+            self.data.refillRatePerSec = refillRatePerSec
+            self.data.bucketCapacity = bucketCapacity
             self.data.spreadAmount = spreadAmount
-            self.data.tradeAmount = tradeAmount
+            self.data.volatilityTolerance = volatilityTolerance
+            # A weight above 1000 would fail every trade and poke once the average has started, as in setEmaWeight.
+            assert emaWeight <= 1000, Errors.BAD_STATE
+            self.data.emaWeight = emaWeight
+            self.data.bucketLevel = bucketLevel
+            self.data.emaPrice = emaPrice
             self.data.tokenBalance = tokenBalance
             self.data.lastTradeTime = lastTradeTime
+            self.data.lastRefillTime = lastRefillTime
+            self.data.emaSpotTime = emaSpotTime
             self.data.state = state
+            self.data.metadata = sp.cast(metadata, sp.big_map[sp.string, sp.bytes])
+
+            # Totals over every trade, and the last `tradeHistorySize` trades keyed by trade number modulo the size.
+            # The size is fixed here, and a size of 0 would fail every trade on the modulo.
+            assert tradeHistorySize > 0, Errors.BAD_STATE
+            self.data.tradeCount = sp.nat(0)
+            self.data.totalTokensSold = sp.nat(0)
+            self.data.totalRequiredOut = sp.nat(0)
+            self.data.tradeHistorySize = sp.cast(tradeHistorySize, sp.nat)
+            self.data.trades = sp.cast(sp.big_map(), sp.big_map[sp.nat, TRADE_TYPE])
+
+        ################################################################
+        # Moving average
+        ################################################################
+
+        # Read the XTZ spot price and its time from Youves, failing if it is stale.
+        @sp.private()
+        def freshSpotPrice(self, spotContractAddress, maxDataDelaySec):
+            youvesSpot = sp.view(
+                "get_price_with_timestamp",
+                spotContractAddress,
+                Constants.XTZ_ASSET_CODE,
+                sp.pair[
+                    sp.nat, # Price
+                    sp.timestamp,  # Time
+                ]
+            ).unwrap_some(error=Errors.SPOT_VIEW_ERROR)
+
+            # Assert that the Youves XTZ data is newer than max data delay
+            spotAge = utils.seconds_of_timestamp(sp.snd(youvesSpot)) / 1000 # Convert this timestamp from milliseconds to seconds
+            dataAge = utils.seconds_of_timestamp(sp.now) - spotAge
+            assert sp.as_nat(dataAge) <= maxDataDelaySec, Errors.STALE_DATA
+            return youvesSpot
+
+        # The bucket level now: the level at the last refill plus the tokens accrued since, up to the capacity.
+        @sp.private()
+        def refilledBucketLevel(self, bucketLevel, lastRefillTime, refillRatePerSec, bucketCapacity):
+            elapsedSeconds = sp.as_nat(sp.now - lastRefillTime)
+            return sp.min(bucketLevel + elapsedSeconds * refillRatePerSec, bucketCapacity)
+
+        # The moving average after folding in a spot price, and the time of its last spot price.
+        # Each Youves update is only counted once, so repeated calls cannot drag the average to the spot price.
+        @sp.private()
+        def updatedEma(self, emaPrice, emaSpotTime, emaWeight, youvesSpot):
+            ema = (emaPrice, emaSpotTime)
+            if sp.snd(youvesSpot) > emaSpotTime:
+                if emaPrice == 0:
+                    ema = youvesSpot
+                else:
+                    ema = ((sp.fst(youvesSpot) * emaWeight + emaPrice * sp.as_nat(1000 - emaWeight)) / 1000, sp.snd(youvesSpot))
+            return ema
+
+        # Update the moving average with the current spot price. Can be called by anyone.
+        @sp.entrypoint
+        def poke(self):
+            assert sp.amount == sp.tez(0)
+            youvesSpot = self.freshSpotPrice(sp.record(
+                spotContractAddress = self.data.spotContractAddress,
+                maxDataDelaySec = self.data.maxDataDelaySec,
+            ))
+            (emaPrice, emaSpotTime) = self.updatedEma(sp.record(
+                emaPrice = self.data.emaPrice,
+                emaSpotTime = self.data.emaSpotTime,
+                emaWeight = self.data.emaWeight,
+                youvesSpot = youvesSpot,
+            ))
+            self.data.emaPrice = emaPrice
+            self.data.emaSpotTime = emaSpotTime
 
         ################################################################
         # Quipuswap API
         ################################################################
 
+        # Sell `tokenAmount` normalized tokens, up to the current bucket level.
         @sp.entrypoint
-        def tokenToTezPayment(self):
+        def tokenToTezPayment(self, tokenAmount):
             # Verify the contract isn't paused.
             assert sp.amount == sp.tez(0)
             assert not self.data.paused, Errors.PAUSED
+            sp.cast(tokenAmount, sp.nat)
 
-            # Make sure enough time has passed
-            timeDeltaSeconds = sp.as_nat(sp.now - self.data.lastTradeTime)
-            assert timeDeltaSeconds >= self.data.minTradeDelaySec, Errors.TRADE_TIME
+            assert tokenAmount > 0, Errors.ZERO_TOKEN_AMOUNT
+
+            # Take the trade out of the rate limit bucket, after adding the tokens accrued since the last refill
+            self.data.bucketLevel = self.refilledBucketLevel(sp.record(
+                bucketLevel = self.data.bucketLevel,
+                lastRefillTime = self.data.lastRefillTime,
+                refillRatePerSec = self.data.refillRatePerSec,
+                bucketCapacity = self.data.bucketCapacity,
+            ))
+            self.data.lastRefillTime = sp.now
+            assert tokenAmount <= self.data.bucketLevel, Errors.RATE_LIMITED
+            self.data.bucketLevel = sp.as_nat(self.data.bucketLevel - tokenAmount)
 
             # Tether depeg protection
             # Read USDTUSD price from Youves
@@ -230,26 +245,31 @@ def quipu():
             assert sp.as_nat(usdtDataAge) <= self.data.maxDataDelaySec, Errors.STALE_DATA
             
             # Read spot price from Youves Spot
-            youvesSpot = sp.view(
-                "get_price_with_timestamp",
-                self.data.spotContractAddress,
-                Constants.XTZ_ASSET_CODE,
-                sp.pair[
-                    sp.nat, # Price
-                    sp.timestamp,  # Time
-                ]
-            ).unwrap_some(error=Errors.SPOT_VIEW_ERROR)
+            youvesSpot = self.freshSpotPrice(sp.record(
+                spotContractAddress = self.data.spotContractAddress,
+                maxDataDelaySec = self.data.maxDataDelaySec,
+            ))
 
             # Extract spot price
             spotPrice = sp.fst(youvesSpot)
-            
-            # Assert that the Youves XTZ data is newer than max data delay
-            spotAge = utils.seconds_of_timestamp(sp.snd(youvesSpot)) / 1000 # Convert this timestamp from milliseconds to seconds
-            dataAge = utils.seconds_of_timestamp(sp.now) - spotAge
-            assert sp.as_nat(dataAge) <= self.data.maxDataDelaySec, Errors.STALE_DATA
+
+            # Volatility protection
+            # Assert that the spot price is within tolerance of its moving average, then update the average
+            deviation = abs(spotPrice - self.data.emaPrice)
+            assert (
+                deviation * 1000 <= self.data.emaPrice * self.data.volatilityTolerance
+            ), Errors.VOLATILITY
+            (emaPrice, emaSpotTime) = self.updatedEma(sp.record(
+                emaPrice = self.data.emaPrice,
+                emaSpotTime = self.data.emaSpotTime,
+                emaWeight = self.data.emaWeight,
+                youvesSpot = youvesSpot,
+            ))
+            self.data.emaPrice = emaPrice
+            self.data.emaSpotTime = emaSpotTime
 
             # Upsample
-            tokensToTrade = self.data.tradeAmount * Constants.PRECISION
+            tokensToTrade = tokenAmount * Constants.PRECISION
 
             # Calculate the expected XTZ with no slippage.
             # Expected out with no slippage = (number of tokens to trade / mutez Spot price) / 1e6
@@ -281,6 +301,17 @@ def quipu():
             # Write last trade timestamp to storage
             self.data.lastTradeTime = sp.now
 
+            # Record the trade, overwriting the oldest one once the ring buffer is full.
+            self.data.trades[sp.mod(self.data.tradeCount, self.data.tradeHistorySize)] = sp.record(
+                time = sp.now,
+                tokenAmount = tokenAmount,
+                spotPrice = spotPrice,
+                requiredOut = requiredOut,
+            )
+            self.data.tradeCount += 1
+            self.data.totalTokensSold += tokenAmount
+            self.data.totalRequiredOut += requiredOut
+
             # Revoke Quipuswap contract approval on token contract
             approveHandle = sp.contract(
                 sp.pair[sp.address, sp.nat], self.data.tokenAddress, "approve"
@@ -375,23 +406,61 @@ def quipu():
             assert sp.sender == self.data.governorContractAddress, Errors.NOT_GOVERNOR
             self.data.maxDataDelaySec = newMaxDataDelaySec
 
-        # Update the delay between swaps.
+        # Update the bucket refill rate (in normalized tokens per second).
+        # Tokens accrued at the old rate are kept.
+        @sp.entrypoint
+        def setRefillRatePerSec(self, newRefillRatePerSec):
+            assert sp.amount == sp.tez(0)
+            sp.cast(newRefillRatePerSec, sp.nat)
+
+            assert sp.sender == self.data.governorContractAddress, Errors.NOT_GOVERNOR
+            # Add the tokens accrued since the last refill to the bucket, up to its capacity.
+            self.data.bucketLevel = self.refilledBucketLevel(sp.record(
+                bucketLevel = self.data.bucketLevel,
+                lastRefillTime = self.data.lastRefillTime,
+                refillRatePerSec = self.data.refillRatePerSec,
+                bucketCapacity = self.data.bucketCapacity,
+            ))
+            self.data.lastRefillTime = sp.now
+            self.data.refillRatePerSec = newRefillRatePerSec
+
+        # Update the bucket capacity (in normalized tokens).
+        # A lower capacity also drains the bucket down to it.
+        @sp.entrypoint
+        def setBucketCapacity(self, newBucketCapacity):
+            assert sp.amount == sp.tez(0)
+            sp.cast(newBucketCapacity, sp.nat)
+
+            assert sp.sender == self.data.governorContractAddress, Errors.NOT_GOVERNOR
+            # Add the tokens accrued since the last refill to the bucket, up to its capacity.
+            self.data.bucketLevel = self.refilledBucketLevel(sp.record(
+                bucketLevel = self.data.bucketLevel,
+                lastRefillTime = self.data.lastRefillTime,
+                refillRatePerSec = self.data.refillRatePerSec,
+                bucketCapacity = self.data.bucketCapacity,
+            ))
+            self.data.lastRefillTime = sp.now
+            self.data.bucketCapacity = newBucketCapacity
+            self.data.bucketLevel = sp.min(self.data.bucketLevel, newBucketCapacity)
+
+        # Set volatility tolerance (in tenths of a percent)
         @sp.entrypoint
-        def setMinTradeDelaySec(self, newMinTradeDelaySec):
+        def setVolatilityTolerance(self, newVolatilityTolerance):
             assert sp.amount == sp.tez(0)
-            newMinTradeDelaySec = sp.cast(newMinTradeDelaySec, sp.nat)
+            sp.cast(newVolatilityTolerance, sp.nat)
 
             assert sp.sender == self.data.governorContractAddress, Errors.NOT_GOVERNOR
-            self.data.minTradeDelaySec = newMinTradeDelaySec
+            self.data.volatilityTolerance = newVolatilityTolerance
 
-        # Set the trade amount (in normalized tokens).
+        # Set the weight of new spot prices in the moving average (in tenths of a percent)
         @sp.entrypoint
-        def setTradeAmount(self, newTradeAmount):
+        def setEmaWeight(self, newEmaWeight):
             assert sp.amount == sp.tez(0)
-            newTradeAmount = sp.cast(newTradeAmount, sp.nat)
+            sp.cast(newEmaWeight, sp.nat)
 
             assert sp.sender == self.data.governorContractAddress, Errors.NOT_GOVERNOR
-            self.data.tradeAmount = newTradeAmount
+            assert newEmaWeight <= 1000, Errors.BAD_STATE
+            self.data.emaWeight = newEmaWeight
 
         # Set spread amount (in tenths of a percent)
         @sp.entrypoint
@@ -466,6 +535,55 @@ def quipu():
 
             assert sp.sender == self.data.governorContractAddress, Errors.NOT_GOVERNOR
             self.data.receiverContractAddress = newReceiverContractAddress
+
+        ################################################################
+        # Views
+        ################################################################
+
+        # The settings and state of the contract in one call (TZIP-16 off-chain view).
+        # `availableTokens` is what a trade could sell now and `tokenBalance` is
+        # the balance recorded by the last `returnBalance`.
+        @sp.offchain_view()
+        def getConfig(self):
+            return sp.record(
+                governorContractAddress = self.data.governorContractAddress,
+                pauseGuardianContractAddress = self.data.pauseGuardianContractAddress,
+                receiverContractAddress = self.data.receiverContractAddress,
+                spotContractAddress = self.data.spotContractAddress,
+                quipuswapContractAddress = self.data.quipuswapContractAddress,
+                tokenAddress = self.data.tokenAddress,
+                maxDataDelaySec = self.data.maxDataDelaySec,
+                spreadAmount = self.data.spreadAmount,
+                volatilityTolerance = self.data.volatilityTolerance,
+                emaWeight = self.data.emaWeight,
+                refillRatePerSec = self.data.refillRatePerSec,
+                bucketCapacity = self.data.bucketCapacity,
+                paused = self.data.paused,
+                lastTradeTime = self.data.lastTradeTime,
+                availableTokens = self.refilledBucketLevel(sp.record(
+                    bucketLevel = self.data.bucketLevel,
+                    lastRefillTime = self.data.lastRefillTime,
+                    refillRatePerSec = self.data.refillRatePerSec,
+                    bucketCapacity = self.data.bucketCapacity,
+                )),
+                emaPrice = self.data.emaPrice,
+                tokenBalance = self.data.tokenBalance,
+                state = self.data.state,
+            )
+
+        # Trade totals and the recent trades, newest first (TZIP-16 off-chain view).
+        @sp.offchain_view()
+        def getTrades(self):
+            recentCount = sp.min(self.data.tradeCount, self.data.tradeHistorySize)
+            recentTrades = []
+            for tradeNumber in range(sp.as_nat(self.data.tradeCount - recentCount), self.data.tradeCount):
+                recentTrades.push(self.data.trades[sp.mod(tradeNumber, self.data.tradeHistorySize)])
+            return sp.record(
+                tradeCount = self.data.tradeCount,
+                totalTokensSold = self.data.totalTokensSold,
+                totalRequiredOut = self.data.totalRequiredOut,
+                recentTrades = recentTrades,
+            )
 			
 # # Only run tests if this file is main.
 # if __name__ == "__main__":
@@ -476,9 +594,9 @@ def quipu():
 #   ################################################################
 #   ################################################################
   
-#   FakeHarbingerVwap = sp.io.import_script_from_url("file:test-helpers/fake-harbinger-normalizer.py")
-#   FakeHarbingerSpot = sp.import_script_from_url("file:test-helpers/fake-harbinger-spot.py")
-#   FakeQuipuswap = sp.io.import_script_from_url("file:test-helpers/fake-quipuswap.py")
+#   from test_helpers.fake_harbinger_normalizer import fakeHarbinger as FakeHarbingerVwap
+#   from test_helpers.fake_harbinger_spot import fakeHarbingerSpot as FakeHarbingerSpot
+#   from test_helpers.fake_quipuswap import fakeQuipuswap as FakeQuipuswap
 
 
 #   ################################################################
@@ -1299,3 +1417,466 @@ def quipu():
 #     )    
 
 #   sp.add_compilation_target("quipu_swapper", MakerContract())
+
+# Descriptions of the off-chain views in the TZIP-16 metadata.
+VIEW_DESCRIPTIONS = {
+    "getConfig": "The settings and state of the contract, the tokens a trade could sell now and the last recorded token balance.",
+    "getTrades": "The number of trades, the normalized tokens sold and the mutez required out over all trades, and the most recent trades, newest first.",
+}
+
+# Only compile if this file is main.
+if __name__ == "__main__":
+    from common.constants import PRECISION, USDT_ASSET_CODE, XTZ_ASSET_CODE
+    from test_helpers.kusd_token import kusdToken, kusdTokenContract
+    from test_helpers.fake_quipuswap import fakeQuipuswap
+    from test_helpers.fake_replay_oracle import fakeReplayOracle, replayOracle
+
+    MODULES = [quipu, kusdToken, fakeQuipuswap, fakeReplayOracle]
+
+    # A MakerContract trading against fakes from `currentTime` seconds. The spot oracle replays
+    # `spotPrices` every `intervalSec` seconds from `currentTime`, with USDT always at $1.00.
+    # Given a `tokenPool`, the maker trades against a constant product pool holding `tezPool`
+    # mutez and `tokenPool` tokens, rather than one which only records the trade.
+    def makerWithFakes(
+        scenario,
+        currentTime,
+        refillRatePerSec = 10,
+        bucketCapacity = 5000,
+        bucketLevel = 0,
+        spotPrices = [1_000_000],
+        intervalSec = 60,
+        emaPrice = 1_000_000,
+        volatilityTolerance = 1000,
+        emaWeight = 100,
+        tradeHistorySize = 100,
+        tezPool = 0,
+        tokenPool = None,
+    ):
+        spot = replayOracle(
+            series = {
+                XTZ_ASSET_CODE: [sp.nat(price) for price in spotPrices],
+                USDT_ASSET_CODE: [sp.nat(1_000_000)],
+            },
+            startTime = sp.timestamp(currentTime),
+            intervalSec = sp.nat(intervalSec),
+        )
+        scenario += spot
+        token = kusdTokenContract(admin = GOVERNOR_ADDRESS)
+        scenario += token
+        if tokenPool is None:
+            quipuswap = fakeQuipuswap.FakeQuipuswapContract()
+            scenario += quipuswap
+        else:
+            quipuswap = fakeQuipuswap.FakeConstantProductQuipuswapContract(
+                tokenAddress = token.address,
+                tezPool = sp.nat(tezPool),
+                tokenPool = sp.nat(tokenPool),
+            )
+            quipuswap.set_initial_balance(sp.mutez(tezPool))
+            scenario += quipuswap
+            token.mint(sp.record(address = quipuswap.address, value = sp.nat(tokenPool)), _sender = GOVERNOR_ADDRESS)
+
+        maker = quipu.MakerContract(
+            governorContractAddress = GOVERNOR_ADDRESS,
+            pauseGuardianContractAddress = PAUSE_GUARDIAN_ADDRESS,
+            receiverContractAddress = RECEIVER_ADDRESS,
+            spotContractAddress = spot.address,
+            quipuswapContractAddress = quipuswap.address,
+            tokenAddress = token.address,
+            paused = False,
+            maxDataDelaySec = sp.nat(60 * 5),
+            refillRatePerSec = sp.nat(refillRatePerSec),
+            bucketCapacity = sp.nat(bucketCapacity),
+            spreadAmount = sp.nat(0),
+            volatilityTolerance = sp.nat(volatilityTolerance),
+            emaWeight = sp.nat(emaWeight),
+            bucketLevel = sp.nat(bucketLevel),
+            emaPrice = sp.nat(emaPrice),
+            tokenBalance = sp.nat(0),
+            lastTradeTime = sp.timestamp(0),
+            lastRefillTime = sp.timestamp(0),
+            emaSpotTime = sp.timestamp(0),
+            state = sp.int(0),
+            tradeHistorySize = sp.nat(tradeHistorySize),
+            metadata = sp.scenario_utils.metadata_of_url(METADATA_URL),
+        )
+        scenario += maker
+        # The maker sells the kUSD it holds, and kUSD only records approvals of holders.
+        token.mint(sp.record(address = maker.address, value = sp.nat(bucketCapacity * PRECISION)), _sender = GOVERNOR_ADDRESS)
+        return maker, quipuswap, spot
+
+    # The error code `originate` fails with, where a contract's `__init__` is expected to fail.
+    # SmartPy fails a contract while building it, so this is checked outside the scenario.
+    def originationErrorCode(originate):
+        try:
+            originate()
+        except sp.FailwithException as failure:
+            assert failure.value.isdigit(), "origination failed with %s rather than an error code" % failure.value
+            return int(failure.value)
+        raise AssertionError("origination did not fail")
+
+    @sp.add_test()
+    def compilation():
+        scenario = sp.test_scenario("quipu_swapper", quipu)
+        maker = quipu.MakerContract(
+            governorContractAddress = GOVERNOR_ADDRESS,
+            pauseGuardianContractAddress = PAUSE_GUARDIAN_ADDRESS,
+            receiverContractAddress = RECEIVER_ADDRESS,
+            spotContractAddress = YOUVES_SPOT_ADDRESS,
+            quipuswapContractAddress = QUIPUSWAP_ADDRESS,
+            tokenAddress = TOKEN_ADDRESS,
+            paused = False,
+            maxDataDelaySec = sp.nat(60 * 5), # 5 minutes
+            refillRatePerSec = sp.nat(1), # 3600 tokens an hour
+            bucketCapacity = sp.nat(5000),
+            spreadAmount = sp.nat(60), # 6%
+            volatilityTolerance = sp.nat(30), # 3%
+            emaWeight = sp.nat(100), # 10%
+            bucketLevel = sp.nat(0),
+            emaPrice = sp.nat(0),
+            tokenBalance = sp.nat(0),
+            lastTradeTime = sp.timestamp(0),
+            lastRefillTime = sp.timestamp(0),
+            emaSpotTime = sp.timestamp(0),
+            state = sp.int(0),
+            tradeHistorySize = sp.nat(100),
+            metadata = sp.scenario_utils.metadata_of_url(METADATA_URL),
+        )
+        scenario += maker
+
+        # Write the TZIP-16 metadata next to the compiled contract, to be pinned at METADATA_URL.
+        metadata = sp.create_tzip16_metadata(
+            name = "Quipuswap Maker Ceiling",
+            description = "Sells kUSD for XTZ on Quipuswap when the price is above the Youves spot price.",
+            interfaces = ["TZIP-016"],
+            offchain_views = maker.get_offchain_views(),
+        )
+        for view in metadata["views"]:
+            view["description"] = VIEW_DESCRIPTIONS[view["name"]]
+            for implementation in view["implementations"]:
+                # TZIP-16 leaves out the parameter of a view which takes none.
+                if implementation["michelsonStorageView"]["parameter"] is None:
+                    del implementation["michelsonStorageView"]["parameter"]
+        with open(os.path.join("quipu_swapper", "metadata.json"), "w") as file:
+            json.dump(metadata, file, indent = 2)
+            file.write("\n")
+
+    ################################################################
+    # Rate limit
+    ################################################################
+
+    @sp.add_test()
+    def test():
+        scenario = sp.test_scenario("tokenToTezPayment - sells any amount up to the bucket level", MODULES)
+
+        # GIVEN a maker whose empty bucket refills at 10 tokens a second
+        currentTime = 100
+        maker, quipuswap, spot = makerWithFakes(scenario, currentTime, refillRatePerSec = 10, bucketCapacity = 5000)
+
+        # WHEN 600 of the 1000 tokens accrued after 100 seconds are sold in one call
+        maker.tokenToTezPayment(600, _now = sp.timestamp(currentTime))
+
+        # THEN the whole amount is traded for at least its value at spot and taken out of the bucket
+        scenario.verify(quipuswap.data.amountOut == 600_000_000)
+        scenario.verify(quipuswap.data.destination == RECEIVER_ADDRESS)
+        scenario.verify(maker.data.bucketLevel == 400)
+        scenario.verify(maker.data.lastTradeTime == sp.timestamp(currentTime))
+
+        # AND more than the remaining 400 tokens cannot be sold in the same block
+        maker.tokenToTezPayment(401, _now = sp.timestamp(currentTime), _valid = False, _exception = Errors.RATE_LIMITED)
+
+        # AND the remaining 400 tokens can
+        maker.tokenToTezPayment(400, _now = sp.timestamp(currentTime))
+        scenario.verify(maker.data.bucketLevel == 0)
+
+    @sp.add_test()
+    def test():
+        scenario = sp.test_scenario("tokenToTezPayment - bucket refill stops at its capacity", MODULES)
+
+        # GIVEN a maker whose bucket refills at 10 tokens a second up to 5000 tokens
+        currentTime = 10_000
+        maker, quipuswap, spot = makerWithFakes(scenario, currentTime, refillRatePerSec = 10, bucketCapacity = 5000)
+
+        # WHEN more than the capacity is sold long after the last refill THEN the call fails
+        maker.tokenToTezPayment(5001, _now = sp.timestamp(currentTime), _valid = False, _exception = Errors.RATE_LIMITED)
+
+        # AND the capacity itself can be sold
+        maker.tokenToTezPayment(5000, _now = sp.timestamp(currentTime))
+        scenario.verify(maker.data.bucketLevel == 0)
+
+    @sp.add_test()
+    def test():
+        scenario = sp.test_scenario("tokenToTezPayment - fails to sell no tokens", MODULES)
+
+        # GIVEN a maker with tokens in its bucket
+        currentTime = 100
+        maker, quipuswap, spot = makerWithFakes(scenario, currentTime, refillRatePerSec = 10, bucketCapacity = 5000)
+
+        # WHEN no tokens are sold THEN the call fails
+        maker.tokenToTezPayment(0, _now = sp.timestamp(currentTime), _valid = False, _exception = Errors.ZERO_TOKEN_AMOUNT)
+
+        # AND nothing was traded or recorded
+        scenario.verify(maker.data.tradeCount == 0)
+        scenario.verify(maker.data.lastRefillTime == sp.timestamp(0))
+
+    ################################################################
+    # Trading against a constant product pool
+    ################################################################
+
+    # The mutez a constant product pool pays out for `tokensIn`, after its 0.3% fee.
+    def constantProductTezOut(tezPool, tokenPool, tokensIn):
+        tokensInWithFee = tokensIn * 997
+        return tokensInWithFee * tezPool // (tokenPool * 1000 + tokensInWithFee)
+
+    @sp.add_test()
+    def test():
+        scenario = sp.test_scenario("tokenToTezPayment - sells into a constant product pool above spot", MODULES)
+
+        # GIVEN a spot price of $1.00 for XTZ
+        # AND a pool of 1,000,000 XTZ and 500,000 tokens, which pays about 2 XTZ a token
+        currentTime = 100
+        tezPool = 1_000_000_000_000
+        tokenPool = 500_000 * PRECISION
+        maker, quipuswap, spot = makerWithFakes(scenario, currentTime, tezPool = tezPool, tokenPool = tokenPool)
+
+        # WHEN the 1000 tokens accrued after 100 seconds are sold
+        maker.tokenToTezPayment(1000, _now = sp.timestamp(currentTime))
+
+        # THEN the pool pulls the tokens and pays out its price after the fee, above the 1000 XTZ required at spot
+        tokensIn = 1000 * PRECISION
+        tezOut = constantProductTezOut(tezPool, tokenPool, tokensIn)
+        assert tezOut > 1_000_000_000
+        scenario.verify(quipuswap.data.amountOut == tezOut)
+        scenario.verify(quipuswap.data.tokenPool == tokenPool + tokensIn)
+        scenario.verify(quipuswap.data.tezPool == tezPool - tezOut)
+        scenario.verify(quipuswap.balance == sp.mutez(tezPool - tezOut))
+
+        # AND the trade records the 1000 XTZ required at spot
+        scenario.verify(maker.data.trades[0].requiredOut == 1_000_000_000)
+
+    @sp.add_test()
+    def test():
+        scenario = sp.test_scenario("tokenToTezPayment - fails when a constant product pool pays less than spot", MODULES)
+
+        # GIVEN a spot price of $1.00 for XTZ
+        # AND a pool of 1,000,000 XTZ and 1,000,000 tokens, which pays 1 XTZ a token before its fee
+        currentTime = 100
+        tezPool = 1_000_000_000_000
+        tokenPool = 1_000_000 * PRECISION
+        maker, quipuswap, spot = makerWithFakes(scenario, currentTime, tezPool = tezPool, tokenPool = tokenPool)
+
+        # WHEN 1000 tokens are sold THEN the pool pays less than the 1000 XTZ required at spot and the trade fails
+        assert constantProductTezOut(tezPool, tokenPool, 1000 * PRECISION) < 1_000_000_000
+        maker.tokenToTezPayment(1000, _now = sp.timestamp(currentTime), _valid = False, _exception = "Dex/high-min-out")
+
+        # AND the pool is unchanged
+        scenario.verify(quipuswap.data.tokenPool == tokenPool)
+        scenario.verify(quipuswap.data.tezPool == tezPool)
+
+    @sp.add_test()
+    def test():
+        scenario = sp.test_scenario("setRefillRatePerSec - keeps tokens accrued at the old rate", MODULES)
+
+        # GIVEN a maker whose empty bucket refills at 10 tokens a second
+        maker, quipuswap, spot = makerWithFakes(scenario, 0, refillRatePerSec = 10, bucketCapacity = 5000)
+
+        # WHEN the rate is lowered after 100 seconds
+        maker.setRefillRatePerSec(1, _sender = GOVERNOR_ADDRESS, _now = sp.timestamp(100))
+
+        # THEN the 1000 tokens accrued so far stay in the bucket
+        scenario.verify(maker.data.refillRatePerSec == 1)
+        scenario.verify(maker.data.bucketLevel == 1000)
+        scenario.verify(maker.data.lastRefillTime == sp.timestamp(100))
+
+        # AND someone who isn't the governor cannot change the rate
+        maker.setRefillRatePerSec(100, _sender = NULL_ADDRESS, _valid = False, _exception = Errors.NOT_GOVERNOR)
+
+    @sp.add_test()
+    def test():
+        scenario = sp.test_scenario("setBucketCapacity - drains the bucket down to a lower capacity", MODULES)
+
+        # GIVEN a maker with a full bucket of 5000 tokens
+        maker, quipuswap, spot = makerWithFakes(scenario, 0, refillRatePerSec = 10, bucketCapacity = 5000, bucketLevel = 5000)
+
+        # WHEN the capacity is lowered to 2000 tokens
+        maker.setBucketCapacity(2000, _sender = GOVERNOR_ADDRESS, _now = sp.timestamp(10))
+
+        # THEN the bucket holds at most the new capacity
+        scenario.verify(maker.data.bucketCapacity == 2000)
+        scenario.verify(maker.data.bucketLevel == 2000)
+
+        # AND someone who isn't the governor cannot change the capacity
+        maker.setBucketCapacity(10_000, _sender = NULL_ADDRESS, _valid = False, _exception = Errors.NOT_GOVERNOR)
+
+    ################################################################
+    # Volatility
+    ################################################################
+
+    @sp.add_test()
+    def test():
+        scenario = sp.test_scenario("poke - folds each spot update into the moving average once", MODULES)
+
+        # GIVEN a maker with a $1.00 average which weighs new prices at 50% and a $1.20 spot price
+        currentTime = 100
+        maker, quipuswap, spot = makerWithFakes(scenario, currentTime, spotPrices = [1_200_000, 1_200_000], intervalSec = 20, emaWeight = 500)
+
+        # WHEN the maker is poked
+        maker.poke(_now = sp.timestamp(currentTime))
+
+        # THEN the average moves halfway to the spot price
+        scenario.verify(maker.data.emaPrice == 1_100_000)
+        scenario.verify(maker.data.emaSpotTime == sp.timestamp(currentTime * 1000))
+
+        # AND poking again before the next spot update leaves the average alone
+        maker.poke(_now = sp.timestamp(currentTime + 10))
+        scenario.verify(maker.data.emaPrice == 1_100_000)
+
+        # AND the next spot update 20 seconds later moves it again
+        maker.poke(_now = sp.timestamp(currentTime + 20))
+        scenario.verify(maker.data.emaPrice == 1_150_000)
+
+    @sp.add_test()
+    def test():
+        scenario = sp.test_scenario("poke - starts the moving average at the spot price", MODULES)
+
+        # GIVEN a maker without a moving average
+        maker, quipuswap, spot = makerWithFakes(scenario, 100, spotPrices = [1_200_000], emaPrice = 0)
+
+        # WHEN the maker is poked THEN the average is the spot price
+        maker.poke(_now = sp.timestamp(100))
+        scenario.verify(maker.data.emaPrice == 1_200_000)
+
+    @sp.add_test()
+    def test():
+        scenario = sp.test_scenario("tokenToTezPayment - fails when spot is too far from its moving average", MODULES)
+
+        # GIVEN a maker with a $1.00 average, a 5% volatility tolerance and a $1.10 spot price, then $1.04 a minute later
+        currentTime = 100
+        maker, quipuswap, spot = makerWithFakes(scenario, currentTime, spotPrices = [1_100_000, 1_040_000], volatilityTolerance = 50)
+
+        # WHEN a trade is attempted THEN it fails
+        maker.tokenToTezPayment(100, _now = sp.timestamp(currentTime), _valid = False, _exception = Errors.VOLATILITY)
+
+        # AND a trade within tolerance succeeds and moves the average toward spot
+        maker.tokenToTezPayment(100, _now = sp.timestamp(currentTime + 60))
+        scenario.verify(maker.data.trades[0].tokenAmount == 100)
+        scenario.verify(quipuswap.data.amountOut == maker.data.trades[0].requiredOut)
+        scenario.verify(maker.data.emaPrice == 1_004_000)
+
+    @sp.add_test()
+    def test():
+        scenario = sp.test_scenario("tokenToTezPayment - fails before the moving average is started", MODULES)
+
+        # GIVEN a maker without a moving average
+        maker, quipuswap, spot = makerWithFakes(scenario, 100, emaPrice = 0)
+
+        # WHEN a trade is attempted THEN it fails
+        maker.tokenToTezPayment(100, _now = sp.timestamp(100), _valid = False, _exception = Errors.VOLATILITY)
+
+    @sp.add_test()
+    def test():
+        scenario = sp.test_scenario("setVolatilityTolerance and setEmaWeight - can only be called by the governor", MODULES)
+
+        # GIVEN a maker
+        maker, quipuswap, spot = makerWithFakes(scenario, 0)
+
+        # WHEN the governor updates the settings THEN they are stored
+        maker.setVolatilityTolerance(40, _sender = GOVERNOR_ADDRESS)
+        maker.setEmaWeight(250, _sender = GOVERNOR_ADDRESS)
+        scenario.verify(maker.data.volatilityTolerance == 40)
+        scenario.verify(maker.data.emaWeight == 250)
+
+        # AND a weight above 100% is rejected
+        maker.setEmaWeight(1001, _sender = GOVERNOR_ADDRESS, _valid = False, _exception = Errors.BAD_STATE)
+
+        # AND someone else cannot update them
+        maker.setVolatilityTolerance(1000, _sender = NULL_ADDRESS, _valid = False, _exception = Errors.NOT_GOVERNOR)
+        maker.setEmaWeight(1000, _sender = NULL_ADDRESS, _valid = False, _exception = Errors.NOT_GOVERNOR)
+
+    ################################################################
+    # Views
+    ################################################################
+
+    @sp.add_test()
+    def test():
+        scenario = sp.test_scenario("getConfig - returns the settings and state", MODULES)
+
+        # GIVEN a maker whose empty bucket refills at 10 tokens a second up to 5000 tokens
+        currentTime = 100
+        maker, quipuswap, spot = makerWithFakes(scenario, currentTime, refillRatePerSec = 10, bucketCapacity = 5000)
+
+        # AND 600 of the 1000 tokens accrued after 100 seconds were sold
+        maker.tokenToTezPayment(600, _now = sp.timestamp(currentTime))
+
+        # WHEN the configuration is read in the same block
+        config = maker.getConfig()
+
+        # THEN it holds the settings and state
+        scenario.verify(config.governorContractAddress == GOVERNOR_ADDRESS)
+        scenario.verify(config.quipuswapContractAddress == quipuswap.address)
+        scenario.verify(config.spotContractAddress == spot.address)
+        scenario.verify(config.refillRatePerSec == 10)
+        scenario.verify(config.bucketCapacity == 5000)
+        scenario.verify(config.paused == False)
+        scenario.verify(config.lastTradeTime == sp.timestamp(currentTime))
+        scenario.verify(config.emaPrice == 1_000_000)
+        scenario.verify(config.state == 0)
+
+        # AND the tokens a trade could sell now
+        scenario.verify(config.availableTokens == 400)
+
+    @sp.add_test()
+    def test():
+        scenario = sp.test_scenario("getTrades - returns the totals and the most recent trades", MODULES)
+
+        # GIVEN a maker at a spot price of 1 XTZ which keeps its last 2 trades
+        currentTime = 100
+        maker, quipuswap, spot = makerWithFakes(scenario, currentTime, refillRatePerSec = 10, tradeHistorySize = 2)
+
+        # AND no trades yet
+        scenario.verify(maker.getTrades().tradeCount == 0)
+        scenario.verify(sp.len(maker.getTrades().recentTrades) == 0)
+
+        # WHEN 100, 200 and then 300 tokens are sold
+        for index, tokenAmount in enumerate([100, 200, 300]):
+            maker.tokenToTezPayment(tokenAmount, _now = sp.timestamp(currentTime + 30 * index))
+
+        # THEN the totals count every trade
+        trades = maker.getTrades()
+        scenario.verify(trades.tradeCount == 3)
+        scenario.verify(trades.totalTokensSold == 600)
+        scenario.verify(trades.totalRequiredOut == 600_000_000)
+
+        # AND only the last 2 trades are kept, newest first
+        scenario.verify_equal(trades.recentTrades, [
+            sp.record(time = sp.timestamp(currentTime + 60), tokenAmount = 300, spotPrice = 1_000_000, requiredOut = 300_000_000),
+            sp.record(time = sp.timestamp(currentTime + 30), tokenAmount = 200, spotPrice = 1_000_000, requiredOut = 200_000_000),
+        ])
+
+        # AND the oldest trade was overwritten in place
+        scenario.verify(maker.data.trades[0].tokenAmount == 300)
+        scenario.verify(~maker.data.trades.contains(2))
+
+    @sp.add_test()
+    def test():
+        scenario = sp.test_scenario("MakerContract - cannot be originated with a moving average weight above 1000", MODULES)
+
+        # WHEN a maker is originated with a weight of 1001
+        code = originationErrorCode(lambda: makerWithFakes(scenario, 100, emaWeight = 1001))
+
+        # THEN origination fails with BAD_STATE
+        scenario.verify_equal(code, Errors.BAD_STATE)
+
+        # AND a weight of 1000 is accepted
+        maker, quipuswap, spot = makerWithFakes(scenario, 100, emaWeight = 1000)
+        scenario.verify(maker.data.emaWeight == 1000)
+
+    @sp.add_test()
+    def test():
+        scenario = sp.test_scenario("MakerContract - cannot be originated without a trade history", MODULES)
+
+        # WHEN a maker is originated with a trade history size of 0
+        code = originationErrorCode(lambda: makerWithFakes(scenario, 100, tradeHistorySize = 0))
+
+        # THEN origination fails with BAD_STATE
+        scenario.verify_equal(code, Errors.BAD_STATE)
@@ -0,0 +1,26 @@
+import smartpy as sp
+
+@sp.module
+def dummyContract():
+    # A dummy contract which can receive and store data for introspection.
+    #
+    # This contract can be used in test as a way to capture the results of contract callbacks.
+    class DummyContract(sp.Contract):
+        def __init__(self):
+            self.data.natValue = sp.nat(0)
+            self.data.intValue = sp.int(0)
+
+        # Default entrypoint always accepts transfers.
+        @sp.entrypoint
+        def default(self):
+            pass
+
+        # Callback for a nat parameter. Places returned value in `natValue`.
+        @sp.entrypoint
+        def natCallback(self, newNatValue):
+            self.data.natValue = newNatValue
+
+        # Callback for a int parameter. Places returned value in `intValue`.
+        @sp.entrypoint
+        def intCallback(self, newIntValue):
+            self.data.intValue = newIntValue
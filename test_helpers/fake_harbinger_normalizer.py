@@ -0,0 +1,40 @@
+import smartpy as sp
+
+from common.constants import Constants
+
+@sp.module
+def fakeHarbinger():
+    import Constants
+
+    # A contract which fakes a Harbinger oracle.
+    class FakeHarbingerContract(sp.Contract):
+        def __init__(self, harbingerValue, harbingerUpdateTime):
+            self.data.harbingerValue = sp.cast(harbingerValue, sp.nat)
+            self.data.harbingerUpdateTime = sp.cast(harbingerUpdateTime, sp.timestamp)
+            self.data.harbingerAsset = Constants.ASSET_CODE
+
+        # Update the asset price.
+        @sp.entrypoint
+        def setNewPrice(self, newValue):
+            self.data.harbingerValue = newValue
+
+        # Update - Not implemented
+        @sp.entrypoint
+        def update(self):
+            pass
+
+        # Get - Returns the static value in the initializer
+        @sp.entrypoint
+        def get(self, requestPair):
+            sp.cast(requestPair, sp.pair[sp.string, sp.contract[Constants.HARBINGER_DATA_TYPE]])
+
+            callback = sp.snd(requestPair)
+
+            result = (self.data.harbingerAsset, (self.data.harbingerUpdateTime, self.data.harbingerValue))
+            sp.transfer(result, sp.mutez(0), callback)
+
+        # Harbinger Normalizer view: (update time, price).
+        @sp.onchain_view()
+        def getPrice(self, assetCode):
+            sp.cast(assetCode, sp.string)
+            return (self.data.harbingerUpdateTime, self.data.harbingerValue)
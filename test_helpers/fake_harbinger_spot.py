@@ -0,0 +1,43 @@
+import smartpy as sp
+
+from common.constants import Constants
+
+@sp.module
+def fakeHarbingerSpot():
+    import Constants
+
+    # A contract which fakes a Harbinger spot oracle.
+    class FakeHarbingerContract(sp.Contract):
+        def __init__(self, harbingerValue, harbingerUpdateTime, harbingerAsset, harbingerVolume):
+            self.data.harbingerValue = sp.cast(harbingerValue, sp.nat)
+            self.data.harbingerUpdateTime = sp.cast(harbingerUpdateTime, sp.timestamp)
+            self.data.harbingerAsset = sp.cast(harbingerAsset, sp.string)
+            self.data.harbingerVolume = sp.cast(harbingerVolume, sp.nat)
+
+        # Update the asset price.
+        @sp.entrypoint
+        def setNewPrice(self, newValue):
+            self.data.harbingerValue = newValue
+
+        # Update - Not implemented
+        @sp.entrypoint
+        def update(self):
+            pass
+
+        # Get - Returns the static value in the initializer
+        @sp.entrypoint
+        def get(self, requestPair):
+            sp.cast(requestPair, sp.pair[sp.string, sp.contract[Constants.HARBINGER_DATA_TYPE]])
+
+            callback = sp.snd(requestPair)
+
+            result = (self.data.harbingerAsset, (self.data.harbingerUpdateTime, self.data.harbingerValue))
+            sp.transfer(result, sp.mutez(0), callback)
+
+        # Harbinger spot view: (start, (end, (open, (high, (low, (close, volume)))))), every price the same.
+        @sp.onchain_view()
+        def getPrice(self, assetCode):
+            sp.cast(assetCode, sp.string)
+            lastUpdateTime = self.data.harbingerUpdateTime
+            closePrice = self.data.harbingerValue
+            return (lastUpdateTime, (lastUpdateTime, (closePrice, (closePrice, (closePrice, (closePrice, self.data.harbingerVolume))))))
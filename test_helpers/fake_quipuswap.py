@@ -0,0 +1,160 @@
+import smartpy as sp
+
+@sp.module
+def fakeQuipuswap():
+    import smartpy.stdlib.utils as utils
+
+    TRANSFER_TYPE: type = sp.record(
+        from_ = sp.address,
+        to_ = sp.address,
+        value = sp.nat,
+    ).layout(("from_ as from", ("to_ as to", "value")))
+
+    # A contract which acts like a quipuswap pool.
+    # Parameters are captured for inspection.
+    class FakeQuipuswapContract(sp.Contract):
+        def __init__(self):
+            # The null address, which is never used.
+            nullAddress = sp.address("tz1bTpviNnyx2PXsNmGpCQTMQsGoYordkUoA")
+
+            self.data.amountOut = sp.nat(0)
+            self.data.destination = nullAddress
+            self.data.amountInvested = sp.nat(0)
+            self.data.amountDivested = sp.nat(0)
+            self.data.voteAmount = sp.nat(0)
+            self.data.voteCandidate = sp.key_hash("tz1VQnqCCqX4K5sP3FNkVSNKTdCAMJDd3E1n")
+            self.data.voteAddress = nullAddress
+            self.data.vetoAmount = sp.nat(0)
+            self.data.vetoAddress = nullAddress
+
+        # Update - Not implemented
+        @sp.entrypoint
+        def update(self):
+            pass
+
+        # Fake entrypoint to make a XTZ -> token trade. captures parameters for inspection.
+        @sp.entrypoint
+        def tezToTokenPayment(self, requestPair):
+            sp.cast(requestPair, sp.pair[sp.nat, sp.address])
+
+            self.data.amountOut = sp.fst(requestPair)
+            self.data.destination = sp.snd(requestPair)
+
+        # Fake entrypoint to make a token -> XTZ trade. captures parameters for inspection.
+        @sp.entrypoint
+        def tokenToTezPayment(self, requestPair):
+            sp.cast(requestPair, sp.pair[sp.pair[sp.nat, sp.nat], sp.address])
+
+            self.data.amountOut = sp.snd(sp.fst(requestPair))
+            self.data.destination = sp.snd(requestPair)
+
+        # Fake entrypoint to invest liquidity. captures parameters for inspection.
+        @sp.entrypoint
+        def investLiquidity(self, requestNat):
+            sp.cast(requestNat, sp.nat)
+
+            self.data.amountInvested = requestNat
+
+        # Fake entrypoint to divest liquidity. captures parameters for inspection.
+        @sp.entrypoint
+        def divestLiquidity(self, requestPair):
+            sp.cast(requestPair, sp.pair[sp.pair[sp.nat, sp.nat], sp.nat])
+
+            self.data.amountDivested = sp.snd(requestPair)
+
+        # Fake entrypoint to vote. captures parameters for inspection.
+        @sp.entrypoint
+        def vote(self, requestTup):
+            sp.cast(requestTup, sp.pair[sp.pair[sp.key_hash, sp.nat], sp.address])
+
+            self.data.voteAmount = sp.snd(sp.fst(requestTup))
+            self.data.voteCandidate = sp.fst(sp.fst(requestTup))
+            self.data.voteAddress = sp.snd(requestTup)
+
+        # Fake entrypoint to veto. captures parameters for inspection.
+        @sp.entrypoint
+        def veto(self, requestPair):
+            sp.cast(requestPair, sp.pair[sp.nat, sp.address])
+
+            self.data.vetoAmount = sp.fst(requestPair)
+            self.data.vetoAddress = sp.snd(requestPair)
+
+    # A contract which acts like a Quipuswap pool with constant product pricing.
+    # Tokens are really pulled through the FA1.2 token contract, XTZ is paid out of the
+    # pool's balance after the 0.3% fee, and trades fail when the output is below the
+    # requested minimum, as they would on mainnet. Originate it with `tezPool` mutez.
+    class FakeConstantProductQuipuswapContract(sp.Contract):
+        def __init__(self, tokenAddress, tezPool, tokenPool):
+            self.data.tokenAddress = sp.cast(tokenAddress, sp.address)
+            self.data.tezPool = sp.cast(tezPool, sp.nat)
+            self.data.tokenPool = sp.cast(tokenPool, sp.nat)
+            self.data.amountOut = sp.nat(0)
+            self.data.amountInvested = sp.nat(0)
+
+        # Pull tokens from `owner` into the pool. The owner must have approved the pool.
+        @sp.private(with_storage = "read-only", with_operations = True)
+        def pullTokens(self, owner, amount):
+            transferHandle = sp.contract(TRANSFER_TYPE, self.data.tokenAddress, "transfer").unwrap_some()
+            sp.transfer(sp.record(from_ = owner, to_ = sp.self_address, value = amount), sp.mutez(0), transferHandle)
+
+        # Trade tokens for XTZ. Fails if less than min_out mutez would be paid out.
+        @sp.entrypoint
+        def tokenToTezPayment(self, requestPair):
+            sp.cast(requestPair, sp.pair[sp.pair[sp.nat, sp.nat], sp.address])
+
+            tokensIn = sp.fst(sp.fst(requestPair))
+            minOut = sp.snd(sp.fst(requestPair))
+            receiver = sp.snd(requestPair)
+            assert tokensIn > 0, "Dex/wrong-params"
+
+            tokensInWithFee = tokensIn * 997
+            tezOut = tokensInWithFee * self.data.tezPool / (self.data.tokenPool * 1000 + tokensInWithFee)
+            assert tezOut >= minOut, "Dex/high-min-out"
+
+            self.data.tokenPool += tokensIn
+            self.data.tezPool = sp.as_nat(self.data.tezPool - tezOut)
+            self.data.amountOut = tezOut
+
+            self.pullTokens(sp.record(owner = sp.sender, amount = tokensIn))
+            sp.send(receiver, utils.nat_to_mutez(tezOut))
+
+        # Trade XTZ for tokens. Fails if less than min_out tokens would be paid out.
+        @sp.entrypoint
+        def tezToTokenPayment(self, requestPair):
+            sp.cast(requestPair, sp.pair[sp.nat, sp.address])
+
+            minOut = sp.fst(requestPair)
+            receiver = sp.snd(requestPair)
+            tezIn = utils.mutez_to_nat(sp.amount)
+            assert tezIn > 0, "Dex/wrong-params"
+
+            tezInWithFee = tezIn * 997
+            tokensOut = tezInWithFee * self.data.tokenPool / (self.data.tezPool * 1000 + tezInWithFee)
+            assert tokensOut >= minOut, "Dex/high-min-out"
+
+            self.data.tezPool += tezIn
+            self.data.tokenPool = sp.as_nat(self.data.tokenPool - tokensOut)
+            self.data.amountOut = tokensOut
+
+            transferHandle = sp.contract(TRANSFER_TYPE, self.data.tokenAddress, "transfer").unwrap_some()
+            sp.transfer(sp.record(from_ = sp.self_address, to_ = receiver, value = tokensOut), sp.mutez(0), transferHandle)
+
+        # Invest XTZ and the matching amount of tokens at the pool ratio, up to `maxTokens`.
+        @sp.entrypoint
+        def investLiquidity(self, maxTokens):
+            sp.cast(maxTokens, sp.nat)
+
+            tezIn = utils.mutez_to_nat(sp.amount)
+            assert tezIn > 0, "Dex/wrong-params"
+
+            # An empty pool takes whatever ratio the first provider brings.
+            tokensRequired = maxTokens
+            if self.data.tezPool > 0:
+                tokensRequired = tezIn * self.data.tokenPool / self.data.tezPool
+            assert tokensRequired <= maxTokens, "Dex/low-max-token-in"
+
+            self.data.tezPool += tezIn
+            self.data.tokenPool += tokensRequired
+            self.data.amountInvested = tokensRequired
+
+            self.pullTokens(sp.record(owner = sp.sender, amount = tokensRequired))
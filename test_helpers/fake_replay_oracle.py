@@ -0,0 +1,68 @@
+import smartpy as sp
+
+@sp.module
+def fakeReplayOracle():
+    # A contract which replays recorded price series in place of a Harbinger or Youves oracle.
+    #
+    # Each series is sampled every `intervalSec` seconds starting at `startTime`. Views serve the
+    # latest sample at or before `sp.now`, and keep serving the last sample once the series runs out
+    # so that staleness checks trip as they would on chain. A whole price path therefore costs a
+    # single origination. Build one with `replayOracle` below.
+    class FakeReplayOracleContract(sp.Contract):
+        def __init__(self, prices, sampleCounts, startTime, intervalSec):
+            self.data.prices = sp.cast(prices, sp.big_map[sp.pair[sp.string, sp.nat], sp.nat])
+            self.data.sampleCounts = sp.cast(sampleCounts, sp.map[sp.string, sp.nat])
+            self.data.startTime = sp.cast(startTime, sp.timestamp)
+            self.data.intervalSec = sp.cast(intervalSec, sp.nat)
+
+        # Update - Not implemented
+        @sp.entrypoint
+        def update(self):
+            pass
+
+        # Returns the index of the sample in effect at `sp.now` and the time it was recorded.
+        @sp.private(with_storage = "read-only")
+        def currentSample(self, assetCode):
+            assert self.data.sampleCounts.contains(assetCode), "UNKNOWN_ASSET"
+            assert sp.now >= self.data.startTime, "NO_DATA"
+
+            index = sp.as_nat(sp.now - self.data.startTime) / self.data.intervalSec
+            lastIndex = sp.as_nat(self.data.sampleCounts[assetCode] - 1)
+            if index > lastIndex:
+                index = lastIndex
+
+            sampleTime = sp.add_seconds(self.data.startTime, sp.to_int(index * self.data.intervalSec))
+            return (index, sampleTime)
+
+        # Harbinger Normalizer view: (update time, price).
+        @sp.onchain_view()
+        def getPrice(self, assetCode):
+            sp.cast(assetCode, sp.string)
+
+            (index, sampleTime) = self.currentSample(assetCode)
+            return (sampleTime, self.data.prices[(assetCode, index)])
+
+        # Youves spot view: (price, update time in milliseconds).
+        @sp.onchain_view()
+        def get_price_with_timestamp(self, assetCode):
+            sp.cast(assetCode, sp.string)
+
+            (index, sampleTime) = self.currentSample(assetCode)
+            sampleSeconds = sp.as_nat(sampleTime - sp.timestamp(0))
+            return (self.data.prices[(assetCode, index)], sp.add_seconds(sp.timestamp(0), sp.to_int(sampleSeconds * 1000)))
+
+# A FakeReplayOracleContract replaying `series`, a map of asset code to a list of prices.
+def replayOracle(series, startTime = sp.timestamp(0), intervalSec = sp.nat(60)):
+    prices = {}
+    sampleCounts = {}
+    for assetCode, assetPrices in series.items():
+        sampleCounts[assetCode] = sp.nat(len(assetPrices))
+        for index, price in enumerate(assetPrices):
+            prices[(assetCode, sp.nat(index))] = price
+
+    return fakeReplayOracle.FakeReplayOracleContract(
+        prices = sp.big_map(prices),
+        sampleCounts = sampleCounts,
+        startTime = startTime,
+        intervalSec = intervalSec,
+    )
@@ -0,0 +1,90 @@
+import smartpy as sp
+
+@sp.module
+def harbingerVwapNormalizer():
+    # A contract which emulates a Harbinger Normalizer, computing its price from candles.
+    #
+    # Each `update` takes one candle. Candles which do not end after the asset's last
+    # update are ignored, as Harbinger does. The candle's typical price,
+    # (high + low + close) / 3, times its volume is kept in a ring buffer of the last
+    # `numDataPoints` candles along with running sums of price times volume and of
+    # volume, so each update adds the new candle and subtracts the one it evicts in
+    # constant time. `getPrice` returns the end of the last candle and the volume
+    # weighted average price, which lags the spot price by up to `numDataPoints` candles.
+
+    CANDLE_TYPE: type = sp.record(
+        assetCode = sp.string,
+        start = sp.timestamp,
+        end = sp.timestamp,
+        open = sp.nat,
+        high = sp.nat,
+        low = sp.nat,
+        close = sp.nat,
+        volume = sp.nat,
+    )
+
+    ENTRY_TYPE: type = sp.record(
+        priceVolume = sp.nat,
+        volume = sp.nat,
+    )
+
+    ASSET_TYPE: type = sp.record(
+        entries = sp.map[sp.nat, ENTRY_TYPE],
+        nextIndex = sp.nat,
+        count = sp.nat,
+        sumPriceVolume = sp.nat,
+        sumVolume = sp.nat,
+        computedPrice = sp.nat,
+        lastUpdateTime = sp.timestamp,
+    )
+
+    class HarbingerVwapNormalizerContract(sp.Contract):
+        def __init__(self, assetCodes, numDataPoints):
+            sp.cast(assetCodes, sp.list[sp.string])
+            self.data.numDataPoints = sp.cast(numDataPoints, sp.nat)
+            self.data.assets = sp.cast({}, sp.map[sp.string, ASSET_TYPE])
+            for assetCode in assetCodes:
+                self.data.assets[assetCode] = sp.record(
+                    entries = {},
+                    nextIndex = 0,
+                    count = 0,
+                    sumPriceVolume = 0,
+                    sumVolume = 0,
+                    computedPrice = 0,
+                    lastUpdateTime = sp.timestamp(0),
+                )
+
+        # Fold a candle into the asset's volume weighted average price.
+        @sp.entrypoint
+        def update(self, candle):
+            sp.cast(candle, CANDLE_TYPE)
+            assert self.data.assets.contains(candle.assetCode), "UNKNOWN_ASSET"
+
+            asset = self.data.assets[candle.assetCode]
+            if candle.end > asset.lastUpdateTime:
+                priceVolume = (candle.high + candle.low + candle.close) / 3 * candle.volume
+
+                # Evict the oldest candle once the buffer is full.
+                if asset.count == self.data.numDataPoints:
+                    evicted = asset.entries[asset.nextIndex]
+                    asset.sumPriceVolume = sp.as_nat(asset.sumPriceVolume - evicted.priceVolume)
+                    asset.sumVolume = sp.as_nat(asset.sumVolume - evicted.volume)
+                else:
+                    asset.count += 1
+
+                asset.entries[asset.nextIndex] = sp.record(priceVolume = priceVolume, volume = candle.volume)
+                asset.nextIndex = sp.mod(asset.nextIndex + 1, self.data.numDataPoints)
+                asset.sumPriceVolume += priceVolume
+                asset.sumVolume += candle.volume
+                asset.computedPrice = asset.sumPriceVolume / asset.sumVolume
+                asset.lastUpdateTime = candle.end
+                self.data.assets[candle.assetCode] = asset
+
+        # Harbinger Normalizer view: (last update time, volume weighted average price).
+        @sp.onchain_view()
+        def getPrice(self, assetCode):
+            sp.cast(assetCode, sp.string)
+            assert self.data.assets.contains(assetCode), "UNKNOWN_ASSET"
+
+            asset = self.data.assets[assetCode]
+            return (asset.lastUpdateTime, asset.computedPrice)
@@ -0,0 +1,81 @@
+import smartpy as sp
+
+# A minimal FA2 token for tests which only move tokens.
+#
+# Implements `transfer` and `balance_of` as specified by TZIP-12, without
+# operators, metadata or pausing, plus an admin only `mint` and a `balance`
+# view.
+
+@sp.module
+def slimFa2():
+    TRANSFER_TX_TYPE: type = sp.record(
+        to_ = sp.address,
+        token_id = sp.nat,
+        amount = sp.nat,
+    ).layout(("to_", ("token_id", "amount")))
+
+    TRANSFER_TYPE: type = sp.record(
+        from_ = sp.address,
+        txs = sp.list[TRANSFER_TX_TYPE],
+    ).layout(("from_", "txs"))
+
+    BALANCE_REQUEST_TYPE: type = sp.record(
+        owner = sp.address,
+        token_id = sp.nat,
+    ).layout(("owner", "token_id"))
+
+    BALANCE_RESPONSE_TYPE: type = sp.record(
+        request = BALANCE_REQUEST_TYPE,
+        balance = sp.nat,
+    ).layout(("request", "balance"))
+
+    class SlimFA2(sp.Contract):
+        def __init__(self, admin):
+            self.data.admin = sp.cast(admin, sp.address)
+            self.data.ledger = sp.cast(sp.big_map(), sp.big_map[sp.pair[sp.address, sp.nat], sp.nat])
+
+        # Move tokens. Only owners can send their own tokens.
+        @sp.entrypoint
+        def transfer(self, params):
+            sp.cast(params, sp.list[TRANSFER_TYPE])
+
+            for transfer in params:
+                assert transfer.from_ == sp.sender, "FA2_NOT_OPERATOR"
+                for tx in transfer.txs:
+                    fromKey = (transfer.from_, tx.token_id)
+                    toKey = (tx.to_, tx.token_id)
+                    fromBalance = self.data.ledger.get(fromKey, default = 0)
+                    assert fromBalance >= tx.amount, "FA2_INSUFFICIENT_BALANCE"
+
+                    self.data.ledger[fromKey] = sp.as_nat(fromBalance - tx.amount)
+                    self.data.ledger[toKey] = self.data.ledger.get(toKey, default = 0) + tx.amount
+
+        # Send the balances of the requested owners to a callback.
+        @sp.entrypoint
+        def balance_of(self, params):
+            sp.cast(params, sp.record(
+                requests = sp.list[BALANCE_REQUEST_TYPE],
+                callback = sp.contract[sp.list[BALANCE_RESPONSE_TYPE]],
+            ).layout(("requests", "callback")))
+
+            responses = []
+            for request in params.requests:
+                responses.push(sp.record(
+                    request = request,
+                    balance = self.data.ledger.get((request.owner, request.token_id), default = 0),
+                ))
+            sp.transfer(reversed(responses), sp.mutez(0), params.callback)
+
+        # Create tokens. Only callable by the admin.
+        @sp.entrypoint
+        def mint(self, address, amount, token_id):
+            assert sp.sender == self.data.admin, "FA2_NOT_ADMIN"
+
+            key = (address, token_id)
+            self.data.ledger[key] = self.data.ledger.get(key, default = 0) + amount
+
+        # The balance of an owner.
+        @sp.onchain_view()
+        def balance(self, request):
+            sp.cast(request, BALANCE_REQUEST_TYPE)
+            return self.data.ledger.get((request.owner, request.token_id), default = 0)
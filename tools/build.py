@@ -0,0 +1,218 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import global_constants
+import run_tests
+import sources
+from sources import METADATA_ARTIFACTS, TARGETS
+
+# Compiles the contracts into their committed `.tz` artifacts through a content-hash cache.
+#
+# A target's cache key covers its source file, every file it imports
+# transitively (common modules and test helpers) and the compiler version.
+# When the key is already cached the artifact is restored without running
+# SmartPy at all. Module syntax files compile by running them, so only the
+# target's compilation scenario is run; the other scenarios are left to
+# run_tests.py. Text outputs are stored ending in exactly one newline, as they
+# are committed.
+#
+# With --check the committed artifacts are compared with the compiled outputs
+# instead of being written, compiling any target the cache has no entry for.
+#
+# With --global-constants the artifacts are also rewritten to share their
+# common Michelson through global constants, see global_constants.py.
+#
+# Usage: python tools/build.py [TARGET ...] [--check] [--force] [--global-constants DIR]
+
+CACHE_DIRECTORY = os.path.join(sources.ROOT, ".build-cache")
+
+# Bumped when the way outputs are stored changes, so older entries are not reused.
+CACHE_FORMAT = "2"
+
+# The compiler outputs kept for each target.
+OUTPUTS = ["contract.tz", "contract.json"]
+
+# The metadata output, named differently by the two syntaxes.
+METADATA_OUTPUT = "metadata.json"
+METADATA_PATTERN = "*metadata*.json"
+
+def sha256_file(path):
+    with open(path, "rb") as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+def cache_key(target):
+    source, artifact = TARGETS[target]
+    legacy = sources.is_legacy(sources.read(source))
+    return sources.digest(sources.dependencies(source), target, sources.compiler_version(legacy), CACHE_FORMAT)
+
+def cache_entry(target, key):
+    return os.path.join(CACHE_DIRECTORY, target, key)
+
+# Load a cache entry, returning None when it is missing or its files do not match the manifest.
+def load_entry(target, key):
+    entry = cache_entry(target, key)
+    manifestPath = os.path.join(entry, "manifest.json")
+    if not os.path.exists(manifestPath):
+        return None
+    with open(manifestPath) as file:
+        manifest = json.load(file)
+    for name, checksum in manifest["files"].items():
+        path = os.path.join(entry, name)
+        if not os.path.exists(path) or sha256_file(path) != checksum:
+            return None
+    return manifest
+
+# A copy of a module syntax source that only runs the scenario named after the target.
+def compile_script(target, workingDir):
+    source, artifact = TARGETS[target]
+    scenarios = [scenario for scenario in run_tests.discover([source]) if scenario.name == target]
+    if not scenarios:
+        raise RuntimeError("%s has no scenario named %s" % (source, target))
+    return run_tests.isolated_script(scenarios, workingDir)
+
+# Run SmartPy for a target and return the paths of its compiled outputs.
+def compile_target(target, workingDir):
+    source, artifact = TARGETS[target]
+    legacy = sources.is_legacy(sources.read(source))
+    outputDir = os.path.join(workingDir, "output")
+    # The legacy CLI's compile command only compiles the compilation targets.
+    script = os.path.join(sources.ROOT, source) if legacy else compile_script(target, workingDir)
+    command = sources.compile_command(script, outputDir, legacy)
+
+    # Legacy `file:` imports resolve against the working directory; module syntax writes its outputs there.
+    os.makedirs(outputDir)
+    result = subprocess.run(
+        command,
+        cwd = sources.ROOT if legacy else outputDir,
+        env = sources.smartpy_environment(),
+        stdout = subprocess.PIPE,
+        stderr = subprocess.STDOUT,
+        text = True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError("Compiling %s failed:\n%s" % (target, result.stdout))
+
+    found = {}
+    for name in OUTPUTS:
+        matches = sorted(glob.glob(os.path.join(outputDir, target, "*_" + name)))
+        if not matches:
+            raise RuntimeError("Compiling %s produced no %s in %s" % (target, name, os.path.join(outputDir, target)))
+        found[name] = matches[0]
+    matches = sorted(glob.glob(os.path.join(outputDir, target, METADATA_PATTERN)))
+    if not matches:
+        raise RuntimeError("Compiling %s produced no metadata in %s" % (target, os.path.join(outputDir, target)))
+    found[METADATA_OUTPUT] = matches[0]
+    return found
+
+def store_entry(target, key, outputs):
+    entry = cache_entry(target, key)
+    staging = entry + ".tmp"
+    shutil.rmtree(staging, ignore_errors = True)
+    os.makedirs(staging)
+    files = {}
+    for name, path in outputs.items():
+        with open(path) as file:
+            content = file.read()
+        with open(os.path.join(staging, name), "w") as file:
+            file.write(sources.artifact_text(content))
+        files[name] = sha256_file(os.path.join(staging, name))
+    source, artifact = TARGETS[target]
+    with open(os.path.join(staging, "manifest.json"), "w") as file:
+        json.dump({
+            "target": target,
+            "sources": sources.dependencies(source),
+            "compiler": sources.compiler_version(sources.is_legacy(sources.read(source))),
+            "files": files,
+        }, file, indent = 2)
+    shutil.rmtree(entry, ignore_errors = True)
+    os.replace(staging, entry)
+    return load_entry(target, key)
+
+# The cache entry of a target for its current sources, compiling it when there is none.
+# Returns (key, manifest, whether it came from the cache).
+def compiled_entry(target, force = False):
+    key = cache_key(target)
+    manifest = None if force else load_entry(target, key)
+    cached = manifest is not None
+    if not cached:
+        workingDir = tempfile.mkdtemp(prefix = "build-%s-" % target)
+        try:
+            manifest = store_entry(target, key, compile_target(target, workingDir))
+        finally:
+            shutil.rmtree(workingDir, ignore_errors = True)
+    return key, manifest, cached
+
+# Build one target, returning (key, whether it came from the cache).
+def build(target, force = False):
+    source, artifact = TARGETS[target]
+    key, manifest, cached = compiled_entry(target, force)
+
+    # Only touch the committed artifacts when they actually change.
+    for output, committed in [("contract.tz", artifact), (METADATA_OUTPUT, METADATA_ARTIFACTS[target])]:
+        artifactPath = os.path.join(sources.ROOT, committed)
+        if not os.path.exists(artifactPath) or sha256_file(artifactPath) != manifest["files"][output]:
+            shutil.copyfile(os.path.join(cache_entry(target, key), output), artifactPath)
+    return key, cached
+
+# Whether the committed artifact is exactly the compiled output for the current sources.
+# Without a cache entry, as on a clean checkout, the target is compiled into the cache first.
+def check(target):
+    source, artifact = TARGETS[target]
+    key, manifest, _ = compiled_entry(target)
+    for output, committed in [("contract.tz", artifact), (METADATA_OUTPUT, METADATA_ARTIFACTS[target])]:
+        artifactPath = os.path.join(sources.ROOT, committed)
+        if not os.path.exists(artifactPath):
+            return False, "%s is missing" % committed
+        if sha256_file(artifactPath) != manifest["files"].get(output):
+            return False, "%s does not match the compiled output of the current sources" % committed
+    return True, "%s is up to date (%s)" % (artifact, key[:12])
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Compile the contracts through a content-hash cache.")
+    parser.add_argument("targets", nargs = "*", default = sorted(TARGETS), help = "targets to build: %s" % ", ".join(sorted(TARGETS)))
+    parser.add_argument("--check", action = "store_true", help = "verify the committed artifacts against the compiled outputs instead of writing them")
+    parser.add_argument("--force", action = "store_true", help = "recompile even when the cache has an entry")
+    parser.add_argument("--global-constants", metavar = "DIR", help = "also write the artifacts rewritten to use global constants, and the constants, to DIR")
+    args = parser.parse_args(argv)
+
+    unknown = [target for target in args.targets if target not in TARGETS]
+    if unknown:
+        parser.error("unknown target(s): %s" % ", ".join(unknown))
+
+    failed = False
+    for target in args.targets:
+        started = time.time()
+        try:
+            if args.check:
+                ok, message = check(target)
+            else:
+                key, cached = build(target, args.force)
+        except RuntimeError as error:
+            failed = True
+            print("FAIL   %s: %s" % (target, error))
+            continue
+        if args.check:
+            failed = failed or not ok
+            print("%-6s %s: %s" % ("OK" if ok else "FAIL", target, message))
+            continue
+        print("%-6s %s: %s in %.3fs" % ("CACHED" if cached else "BUILT", target, key[:12], time.time() - started))
+
+    if args.global_constants and not args.check and not failed:
+        report = global_constants.write([os.path.join(sources.ROOT, TARGETS[target][1]) for target in args.targets], args.global_constants)
+        for script in report["scripts"]:
+            print("CONST  %s: %d -> %d bytes, %d saved" % (os.path.basename(script["file"]), script["bytes"], script["bytesWithConstants"], script["savedBytes"]))
+        print("CONST  %d constants, %d bytes to register once, %d bytes saved per set of originations" % (
+            len(report["constants"]), report["constantBytes"], report["savedBytesPerOrigination"],
+        ))
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,23 @@
+import threading
+
+import pytest
+
+import fixture_rpc
+
+# Blocks synthesized for a fixture node.
+FIXTURE_BLOCKS = 20
+
+# A fixture_rpc.py node serving synthesized blocks of calls to both contracts, as (url, directory).
+# Tests may add responses to the directory, laid out like the RPC paths.
+@pytest.fixture
+def fixture_node(tmp_path):
+    directory = str(tmp_path / "fixture")
+    fixture_rpc.synthesize(directory, FIXTURE_BLOCKS, 1)
+    server = fixture_rpc.make_server(directory, port = 0)
+    thread = threading.Thread(target = server.serve_forever, daemon = True)
+    thread.start()
+    try:
+        yield "http://127.0.0.1:%d" % server.server_address[1], directory
+    finally:
+        server.shutdown()
+        server.server_close()
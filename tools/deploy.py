@@ -0,0 +1,289 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import subprocess
+import sys
+import time
+
+from build import TARGETS
+from gas_cache import FEE_BASE_MUTEZ, FEE_NANOTEZ_PER_BYTE, FEE_NANOTEZ_PER_GAS, GAS_MARGIN, GAS_MARGIN_MIN, ORIGINATION_SIZE, STORAGE_MARGIN_BYTES, ZERO_SIGNATURE
+from michelson import CONTRACT_HASH_PREFIX, base58check, base58check_decode, binary_size, decode, encode, from_json, parse_script, section, to_json
+from rpc import RpcClient, RpcError
+import sources
+
+# Originates several contracts from the committed artifacts in one operation group.
+#
+# An environment file lists the instances to deploy: a name, the compilation
+# target whose artifact it runs, its balance and its storage fields. Fields
+# left out take the values of the compilation targets. Storages are encoded
+# against each artifact's storage type, then the group is simulated to set its
+# limits and fees, forged and signed. The address of every instance follows
+# from the signed operation's hash and its position in the group, so all of
+# them are known before anything is injected. After injection the tool waits
+# for the group to be included and checks every address holds the committed
+# code, the requested balance and the generated storage.
+#
+# Usage: python tools/deploy.py ENVIRONMENT --rpc URL [--dry-run] [--output FILE]
+
+# Storage fields of each compilation target which environments may leave out.
+DEFAULT_STORAGE = {
+    "liquidity-fund": {
+        "slippageTolerance": 5,
+        "maxDataDelaySec": 60 * 5,
+        "state": 0,
+        "sendAllTokens_destination": None,
+    },
+    "quipu_swapper": {
+        "paused": False,
+        "maxDataDelaySec": 60 * 5,
+        "refillRatePerSec": 1,
+        "bucketCapacity": 5000,
+        "spreadAmount": 60,
+        "volatilityTolerance": 30,
+        "emaWeight": 100,
+        "bucketLevel": 0,
+        "emaPrice": 0,
+        "tokenBalance": 0,
+        "lastTradeTime": 0,
+        "lastRefillTime": 0,
+        "emaSpotTime": 0,
+        "state": 0,
+        "tradeCount": 0,
+        "totalTokensSold": 0,
+        "totalRequiredOut": 0,
+        "tradeHistorySize": 100,
+        "trades": {},
+    },
+}
+
+# Forged size of an origination excluding its script, and of the group's branch and signature.
+ORIGINATION_OVERHEAD_BYTES = 100
+GROUP_OVERHEAD_BYTES = 32 + 64
+
+# Base58check prefixes of signatures, by their text prefix.
+SIGNATURE_PREFIXES = {
+    "edsig": bytes([9, 245, 205, 134, 18]),
+    "spsig1": bytes([13, 115, 101, 19, 63]),
+    "p2sig": bytes([54, 240, 44, 52]),
+    "sig": bytes([4, 130, 43]),
+}
+OPERATION_HASH_PREFIX = bytes([5, 116])
+
+# Watermark of manager operations, signed in front of the forged bytes.
+GENERIC_WATERMARK = "03"
+
+# Heads to wait for the group to be included.
+INCLUSION_TIMEOUT_HEADS = 10
+
+def load_environment(path):
+    with open(path) as file:
+        return json.load(file)
+
+def load_artifact(target):
+    with open(os.path.join(sources.ROOT, TARGETS[target][1])) as file:
+        sections = parse_script(file.read())
+    return [to_json(node) for node in sections], section(sections, "storage")
+
+# The Micheline storage of an instance: the target's defaults, overridden by the environment.
+# A `metadataUrl` fills the TZIP-16 metadata big map.
+def instance_storage(instance, storageType):
+    fields = dict(DEFAULT_STORAGE.get(instance["target"], {}))
+    fields.update(instance.get("storage", {}))
+    if "metadataUrl" in instance:
+        fields["metadata"] = {"": "0x" + instance["metadataUrl"].encode("utf-8").hex()}
+    # The maker stores trade n at n % tradeHistorySize, which fails every trade when the size is 0.
+    if fields.get("tradeHistorySize") == 0:
+        raise ValueError("%s: tradeHistorySize must be positive" % instance["name"])
+    # The maker's moving average weight is in thousandths, and a weight above 1000 fails every trade and poke once the average has started.
+    if fields.get("emaWeight", 0) > 1000:
+        raise ValueError("%s: emaWeight must be at most 1000" % instance["name"])
+    return to_json(encode(storageType, fields))
+
+def operation_hash(signedBytes):
+    return base58check(OPERATION_HASH_PREFIX, hashlib.blake2b(signedBytes, digest_size = 32).digest())
+
+# The address of the contract originated at `index` of the origination contents of an operation.
+def originated_address(operationHash, index):
+    hashBytes = base58check_decode(operationHash)[len(OPERATION_HASH_PREFIX):]
+    return base58check(CONTRACT_HASH_PREFIX, hashlib.blake2b(hashBytes + index.to_bytes(4, "big"), digest_size = 20).digest())
+
+def signature_bytes(signature):
+    for prefix in sorted(SIGNATURE_PREFIXES, key = len, reverse = True):
+        if signature.startswith(prefix):
+            return base58check_decode(signature)[len(SIGNATURE_PREFIXES[prefix]):]
+    raise ValueError("Unknown signature %s" % signature)
+
+# Where each top-level value differs, ignoring big maps, which are only compared by their presence.
+def storage_differences(expected, actual, path = ""):
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        differences = []
+        for key in expected:
+            differences += storage_differences(expected[key], actual.get(key), "%s.%s" % (path, key) if path else key)
+        return differences
+    if isinstance(expected, list) and isinstance(actual, int):
+        # A big map literal becomes an id once originated.
+        return []
+    return [] if expected == actual else ["%s: expected %r, found %r" % (path or "storage", expected, actual)]
+
+################################################################
+# Deployment
+################################################################
+
+class Deployment:
+    def __init__(self, client, environment, octezClient = "octez-client", endpoint = None):
+        self.client = client
+        self.environment = environment
+        self.octezClient = octezClient
+        self.endpoint = endpoint or client.url
+        self.source = environment["source"]
+        self.sourceAddress = environment["sourceAddress"]
+        self.instances = environment["contracts"]
+        self.constants = client.get("/chains/main/blocks/head/context/constants")
+        self.chainId = client.get("/chains/main/chain_id")
+        self.artifacts = dict((target, load_artifact(target)) for target in set(instance["target"] for instance in self.instances))
+
+    def contents(self, counter):
+        # The simulated group may not use more gas than a block holds.
+        gasLimit = min(int(self.constants["hard_gas_limit_per_operation"]), int(self.constants["hard_gas_limit_per_block"]) // len(self.instances))
+        contents = []
+        for index, instance in enumerate(self.instances):
+            code, storageType = self.artifacts[instance["target"]]
+            contents.append({
+                "kind": "origination",
+                "source": self.sourceAddress,
+                "fee": "0",
+                "counter": str(counter + index + 1),
+                "gas_limit": str(gasLimit),
+                "storage_limit": self.constants["hard_storage_limit_per_operation"],
+                "balance": str(instance.get("balance", 0)),
+                "script": {"code": code, "storage": instance_storage(instance, storageType)},
+            })
+        return contents
+
+    # Set the limits and fees of the contents from a simulation of the whole group.
+    def set_limits(self, branch, contents):
+        result = self.client.post("/chains/main/blocks/head/helpers/scripts/run_operation", {
+            "operation": {"branch": branch, "contents": contents, "signature": ZERO_SIGNATURE},
+            "chain_id": self.chainId,
+        })
+        for instance, content, simulated in zip(self.instances, contents, result["contents"]):
+            operationResult = simulated["metadata"]["operation_result"]
+            if operationResult["status"] != "applied":
+                raise RpcError("Simulating the origination of %s failed: %s" % (instance["name"], json.dumps(operationResult.get("errors", operationResult["status"]))))
+            gas = math.ceil(int(operationResult.get("consumed_milligas", 0)) / 1000)
+            storage = int(operationResult.get("paid_storage_size_diff", 0)) + ORIGINATION_SIZE * len(operationResult.get("originated_contracts", []))
+            content["gas_limit"] = str(gas + max(GAS_MARGIN_MIN, math.ceil(gas * GAS_MARGIN)))
+            content["storage_limit"] = str(storage + STORAGE_MARGIN_BYTES)
+
+        # The minimal fee covers the whole group: the first origination pays the base fee and the shared bytes.
+        for index, content in enumerate(contents):
+            size = ORIGINATION_OVERHEAD_BYTES + binary_size(from_json(content["script"]["code"])) + binary_size(from_json(content["script"]["storage"]))
+            if index == 0:
+                size += GROUP_OVERHEAD_BYTES
+            fee = math.ceil((int(content["gas_limit"]) * FEE_NANOTEZ_PER_GAS + size * FEE_NANOTEZ_PER_BYTE) / 1000)
+            content["fee"] = str(fee + (FEE_BASE_MUTEZ if index == 0 else 0))
+        return contents
+
+    def sign(self, forged):
+        output = subprocess.run(
+            [self.octezClient, "--endpoint", self.endpoint, "sign", "bytes", "0x" + GENERIC_WATERMARK + forged, "for", self.source],
+            capture_output = True, text = True,
+        )
+        match = re.search(r"Signature: (\w+)", output.stdout)
+        if output.returncode != 0 or match is None:
+            raise RpcError("Signing failed: %s" % (output.stderr or output.stdout).strip())
+        return match.group(1)
+
+    # Build, simulate, forge and sign the group. Returns (signed bytes as hex, operation hash, addresses by name).
+    def prepare(self):
+        if self.client.get("/chains/main/blocks/head/context/contracts/%s/manager_key" % self.sourceAddress) is None:
+            raise RpcError("%s is not revealed" % self.sourceAddress)
+        counter = int(self.client.get("/chains/main/blocks/head/context/contracts/%s/counter" % self.sourceAddress))
+        branch = self.client.get("/chains/main/blocks/head/hash")
+        contents = self.set_limits(branch, self.contents(counter))
+        forged = self.client.post("/chains/main/blocks/head/helpers/forge/operations", {"branch": branch, "contents": contents})
+        signed = forged + signature_bytes(self.sign(forged)).hex()
+        operationHash = operation_hash(bytes.fromhex(signed))
+        addresses = dict((instance["name"], originated_address(operationHash, index)) for index, instance in enumerate(self.instances))
+        return signed, operationHash, addresses
+
+    def inject(self, signed, operationHash):
+        injected = self.client.post("/injection/operation", signed)
+        if injected != operationHash:
+            raise RpcError("The node injected %s, expected %s" % (injected, operationHash))
+
+    # Wait until the first instance exists, returning the level it was found at.
+    def wait_for_inclusion(self, address):
+        blockDelay = int(self.constants["minimal_block_delay"])
+        for _ in range(INCLUSION_TIMEOUT_HEADS * 2):
+            header = self.client.get("/chains/main/blocks/head/header")
+            try:
+                self.client.get("/chains/main/blocks/%s/context/contracts/%s/balance" % (header["hash"], address))
+                return header["level"]
+            except RpcError:
+                time.sleep(blockDelay / 2)
+        raise RpcError("%s was not originated after %d blocks" % (address, INCLUSION_TIMEOUT_HEADS))
+
+    # Differences between what each instance holds and what was deployed, as readable lines.
+    def verify(self, addresses):
+        problems = []
+        for instance in self.instances:
+            address = addresses[instance["name"]]
+            code, storageType = self.artifacts[instance["target"]]
+            contract = self.client.get("/chains/main/blocks/head/context/contracts/%s" % address)
+            if from_json(contract["script"]["code"]) != from_json(code):
+                problems.append("%s (%s): code differs from %s" % (instance["name"], address, TARGETS[instance["target"]][1]))
+            if int(contract["balance"]) != int(instance.get("balance", 0)):
+                problems.append("%s (%s): balance %s, expected %s" % (instance["name"], address, contract["balance"], instance.get("balance", 0)))
+            expected = decode(storageType, from_json(instance_storage(instance, storageType)))
+            actual = decode(storageType, from_json(contract["script"]["storage"]))
+            problems += ["%s (%s): %s" % (instance["name"], address, difference) for difference in storage_differences(expected, actual)]
+        return problems
+
+################################################################
+# Main
+################################################################
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Originate the contracts of an environment in one operation group.")
+    parser.add_argument("environment", help = "environment file, see deploy/")
+    parser.add_argument("--rpc", required = True, help = "node RPC URL")
+    parser.add_argument("--octez-client", default = "octez-client", help = "path to octez-client, which signs the group")
+    parser.add_argument("--dry-run", action = "store_true", help = "print the addresses the group would originate without injecting it")
+    parser.add_argument("--output", help = "write the deployed addresses to this JSON file")
+    args = parser.parse_args(argv)
+
+    client = RpcClient(args.rpc)
+    try:
+        deployment = Deployment(client, load_environment(args.environment), args.octez_client)
+        signed, operationHash, addresses = deployment.prepare()
+        for name, address in addresses.items():
+            print("%s: %s" % (name, address), flush = True)
+        if args.dry_run:
+            print("dry run: not injecting %s" % operationHash)
+            return 0
+
+        deployment.inject(signed, operationHash)
+        print("injected %s" % operationHash, flush = True)
+        level = deployment.wait_for_inclusion(next(iter(addresses.values())))
+        print("included at level %d" % level, flush = True)
+
+        problems = deployment.verify(addresses)
+        if args.output:
+            with open(args.output, "w") as file:
+                json.dump({"operation": operationHash, "level": level, "contracts": addresses}, file, indent = 2)
+        for problem in problems:
+            print(problem, file = sys.stderr)
+        if problems:
+            return 1
+        print("verified %d contracts" % len(addresses))
+        return 0
+    except (RpcError, ValueError, KeyError) as error:
+        print(error, file = sys.stderr)
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,315 @@
+import argparse
+import datetime
+import http.server
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from michelson import address_expr_hash, decode, from_json
+from rpc import RpcClient, RpcError
+
+# Exposes the health of MakerContract and LiquidityFundContract instances as
+# Prometheus gauges, refreshed on every head of the node's head stream.
+#
+# Each head costs one RPC call per instance: its balance and storage are read
+# together from the contract's context, addressed by block hash so a cached
+# client can serve repeats. What instances share, Quipuswap pools, oracles and
+# FA1.2 balances, is collected from their storages and read once per head no
+# matter how many instances use it. All reads for a head run concurrently.
+#
+# Usage: python tools/exporter.py --rpc URL --maker NAME=KT1... --fund NAME=KT1... [--port PORT] [--cache DIR]
+
+# Port serving /metrics.
+PORT = 9108
+
+# Concurrent reads from the node.
+FETCH_JOBS = 8
+
+# Seconds to wait before reconnecting to the head stream.
+RECONNECT_DELAY_SEC = 2
+
+# Oracle views read for each kind of contract, with the asset they are asked for, as in the contracts.
+ORACLE_VIEWS = {
+    "maker": ("get_price_with_timestamp", "XTZUSDT"),
+    "fund": ("getPrice", "XTZ-USD"),
+}
+
+# Storage fields holding the addresses each kind of contract depends on.
+DEPENDENCY_FIELDS = {
+    "maker": {"token": "tokenAddress", "pool": "quipuswapContractAddress", "oracle": "spotContractAddress"},
+    "fund": {"token": "tokenContractAddress", "pool": "quipuswapContractAddress", "oracle": "harbingerContractAddress"},
+}
+
+# Names of the big map holding FA1.2 balances.
+LEDGER_FIELDS = ("balances", "ledger")
+
+TOKEN_PRECISION = 10 ** 18
+MUTEZ_PER_XTZ = 10 ** 6
+ORACLE_PRECISION = 10 ** 6
+
+METRICS = {
+    "quipuswap_head_level": ("gauge", "Level of the last head the gauges were read at."),
+    "quipuswap_paused": ("gauge", "1 if the maker is paused."),
+    "quipuswap_seconds_since_last_trade": ("gauge", "Seconds from the maker's lastTradeTime to the head."),
+    "quipuswap_token_balance": ("gauge", "FA1.2 balance of the contract, in tokens."),
+    "quipuswap_xtz_balance": ("gauge", "XTZ balance of the contract."),
+    "quipuswap_oracle_age_seconds": ("gauge", "Seconds from the oracle's last update to the head."),
+    "quipuswap_premium": ("gauge", "Quipuswap token price of XTZ over the oracle price, minus 1."),
+    "quipuswap_state": ("gauge", "State machine value of the contract."),
+    "quipuswap_trades_total": ("counter", "Trades the maker has made, from its tradeCount."),
+    "quipuswap_tokens_sold_total": ("counter", "Tokens the maker has sold, from its totalTokensSold."),
+    "quipuswap_read_errors_total": ("counter", "Failed RPC reads since the exporter started."),
+}
+
+def seconds(timestamp):
+    if isinstance(timestamp, int):
+        return timestamp
+    return int(datetime.datetime.fromisoformat(timestamp.replace("Z", "+00:00")).timestamp())
+
+# Find a field anywhere in a decoded storage value.
+def _find(value, name):
+    if isinstance(value, dict):
+        if name in value:
+            return value[name]
+        for child in value.values():
+            found = _find(child, name)
+            if found is not None:
+                return found
+    elif isinstance(value, list):
+        for child in value:
+            found = _find(child, name)
+            if found is not None:
+                return found
+    return None
+
+# The type of an annotated field anywhere in a type.
+def _find_type(typeNode, name):
+    if "%" + name in getattr(typeNode, "annots", ()):
+        return typeNode
+    for arg in getattr(typeNode, "args", ()):
+        found = _find_type(arg, name)
+        if found is not None:
+            return found
+    return None
+
+def _storage_type(script):
+    return from_json(next(node for node in script["code"] if node["prim"] == "storage")["args"][0])
+
+################################################################
+# Reading
+################################################################
+
+class Exporter:
+    def __init__(self, client, instances, jobs = FETCH_JOBS):
+        self.client = client
+        # List of (kind, name, address).
+        self.instances = instances
+        self.pool = ThreadPoolExecutor(jobs)
+        self.chainId = client.get("/chains/main/chain_id")
+        self.storageTypes = {}
+        # Map of token address to (ledger big map id, ledger value type).
+        self.ledgers = {}
+        self.errors = 0
+        self.text = self.render([])
+
+    def storage_type(self, address):
+        if address not in self.storageTypes:
+            self.storageTypes[address] = _storage_type(self.client.script(address))
+        return self.storageTypes[address]
+
+    def ledger(self, token):
+        if token not in self.ledgers:
+            script = self.client.script(token)
+            storageType = _storage_type(script)
+            storage = decode(storageType, from_json(script["storage"]))
+            name = next(name for name in LEDGER_FIELDS if _find(storage, name) is not None)
+            self.ledgers[token] = (_find(storage, name), _find_type(storageType, name).args[1])
+        return self.ledgers[token]
+
+    # Balance and decoded storage of an instance.
+    def read_contract(self, block, address):
+        contract = self.client.get("/chains/main/blocks/%s/context/contracts/%s" % (block, address))
+        return int(contract["balance"]), decode(self.storage_type(address), from_json(contract["script"]["storage"]))
+
+    # (mutez, token units) held by a Quipuswap pool.
+    def read_pool(self, block, address):
+        storage = decode(self.storage_type(address), from_json(self.client.get("/chains/main/blocks/%s/context/contracts/%s/storage" % (block, address))))
+        return int(_find(storage, "tez_pool")), int(_find(storage, "token_pool"))
+
+    # (price, update time in seconds) reported by an oracle view.
+    def read_oracle(self, block, address, kind):
+        view, assetCode = ORACLE_VIEWS[kind]
+        result = self.client.post("/chains/main/blocks/%s/helpers/scripts/run_script_view" % block, {
+            "contract": address,
+            "view": view,
+            "input": {"string": assetCode},
+            "chain_id": self.chainId,
+            "unparsing_mode": "Optimized",
+        })["data"]["args"]
+        if kind == "maker":
+            # Youves reports (price, time in milliseconds).
+            return int(result[0]["int"]), int(result[1]["int"]) // 1000
+        # Harbinger reports (time, price).
+        return int(result[1]["int"]), int(result[0]["int"])
+
+    # FA1.2 balance of `holder` in token units.
+    def read_token_balance(self, block, token, holder):
+        bigMap, valueType = self.ledger(token)
+        try:
+            value = self.client.get("/chains/main/blocks/%s/context/big_maps/%d/%s" % (block, bigMap, address_expr_hash(holder)))
+        except RpcError as error:
+            # The node answers 404 for holders without an entry.
+            if "404" not in str(error):
+                raise
+            return 0
+        balance = decode(valueType, from_json(value))
+        return balance if isinstance(balance, int) else balance["balance"]
+
+    # Run reads concurrently, returning a map of key to result, or None where the read failed.
+    def read_all(self, reads):
+        futures = dict((key, self.pool.submit(read, *args)) for key, (read, args) in reads.items())
+        results = {}
+        for key, future in futures.items():
+            try:
+                results[key] = future.result()
+            except (RpcError, KeyError, TypeError, ValueError, StopIteration) as error:
+                print("reading %s failed: %r" % (key, error), file = sys.stderr, flush = True)
+                self.errors += 1
+                results[key] = None
+        return results
+
+    # Read every instance at a head and return the samples as (metric, labels, value).
+    def collect(self, header):
+        block = header["hash"]
+        headTime = seconds(header["timestamp"])
+        contracts = self.read_all(dict(
+            (address, (self.read_contract, (block, address))) for _, _, address in self.instances
+        ))
+
+        reads = {}
+        for kind, _, address in self.instances:
+            if contracts[address] is None:
+                continue
+            storage = contracts[address][1]
+            fields = DEPENDENCY_FIELDS[kind]
+            reads[("pool", storage[fields["pool"]])] = (self.read_pool, (block, storage[fields["pool"]]))
+            reads[("oracle", storage[fields["oracle"]], kind)] = (self.read_oracle, (block, storage[fields["oracle"]], kind))
+            reads[("token", storage[fields["token"]], address)] = (self.read_token_balance, (block, storage[fields["token"]], address))
+        shared = self.read_all(reads)
+
+        samples = [("quipuswap_head_level", {}, header["level"])]
+        for kind, name, address in self.instances:
+            if contracts[address] is None:
+                continue
+            balance, storage = contracts[address]
+            fields = DEPENDENCY_FIELDS[kind]
+            labels = {"kind": kind, "name": name, "address": address}
+            samples.append(("quipuswap_xtz_balance", labels, balance / MUTEZ_PER_XTZ))
+            samples.append(("quipuswap_state", labels, storage["state"]))
+            if kind == "maker":
+                samples.append(("quipuswap_paused", labels, int(storage["paused"])))
+                samples.append(("quipuswap_seconds_since_last_trade", labels, headTime - seconds(storage["lastTradeTime"])))
+                # Makers originated before the trade counters have no tradeCount.
+                if "tradeCount" in storage:
+                    samples.append(("quipuswap_trades_total", labels, storage["tradeCount"]))
+                    samples.append(("quipuswap_tokens_sold_total", labels, storage["totalTokensSold"] / TOKEN_PRECISION))
+
+            tokens = shared[("token", storage[fields["token"]], address)]
+            if tokens is not None:
+                samples.append(("quipuswap_token_balance", labels, tokens / TOKEN_PRECISION))
+            oracle = shared[("oracle", storage[fields["oracle"]], kind)]
+            if oracle is not None:
+                samples.append(("quipuswap_oracle_age_seconds", labels, headTime - oracle[1]))
+            pool = shared[("pool", storage[fields["pool"]])]
+            if oracle is not None and pool is not None and pool[0] > 0 and oracle[0] > 0:
+                poolPrice = (pool[1] / TOKEN_PRECISION) / (pool[0] / MUTEZ_PER_XTZ)
+                samples.append(("quipuswap_premium", labels, poolPrice / (oracle[0] / ORACLE_PRECISION) - 1))
+        return samples
+
+    # Prometheus text exposition of the samples.
+    def render(self, samples):
+        samples = samples + [("quipuswap_read_errors_total", {}, self.errors)]
+        lines = []
+        for metric, (metricType, description) in METRICS.items():
+            matching = [(labels, value) for name, labels, value in samples if name == metric]
+            if not matching:
+                continue
+            lines.append("# HELP %s %s" % (metric, description))
+            lines.append("# TYPE %s %s" % (metric, metricType))
+            for labels, value in matching:
+                labelText = ",".join('%s="%s"' % (key, str(labelValue).replace("\\", "\\\\").replace('"', '\\"')) for key, labelValue in labels.items())
+                lines.append("%s%s %s" % (metric, "{%s}" % labelText if labelText else "", repr(float(value))))
+        return "\n".join(lines) + "\n"
+
+    def on_head(self, header):
+        self.text = self.render(self.collect(header))
+
+################################################################
+# Serving
+################################################################
+
+def make_server(exporter, port = PORT, host = "0.0.0.0"):
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = exporter.text.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return http.server.ThreadingHTTPServer((host, port), Handler)
+
+def run(client, exporter):
+    while True:
+        try:
+            for header in client.stream("/monitor/heads/main"):
+                received = time.time()
+                exporter.on_head(header)
+                print("level %d: read %d instances (%.1f ms)" % (header["level"], len(exporter.instances), (time.time() - received) * 1000), flush = True)
+        except RpcError as error:
+            print(error, file = sys.stderr, flush = True)
+        time.sleep(RECONNECT_DELAY_SEC)
+
+def parse_contract(value):
+    name, separator, address = value.partition("=")
+    if not separator or not address:
+        raise argparse.ArgumentTypeError("expected NAME=ADDRESS")
+    return name, address
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Export Prometheus gauges for maker and liquidity fund contracts.")
+    parser.add_argument("--rpc", required = True, help = "node RPC URL")
+    parser.add_argument("--maker", type = parse_contract, action = "append", default = [], help = "NAME=ADDRESS of a MakerContract, repeatable")
+    parser.add_argument("--fund", type = parse_contract, action = "append", default = [], help = "NAME=ADDRESS of a LiquidityFundContract, repeatable")
+    parser.add_argument("--port", type = int, default = PORT, help = "port serving /metrics")
+    parser.add_argument("--jobs", type = int, default = FETCH_JOBS, help = "concurrent reads from the node")
+    parser.add_argument("--cache", help = "cache final blocks in this directory")
+    args = parser.parse_args(argv)
+
+    instances = [("maker", name, address) for name, address in args.maker] + [("fund", name, address) for name, address in args.fund]
+    if not instances:
+        parser.error("nothing to export: give --maker or --fund NAME=ADDRESS")
+
+    client = RpcClient(args.rpc, cacheDirectory = args.cache)
+    try:
+        exporter = Exporter(client, instances, args.jobs)
+        server = make_server(exporter, args.port)
+        threading.Thread(target = server.serve_forever, daemon = True).start()
+        print("serving http://localhost:%d/metrics" % args.port, flush = True)
+        run(client, exporter)
+    except RpcError as error:
+        print(error, file = sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,437 @@
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from michelson import CONTRACT_HASH_PREFIX, Prim, base58check, from_json, locations, parse_expression, parse_script, to_json
+from rpc import RpcClient
+import sources
+
+# Serves recorded node RPC responses, so the off-chain tools can be run and
+# tested without a node.
+#
+# A fixture directory has the layout of an RpcClient cache. `record` fills one
+# from a real node, `synthesize` generates blocks of calls to both contracts and
+# `serve` answers RPC requests from it, resolving `head` to the highest block.
+# With --stream-heads it also streams synthetic heads continuing the recorded
+# chain, for testing the keeper. Simulations and traces are answered with synthetic gas costs.
+#
+# Usage: python tools/fixture_rpc.py serve DIR [--port 8732] [--stream-heads SECONDS]
+#        python tools/fixture_rpc.py record DIR --rpc URL --from LEVEL --to LEVEL [--contract KT1...]
+#        python tools/fixture_rpc.py synthesize DIR [--blocks N] [--start-level LEVEL]
+
+DEFAULT_PORT = 8732
+
+BLOCK_PATH = os.path.join("chains", "main", "blocks")
+
+BLOCK_REQUEST = re.compile(r"^chains/main/blocks/(head|\d+)(/.*)?$")
+
+################################################################
+# Serving
+################################################################
+
+# The highest block level in a fixture directory.
+def fixture_head(directory):
+    levels = [
+        int(name[:-len(".json")])
+        for name in os.listdir(os.path.join(directory, BLOCK_PATH))
+        if name.endswith(".json") and name[:-len(".json")].isdigit()
+    ]
+    if not levels:
+        raise ValueError("No blocks in %s" % directory)
+    return max(levels)
+
+# Synthetic gas of setting up a traced call, and of each instruction and node it spans, in milligas.
+TRACE_SETUP_MILLIGAS = 1_000_000
+TRACE_INSTRUCTION_MILLIGAS = 100
+TRACE_NODE_MILLIGAS = 10
+
+# A `trace_code` answer which runs every instruction of the script's code once, in
+# location order, whatever the input. The storage is returned unchanged.
+def synthetic_trace(body):
+    nodes = locations(from_json(body["script"]))
+    codeStart = next(location for location, node in enumerate(nodes) if isinstance(node, Prim) and node.name == "code")
+    codeEnd = codeStart + len(locations(nodes[codeStart]))
+    remaining = int(body.get("gas", "1040000")) * 1000 - TRACE_SETUP_MILLIGAS
+    trace = [{"location": codeStart + 1, "gas": str(remaining), "stack": []}]
+    for location in range(codeStart + 2, codeEnd):
+        node = nodes[location]
+        if isinstance(node, Prim) and node.name.isupper():
+            remaining -= TRACE_INSTRUCTION_MILLIGAS + TRACE_NODE_MILLIGAS * len(locations(node))
+            trace.append({"location": location, "gas": str(remaining), "stack": []})
+    return {"storage": body["storage"], "operations": [], "trace": trace}
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    directory = None
+    headLevel = None
+    headInterval = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, body):
+        data = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        path = self.path.split("?")[0].strip("/")
+        match = BLOCK_REQUEST.match(path)
+        if match is not None and match.group(1) == "head":
+            path = "chains/main/blocks/%d%s" % (self.headLevel, match.group(2) or "")
+            match = BLOCK_REQUEST.match(path)
+
+        if path == "monitor/heads/main" and self.headInterval is not None:
+            return self.stream_heads()
+
+        filePath = os.path.join(self.directory, path + ".json")
+        if not os.path.exists(filePath) and match is not None and (match.group(2) or "").startswith("/context/"):
+            # Context is served from the latest level at or below the request that recorded it.
+            filePath = self.context_path(int(match.group(1)), match.group(2)) or filePath
+        if not os.path.exists(filePath) and match is not None and match.group(2) in ("/header", "/hash"):
+            # Headers are served from the recorded block.
+            filePath = os.path.join(self.directory, BLOCK_PATH, "%s.json" % match.group(1))
+            if os.path.exists(filePath):
+                with open(filePath) as file:
+                    block = json.load(file)
+                if match.group(2) == "/hash":
+                    return self.send_json(200, block["hash"])
+                return self.send_json(200, dict(block["header"], hash = block["hash"]))
+        if not os.path.exists(filePath) and path == "chains/main/chain_id":
+            with open(os.path.join(self.directory, BLOCK_PATH, "%d.json" % self.headLevel)) as file:
+                return self.send_json(200, json.load(file)["chain_id"])
+
+        if not os.path.exists(filePath):
+            return self.send_json(404, [{"kind": "temporary", "id": "failure", "msg": "no fixture for /%s" % path}])
+        with open(filePath, "rb") as file:
+            self.send_json(200, file.read())
+
+    # Simulations are answered with a gas cost that grows with the size of the argument.
+    def do_POST(self):
+        path = self.path.split("?")[0].strip("/")
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        if path.endswith("/helpers/scripts/trace_code"):
+            return self.send_json(200, synthetic_trace(body))
+        if not path.endswith("/helpers/scripts/run_operation"):
+            return self.send_json(404, [{"kind": "temporary", "id": "failure", "msg": "no fixture for POST /%s" % path}])
+        contents = []
+        for content in body["operation"]["contents"]:
+            argument = json.dumps(content.get("parameters", {}).get("value", {}))
+            result = {"status": "applied", "consumed_milligas": str(1_500_000 + 1000 * len(argument)), "paid_storage_size_diff": "0"}
+            contents.append(dict(content, metadata = {"operation_result": result, "internal_operation_results": []}))
+        self.send_json(200, {"contents": contents})
+
+    def context_path(self, level, subpath):
+        blockDirectory = os.path.join(self.directory, BLOCK_PATH)
+        levels = sorted((int(name) for name in os.listdir(blockDirectory) if name.isdigit() and int(name) <= level), reverse = True)
+        for candidate in levels:
+            filePath = os.path.join(blockDirectory, str(candidate), subpath.strip("/") + ".json")
+            if os.path.exists(filePath):
+                return filePath
+        return None
+
+    # Stream a synthetic head every `headInterval` seconds, continuing the recorded chain.
+    def stream_heads(self):
+        with open(os.path.join(self.directory, BLOCK_PATH, "%d.json" % self.headLevel)) as file:
+            block = json.load(file)
+        level = self.headLevel
+        timestamp = datetime.datetime.strptime(block["header"]["timestamp"], "%Y-%m-%dT%H:%M:%SZ")
+        predecessor = block["hash"]
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            while True:
+                time.sleep(self.headInterval)
+                level += 1
+                timestamp += datetime.timedelta(seconds = BLOCK_TIME_SEC)
+                header = {
+                    "hash": _hash(BLOCK_PREFIX, "block", level),
+                    "level": level,
+                    "predecessor": predecessor,
+                    "timestamp": timestamp.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                }
+                predecessor = header["hash"]
+                data = (json.dumps(header) + "\n").encode("utf-8")
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+# `headInterval` enables a `monitor/heads/main` stream of synthetic heads at that many seconds apart.
+def make_server(directory, port = DEFAULT_PORT, host = "127.0.0.1", headInterval = None):
+    handler = type("Handler", (FixtureHandler,), {
+        "directory": directory,
+        "headLevel": fixture_head(directory),
+        "headInterval": headInterval,
+    })
+    return ThreadingHTTPServer((host, port), handler)
+
+################################################################
+# Recording
+################################################################
+
+# Copy a range of blocks, and the scripts of the given contracts, from a node into a fixture directory.
+def record(directory, url, fromLevel, toLevel, contracts):
+    client = RpcClient(url, cacheDirectory = directory)
+    for level in range(fromLevel, toLevel + 1):
+        client.block(level)
+    for address in contracts:
+        client.script(address, fromLevel)
+
+################################################################
+# Synthesizing
+################################################################
+
+def _contract_address(name):
+    return base58check(CONTRACT_HASH_PREFIX, hashlib.blake2b(name.encode("utf-8"), digest_size = 20).digest())
+
+FUND_ADDRESS = _contract_address("liquidity-fund")
+MAKER_ADDRESS = _contract_address("quipu_swapper")
+TOKEN_ADDRESS = _contract_address("token")
+QUIPUSWAP_ADDRESS = _contract_address("quipuswap")
+SPOT_ADDRESS = _contract_address("youves-spot")
+KEEPER_ADDRESS = "tz1YYnf7vGXqCmB1shNg4rHiTz5gwWTDYceB"
+RECEIVER_ADDRESS = "tz1R6Ej25VSerE3MkSoEEeBjKHCDTFbpKuSX"
+OTHER_ADDRESSES = ["tz1VQnqCCqX4K5sP3FNkVSNKTdCAMJDd3E1n", "tz1UMCB2AHSTwG7YcGNr31CqYCtGN873royv"]
+
+BLOCK_PREFIX = bytes([1, 52])
+OPERATION_PREFIX = bytes([5, 116])
+
+BLOCK_TIME_SEC = 15
+
+def _hash(prefix, *parts):
+    return base58check(prefix, hashlib.blake2b("/".join(str(part) for part in parts).encode("utf-8"), digest_size = 32).digest())
+
+def _nat(value):
+    return {"int": str(value)}
+
+def _string(value):
+    return {"string": value}
+
+def _pair(*args):
+    return {"prim": "Pair", "args": list(args)}
+
+UNIT = {"prim": "Unit"}
+
+def _transaction(source, destination, amount, entrypoint, value, internal = False):
+    operation = {
+        "kind": "transaction",
+        "source": source,
+        "destination": destination,
+        "amount": str(amount),
+        "parameters": {"entrypoint": entrypoint, "value": value},
+    }
+    result = {"status": "applied"}
+    if internal:
+        operation["nonce"] = 0
+        operation["result"] = result
+    else:
+        operation.update({"fee": "2000", "counter": "1", "gas_limit": "20000", "storage_limit": "0"})
+        operation["metadata"] = {"operation_result": result, "internal_operation_results": []}
+    return operation
+
+def _with_internals(operation, internals):
+    for nonce, internal in enumerate(internals):
+        internal["nonce"] = nonce
+    operation["metadata"]["internal_operation_results"] = internals
+    return operation
+
+def _maker_trade(rng):
+    tokenAmount = rng.randint(100, 2000)
+    tokens = tokenAmount * 10 ** 18
+    mutez = tokens // (rng.randint(600_000, 1_200_000) * 10 ** 6)
+    minOut = mutez * 1000 // 1060
+    return _with_internals(_transaction(KEEPER_ADDRESS, MAKER_ADDRESS, 0, "tokenToTezPayment", _nat(tokenAmount)), [
+        _transaction(MAKER_ADDRESS, TOKEN_ADDRESS, 0, "approve", _pair(_string(QUIPUSWAP_ADDRESS), _nat(tokens)), True),
+        _transaction(MAKER_ADDRESS, QUIPUSWAP_ADDRESS, 0, "tokenToTezPayment", _pair(_pair(_nat(tokens), _nat(minOut)), _string(RECEIVER_ADDRESS)), True),
+        _transaction(QUIPUSWAP_ADDRESS, TOKEN_ADDRESS, 0, "transfer", _pair(_string(MAKER_ADDRESS), _pair(_string(QUIPUSWAP_ADDRESS), _nat(tokens))), True),
+        _transaction(QUIPUSWAP_ADDRESS, RECEIVER_ADDRESS, mutez, "default", UNIT, True),
+        _transaction(MAKER_ADDRESS, TOKEN_ADDRESS, 0, "approve", _pair(_string(QUIPUSWAP_ADDRESS), _nat(0)), True),
+    ])
+
+def _add_liquidity(rng):
+    mutez = rng.randint(1, 100) * 1_000_000
+    tokens = mutez * rng.randint(600_000, 1_200_000) * 10 ** 6
+    return _with_internals(_transaction(KEEPER_ADDRESS, FUND_ADDRESS, 0, "addLiquidity", _pair(_nat(tokens), _nat(mutez))), [
+        _transaction(FUND_ADDRESS, TOKEN_ADDRESS, 0, "approve", _pair(_string(QUIPUSWAP_ADDRESS), _nat(tokens)), True),
+        _transaction(FUND_ADDRESS, QUIPUSWAP_ADDRESS, mutez, "investLiquidity", _nat(tokens), True),
+        _transaction(FUND_ADDRESS, TOKEN_ADDRESS, 0, "approve", _pair(_string(QUIPUSWAP_ADDRESS), _nat(0)), True),
+    ])
+
+def _setter(rng):
+    if rng.random() < 0.5:
+        return _transaction(KEEPER_ADDRESS, MAKER_ADDRESS, 0, "setSpreadAmount", _nat(rng.randint(10, 100)))
+    return _transaction(KEEPER_ADDRESS, FUND_ADDRESS, 0, "setSlippageTolerance", _nat(rng.randint(1, 10)))
+
+def _unrelated(rng):
+    source, destination = rng.sample(OTHER_ADDRESSES, 2)
+    operation = _transaction(source, destination, rng.randint(1, 10 ** 9), "default", UNIT)
+    del operation["parameters"]
+    return operation
+
+def synthetic_block(level, startTime, rng):
+    contents = [_unrelated(rng) for _ in range(rng.randint(0, 3))]
+    if rng.random() < 0.3:
+        contents.append(_maker_trade(rng))
+    if rng.random() < 0.1:
+        contents.append(_add_liquidity(rng))
+    if rng.random() < 0.02:
+        contents.append(_setter(rng))
+    rng.shuffle(contents)
+
+    timestamp = startTime + datetime.timedelta(seconds = level * BLOCK_TIME_SEC)
+    return {
+        "protocol": "PtParisBxoLz5gzMmn3d9WBQNoPSZakgnkMC2VNuQ3KXfUtUQeZ",
+        "chain_id": "NetXdQprcVkpaWU",
+        "hash": _hash(BLOCK_PREFIX, "block", level),
+        "header": {
+            "level": level,
+            "predecessor": _hash(BLOCK_PREFIX, "block", level - 1),
+            "timestamp": timestamp.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        },
+        "operations": [[], [], [], [
+            {"hash": _hash(OPERATION_PREFIX, level, index), "contents": [content]}
+            for index, content in enumerate(contents)
+        ]],
+    }
+
+# The committed script of a contract in the JSON form of the `script` RPC, with an empty storage.
+def _script(artifact):
+    with open(os.path.join(sources.ROOT, artifact)) as file:
+        sections = parse_script(file.read())
+    return {"code": [to_json(node) for node in sections], "storage": UNIT}
+
+# Write `count` blocks of synthetic calls to a fund and a maker at the fixed addresses above.
+# Rate limit of the synthetic maker, in normalized tokens.
+MAKER_REFILL_RATE_PER_SEC = 1
+MAKER_BUCKET_CAPACITY = 5000
+
+# Storage of the synthetic maker, in the field order of its storage type.
+def maker_storage(lastTradeTime, bucketLevel):
+    fields = [
+        str(MAKER_BUCKET_CAPACITY), # bucketCapacity
+        str(bucketLevel), # bucketLevel
+        "1000000", # emaPrice
+        '"%s"' % lastTradeTime, # emaSpotTime
+        "100", # emaWeight
+        '"%s"' % KEEPER_ADDRESS, # governorContractAddress
+        '"%s"' % lastTradeTime, # lastRefillTime
+        '"%s"' % lastTradeTime, # lastTradeTime
+        "300", # maxDataDelaySec
+        "0", # metadata, a big_map id
+        '"%s"' % KEEPER_ADDRESS, # pauseGuardianContractAddress
+        "False", # paused
+        '"%s"' % QUIPUSWAP_ADDRESS, # quipuswapContractAddress
+        '"%s"' % RECEIVER_ADDRESS, # receiverContractAddress
+        str(MAKER_REFILL_RATE_PER_SEC), # refillRatePerSec
+        '"%s"' % SPOT_ADDRESS, # spotContractAddress
+        "60", # spreadAmount
+        "0", # state
+        '"%s"' % TOKEN_ADDRESS, # tokenAddress
+        "0", # tokenBalance
+        "0", # totalRequiredOut
+        "0", # totalTokensSold
+        "0", # tradeCount
+        "100", # tradeHistorySize
+        "1", # trades, a big_map id
+        "30", # volatilityTolerance
+    ]
+    return to_json(parse_expression("Pair " + " ".join(fields)))
+
+def _write_json(path, value):
+    os.makedirs(os.path.dirname(path), exist_ok = True)
+    with open(path, "w") as file:
+        json.dump(value, file)
+
+# Write `count` blocks of synthetic calls to a fund and a maker at the fixed addresses above,
+# the contracts' scripts, the maker's storage after the last block and the protocol constants.
+def synthesize(directory, count, startLevel, seed = 0):
+    rng = random.Random(seed)
+    startTime = datetime.datetime(2024, 1, 1, tzinfo = datetime.timezone.utc)
+    blockDirectory = os.path.join(directory, BLOCK_PATH)
+    lastTradeTime = startTime.strftime("%Y-%m-%dT%H:%M:%SZ")
+    lastTradeSeconds = startTime.timestamp()
+    bucketLevel = MAKER_BUCKET_CAPACITY
+    for level in range(startLevel, startLevel + count):
+        block = synthetic_block(level, startTime, rng)
+        for operation in block["operations"][3]:
+            content = operation["contents"][0]
+            if content["destination"] == MAKER_ADDRESS and content.get("parameters", {}).get("entrypoint") == "tokenToTezPayment":
+                # Synthetic trades ignore the bucket, which only drains down to empty.
+                tradeSeconds = startTime.timestamp() + level * BLOCK_TIME_SEC
+                refilled = min(MAKER_BUCKET_CAPACITY, bucketLevel + int(tradeSeconds - lastTradeSeconds) * MAKER_REFILL_RATE_PER_SEC)
+                bucketLevel = max(0, refilled - int(content["parameters"]["value"]["int"]))
+                lastTradeTime = block["header"]["timestamp"]
+                lastTradeSeconds = tradeSeconds
+        _write_json(os.path.join(blockDirectory, "%d.json" % level), block)
+
+    context = os.path.join(blockDirectory, str(startLevel), "context")
+    for address, artifact in [(FUND_ADDRESS, "quipuswap_liquidity_proxy.tz"), (MAKER_ADDRESS, "quipuswap_maker_ceiling.tz")]:
+        _write_json(os.path.join(context, "contracts", address, "script.json"), _script(artifact))
+        _write_json(os.path.join(context, "contracts", address, "balance.json"), "0")
+    _write_json(os.path.join(context, "constants.json"), {
+        "minimal_block_delay": str(BLOCK_TIME_SEC),
+        "hard_gas_limit_per_operation": "1040000",
+        "hard_storage_limit_per_operation": "60000",
+        "max_operations_time_to_live": "240",
+    })
+    _write_json(os.path.join(context, "contracts", KEEPER_ADDRESS, "counter.json"), "41")
+
+    headContext = os.path.join(blockDirectory, str(startLevel + count - 1), "context")
+    _write_json(os.path.join(headContext, "contracts", MAKER_ADDRESS, "storage.json"), maker_storage(lastTradeTime, bucketLevel))
+
+################################################################
+# Main
+################################################################
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Serve, record or synthesize node RPC fixtures.")
+    commands = parser.add_subparsers(dest = "command", required = True)
+
+    serve = commands.add_parser("serve", help = "serve a fixture directory over HTTP")
+    serve.add_argument("directory")
+    serve.add_argument("--port", type = int, default = DEFAULT_PORT)
+    serve.add_argument("--stream-heads", type = float, metavar = "SECONDS", help = "stream a synthetic head on monitor/heads/main every SECONDS")
+
+    recordCommand = commands.add_parser("record", help = "record blocks and scripts from a node")
+    recordCommand.add_argument("directory")
+    recordCommand.add_argument("--rpc", required = True, help = "node RPC URL")
+    recordCommand.add_argument("--from", dest = "fromLevel", type = int, required = True)
+    recordCommand.add_argument("--to", dest = "toLevel", type = int, required = True)
+    recordCommand.add_argument("--contract", action = "append", default = [], help = "contract whose script to record, repeatable")
+
+    synthesizeCommand = commands.add_parser("synthesize", help = "generate blocks of calls to both contracts")
+    synthesizeCommand.add_argument("directory")
+    synthesizeCommand.add_argument("--blocks", type = int, default = 10000)
+    synthesizeCommand.add_argument("--start-level", type = int, default = 1)
+    synthesizeCommand.add_argument("--seed", type = int, default = 0)
+
+    args = parser.parse_args(argv)
+    if args.command == "serve":
+        server = make_server(args.directory, args.port, headInterval = args.stream_heads)
+        print("Serving %s at http://127.0.0.1:%d (head %d)" % (args.directory, args.port, server.RequestHandlerClass.headLevel))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    elif args.command == "record":
+        record(args.directory, args.rpc, args.fromLevel, args.toLevel, args.contract)
+    else:
+        synthesize(args.directory, args.blocks, args.start_level, args.seed)
+        print("Wrote blocks %d to %d, fund %s, maker %s" % (args.start_level, args.start_level + args.blocks - 1, FUND_ADDRESS, MAKER_ADDRESS))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,330 @@
+import argparse
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy
+
+import price_math
+import sources
+
+# Fuzzes the integer price math of the contracts against the reference models
+# in price_math.py and reports divergences, truncation to zero, division by
+# zero and values beyond the range of mutez, as a JSON document.
+#
+# Every row is evaluated by the vectorized model. A sample is also evaluated by
+# the scalar transcription and a smaller one by the SmartPy interpreter.
+#
+# Usage: python tools/fuzz_price_math.py [--rows N] [--seed S] [--check N] [--smartpy N] [-o report.json]
+
+DEFAULT_ROWS = 1_000_000
+DEFAULT_CHECK_ROWS = 10_000
+DEFAULT_SMARTPY_ROWS = 200
+
+# Flagged rows kept as examples in the report.
+EXAMPLES = 5
+
+# Input columns of each formula and the magnitude, in decimal digits, of the random values drawn for them.
+FORMULAS = {
+    "maker.tokenToTezPayment": {
+        "columns": ["tokenAmount", "spotPrice", "spreadAmount"],
+        "digits": [9, 12, 4],
+        "edges": [
+            [0, 1, 1000, 10 ** 6, 10 ** 6 + 1, 10 ** 9],
+            [0, 1, 999_999, 1_000_000, 2_000_000, 10 ** 12, 10 ** 15, price_math.INT64_MAX],
+            [0, 60, 999, 1000, 8000, 8001],
+        ],
+        "scalar": price_math.maker_required_out,
+        "vector": price_math.maker_required_out_vector,
+        "outputs": ["neutralOut", "requiredOut"],
+    },
+    "fund.addLiquidity": {
+        "columns": ["tokens", "mutez", "harbingerPrice"],
+        "digits": [27, 16, 12],
+        "edges": [
+            [0, 1, 10 ** 6 - 1, 10 ** 12, price_math.PRECISION, 2 * price_math.PRECISION, 10 ** 27],
+            [0, 1, 1_000_000, price_math.MAX_MUTEZ, price_math.MAX_MUTEZ + 1],
+            [0, 1, 2_000_000, 10 ** 12],
+        ],
+        "scalar": price_math.fund_price_check,
+        "vector": price_math.fund_price_check_vector,
+        "outputs": ["inputPrice", "percentageDifference"],
+    },
+}
+
+################################################################
+# Inputs
+################################################################
+
+# Log-uniform random integers of up to `digits` decimal digits.
+def random_column(rng, count, digits):
+    mantissaDigits = min(digits, 18)
+    values = numpy.floor(10 ** rng.uniform(0, mantissaDigits, count)).astype(numpy.int64)
+    # A few exact zeros, which log-uniform draws never hit.
+    values[rng.random(count) < 0.001] = 0
+    if digits > 18:
+        # Beyond int64: scale by a random power of ten and fill in the low digits.
+        shifts = rng.integers(0, digits - 18 + 1, count)
+        values = values.astype(object) * (10 ** shifts).astype(object) + rng.integers(0, 10 ** 6, count).astype(object)
+    return values
+
+# Every combination of the edge values of each column.
+def edge_rows(edges):
+    grids = numpy.meshgrid(*[numpy.array(values, dtype = object) for values in edges], indexing = "ij")
+    return [grid.ravel() for grid in grids]
+
+def generate(spec, rng, count):
+    edges = edge_rows(spec["edges"])
+    columns = []
+    for index, digits in enumerate(spec["digits"]):
+        column = numpy.concatenate([edges[index], random_column(rng, count, digits).astype(object)])
+        # Keep int64 columns where every value fits, which is what allows the fast path.
+        if all(value <= price_math.INT64_MAX for value in edges[index]) and digits <= 18:
+            column = column.astype(numpy.int64)
+        columns.append(column)
+    return columns, len(edges[0])
+
+################################################################
+# Findings
+################################################################
+
+def _row(spec, columns, outputs, index):
+    row = dict((name, int(column[index])) for name, column in zip(spec["columns"], columns))
+    for name, output in zip(spec["outputs"], outputs):
+        row[name] = None if output is None else int(output[index])
+    return row
+
+# The rows in `mask`, summarised as the range of each input and a few examples.
+def region(spec, columns, outputs, mask):
+    indices = numpy.flatnonzero(mask)
+    if len(indices) == 0:
+        return None
+    return {
+        "rows": int(len(indices)),
+        "share": round(len(indices) / len(mask), 6),
+        "ranges": dict(
+            (name, [int(column[indices].min()), int(column[indices].max())])
+            for name, column in zip(spec["columns"], columns)
+        ),
+        "examples": [_row(spec, columns, outputs, index) for index in indices[:EXAMPLES]],
+    }
+
+def findings(name, spec, columns, outputs, zeroDivisor):
+    regions = {"divisionByZero": zeroDivisor}
+    if name == "maker.tokenToTezPayment":
+        tokenAmount, spotPrice, spreadAmount = columns
+        neutralOut, requiredOut = outputs
+        # A minimum of zero lets Quipuswap fill the trade at any price.
+        regions["requiredOutTruncatedToZero"] = ~zeroDivisor & (tokenAmount > 0) & (requiredOut == 0)
+        # No payout can reach a minimum beyond the largest mutez amount, so the trade always fails.
+        regions["requiredOutAboveMaxMutez"] = ~zeroDivisor & (requiredOut > price_math.MAX_MUTEZ)
+    else:
+        tokens, mutez, harbingerPrice = columns
+        inputPrice, percentageDifference = outputs
+        # A zero input price is always 100% away from Harbinger, so the call always fails on slippage.
+        regions["inputPriceTruncatedToZero"] = ~zeroDivisor & (tokens > 0) & (inputPrice == 0)
+        # `nat_to_mutez` fails on amounts beyond the largest mutez amount.
+        regions["mutezOverflow"] = mutez > price_math.MAX_MUTEZ
+
+    report = {}
+    for regionName, mask in regions.items():
+        # The model substitutes a divisor of one on those rows, so their outputs mean nothing.
+        shown = [None] * len(outputs) if regionName == "divisionByZero" else outputs
+        found = region(spec, columns, shown, numpy.asarray(mask, dtype = bool))
+        if found is not None:
+            report[regionName] = found
+    return report
+
+################################################################
+# Cross-checks
+################################################################
+
+# Rows where the scalar transcription and the vectorized model disagree.
+def check_scalar(spec, columns, outputs, zeroDivisor, indices):
+    divergences = []
+    for index in indices:
+        inputs = [int(column[index]) for column in columns]
+        try:
+            expected = spec["scalar"](*inputs)[-len(spec["outputs"]):]
+            failed = False
+        except ZeroDivisionError:
+            failed = True
+        if failed != bool(zeroDivisor[index]) or (not failed and list(expected) != [int(output[index]) for output in outputs]):
+            row = _row(spec, columns, outputs, index)
+            row["scalar"] = "division by zero" if failed else [int(value) for value in expected]
+            divergences.append(row)
+    return divergences
+
+# Extra error introduced by rounding at each step rather than once, over the given rows.
+def maker_rounding_loss(columns, outputs, zeroDivisor, indices):
+    tokenAmount, spotPrice, spreadAmount = columns
+    neutralOut, requiredOut = outputs
+    worst = None
+    for index in indices:
+        if zeroDivisor[index]:
+            continue
+        exact = int(tokenAmount[index]) * 10 ** 12 * (1000 + int(spreadAmount[index])) // (int(spotPrice[index]) * 1000)
+        loss = exact - int(requiredOut[index])
+        if worst is None or loss > worst["lossMutez"]:
+            worst = {
+                "tokenAmount": int(tokenAmount[index]),
+                "spotPrice": int(spotPrice[index]),
+                "spreadAmount": int(spreadAmount[index]),
+                "requiredOut": int(requiredOut[index]),
+                "lossMutez": loss,
+            }
+    return worst
+
+# The formulas as they appear in the contracts, as views of a SmartPy contract.
+SMARTPY_TEMPLATE = '''import smartpy as sp
+
+@sp.module
+def main():
+    class PriceMath(sp.Contract):
+        def __init__(self):
+            pass
+
+        # quipuswap_maker_ceiling.py, tokenToTezPayment
+        @sp.onchain_view()
+        def maker(self, param):
+            sp.cast(param, sp.record(tokenAmount = sp.nat, spotPrice = sp.nat, spreadAmount = sp.nat))
+            tokensToTrade = param.tokenAmount * %(precision)d
+            neutralOut = (tokensToTrade / param.spotPrice) / 1_000_000
+            percent = sp.nat(1000) + param.spreadAmount
+            requiredOut = (neutralOut * percent) / 1000
+            return (neutralOut, requiredOut)
+
+        # quipuswap_liquidity_proxy.py, addLiquidity
+        @sp.onchain_view()
+        def fund(self, param):
+            sp.cast(param, sp.record(tokens = sp.nat, mutez = sp.nat, harbingerPrice = sp.nat))
+            inputPrice = param.tokens / param.mutez / 1_000_000
+            percentageDifference = abs(param.harbingerPrice - inputPrice) * 100 / param.harbingerPrice
+            return (inputPrice, percentageDifference)
+
+@sp.add_test()
+def test():
+    scenario = sp.test_scenario("price_math", main)
+    priceMath = main.PriceMath()
+    scenario += priceMath
+%(calls)s
+'''
+
+COMPUTED_PATTERN = re.compile(r"^Computing scenario_var(\d+)\.\.\.\n => \(?(\d+), (\d+)\)?$", re.MULTILINE)
+
+# Evaluate sampled rows in the SmartPy interpreter and return the rows that disagree with the model.
+# Rows with a zero divisor are left out: the interpreter aborts the scenario on them.
+def check_smartpy(samples):
+    if not samples:
+        return [], 0
+    calls = []
+    for view, spec, columns, outputs, index in samples:
+        fields = ", ".join("%s = %d" % (name, int(column[index])) for name, column in zip(spec["columns"], columns))
+        calls.append("    scenario.show(scenario.compute(priceMath.%s(sp.record(%s))))" % (view, fields))
+    script = SMARTPY_TEMPLATE % {"precision": price_math.PRECISION, "calls": "\n".join(calls)}
+
+    workingDir = tempfile.mkdtemp(prefix = "fuzz-price-math-")
+    try:
+        scriptPath = os.path.join(workingDir, "price_math_check.py")
+        with open(scriptPath, "w") as file:
+            file.write(script)
+        result = subprocess.run(
+            sources.scenario_command(scriptPath, os.path.join(workingDir, "output"), False),
+            cwd = workingDir,
+            env = sources.smartpy_environment(),
+            stdout = subprocess.PIPE,
+            stderr = subprocess.STDOUT,
+            text = True,
+        )
+        logPath = os.path.join(workingDir, "price_math", "log.txt")
+        if result.returncode != 0 or not os.path.exists(logPath):
+            raise RuntimeError("The SmartPy cross-check failed:\n%s" % result.stdout[-4000:])
+        with open(logPath) as file:
+            computed = dict((int(index), (int(first), int(second))) for index, first, second in COMPUTED_PATTERN.findall(file.read()))
+    finally:
+        shutil.rmtree(workingDir, ignore_errors = True)
+
+    divergences = []
+    for callIndex, (view, spec, columns, outputs, index) in enumerate(samples):
+        expected = tuple(int(output[index]) for output in outputs)
+        actual = computed.get(callIndex)
+        if actual != expected:
+            row = _row(spec, columns, outputs, index)
+            row["formula"] = view
+            row["smartpy"] = None if actual is None else list(actual)
+            divergences.append(row)
+    return divergences, len(samples)
+
+################################################################
+# Main
+################################################################
+
+def fuzz(rows, seed, checkRows, smartpyRows):
+    rng = numpy.random.default_rng(seed)
+    report = {"seed": seed, "formulas": {}}
+    smartpySamples = []
+    for name, spec in FORMULAS.items():
+        columns, edgeCount = generate(spec, rng, rows)
+        started = time.time()
+        outputs, zeroDivisor = spec["vector"](*columns)
+        seconds = time.time() - started
+
+        # Edge rows are always checked, random rows are sampled.
+        count = len(zeroDivisor)
+        sampled = rng.choice(numpy.arange(edgeCount, count), min(checkRows, count - edgeCount), replace = False)
+        checked = numpy.concatenate([numpy.arange(edgeCount), sampled])
+
+        entry = {
+            "rows": count,
+            "seconds": round(seconds, 3),
+            "rowsPerSecond": int(count / seconds) if seconds > 0 else None,
+            "findings": findings(name, spec, columns, outputs, zeroDivisor),
+            "scalarRowsChecked": int(len(checked)),
+            "scalarDivergences": check_scalar(spec, columns, outputs, zeroDivisor, checked),
+        }
+        if name == "maker.tokenToTezPayment":
+            entry["worstRoundingLoss"] = maker_rounding_loss(columns, outputs, zeroDivisor, checked)
+        report["formulas"][name] = entry
+
+        view = name.split(".")[0]
+        candidates = [index for index in checked if not zeroDivisor[index]]
+        for index in rng.permutation(candidates)[:smartpyRows]:
+            smartpySamples.append((view, spec, columns, outputs, index))
+
+    divergences, checkedCount = check_smartpy(smartpySamples)
+    report["smartpyRowsChecked"] = checkedCount
+    report["smartpyDivergences"] = divergences
+    return report
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Fuzz the contracts' price math against a reference model.")
+    parser.add_argument("--rows", type = int, default = DEFAULT_ROWS, help = "random rows per formula")
+    parser.add_argument("--seed", type = int, default = 0, help = "random seed")
+    parser.add_argument("--check", type = int, default = DEFAULT_CHECK_ROWS, help = "random rows per formula checked against the scalar transcription")
+    parser.add_argument("--smartpy", type = int, default = DEFAULT_SMARTPY_ROWS, help = "rows per formula checked in the SmartPy interpreter, 0 to skip")
+    parser.add_argument("-o", "--output", help = "write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    try:
+        report = fuzz(args.rows, args.seed, args.check, args.smartpy)
+    except RuntimeError as error:
+        print(error, file = sys.stderr)
+        return 2
+
+    text = json.dumps(report, indent = 2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
+    else:
+        sys.stdout.write(text + "\n")
+
+    divergent = report["smartpyDivergences"] or any(entry["scalarDivergences"] for entry in report["formulas"].values())
+    return 1 if divergent else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+import sys
+
+from michelson import binary_size, from_json
+from rpc import RpcClient, RpcError
+import sources
+
+# Caches the gas, storage and fee limits of contract calls so that injections
+# can skip the `run_operation` simulation.
+#
+# Limits are keyed by the contract's code hash, the entrypoint and the shape
+# of the storage and the argument: their structure with every number, string
+# and bytes replaced by its encoded size. A call is only simulated again when
+# one of those changes, for example after an upgrade or a config change that
+# grows a value. Simulated limits are padded with a safety margin.
+#
+# Usage: python tools/gas_cache.py --rpc URL --source tz1... --contract KT1... --entrypoint tokenToTezPayment [--arg MICHELINE_JSON]
+
+DEFAULT_CACHE_FILE = os.path.join(sources.ROOT, ".gas-cache.json")
+
+# Safety margins added to simulated limits.
+GAS_MARGIN = 0.2
+GAS_MARGIN_MIN = 100
+STORAGE_MARGIN_BYTES = 32
+
+# Minimal fee of the default filter: a base fee plus nanotez per gas unit and per byte.
+FEE_BASE_MUTEZ = 100
+FEE_NANOTEZ_PER_GAS = 100
+FEE_NANOTEZ_PER_BYTE = 1000
+
+# Forged size of a transaction to a contract and its signature, excluding the argument.
+TRANSACTION_OVERHEAD_BYTES = 150 + 64
+
+# Storage burned for a new implicit account.
+ORIGINATION_SIZE = 257
+
+# Placeholder signature accepted by run_operation.
+ZERO_SIGNATURE = "sigUHx32f9wesZ1n2BWpixXz4AQaZggEtchaQNHYGRCoWNAXx45WGW2ua3apUUUAGMLPwAU41QoaFCzVSL61VaessLg4YbbP"
+
+# The structure of a Micheline JSON value with every leaf replaced by its size class.
+def shape(value):
+    if isinstance(value, list):
+        return [shape(item) for item in value]
+    if "int" in value:
+        return "i%d" % binary_size(from_json(value))
+    if "string" in value:
+        return "s%d" % len(value["string"])
+    if "bytes" in value:
+        return "b%d" % len(value["bytes"])
+    return [value["prim"]] + [shape(arg) for arg in value.get("args", [])]
+
+def _hash(value):
+    return hashlib.sha256(json.dumps(value, sort_keys = True, separators = (",", ":")).encode("utf-8")).hexdigest()
+
+class GasCache:
+    def __init__(self, client, path = DEFAULT_CACHE_FILE):
+        self.client = client
+        self.path = path
+        self.entries = {}
+        self.codeHashes = {}
+        self.simulations = 0
+        if os.path.exists(path):
+            with open(path) as file:
+                saved = json.load(file)
+            self.entries = saved.get("entries", {})
+            self.codeHashes = saved.get("codeHashes", {})
+
+    def save(self):
+        with open(self.path + ".tmp", "w") as file:
+            json.dump({"codeHashes": self.codeHashes, "entries": self.entries}, file, indent = 2, sort_keys = True)
+        os.replace(self.path + ".tmp", self.path)
+
+    # Contract code never changes at an address, so its hash is kept forever.
+    def code_hash(self, address):
+        if address not in self.codeHashes:
+            self.codeHashes[address] = _hash(self.client.script(address)["code"])
+        return self.codeHashes[address]
+
+    def key(self, destination, entrypoint, value, storage):
+        return _hash([self.code_hash(destination), entrypoint, shape(value), shape(storage)])
+
+    # Gas, storage and fee limits for a call, simulating it only on a cache miss.
+    # Pass the contract's storage when it is already at hand to save an RPC call.
+    def limits(self, source, destination, entrypoint, value, amount = 0, storage = None):
+        if storage is None:
+            storage = self.client.get("/chains/main/blocks/head/context/contracts/%s/storage" % destination)
+        key = self.key(destination, entrypoint, value, storage)
+        if key not in self.entries:
+            self.entries[key] = self.simulate(source, destination, entrypoint, value, amount)
+            self.entries[key]["entrypoint"] = entrypoint
+            self.save()
+        return self.entries[key]
+
+    # Limits for each call of a group injected as one operation, where every call runs
+    # after the ones before it, such as an oracle update followed by a trade that needs it.
+    # `calls` are (destination, entrypoint, value) and `storages` maps destinations to storages at hand.
+    def group_limits(self, source, calls, storages = None):
+        keys = []
+        for destination, entrypoint, value in calls:
+            storage = (storages or {}).get(destination)
+            if storage is None:
+                storage = self.client.get("/chains/main/blocks/head/context/contracts/%s/storage" % destination)
+            keys.append(self.key(destination, entrypoint, value, storage))
+        key = _hash(keys)
+        if key not in self.entries:
+            self.entries[key] = {
+                "group": self.simulate_group(source, [(destination, entrypoint, value, 0) for destination, entrypoint, value in calls]),
+                "entrypoints": [entrypoint for _, entrypoint, _ in calls],
+            }
+            self.save()
+        return self.entries[key]["group"]
+
+    def simulate(self, source, destination, entrypoint, value, amount):
+        return self.simulate_group(source, [(destination, entrypoint, value, amount)])[0]
+
+    # Simulate calls, given as (destination, entrypoint, value, amount), in one operation.
+    def simulate_group(self, source, calls):
+        self.simulations += 1
+        constants = self.client.get("/chains/main/blocks/head/context/constants")
+        counter = int(self.client.get("/chains/main/blocks/head/context/contracts/%s/counter" % source))
+        contents = [
+            {
+                "kind": "transaction",
+                "source": source,
+                "fee": "0",
+                "counter": str(counter + 1 + index),
+                "gas_limit": constants["hard_gas_limit_per_operation"],
+                "storage_limit": constants["hard_storage_limit_per_operation"],
+                "amount": str(amount),
+                "destination": destination,
+                "parameters": {"entrypoint": entrypoint, "value": value},
+            }
+            for index, (destination, entrypoint, value, amount) in enumerate(calls)
+        ]
+        result = self.client.post("/chains/main/blocks/head/helpers/scripts/run_operation", {
+            "operation": {
+                "branch": self.client.get("/chains/main/blocks/head/hash"),
+                "contents": contents,
+                "signature": ZERO_SIGNATURE,
+            },
+            "chain_id": self.client.get("/chains/main/chain_id"),
+        })
+
+        limits = []
+        for (destination, entrypoint, value, amount), simulated in zip(calls, result["contents"]):
+            metadata = simulated["metadata"]
+            results = [metadata["operation_result"]] + [internal["result"] for internal in metadata.get("internal_operation_results", [])]
+            failed = [entry for entry in results if entry["status"] != "applied"]
+            if failed:
+                raise RpcError("Simulating %s on %s failed: %s" % (entrypoint, destination, json.dumps(failed[0].get("errors", failed[0]["status"]))))
+
+            milligas = sum(int(entry.get("consumed_milligas", 0)) for entry in results)
+            storage = sum(int(entry.get("paid_storage_size_diff", 0)) + (ORIGINATION_SIZE if entry.get("allocated_destination_contract") else 0) for entry in results)
+            gas = math.ceil(milligas / 1000)
+            gasLimit = gas + max(GAS_MARGIN_MIN, math.ceil(gas * GAS_MARGIN))
+            size = TRANSACTION_OVERHEAD_BYTES + binary_size(from_json(value))
+            fee = FEE_BASE_MUTEZ + math.ceil((gasLimit * FEE_NANOTEZ_PER_GAS + size * FEE_NANOTEZ_PER_BYTE) / 1000)
+            limits.append({
+                "gas_limit": gasLimit,
+                "storage_limit": storage + STORAGE_MARGIN_BYTES if storage else 0,
+                "fee": fee,
+                "simulated_gas": gas,
+                "simulated_storage": storage,
+            })
+        return limits
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Print cached gas, storage and fee limits for a contract call.")
+    parser.add_argument("--rpc", required = True, help = "node RPC URL")
+    parser.add_argument("--source", required = True, help = "address of the account making the call")
+    parser.add_argument("--contract", required = True, help = "address of the contract called")
+    parser.add_argument("--entrypoint", required = True)
+    parser.add_argument("--arg", default = '{"prim": "Unit"}', help = "argument as Micheline JSON")
+    parser.add_argument("--amount", type = int, default = 0, help = "mutez sent with the call")
+    parser.add_argument("--cache", default = DEFAULT_CACHE_FILE, help = "cache file")
+    args = parser.parse_args(argv)
+
+    cache = GasCache(RpcClient(args.rpc), args.cache)
+    try:
+        limits = cache.limits(args.source, args.contract, args.entrypoint, json.loads(args.arg), args.amount)
+    except RpcError as error:
+        print(error, file = sys.stderr)
+        return 1
+    print(json.dumps(dict(limits, simulated = cache.simulations > 0), indent = 2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,274 @@
+import argparse
+import json
+import os
+import re
+import sys
+from collections import Counter
+
+from build import TARGETS
+from deploy import DEFAULT_STORAGE
+from michelson import Seq, decode, encode, from_json, locations, parse_expression, parse_script, section, to_json
+from rpc import RpcClient, RpcError
+import sources
+
+# Profiles the gas of one contract call by SmartPy source line.
+#
+# The call is traced by the node's `trace_code` RPC against the storage and
+# balance of a deployed instance, so the views and big maps it reads resolve as
+# they do on chain. The script traced is the committed artifact of the
+# compilation target, or any compiled script given with --script, such as a
+# scenario's output. When its storage type differs from the instance's, the
+# instance's fields are re-encoded and new fields take the deploy defaults.
+#
+# Each trace entry is charged the gas consumed since the entry before it. The
+# compiler writes the first line of every statement as a comment above its
+# code, and entrypoints and private lambdas as `== name ==` and `Private
+# variable: name`, so each instruction maps to the statement and function that
+# enclose it. Statements are found in the function of the same name in the
+# SmartPy source. Inlined library code, such as `utils` helpers, is charged to
+# the statement it was inlined into.
+#
+# The collapsed stacks, `frame;frame;... milligas` per line, are read by
+# flamegraph.pl and speedscope. Frames are `function:line`, so a lambda's frame
+# sits on the line of its caller that called it. The per-line table is printed.
+#
+# Usage: python tools/gas_profile.py TARGET --rpc URL --contract KT1... --entrypoint NAME [--arg MICHELINE_JSON | --arg-file TZ] [--script TZ] [--collapsed FILE]
+
+ENTRYPOINT_COMMENT = re.compile(r"^#\s*== (\w+) ==")
+LAMBDA_COMMENT = re.compile(r"^#\s*Private variable: (\w+)")
+
+# Frame of the code outside entrypoints and lambdas, which selects the entrypoint.
+DISPATCH_FRAME = "(dispatch)"
+
+# Frame of the gas consumed before the first traced instruction, parsing the script and its storage.
+SETUP_FRAME = "(setup)"
+
+# The statement of a compiler comment, without the stack type written after it.
+def _statement(comment):
+    return comment.lstrip("#").strip().split(" # ")[0].strip()
+
+# Remaining gas of a trace entry, in milligas. The RPC serves milligas; gas units have a decimal point.
+def _milligas(value):
+    if "." in value:
+        return round(float(value) * 1000)
+    return int(value)
+
+# Lines of the SmartPy source, looked up by function and statement.
+class SourceMap:
+    def __init__(self, path):
+        self.path = path
+        self.lines = sources.read(path).split("\n")
+        self.ranges = {}
+        self.cursors = {}
+
+    # The 0-based range of lines of `def name(`, up to the next line indented as little.
+    def function_range(self, name):
+        if name not in self.ranges:
+            self.ranges[name] = None
+            for index, line in enumerate(self.lines):
+                match = re.match(r"(\s*)def %s\(" % re.escape(name), line)
+                if match is None:
+                    continue
+                indent = len(match.group(1))
+                end = index + 1
+                while end < len(self.lines) and (not self.lines[end].strip() or len(self.lines[end]) - len(self.lines[end].lstrip()) > indent):
+                    end += 1
+                self.ranges[name] = (index, end)
+                break
+        return self.ranges[name]
+
+    # The 1-based line of a statement of a function, ignoring comments after it. Statements are
+    # looked up in code order, so a repeated statement resolves to its next occurrence.
+    def find(self, function, statement):
+        lineRange = self.function_range(function) if function is not None else None
+        if lineRange is None:
+            return None
+        start, end = lineRange
+        cursor = self.cursors.get(function, start)
+        for first in (cursor, start):
+            for index in range(first, end):
+                if self.lines[index].split(" # ")[0].strip() == statement:
+                    self.cursors[function] = index + 1
+                    return index + 1
+        return None
+
+    def text(self, line):
+        return self.lines[line - 1].split(" # ")[0].strip()
+
+# Label every node of the script with (function, line, inlined statement), following the
+# compiler's comments. Comments hold for the rest of their sequence and everything nested in it.
+def label_script(sections, comments, sourceMap):
+    labels = {}
+
+    def walk(node, function, line, inlined):
+        labels[id(node)] = (function, line, inlined)
+        if isinstance(node, Seq):
+            for item in node.items:
+                bodyFunction = None
+                for comment in comments.get(id(item), []):
+                    entrypoint = ENTRYPOINT_COMMENT.match(comment)
+                    private = LAMBDA_COMMENT.match(comment)
+                    if entrypoint is not None:
+                        function, line, inlined = entrypoint.group(1), None, None
+                    elif private is not None:
+                        bodyFunction = private.group(1)
+                    else:
+                        statement = _statement(comment)
+                        found = sourceMap.find(function, statement)
+                        if found is not None:
+                            line, inlined = found, None
+                        else:
+                            inlined = statement
+                # A private lambda's body runs as its own function, its push as the current one.
+                if bodyFunction is not None:
+                    labels[id(item)] = (function, line, inlined)
+                    for arg in item.args:
+                        walk(arg, bodyFunction, None, None)
+                else:
+                    walk(item, function, line, inlined)
+        else:
+            for arg in getattr(node, "args", ()):
+                walk(arg, function, line, inlined)
+
+    walk(Seq(tuple(sections)), None, None, None)
+    return labels
+
+class Profile:
+    def __init__(self, sourceMap):
+        self.sourceMap = sourceMap
+        # Milligas by collapsed stack, and milligas and instructions by (function, line).
+        self.stacks = Counter()
+        self.lines = Counter()
+        self.instructions = Counter()
+        self.total = 0
+
+    # Charge each trace entry the gas consumed since the one before it. The call
+    # stack follows the functions of the entries: reaching a function already on
+    # the stack returns to it, reaching a new one calls it.
+    def add_trace(self, trace, nodes, labels, gasLimitMilligas):
+        frames = []
+        previous = gasLimitMilligas
+        for index, entry in enumerate(trace):
+            remaining = _milligas(entry["gas"])
+            cost = previous - remaining
+            previous = remaining
+            self.total += cost
+            if index == 0:
+                self.stacks[SETUP_FRAME] += cost
+                continue
+
+            function, line, inlined = labels.get(id(nodes[entry["location"]]), (None, None, None))
+            names = [name for name, _ in frames]
+            if function in names:
+                del frames[names.index(function) + 1:]
+            else:
+                frames.append([function, None])
+            frames[-1][1] = line
+
+            stack = [DISPATCH_FRAME if name is None else "%s:%d" % (name, frameLine) if frameLine is not None else name for name, frameLine in frames]
+            if inlined is not None:
+                stack.append(inlined.replace(";", ","))
+            self.stacks[";".join(stack)] += cost
+            self.lines[(function, line)] += cost
+            self.instructions[(function, line)] += 1
+
+    def collapsed(self):
+        return "".join("%s %d\n" % (stack, milligas) for stack, milligas in sorted(self.stacks.items()) if milligas > 0)
+
+    # Gas by source line, most expensive first.
+    def table(self):
+        rows = [("gas", "share", "steps", "line", "function", "statement")]
+        for (function, line), milligas in sorted(self.lines.items(), key = lambda item: -item[1]):
+            location = "%s:%d" % (self.sourceMap.path, line) if line is not None else "-"
+            statement = self.sourceMap.text(line) if line is not None else ""
+            rows.append((
+                "%.3f" % (milligas / 1000),
+                "%.1f%%" % (100 * milligas / self.total) if self.total else "-",
+                str(self.instructions[(function, line)]),
+                location,
+                function or DISPATCH_FRAME,
+                statement,
+            ))
+        setup = self.stacks[SETUP_FRAME]
+        rows.append(("%.3f" % (setup / 1000), "%.1f%%" % (100 * setup / self.total) if self.total else "-", "", "-", SETUP_FRAME, ""))
+        rows.append(("%.3f" % (self.total / 1000), "", "", "", "total", ""))
+        # Numbers are right aligned, text left aligned.
+        widths = [max(len(row[column]) for row in rows) for column in range(len(rows[0]))]
+        lines = []
+        for row in rows:
+            cells = [cell.rjust(width) if column < 3 else cell.ljust(width) for column, (cell, width) in enumerate(zip(row, widths))]
+            lines.append("  ".join(cells).rstrip() + "\n")
+        return "".join(lines)
+
+# The storage to trace with: the instance's, re-encoded when the script's storage type
+# differs from the instance's, with the fields the instance lacks taken from the deploy defaults.
+def trace_storage(target, storageType, chainScript, chainStorage):
+    chainType = section([from_json(node) for node in chainScript["code"]], "storage")
+    if chainType == storageType:
+        return chainStorage
+    fields = dict(DEFAULT_STORAGE.get(target, {}))
+    fields.update(decode(chainType, from_json(chainStorage)))
+    return to_json(encode(storageType, fields))
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Profile the gas of a contract call by SmartPy source line.")
+    parser.add_argument("target", choices = sorted(TARGETS), help = "compilation target whose source the script maps to")
+    parser.add_argument("--rpc", required = True, help = "node RPC URL")
+    parser.add_argument("--contract", required = True, help = "deployed instance whose storage and balance the call runs with")
+    parser.add_argument("--entrypoint", required = True)
+    parser.add_argument("--arg", default = '{"prim": "Unit"}', help = "argument as Micheline JSON")
+    parser.add_argument("--arg-file", help = "argument as a Michelson expression file, such as a scenario's step_NNN_cont_N_params.tz")
+    parser.add_argument("--script", help = "compiled script to trace, defaults to the target's committed artifact")
+    parser.add_argument("--source", help = "address of the account making the call")
+    parser.add_argument("--amount", type = int, default = 0, help = "mutez sent with the call")
+    parser.add_argument("--block", default = "head")
+    parser.add_argument("--collapsed", default = "gas-profile.folded", help = "collapsed-stack output file")
+    args = parser.parse_args(argv)
+
+    sourcePath, artifact = TARGETS[args.target]
+    with open(args.script or os.path.join(sources.ROOT, artifact)) as file:
+        comments = {}
+        sections = parse_script(file.read(), comments)
+    if args.arg_file is not None:
+        with open(args.arg_file) as file:
+            argument = to_json(parse_expression(file.read()))
+    else:
+        argument = json.loads(args.arg)
+
+    sourceMap = SourceMap(sourcePath)
+    labels = label_script(sections, comments, sourceMap)
+    nodes = locations(Seq(tuple(sections)))
+
+    client = RpcClient(args.rpc)
+    try:
+        contractPath = "/chains/main/blocks/%s/context/contracts/%s" % (args.block, args.contract)
+        storage = trace_storage(args.target, section(sections, "storage"), client.script(args.contract, args.block), client.get(contractPath + "/storage"))
+        gasLimit = int(client.get("/chains/main/blocks/%s/context/constants" % args.block)["hard_gas_limit_per_operation"])
+        body = {
+            "script": [to_json(node) for node in sections],
+            "storage": storage,
+            "input": argument,
+            "amount": str(args.amount),
+            "balance": client.get(contractPath + "/balance"),
+            "chain_id": client.get("/chains/main/chain_id"),
+            "entrypoint": args.entrypoint,
+            "gas": str(gasLimit),
+            "self": args.contract,
+        }
+        if args.source is not None:
+            body["source"] = args.source
+            body["payer"] = args.source
+        result = client.post("/chains/main/blocks/%s/helpers/scripts/trace_code" % args.block, body)
+    except RpcError as error:
+        print(error, file = sys.stderr)
+        return 1
+
+    profile = Profile(sourceMap)
+    profile.add_trace(result["trace"], nodes, labels, gasLimit * 1000)
+    with open(args.collapsed, "w") as file:
+        file.write(profile.collapsed())
+    sys.stdout.write(profile.table())
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
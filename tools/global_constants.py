@@ -0,0 +1,269 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from michelson import Prim, Seq, String, binary_size, expr_hash, instruction_count, parse_script, render, to_json
+from rpc import RpcClient, RpcError
+
+# Moves the Michelson the compiled scripts share into global constants.
+#
+# Sub-expressions, and runs of instructions, that occur more than once in the
+# `code` and views of the given scripts are replaced by `constant "expr..."`
+# references, largest saving first, until nothing left is worth a reference.
+# A run becomes a constant holding the run as a sequence, which the protocol
+# expands in place before type checking. Parameter and storage types are left
+# alone so that tools reading them from the chain keep working.
+#
+# Writes the rewritten scripts and the constants to register, and reports the
+# bytes every origination saves. With --register the constants that are not on
+# chain yet are registered with octez-client.
+#
+# Usage: python tools/global_constants.py quipuswap_liquidity_proxy.tz quipuswap_maker_ceiling.tz -o build/global-constants
+#            [--register --rpc URL --source ALIAS]
+
+# Size of a `constant "expr..."` reference.
+REFERENCE_BYTES = binary_size(Prim("constant", (String(expr_hash(Prim("Unit", (), ()))),), ()))
+
+# Extractions saving less than this are not worth a constant.
+DEFAULT_MIN_BYTES = 32
+
+# Longest run of instructions considered.
+MAX_WINDOW = 40
+
+# Longest rendering of a constant kept in the report.
+PREVIEW_LENGTH = 240
+
+CONSTANTS_FILE = "global-constants.json"
+
+def reference(node):
+    return Prim("constant", (String(expr_hash(node)),), ())
+
+################################################################
+# Extraction
+################################################################
+
+# The sections of a script in which constants may be used, as (index, argument index) pairs.
+def _code_slots(sections):
+    slots = []
+    for index, node in enumerate(sections):
+        if node.name == "code":
+            slots.append((index, 0))
+        elif node.name == "view":
+            slots.append((index, 3))
+    return slots
+
+# Count the sub-expressions and non-overlapping instruction runs of the code, keyed structurally.
+def _count(scripts):
+    ids = {}
+    nodes = {}
+    counts = {}
+
+    def intern(node):
+        if isinstance(node, Seq):
+            key = ("seq", tuple(intern(item) for item in node.items))
+        elif isinstance(node, Prim):
+            key = ("prim", node.name, tuple(intern(arg) for arg in node.args), node.annots)
+        else:
+            key = node
+        if key not in ids:
+            ids[key] = len(ids)
+            nodes[ids[key]] = node
+        nodeId = ids[key]
+        if isinstance(node, Seq) or (isinstance(node, Prim) and node.name != "constant"):
+            counts[("node", nodeId)] = counts.get(("node", nodeId), 0) + 1
+        if isinstance(node, Seq):
+            itemIds = key[1]
+            lastEnd = {}
+            for start in range(len(itemIds)):
+                for length in range(2, min(MAX_WINDOW, len(itemIds) - start) + 1):
+                    window = itemIds[start:start + length]
+                    if len(window) == len(itemIds) or lastEnd.get(window, 0) > start:
+                        continue
+                    lastEnd[window] = start + length
+                    counts[("run", window)] = counts.get(("run", window), 0) + 1
+        return nodeId
+
+    for sections in scripts.values():
+        for index, argIndex in _code_slots(sections):
+            intern(sections[index].args[argIndex])
+    return counts, nodes
+
+# The candidate saving the most bytes, as (saving, value to register, run length or None).
+def _best(scripts, minBytes):
+    counts, nodes = _count(scripts)
+    sizes = {}
+    best = None
+    for (kind, key), count in counts.items():
+        if count < 2:
+            continue
+        if kind == "node":
+            value = nodes[key]
+            size = sizes.get(key) or sizes.setdefault(key, binary_size(value))
+        else:
+            size = sum(sizes.get(itemId) or sizes.setdefault(itemId, binary_size(nodes[itemId])) for itemId in key)
+        saving = count * (size - REFERENCE_BYTES)
+        if saving >= minBytes and (best is None or saving > best[0]):
+            best = (saving, kind, key)
+    if best is None:
+        return None
+    saving, kind, key = best
+    if kind == "node":
+        return saving, nodes[key], None
+    return saving, Seq(tuple(nodes[itemId] for itemId in key)), len(key)
+
+# Replace every occurrence of `value`, or of its items as a run when `runLength` is set.
+def _replace(node, value, runLength, ref):
+    if runLength is None and node == value:
+        return ref
+    if isinstance(node, Seq):
+        items = [_replace(item, value, runLength, ref) for item in node.items]
+        if runLength is not None:
+            replaced = []
+            index = 0
+            while index < len(items):
+                if tuple(items[index:index + runLength]) == value.items and runLength < len(items):
+                    replaced.append(ref)
+                    index += runLength
+                else:
+                    replaced.append(items[index])
+                    index += 1
+            items = replaced
+        return Seq(tuple(items))
+    if isinstance(node, Prim) and node.args:
+        return Prim(node.name, tuple(_replace(arg, value, runLength, ref) for arg in node.args), node.annots)
+    return node
+
+# Rewrite the scripts, a map of name to sections, to use global constants.
+# Returns the rewritten scripts and the constants as a map of hash to value.
+def extract(scripts, minBytes = DEFAULT_MIN_BYTES):
+    scripts = dict(scripts)
+    constants = {}
+    while True:
+        best = _best(scripts, minBytes)
+        if best is None:
+            return scripts, constants
+        _, value, runLength = best
+        ref = reference(value)
+        constants[expr_hash(value)] = value
+        for name, sections in scripts.items():
+            sections = list(sections)
+            for index, argIndex in _code_slots(sections):
+                args = list(sections[index].args)
+                args[argIndex] = _replace(args[argIndex], value, runLength, ref)
+                sections[index] = Prim(sections[index].name, tuple(args), sections[index].annots)
+            scripts[name] = sections
+
+# Number of references to each constant in the scripts and the other constants.
+def _uses(nodes):
+    uses = {}
+
+    def walk(node):
+        if isinstance(node, Prim) and node.name == "constant":
+            uses[node.args[0].value] = uses.get(node.args[0].value, 0) + 1
+        elif isinstance(node, Seq):
+            for item in node.items:
+                walk(item)
+        elif isinstance(node, Prim):
+            for arg in node.args:
+                walk(arg)
+
+    for node in nodes:
+        walk(node)
+    return uses
+
+def build_report(original, rewritten, constants):
+    uses = _uses([node for sections in rewritten.values() for node in sections] + list(constants.values()))
+    report = {"scripts": [], "constants": []}
+    for name in original:
+        before = sum(binary_size(node) for node in original[name])
+        after = sum(binary_size(node) for node in rewritten[name])
+        report["scripts"].append({"file": name, "bytes": before, "bytesWithConstants": after, "savedBytes": before - after})
+    for constantHash, value in constants.items():
+        preview = render(value)
+        if len(preview) > PREVIEW_LENGTH:
+            preview = preview[:PREVIEW_LENGTH - 3] + "..."
+        report["constants"].append({
+            "hash": constantHash,
+            "bytes": binary_size(value),
+            "instructions": instruction_count(value),
+            "references": uses.get(constantHash, 0),
+            "michelson": preview,
+        })
+    report["savedBytesPerOrigination"] = sum(script["savedBytes"] for script in report["scripts"])
+    report["constantBytes"] = sum(constant["bytes"] for constant in report["constants"])
+    return report
+
+def render_script(sections):
+    return "".join("%s;\n" % render(node) for node in sections)
+
+# Extract constants from .tz files and write the rewritten scripts and the constants to `outputDir`.
+def write(paths, outputDir, minBytes = DEFAULT_MIN_BYTES):
+    original = {}
+    for path in paths:
+        with open(path) as file:
+            original[path] = parse_script(file.read())
+    rewritten, constants = extract(original, minBytes)
+
+    os.makedirs(outputDir, exist_ok = True)
+    for path, sections in rewritten.items():
+        with open(os.path.join(outputDir, os.path.basename(path)), "w") as file:
+            file.write(render_script(sections))
+    with open(os.path.join(outputDir, CONSTANTS_FILE), "w") as file:
+        json.dump([{"hash": constantHash, "value": to_json(value)} for constantHash, value in constants.items()], file, indent = 2)
+    return build_report(original, rewritten, constants)
+
+################################################################
+# Registration
+################################################################
+
+# Register the constants of an output directory that are not on chain yet, returning their hashes.
+def register(client, outputDir, source, octezClient = "octez-client", burnCap = "1"):
+    with open(os.path.join(outputDir, CONSTANTS_FILE)) as file:
+        constants = json.load(file)
+    registered = []
+    # Constants are listed in extraction order, so any constant a value references is registered before it.
+    for constant in constants:
+        try:
+            client.get("/chains/main/blocks/head/context/constants/%s" % constant["hash"])
+            continue
+        except RpcError as error:
+            if "404" not in str(error):
+                raise
+        result = subprocess.run(
+            [octezClient, "--endpoint", client.url, "register", "global", "constant", json.dumps(constant["value"]), "from", source, "--burn-cap", burnCap],
+            capture_output = True, text = True,
+        )
+        if result.returncode != 0:
+            raise RpcError("Registering %s failed: %s" % (constant["hash"], result.stderr.strip()))
+        registered.append(constant["hash"])
+    return registered
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Share the Michelson of compiled scripts through global constants.")
+    parser.add_argument("scripts", nargs = "+", help = "compiled .tz files")
+    parser.add_argument("-o", "--output", required = True, help = "directory for the rewritten scripts and the constants")
+    parser.add_argument("--min-bytes", type = int, default = DEFAULT_MIN_BYTES, help = "ignore extractions saving less than this")
+    parser.add_argument("--register", action = "store_true", help = "register the constants which are not on chain yet")
+    parser.add_argument("--rpc", help = "node RPC URL, needed with --register")
+    parser.add_argument("--source", help = "octez-client alias paying for the registrations")
+    parser.add_argument("--octez-client", default = "octez-client", help = "path to octez-client")
+    args = parser.parse_args(argv)
+
+    if args.register and not (args.rpc and args.source):
+        parser.error("--register needs --rpc and --source")
+
+    report = write(args.scripts, args.output, args.min_bytes)
+    print(json.dumps(report, indent = 2))
+    if args.register:
+        try:
+            for constantHash in register(RpcClient(args.rpc), args.output, args.source, args.octez_client):
+                print("registered %s" % constantHash, file = sys.stderr)
+        except RpcError as error:
+            print(error, file = sys.stderr)
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
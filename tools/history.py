@@ -0,0 +1,280 @@
+import argparse
+import csv
+import datetime
+import json
+import math
+import os
+import sqlite3
+import sys
+
+import numpy
+
+from michelson import decode, from_json
+from rpc import RpcClient, RpcError
+
+# An append-only store of oracle prices and Quipuswap pool reserves, kept as one
+# raw NumPy column file per field so that reading it costs a memory map.
+#
+# Each row is the state at its timestamp: the last oracle price and the last
+# pool reserves seen, so sources which only know some of the columns carry the
+# others forward. Rows are kept in timestamp order, which makes the timestamp
+# column the time index: ranges are found by binary search and returned as
+# slices of the memory maps without copying.
+#
+# Column files are only ever appended to, and the row count in meta.json is
+# replaced after the rows are written, so readers never see a partial append
+# and an interrupted append is discarded by the next one.
+#
+# Usage: python tools/history.py import STORE FILE...
+#        python tools/history.py follow STORE INDEX_DB --rpc URL --quipuswap KT1... --oracle KT1... [--every LEVELS]
+#        python tools/history.py show STORE [--from TIME] [--to TIME]
+
+# Column names and types. Token reserves have 18 decimals and overflow int64, so they are stored as float64.
+COLUMNS = {
+    "timestamp": numpy.int64,
+    "price": numpy.int64,
+    "tez_pool": numpy.int64,
+    "token_pool": numpy.float64,
+}
+
+META_FILE = "meta.json"
+
+# The Youves view read by `follow`, and the asset it is asked for.
+ORACLE_VIEW = "get_price_with_timestamp"
+ORACLE_ASSET = "XTZUSD"
+
+# Blocks per `follow` batch, written as one append.
+FOLLOW_BATCH = 500
+
+def seconds(timestamp):
+    if isinstance(timestamp, (int, numpy.integer)) or timestamp.isdigit():
+        return int(timestamp)
+    return int(datetime.datetime.fromisoformat(timestamp.replace("Z", "+00:00")).timestamp())
+
+# A column value parsed from a dump, or None where it is missing.
+def _parse(value, dtype):
+    if value is None or value == "" or (isinstance(value, float) and math.isnan(value)):
+        return None
+    return int(value) if dtype == numpy.int64 else float(value)
+
+################################################################
+# Store
+################################################################
+
+class HistoryStore:
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok = True)
+        self.meta = {"rows": 0, "level": None}
+        if os.path.exists(os.path.join(path, META_FILE)):
+            with open(os.path.join(path, META_FILE)) as file:
+                self.meta = json.load(file)
+        self._columns = None
+
+    def __len__(self):
+        return self.meta["rows"]
+
+    def column_path(self, name):
+        return os.path.join(self.path, "%s.%s" % (name, numpy.dtype(COLUMNS[name]).str.lstrip("<>|=")))
+
+    # Read-only memory maps of every column, covering the committed rows.
+    def columns(self):
+        if self._columns is None:
+            self._columns = {
+                name: numpy.memmap(self.column_path(name), dtype = dtype, mode = "r", shape = (len(self),))
+                if len(self) else numpy.empty(0, dtype = dtype)
+                for name, dtype in COLUMNS.items()
+            }
+        return self._columns
+
+    # The last row, as a dict, or None for an empty store.
+    def last(self):
+        if not len(self):
+            return None
+        return {name: column[-1].item() for name, column in self.columns().items()}
+
+    # Zero-copy slices of every column for timestamps in [start, end).
+    def between(self, start = None, end = None):
+        timestamps = self.columns()["timestamp"]
+        first = 0 if start is None else int(numpy.searchsorted(timestamps, start, side = "left"))
+        last = len(self) if end is None else int(numpy.searchsorted(timestamps, end, side = "left"))
+        return {name: column[first:last] for name, column in self.columns().items()}
+
+    # The row in force at `timestamp`, as a dict, or None before the first row.
+    def as_of(self, timestamp):
+        index = int(numpy.searchsorted(self.columns()["timestamp"], timestamp, side = "right")) - 1
+        if index < 0:
+            return None
+        return {name: column[index].item() for name, column in self.columns().items()}
+
+    # Append rows from lists or NumPy arrays. Columns missing from `values`, or NaN / None entries, carry the previous
+    # row's value forward. Rows are sorted by timestamp and may not predate the last stored row.
+    # `level` records the last block covered, for incremental ingestion.
+    def append(self, timestamps, values, level = None):
+        timestamps = numpy.asarray(timestamps, dtype = numpy.int64)
+        order = numpy.argsort(timestamps, kind = "stable")
+        timestamps = timestamps[order]
+        last = self.last()
+        if len(timestamps) and last is not None and timestamps[0] < last["timestamp"]:
+            raise ValueError("Rows from %d predate the last stored row at %d" % (timestamps[0], last["timestamp"]))
+
+        rows = {"timestamp": timestamps}
+        for name, dtype in COLUMNS.items():
+            if name == "timestamp":
+                continue
+            given = values.get(name)
+            if isinstance(given, numpy.ndarray) and given.dtype.kind in "iuf":
+                known = (~numpy.isnan(given) if given.dtype.kind == "f" else numpy.ones(len(given), dtype = bool))[order]
+                column = numpy.where(known, given[order], 0).astype(dtype)
+            else:
+                parsed = [_parse(value, dtype) for value in given] if given is not None else [None] * len(timestamps)
+                known = numpy.array([value is not None for value in parsed], dtype = bool)[order]
+                column = numpy.array([0 if value is None else value for value in parsed], dtype = dtype)[order]
+            # Forward fill from the previous row.
+            source = numpy.maximum.accumulate(numpy.where(known, numpy.arange(len(column)), -1))
+            previous = last[name] if last is not None else 0
+            rows[name] = numpy.where(source < 0, previous, column[numpy.maximum(source, 0)]).astype(dtype)
+
+        count = len(self)
+        for name, dtype in COLUMNS.items():
+            with open(self.column_path(name), "ab") as file:
+                # Drop rows of an interrupted append that were never committed.
+                file.truncate(count * numpy.dtype(dtype).itemsize)
+                file.write(numpy.ascontiguousarray(rows[name], dtype = dtype).tobytes())
+                file.flush()
+                os.fsync(file.fileno())
+        self.meta["rows"] = count + len(timestamps)
+        if level is not None:
+            self.meta["level"] = level
+        with open(os.path.join(self.path, META_FILE + ".tmp"), "w") as file:
+            json.dump(self.meta, file)
+        os.replace(os.path.join(self.path, META_FILE + ".tmp"), os.path.join(self.path, META_FILE))
+        self._columns = None
+        return len(timestamps)
+
+################################################################
+# Ingestion
+################################################################
+
+# Rows of a CSV file with a header, or a JSON list of objects, with a `timestamp`
+# (seconds or ISO 8601) and any of the other columns.
+def read_dump(path):
+    with open(path) as file:
+        if path.endswith(".json"):
+            records = json.load(file)
+        else:
+            records = list(csv.DictReader(file))
+    timestamps = [seconds(str(record["timestamp"])) for record in records]
+    values = {name: [record.get(name) for record in records] for name in COLUMNS if name != "timestamp"}
+    return timestamps, values
+
+# Find a field anywhere in a decoded storage value.
+def _find(value, name):
+    if isinstance(value, dict):
+        if name in value:
+            return value[name]
+        for child in value.values():
+            found = _find(child, name)
+            if found is not None:
+                return found
+    elif isinstance(value, list):
+        for child in value:
+            found = _find(child, name)
+            if found is not None:
+                return found
+    return None
+
+# The Quipuswap reserves and the Youves price at a block.
+def snapshot(client, level, quipuswap, storageType, oracle, chainId):
+    storage = decode(storageType, from_json(client.get("/chains/main/blocks/%d/context/contracts/%s/storage" % (level, quipuswap))))
+    view = client.post("/chains/main/blocks/%d/helpers/scripts/run_script_view" % level, {
+        "contract": oracle,
+        "view": ORACLE_VIEW,
+        "input": {"string": ORACLE_ASSET},
+        "chain_id": chainId,
+        "unparsing_mode": "Readable",
+    })
+    return int(view["data"]["args"][0]["int"]), int(_find(storage, "tez_pool")), int(_find(storage, "token_pool"))
+
+# Append a snapshot for every `every`th block the indexer has covered since the store's last level.
+def follow(store, db, client, quipuswap, oracle, every = 1):
+    script = client.script(quipuswap)
+    storageType = from_json(next(node for node in script["code"] if node["prim"] == "storage")["args"][0])
+    chainId = client.get("/chains/main/chain_id")
+    fromLevel = store.meta["level"] if store.meta["level"] is not None else -1
+    blocks = db.execute(
+        "SELECT level, timestamp FROM blocks WHERE level > ? AND level % ? = 0 ORDER BY level",
+        (fromLevel, every),
+    ).fetchall()
+
+    appended = 0
+    for start in range(0, len(blocks), FOLLOW_BATCH):
+        batch = blocks[start:start + FOLLOW_BATCH]
+        snapshots = [snapshot(client, level, quipuswap, storageType, oracle, chainId) for level, _ in batch]
+        appended += store.append(
+            [seconds(timestamp) for _, timestamp in batch],
+            {
+                "price": [price for price, _, _ in snapshots],
+                "tez_pool": [tezPool for _, tezPool, _ in snapshots],
+                "token_pool": [tokenPool for _, _, tokenPool in snapshots],
+            },
+            level = batch[-1][0],
+        )
+    return appended
+
+################################################################
+# Main
+################################################################
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Store oracle prices and pool reserves as memory-mapped columns.")
+    commands = parser.add_subparsers(dest = "command", required = True)
+
+    importer = commands.add_parser("import", help = "append rows from CSV or JSON dumps")
+    importer.add_argument("store", help = "store directory, created if missing")
+    importer.add_argument("files", nargs = "+", help = "CSV files with a header, or JSON lists of objects")
+
+    follower = commands.add_parser("follow", help = "append a snapshot per block indexed by indexer.py")
+    follower.add_argument("store", help = "store directory, created if missing")
+    follower.add_argument("index", help = "SQLite database written by indexer.py")
+    follower.add_argument("--rpc", required = True, help = "node RPC URL")
+    follower.add_argument("--quipuswap", required = True, help = "address of the Quipuswap pool")
+    follower.add_argument("--oracle", required = True, help = "address of the Youves oracle")
+    follower.add_argument("--every", type = int, default = 1, help = "only snapshot levels that are a multiple of this")
+    follower.add_argument("--cache", help = "cache final blocks in this directory")
+
+    shower = commands.add_parser("show", help = "print the rows of a time range")
+    shower.add_argument("store")
+    shower.add_argument("--from", dest = "start", help = "first timestamp, seconds or ISO 8601")
+    shower.add_argument("--to", dest = "end", help = "timestamp after the last row, seconds or ISO 8601")
+    args = parser.parse_args(argv)
+
+    store = HistoryStore(args.store)
+    try:
+        if args.command == "import":
+            for path in args.files:
+                timestamps, values = read_dump(path)
+                print("%s: %d rows" % (path, store.append(timestamps, values)))
+        elif args.command == "follow":
+            db = sqlite3.connect(args.index)
+            try:
+                appended = follow(store, db, RpcClient(args.rpc, cacheDirectory = args.cache), args.quipuswap, args.oracle, args.every)
+            finally:
+                db.close()
+            print("%d rows, up to level %s" % (appended, store.meta["level"]))
+        else:
+            columns = store.between(
+                seconds(args.start) if args.start else None,
+                seconds(args.end) if args.end else None,
+            )
+            writer = csv.writer(sys.stdout)
+            writer.writerow(COLUMNS)
+            for row in zip(*(columns[name].tolist() for name in COLUMNS)):
+                writer.writerow(row)
+    except (RpcError, ValueError, KeyError) as error:
+        print(error, file = sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
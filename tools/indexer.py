@@ -0,0 +1,272 @@
+import argparse
+import json
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from michelson import decode_parameter, from_json, parse_expression, render
+from rpc import FINALITY, RpcClient, RpcError
+
+# Incrementally indexes calls to the contracts, and the internal operations they
+# cause, from a node RPC into SQLite.
+#
+# The cursor is written in the same transaction as the rows of the blocks it
+# covers, so an interrupted run resumes exactly where it stopped. When a new
+# block does not build on the indexed chain the indexer rewinds one level at a
+# time until it does.
+#
+# Usage: python tools/indexer.py DATABASE --rpc URL --contract liquidity-fund=KT1... --contract quipu_swapper=KT1...
+#            [--start-level LEVEL] [--to-level LEVEL] [--follow] [--cache DIR]
+
+# Blocks fetched and written per transaction.
+BATCH_SIZE = 500
+
+# Concurrent block fetches from the node.
+FETCH_JOBS = 8
+
+# Seconds between polls for new blocks with --follow.
+POLL_INTERVAL_SEC = 10
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS contracts (
+    name TEXT PRIMARY KEY,
+    address TEXT NOT NULL UNIQUE,
+    parameter_type TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS cursor (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    level INTEGER NOT NULL,
+    hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS blocks (
+    level INTEGER PRIMARY KEY,
+    hash TEXT NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS calls (
+    id INTEGER PRIMARY KEY,
+    level INTEGER NOT NULL,
+    timestamp TEXT NOT NULL,
+    operation_hash TEXT NOT NULL,
+    content_index INTEGER NOT NULL,
+    internal_index INTEGER,
+    contract TEXT NOT NULL,
+    entrypoint TEXT NOT NULL,
+    sender TEXT NOT NULL,
+    amount INTEGER NOT NULL,
+    parameters TEXT,
+    status TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS calls_by_entrypoint ON calls (contract, entrypoint, timestamp);
+CREATE INDEX IF NOT EXISTS calls_by_level ON calls (level);
+CREATE TABLE IF NOT EXISTS internal_operations (
+    call_id INTEGER NOT NULL REFERENCES calls (id),
+    position INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    source TEXT NOT NULL,
+    destination TEXT,
+    entrypoint TEXT,
+    amount INTEGER,
+    parameters TEXT,
+    status TEXT NOT NULL,
+    PRIMARY KEY (call_id, position)
+);
+CREATE INDEX IF NOT EXISTS internal_operations_by_destination ON internal_operations (destination, entrypoint);
+"""
+
+################################################################
+# Database
+################################################################
+
+def connect(path):
+    db = sqlite3.connect(path)
+    db.executescript(SCHEMA)
+    return db
+
+def read_cursor(db):
+    return db.execute("SELECT level, hash FROM cursor WHERE id = 0").fetchone()
+
+def write_cursor(db, level, blockHash):
+    db.execute("INSERT OR REPLACE INTO cursor (id, level, hash) VALUES (0, ?, ?)", (level, blockHash))
+
+# Remove everything indexed above `level`.
+def rewind(db, level):
+    db.execute("DELETE FROM internal_operations WHERE call_id IN (SELECT id FROM calls WHERE level > ?)", (level,))
+    db.execute("DELETE FROM calls WHERE level > ?", (level,))
+    db.execute("DELETE FROM blocks WHERE level > ?", (level,))
+
+# Record the tracked contracts and their parameter types, read from the chain on first use.
+def register_contracts(db, client, contracts, level):
+    for name, address in contracts.items():
+        known = db.execute("SELECT address FROM contracts WHERE name = ?", (name,)).fetchone()
+        if known is not None:
+            if known[0] != address:
+                raise ValueError("%s is already indexed as %s, not %s" % (name, known[0], address))
+            continue
+        script = client.script(address, level)
+        parameterType = next(section for section in script["code"] if section["prim"] == "parameter")["args"][0]
+        db.execute("INSERT INTO contracts (name, address, parameter_type) VALUES (?, ?, ?)", (name, address, render(from_json(parameterType))))
+    db.commit()
+
+# Map of address to (name, parameter type) for every tracked contract.
+def load_contracts(db):
+    return dict(
+        (address, (name, parse_expression(parameterType)))
+        for name, address, parameterType in db.execute("SELECT name, address, parameter_type FROM contracts")
+    )
+
+################################################################
+# Decoding
+################################################################
+
+def _status(operation):
+    result = operation.get("result") or operation.get("metadata", {}).get("operation_result", {})
+    return result.get("status", "unknown")
+
+# The entrypoint and decoded argument of a call to a tracked contract.
+def decode_call(parameterType, operation):
+    parameters = operation.get("parameters")
+    if parameters is None:
+        return decode_parameter(parameterType, "default", parse_expression("Unit"))
+    return decode_parameter(parameterType, parameters["entrypoint"], from_json(parameters["value"]))
+
+def _internal_row(operation):
+    parameters = operation.get("parameters")
+    return (
+        operation["kind"],
+        operation["source"],
+        operation.get("destination"),
+        parameters["entrypoint"] if parameters else None,
+        int(operation["amount"]) if "amount" in operation else None,
+        json.dumps(parameters["value"]) if parameters else None,
+        _status(operation),
+    )
+
+# The internal operations caused by the call at `index` of an operation's internal
+# results, which are listed in execution order: everything up to the next
+# operation emitted by the caller of that call.
+def _caused_by(internals, index):
+    caller = internals[index]["source"]
+    caused = []
+    for operation in internals[index + 1:]:
+        if operation["source"] == caller:
+            break
+        caused.append(operation)
+    return caused
+
+# Every call to a tracked contract in a manager operation content, as
+# (internal index or None, operation, internal operations it caused).
+def tracked_calls(content, contracts):
+    internals = content.get("metadata", {}).get("internal_operation_results", [])
+    calls = []
+    if content.get("kind") == "transaction" and content.get("destination") in contracts:
+        calls.append((None, content, internals))
+    for index, operation in enumerate(internals):
+        if operation.get("kind") == "transaction" and operation.get("destination") in contracts:
+            calls.append((index, operation, _caused_by(internals, index)))
+    return calls
+
+def index_block(db, block, contracts):
+    level = block["header"]["level"]
+    timestamp = block["header"]["timestamp"]
+    db.execute("INSERT OR REPLACE INTO blocks (level, hash, timestamp) VALUES (?, ?, ?)", (level, block["hash"], timestamp))
+    calls = 0
+    for group in block["operations"]:
+        for operation in group:
+            for contentIndex, content in enumerate(operation.get("contents", [])):
+                for internalIndex, call, caused in tracked_calls(content, contracts):
+                    name, parameterType = contracts[call["destination"]]
+                    entrypoint, argument = decode_call(parameterType, call)
+                    cursor = db.execute(
+                        "INSERT INTO calls (level, timestamp, operation_hash, content_index, internal_index, contract, entrypoint, sender, amount, parameters, status)"
+                        " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (level, timestamp, operation["hash"], contentIndex, internalIndex, name, entrypoint, call["source"], int(call["amount"]), json.dumps(argument), _status(call)),
+                    )
+                    db.executemany(
+                        "INSERT INTO internal_operations (call_id, position, kind, source, destination, entrypoint, amount, parameters, status)"
+                        " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        [(cursor.lastrowid, position) + _internal_row(internal) for position, internal in enumerate(caused)],
+                    )
+                    calls += 1
+    return calls
+
+################################################################
+# Following the chain
+################################################################
+
+# Index blocks up to `toLevel`, returning (blocks, calls) indexed.
+def catch_up(db, client, toLevel, startLevel = None):
+    contracts = load_contracts(db)
+    position = read_cursor(db)
+    if position is None:
+        if startLevel is None:
+            raise ValueError("The database is empty: give --start-level")
+        position = (startLevel - 1, None)
+
+    blocks = calls = 0
+    with ThreadPoolExecutor(max_workers = FETCH_JOBS) as pool:
+        while position[0] < toLevel:
+            levels = range(position[0] + 1, min(position[0] + BATCH_SIZE, toLevel) + 1)
+            for block in pool.map(client.block, levels):
+                level, cursorHash = position
+                if cursorHash and block["header"]["predecessor"] != cursorHash:
+                    # A reorganisation: drop the last indexed block and fetch again from there.
+                    rewind(db, level - 1)
+                    previous = db.execute("SELECT hash FROM blocks WHERE level = ?", (level - 1,)).fetchone()
+                    position = (level - 1, previous[0] if previous else None)
+                    write_cursor(db, position[0], position[1] or "")
+                    break
+                calls += index_block(db, block, contracts)
+                blocks += 1
+                position = (block["header"]["level"], block["hash"])
+                write_cursor(db, position[0], position[1])
+            db.commit()
+    return blocks, calls
+
+def parse_contract(value):
+    name, separator, address = value.partition("=")
+    if not separator or not address:
+        raise argparse.ArgumentTypeError("expected NAME=ADDRESS")
+    return name, address
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Index calls to the contracts into SQLite.")
+    parser.add_argument("database", help = "SQLite database file, created if missing")
+    parser.add_argument("--rpc", required = True, help = "node RPC URL")
+    parser.add_argument("--contract", type = parse_contract, action = "append", default = [], help = "NAME=ADDRESS of a contract to index, repeatable")
+    parser.add_argument("--start-level", type = int, help = "first level to index in an empty database, usually the origination level")
+    parser.add_argument("--to-level", type = int, help = "last level to index (default: the last final block)")
+    parser.add_argument("--follow", action = "store_true", help = "keep indexing new blocks as they become final")
+    parser.add_argument("--cache", help = "cache final blocks in this directory")
+    args = parser.parse_args(argv)
+
+    db = connect(args.database)
+    client = RpcClient(args.rpc, cacheDirectory = args.cache)
+    try:
+        if args.contract:
+            position = read_cursor(db)
+            register_contracts(db, client, dict(args.contract), args.start_level if position is None else position[0])
+        if not load_contracts(db):
+            parser.error("no contracts to index: give --contract NAME=ADDRESS")
+
+        while True:
+            toLevel = args.to_level if args.to_level is not None else client.head_level() - FINALITY
+            started = time.time()
+            blocks, calls = catch_up(db, client, toLevel, args.start_level)
+            seconds = time.time() - started
+            if blocks:
+                print("Indexed %d blocks (%d calls) up to level %d in %.2fs, %d blocks/s" % (
+                    blocks, calls, read_cursor(db)[0], seconds, blocks / seconds if seconds > 0 else blocks,
+                ))
+            if not args.follow:
+                return 0
+            time.sleep(POLL_INTERVAL_SEC)
+    except (RpcError, ValueError) as error:
+        print(error, file = sys.stderr)
+        return 1
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
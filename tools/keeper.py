@@ -0,0 +1,345 @@
+import argparse
+import datetime
+import json
+import math
+import re
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from gas_cache import GasCache
+from michelson import decode, from_json, render
+from rpc import RpcClient, RpcError
+
+# Calls `tokenToTezPayment` on a MakerContract in the first block where its
+# rate limit bucket holds enough tokens, driven by the node's head stream.
+#
+# The maker's storage is read once and then only refreshed every few heads and
+# after each trade, so deciding whether to trade on a new head costs no RPC
+# call. The call is injected on the head before the first block whose
+# timestamp lets the bucket refill to `--min-amount` tokens, and sells what the
+# bucket holds at that timestamp.
+#
+# With --oracle-feed, every trade is injected in one operation group behind an
+# `update` of the maker's spot oracle with data fetched from the feed just
+# before injection. The trade then never finds stale data, and fails together
+# with the update if the update fails, so the maker can run with a much smaller
+# `maxDataDelaySec`.
+#
+# A trade is never injected again while the previous one can still be
+# included. Its operation hash is looked up in each new head, and after a few
+# heads in the mempool, until it is included, dropped, or older than the
+# operation time to live.
+#
+# Usage: python tools/keeper.py --rpc URL --maker KT1... --source ALIAS [--min-amount TOKENS] [--oracle-feed URL] [--dry-run]
+
+# Heads between storage refreshes, which pick up trades by others and governance changes.
+REFRESH_HEADS = 20
+
+# Heads to wait for an injected trade to be included before looking for it in the mempool.
+# A trade still in the mempool is waited for until its time to live runs out.
+INCLUSION_HEADS = 2
+
+# Validation pass of manager operations in a block's operation hashes.
+MANAGER_PASS = 3
+
+# Mempool classifications whose operations can still be included.
+LIVE_MEMPOOL_CLASSES = ["validated", "applied", "branch_delayed", "unprocessed"]
+
+# How octez-client reports the hash of an operation it injected.
+OPERATION_HASH = re.compile(r"Operation hash is '(o\w+)'")
+
+# Seconds to wait before reconnecting to the head stream.
+RECONNECT_DELAY_SEC = 2
+
+# Normalized tokens the bucket must hold before a trade is worth its fees.
+MIN_AMOUNT = 100
+
+# The entrypoint of the spot oracle which takes signed price data.
+ORACLE_ENTRYPOINT = "update"
+
+# Seconds to wait for the oracle feed, which is fetched in the block before the trade.
+FEED_TIMEOUT_SEC = 5
+
+def seconds(timestamp):
+    if isinstance(timestamp, int):
+        return timestamp
+    return int(datetime.datetime.fromisoformat(timestamp.replace("Z", "+00:00")).timestamp())
+
+################################################################
+# Scheduling
+################################################################
+
+class Keeper:
+    def __init__(self, client, maker, fire, refreshHeads = REFRESH_HEADS, minAmount = MIN_AMOUNT):
+        self.client = client
+        self.maker = maker
+        self.fire = fire
+        self.refreshHeads = refreshHeads
+        self.minAmount = minAmount
+
+        script = client.script(maker)
+        self.storageType = from_json(next(node for node in script["code"] if node["prim"] == "storage")["args"][0])
+        constants = client.get("/chains/main/blocks/head/context/constants")
+        self.blockDelay = int(constants["minimal_block_delay"])
+        self.operationTtl = int(constants["max_operations_time_to_live"])
+
+        self.rawStorage = None
+        self.storage = None
+        self.readyAt = None
+        self.refreshLevel = None
+        # The last trade injected, and the level of the head it was injected on, until it is included or dropped.
+        self.pending = None
+        self.pendingLevel = None
+
+    def refresh(self):
+        self.rawStorage = self.client.get("/chains/main/blocks/head/context/contracts/%s/storage" % self.maker)
+        self.storage = decode(self.storageType, from_json(self.rawStorage))
+        self.readyAt = self.ready_time()
+
+    # Normalized tokens the maker's bucket holds at `timestamp`, in seconds.
+    def bucket_level(self, timestamp):
+        elapsed = max(0, timestamp - seconds(self.storage["lastRefillTime"]))
+        return min(self.storage["bucketCapacity"], self.storage["bucketLevel"] + elapsed * self.storage["refillRatePerSec"])
+
+    # The first time, in seconds, at which the bucket holds `minAmount` tokens, or None if it never will.
+    def ready_time(self):
+        missing = self.minAmount - self.storage["bucketLevel"]
+        if missing <= 0:
+            return seconds(self.storage["lastRefillTime"])
+        if self.storage["refillRatePerSec"] == 0 or self.minAmount > self.storage["bucketCapacity"]:
+            return None
+        return seconds(self.storage["lastRefillTime"]) + math.ceil(missing / self.storage["refillRatePerSec"])
+
+    # The level of the first block whose timestamp lets a trade through, seen from a head.
+    def target_level(self, level, headTime):
+        return level + max(1, math.ceil((self.readyAt - headTime) / self.blockDelay))
+
+    # Whether an operation is in the mempool in a class from which it can still be included.
+    def in_mempool(self, operationHash):
+        mempool = self.client.get("/chains/main/mempool/pending_operations")
+        for name in LIVE_MEMPOOL_CLASSES:
+            for operation in mempool.get(name, []):
+                # Older nodes list unprocessed operations as [hash, operation] pairs.
+                if (operation["hash"] if isinstance(operation, dict) else operation[0]) == operationHash:
+                    return True
+        return False
+
+    # Follow the pending trade on a new head. Returns what is being waited for, or None
+    # once the trade is included or can no longer be, and the storage is to be read again.
+    def follow_pending(self, header):
+        level = header["level"]
+        operationHash = self.pending.hash
+        if not self.pending.failed and level <= self.pendingLevel + self.operationTtl:
+            if operationHash is None:
+                return "waiting for the trade fired at level %d to be injected" % self.pendingLevel
+            included = operationHash in self.client.get("/chains/main/blocks/%s/operation_hashes/%d" % (header["hash"], MANAGER_PASS))
+            if not included and (level < self.pendingLevel + INCLUSION_HEADS or self.in_mempool(operationHash)):
+                return "waiting for %s injected at level %d" % (operationHash, self.pendingLevel)
+        self.pending = None
+        self.pendingLevel = None
+        self.refreshLevel = level
+        return None
+
+    # Decide what to do on a new head and return a short description of it.
+    def on_head(self, header):
+        level = header["level"]
+        headTime = seconds(header["timestamp"])
+        if self.pending is not None:
+            waiting = self.follow_pending(header)
+            if waiting is not None:
+                return waiting
+        if self.refreshLevel is None or level >= self.refreshLevel:
+            self.refresh()
+            self.refreshLevel = level + self.refreshHeads
+
+        if self.storage["paused"]:
+            return "paused"
+        if self.readyAt is None:
+            return "bucket never reaches %d tokens" % self.minAmount
+
+        targetLevel = self.target_level(level, headTime)
+        if targetLevel == level + 1:
+            # The next block is at least one block delay away, so the bucket holds at least this much.
+            amount = self.bucket_level(headTime + self.blockDelay)
+            self.pending = self.fire(self.rawStorage, amount, self.storage["spotContractAddress"])
+            self.pendingLevel = level
+            return "fired %d tokens for level %d" % (amount, targetLevel)
+        return "trade possible at level %d" % targetLevel
+
+################################################################
+# Injection
+################################################################
+
+# A trade handed to octez-client. Its hash is set once octez-client reports it, and
+# `failed` when octez-client exits with an error, or in a dry run, where nothing is injected.
+class Injection:
+    def __init__(self):
+        self.hash = None
+        self.failed = False
+
+# The argument of an oracle `update`, as Micheline JSON, fetched from a feed URL.
+def fetch_oracle_update(url, timeout = FEED_TIMEOUT_SEC):
+    try:
+        with urllib.request.urlopen(url, timeout = timeout) as response:
+            return json.loads(response.read())
+    except (urllib.error.URLError, OSError, ValueError) as error:
+        raise RpcError("Fetching the oracle update from %s failed: %s" % (url, error))
+
+# Injects `tokenToTezPayment` with octez-client, without blocking the head loop.
+# With a gas cache and the source's address, the limits are passed explicitly so
+# that octez-client does not simulate the call first. With an oracle feed, the
+# trade is injected with `multiple transfers` behind the oracle's `update`.
+class OctezInjector:
+    def __init__(self, octezClient, endpoint, source, maker, burnCap, dryRun = False, gasCache = None, sourceAddress = None, oracleFeed = None, oracleEntrypoint = ORACLE_ENTRYPOINT):
+        self.maker = maker
+        self.gasCache = gasCache
+        self.sourceAddress = sourceAddress
+        self.oracleFeed = oracleFeed
+        self.oracleEntrypoint = oracleEntrypoint
+        self.client = [octezClient, "--endpoint", endpoint]
+        self.source = source
+        self.burnCap = burnCap
+        self.command = self.client + [
+            "transfer", "0", "from", source, "to", maker,
+            "--entrypoint", "tokenToTezPayment",
+            "--burn-cap", burnCap,
+        ]
+        self.dryRun = dryRun
+
+    # octez-client arguments setting the limits for selling `amount` against `storage`, if known.
+    def limit_arguments(self, storage, amount):
+        if self.gasCache is None:
+            return []
+        try:
+            limits = self.gasCache.limits(self.sourceAddress, self.maker, "tokenToTezPayment", {"int": str(amount)}, storage = storage)
+        except RpcError as error:
+            # Simulation failures are reported but left for octez-client to retry.
+            print(error, file = sys.stderr, flush = True)
+            return []
+        return ["--gas-limit", str(limits["gas_limit"]), "--storage-limit", str(limits["storage_limit"]), "--fee", "%.6f" % (limits["fee"] / 1e6)]
+
+    # The `multiple transfers` JSON of an oracle update followed by selling `amount` against `storage`.
+    def group(self, storage, amount, oracle, update):
+        calls = [(oracle, self.oracleEntrypoint, update), (self.maker, "tokenToTezPayment", {"int": str(amount)})]
+        transfers = [
+            {"destination": destination, "amount": "0", "entrypoint": entrypoint, "arg": render(from_json(value))}
+            for destination, entrypoint, value in calls
+        ]
+        if self.gasCache is not None:
+            try:
+                limits = self.gasCache.group_limits(self.sourceAddress, calls, storages = {self.maker: storage})
+            except RpcError as error:
+                # Simulation failures are reported but left for octez-client to retry.
+                print(error, file = sys.stderr, flush = True)
+                limits = []
+            for transfer, callLimits in zip(transfers, limits):
+                transfer.update({
+                    "gas-limit": str(callLimits["gas_limit"]),
+                    "storage-limit": str(callLimits["storage_limit"]),
+                    "fee": "%.6f" % (callLimits["fee"] / 1e6),
+                })
+        return transfers
+
+    # Inject a trade and return its Injection.
+    def __call__(self, storage, amount, oracle):
+        injection = Injection()
+        if self.oracleFeed is None:
+            self.start(injection, self.command + ["--arg", str(amount)] + self.limit_arguments(storage, amount))
+        else:
+            # The feed is fetched off the head loop.
+            threading.Thread(target = self.fire_group, args = (injection, storage, amount, oracle), daemon = True).start()
+        return injection
+
+    def fire_group(self, injection, storage, amount, oracle):
+        try:
+            update = fetch_oracle_update(self.oracleFeed)
+        except RpcError as error:
+            print("not injected: %s" % error, file = sys.stderr, flush = True)
+            injection.failed = True
+            return
+        transfers = self.group(storage, amount, oracle, update)
+        self.start(injection, self.client + [
+            "multiple", "transfers", "from", self.source, "using", json.dumps(transfers),
+            "--burn-cap", self.burnCap,
+        ])
+
+    def start(self, injection, command):
+        if self.dryRun:
+            print("dry run: %s" % " ".join(command), flush = True)
+            injection.failed = True
+            return
+        process = subprocess.Popen(command, stdout = subprocess.PIPE, stderr = subprocess.STDOUT, text = True)
+        threading.Thread(target = self.report, args = (injection, process), daemon = True).start()
+
+    # Pass on the operation hash as soon as octez-client prints it, before it waits for inclusion.
+    def report(self, injection, process):
+        lines = []
+        for line in process.stdout:
+            lines.append(line)
+            match = OPERATION_HASH.search(line)
+            if match is not None and injection.hash is None:
+                injection.hash = match.group(1)
+        process.wait()
+        if process.returncode != 0 and injection.hash is None:
+            injection.failed = True
+        status = "injected" if process.returncode == 0 else "injection failed (%d)" % process.returncode
+        print("%s:\n%s" % (status, "".join(lines).strip()), flush = True)
+
+################################################################
+# Main
+################################################################
+
+def run(client, keeper):
+    while True:
+        try:
+            for header in client.stream("/monitor/heads/main"):
+                received = time.time()
+                action = keeper.on_head(header)
+                print("level %d: %s (%.1f ms)" % (header["level"], action, (time.time() - received) * 1000), flush = True)
+        except RpcError as error:
+            print(error, file = sys.stderr, flush = True)
+        time.sleep(RECONNECT_DELAY_SEC)
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Trade on a MakerContract as soon as its rate limit allows.")
+    parser.add_argument("--rpc", required = True, help = "node RPC URL")
+    parser.add_argument("--maker", required = True, help = "address of the MakerContract")
+    parser.add_argument("--source", default = "keeper", help = "octez-client alias of the account paying for the calls")
+    parser.add_argument("--octez-client", default = "octez-client", help = "path to octez-client")
+    parser.add_argument("--burn-cap", default = "0.1", help = "burn cap for the calls, in XTZ")
+    parser.add_argument("--refresh-heads", type = int, default = REFRESH_HEADS, help = "heads between storage refreshes")
+    parser.add_argument("--min-amount", type = int, default = MIN_AMOUNT, help = "normalized tokens the bucket must hold before trading")
+    parser.add_argument("--gas-cache", help = "take gas, storage and fee limits from this gas_cache.py file instead of simulating")
+    parser.add_argument("--source-address", help = "address of --source, needed with --gas-cache")
+    parser.add_argument("--oracle-feed", help = "URL returning the argument of the spot oracle's update, as Micheline JSON, to push in the same group as each trade")
+    parser.add_argument("--oracle-entrypoint", default = ORACLE_ENTRYPOINT, help = "entrypoint of the spot oracle taking the feed's data")
+    parser.add_argument("--dry-run", action = "store_true", help = "print the injection command instead of running it")
+    args = parser.parse_args(argv)
+
+    if args.gas_cache and not args.source_address:
+        parser.error("--gas-cache needs --source-address")
+
+    client = RpcClient(args.rpc)
+    gasCache = GasCache(client, args.gas_cache) if args.gas_cache else None
+    injector = OctezInjector(args.octez_client, args.rpc, args.source, args.maker, args.burn_cap, args.dry_run, gasCache, args.source_address, args.oracle_feed, args.oracle_entrypoint)
+    try:
+        keeper = Keeper(client, args.maker, injector, args.refresh_heads, args.min_amount)
+        # Fill the gas cache now rather than on the first trade.
+        keeper.refresh()
+        if args.oracle_feed is None:
+            injector.limit_arguments(keeper.rawStorage, args.min_amount)
+        elif gasCache is not None:
+            injector.group(keeper.rawStorage, args.min_amount, keeper.storage["spotContractAddress"], fetch_oracle_update(args.oracle_feed))
+        run(client, keeper)
+    except RpcError as error:
+        print(error, file = sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
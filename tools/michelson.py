@@ -0,0 +1,586 @@
+import datetime
+import hashlib
+import re
+from collections import namedtuple
+
+# A small reader for the Michelson scripts emitted by the SmartPy compiler.
+#
+# Nodes are plain namedtuples so that structurally equal sub-expressions hash
+# and compare equal, which is what the size and duplication tools rely on.
+
+Prim = namedtuple("Prim", ["name", "args", "annots"])
+Seq = namedtuple("Seq", ["items"])
+Int = namedtuple("Int", ["value"])
+String = namedtuple("String", ["value"])
+Bytes = namedtuple("Bytes", ["value"])
+
+################################################################
+# Parsing
+################################################################
+
+TOKEN_PATTERN = re.compile(r"""
+    (?P<space>\s+)
+  | (?P<line_comment>\#[^\n]*)
+  | (?P<block_comment>/\*.*?\*/)
+  | (?P<string>"(?:[^"\\]|\\.)*")
+  | (?P<bytes>0x[0-9a-fA-F]*)
+  | (?P<int>-?[0-9]+)
+  | (?P<annot>[%@:][A-Za-z0-9_.%@]*)
+  | (?P<ident>[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<punct>[(){};])
+""", re.VERBOSE | re.DOTALL)
+
+# Split Michelson source into (kind, text) tokens, dropping whitespace and comments.
+# With `keepComments`, comments which start their own line are kept as "comment" tokens.
+def tokenize(text, keepComments = False):
+    tokens = []
+    position = 0
+    while position < len(text):
+        match = TOKEN_PATTERN.match(text, position)
+        if match is None:
+            raise ValueError("Unexpected character %r at offset %d" % (text[position], position))
+        kind = match.lastgroup
+        if kind == "line_comment" and keepComments and not text[text.rfind("\n", 0, position) + 1:position].strip():
+            tokens.append(("comment", match.group()))
+        elif kind not in ("space", "line_comment", "block_comment"):
+            tokens.append((kind, match.group()))
+        position = match.end()
+    return tokens
+
+class _Parser:
+    def __init__(self, tokens, comments = None):
+        self.tokens = tokens
+        self.position = 0
+        # When collecting, maps id() of each node to the comments on their own lines above it.
+        self.comments = comments
+        self.pending = []
+
+    def peek(self):
+        while self.position < len(self.tokens) and self.tokens[self.position][0] == "comment":
+            self.pending.append(self.tokens[self.position][1])
+            self.position += 1
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return (None, None)
+
+    def next(self):
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def expect(self, text):
+        kind, value = self.next()
+        if value != text:
+            raise ValueError("Expected %r but found %r" % (text, value))
+
+    # An argument position: an atom, a sequence, a parenthesised expression or a bare primitive.
+    def parse_argument(self):
+        kind, value = self.peek()
+        if kind == "ident":
+            self.next()
+            return Prim(value, (), ())
+        return self.parse_atom()
+
+    def parse_atom(self):
+        kind, value = self.next()
+        if kind == "int":
+            return Int(int(value))
+        if kind == "string":
+            return String(bytes(value[1:-1], "utf-8").decode("unicode_escape"))
+        if kind == "bytes":
+            return Bytes(value[2:].lower())
+        if value == "{":
+            return self.parse_sequence_body()
+        if value == "(":
+            node = self.parse_application()
+            self.expect(")")
+            return node
+        raise ValueError("Unexpected token %r" % (value,))
+
+    # A primitive followed by its annotations and arguments, up to a separator.
+    def parse_application(self):
+        kind, value = self.peek()
+        if kind != "ident":
+            return self.parse_atom()
+        self.next()
+        above, self.pending = self.pending, []
+        annots = []
+        args = []
+        while True:
+            kind, token = self.peek()
+            if kind is None or token in (";", "}", ")"):
+                break
+            if kind == "annot":
+                self.next()
+                annots.append(token)
+            else:
+                args.append(self.parse_argument())
+        node = Prim(value, tuple(args), tuple(annots))
+        if self.comments is not None and above:
+            self.comments[id(node)] = above
+        return node
+
+    def parse_sequence_body(self):
+        items = []
+        while True:
+            kind, value = self.peek()
+            if value == "}":
+                self.next()
+                # Comments closing a sequence belong to no instruction.
+                self.pending = []
+                return Seq(tuple(items))
+            if value == ";":
+                self.next()
+                continue
+            if kind is None:
+                raise ValueError("Unterminated sequence")
+            items.append(self.parse_application())
+
+# Parse a Michelson expression (a type, a value or an instruction sequence).
+def parse_expression(text):
+    parser = _Parser(tokenize(text))
+    node = parser.parse_application()
+    if parser.peek()[0] is not None:
+        raise ValueError("Trailing tokens after expression")
+    return node
+
+# Parse a full script into its top-level sections, in source order.
+# A `comments` dict is filled with the comments on their own lines above each
+# instruction, keyed by id() of its node, such as the SmartPy compiler's
+# statement comments.
+def parse_script(text, comments = None):
+    parser = _Parser(tokenize(text, keepComments = comments is not None), comments)
+    sections = []
+    while parser.peek()[0] is not None:
+        if parser.peek()[1] == ";":
+            parser.next()
+            continue
+        if parser.peek()[1] == "{":
+            parser.next()
+            continue
+        if parser.peek()[1] == "}":
+            parser.next()
+            continue
+        sections.append(parser.parse_application())
+    return sections
+
+# Return the argument of the first top-level section with the given name.
+def section(sections, name):
+    for node in sections:
+        if node.name == name:
+            return node.args[0]
+    raise KeyError(name)
+
+################################################################
+# Rendering
+################################################################
+
+# Render a node as compact single-line Michelson.
+def render(node, wrap = False):
+    if isinstance(node, Int):
+        return str(node.value)
+    if isinstance(node, String):
+        return '"%s"' % node.value.replace("\\", "\\\\").replace('"', '\\"')
+    if isinstance(node, Bytes):
+        return "0x" + node.value
+    if isinstance(node, Seq):
+        return "{" + "; ".join(render(item) for item in node.items) + "}"
+    parts = [node.name] + list(node.annots) + [render(arg, wrap = True) for arg in node.args]
+    text = " ".join(parts)
+    if wrap and (node.args or node.annots):
+        return "(" + text + ")"
+    return text
+
+################################################################
+# Binary size
+################################################################
+
+# Size in bytes of a zarith-encoded integer.
+def _zarith_size(value):
+    magnitude = abs(value)
+    if magnitude < 64:
+        return 1
+    return 1 + (magnitude.bit_length() - 6 + 6) // 7
+
+def _annots_size(annots):
+    return 4 + len(" ".join(annots).encode("utf-8"))
+
+# Size in bytes of the binary Micheline encoding, as paid for on chain.
+def binary_size(node):
+    if isinstance(node, Int):
+        return 1 + _zarith_size(node.value)
+    if isinstance(node, String):
+        return 1 + 4 + len(node.value.encode("utf-8"))
+    if isinstance(node, Bytes):
+        return 1 + 4 + len(node.value) // 2
+    if isinstance(node, Seq):
+        return 1 + 4 + sum(binary_size(item) for item in node.items)
+    args_size = sum(binary_size(arg) for arg in node.args)
+    if len(node.args) <= 2:
+        # Tag, primitive, arguments and an optional annotation block.
+        return 2 + args_size + (_annots_size(node.annots) if node.annots else 0)
+    # Tag, primitive, length-prefixed argument list and annotation block.
+    return 2 + 4 + args_size + _annots_size(node.annots)
+
+# Michelson primitives in the order of their binary codes.
+PRIMITIVES = """
+parameter storage code False Elt Left None Pair Right Some True Unit PACK UNPACK BLAKE2B SHA256 SHA512 ABS ADD
+AMOUNT AND BALANCE CAR CDR CHECK_SIGNATURE COMPARE CONCAT CONS CREATE_ACCOUNT CREATE_CONTRACT IMPLICIT_ACCOUNT DIP
+DROP DUP EDIV EMPTY_MAP EMPTY_SET EQ EXEC FAILWITH GE GET GT HASH_KEY IF IF_CONS IF_LEFT IF_NONE INT LAMBDA LE
+LEFT LOOP LSL LSR LT MAP MEM MUL NEG NEQ NIL NONE NOT NOW OR PAIR PUSH RIGHT SIZE SOME SOURCE SENDER SELF
+STEPS_TO_QUOTA SUB SWAP TRANSFER_TOKENS SET_DELEGATE UNIT UPDATE XOR ITER LOOP_LEFT ADDRESS CONTRACT ISNAT CAST
+RENAME bool contract int key key_hash lambda list map big_map nat option or pair set signature string bytes mutez
+timestamp unit operation address SLICE DIG DUG EMPTY_BIG_MAP APPLY chain_id CHAIN_ID LEVEL SELF_ADDRESS never
+NEVER UNPAIR VOTING_POWER TOTAL_VOTING_POWER KECCAK SHA3 PAIRING_CHECK bls12_381_g1 bls12_381_g2 bls12_381_fr
+sapling_state sapling_transaction_deprecated SAPLING_EMPTY_STATE SAPLING_VERIFY_UPDATE ticket TICKET_DEPRECATED
+READ_TICKET SPLIT_TICKET JOIN_TICKETS GET_AND_UPDATE chest chest_key OPEN_CHEST VIEW view constant SUB_MUTEZ
+tx_rollup_l2_address MIN_BLOCK_TIME sapling_transaction EMIT Lambda_rec LAMBDA_REC TICKET BYTES NAT
+""".split()
+PRIMITIVE_CODES = dict((name, code) for code, name in enumerate(PRIMITIVES))
+
+def _zarith(value):
+    magnitude = abs(value)
+    data = bytearray([(magnitude & 0x3f) | (0x40 if value < 0 else 0)])
+    magnitude >>= 6
+    while magnitude:
+        data[-1] |= 0x80
+        data.append(magnitude & 0x7f)
+        magnitude >>= 7
+    return bytes(data)
+
+def _sized(data):
+    return len(data).to_bytes(4, "big") + data
+
+# The binary Micheline encoding of a node, whose length is `binary_size`.
+def binary(node):
+    if isinstance(node, Int):
+        return b"\x00" + _zarith(node.value)
+    if isinstance(node, String):
+        return b"\x01" + _sized(node.value.encode("utf-8"))
+    if isinstance(node, Bytes):
+        return b"\x0a" + _sized(bytes.fromhex(node.value))
+    if isinstance(node, Seq):
+        return b"\x02" + _sized(b"".join(binary(item) for item in node.items))
+    code = bytes([PRIMITIVE_CODES[node.name]])
+    args = b"".join(binary(arg) for arg in node.args)
+    annots = _sized(" ".join(node.annots).encode("utf-8"))
+    if len(node.args) <= 2:
+        tag = 3 + 2 * len(node.args) + (1 if node.annots else 0)
+        return bytes([tag]) + code + args + (annots if node.annots else b"")
+    return b"\x09" + code + _sized(args) + annots
+
+# The script expression hash of a node, which names big map keys and global constants.
+def expr_hash(node):
+    return base58check(SCRIPT_EXPR_PREFIX, hashlib.blake2b(b"\x05" + binary(node), digest_size = 32).digest())
+
+# Number of instructions in a node, counting nested branches and bodies.
+def instruction_count(node):
+    if isinstance(node, Seq):
+        return sum(instruction_count(item) for item in node.items)
+    if isinstance(node, Prim) and node.name.isupper():
+        return 1 + sum(instruction_count(arg) for arg in node.args if isinstance(arg, Seq))
+    return 0
+
+# The nodes of an expression in prefix order. The index of a node is its location,
+# the number the node's RPCs give it in traces and errors.
+def locations(node):
+    found = []
+
+    def walk(node):
+        found.append(node)
+        if isinstance(node, Seq):
+            for item in node.items:
+                walk(item)
+        elif isinstance(node, Prim):
+            for arg in node.args:
+                walk(arg)
+
+    walk(node)
+    return found
+
+################################################################
+# Micheline JSON
+################################################################
+
+# Convert Micheline JSON, as served by the node RPC, into nodes.
+def from_json(value):
+    if isinstance(value, list):
+        return Seq(tuple(from_json(item) for item in value))
+    if "int" in value:
+        return Int(int(value["int"]))
+    if "string" in value:
+        return String(value["string"])
+    if "bytes" in value:
+        return Bytes(value["bytes"].lower())
+    return Prim(value["prim"], tuple(from_json(arg) for arg in value.get("args", [])), tuple(value.get("annots", [])))
+
+# Convert a node into Micheline JSON.
+def to_json(node):
+    if isinstance(node, Int):
+        return {"int": str(node.value)}
+    if isinstance(node, String):
+        return {"string": node.value}
+    if isinstance(node, Bytes):
+        return {"bytes": node.value}
+    if isinstance(node, Seq):
+        return [to_json(item) for item in node.items]
+    value = {"prim": node.name}
+    if node.args:
+        value["args"] = [to_json(arg) for arg in node.args]
+    if node.annots:
+        value["annots"] = list(node.annots)
+    return value
+
+################################################################
+# Decoding values
+################################################################
+
+BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+# Base58check prefixes of implicit account key hashes, by the tag of their binary encoding.
+KEY_HASH_PREFIXES = {
+    0: bytes([6, 161, 159]), # tz1
+    1: bytes([6, 161, 161]), # tz2
+    2: bytes([6, 161, 164]), # tz3
+    3: bytes([6, 161, 166]), # tz4
+}
+CONTRACT_HASH_PREFIX = bytes([2, 90, 121]) # KT1
+SCRIPT_EXPR_PREFIX = bytes([13, 44, 64, 27]) # expr
+
+def base58check(prefix, payload):
+    data = prefix + payload
+    data += hashlib.sha256(hashlib.sha256(data).digest()).digest()[:4]
+    number = int.from_bytes(data, "big")
+    text = ""
+    while number > 0:
+        number, remainder = divmod(number, 58)
+        text = BASE58_ALPHABET[remainder] + text
+    return "1" * (len(data) - len(data.lstrip(b"\0"))) + text
+
+def _key_hash(data):
+    return base58check(KEY_HASH_PREFIXES[data[0]], data[1:21])
+
+# The readable form of a binary address, keeping any entrypoint suffix.
+def _address(data):
+    if data[0] == 0:
+        text = _key_hash(data[1:22])
+    else:
+        text = base58check(CONTRACT_HASH_PREFIX, data[1:21])
+    if len(data) > 22:
+        text += "%" + data[22:].decode("utf-8")
+    return text
+
+# The prefix and payload of a base58check string.
+def base58check_decode(text):
+    number = 0
+    for character in text:
+        number = number * 58 + BASE58_ALPHABET.index(character)
+    data = number.to_bytes((number.bit_length() + 7) // 8, "big")
+    data = b"\0" * (len(text) - len(text.lstrip("1"))) + data
+    payload, checksum = data[:-4], data[-4:]
+    if hashlib.sha256(hashlib.sha256(payload).digest()).digest()[:4] != checksum:
+        raise ValueError("Bad checksum in %s" % text)
+    return payload
+
+# The binary encoding of a base58 address, the inverse of `_address`.
+def address_bytes(text):
+    text, _, entrypoint = text.partition("%")
+    data = base58check_decode(text)
+    if text.startswith("KT1"):
+        encoded = b"\1" + data[len(CONTRACT_HASH_PREFIX):] + b"\0"
+    else:
+        tag = next(tag for tag, prefix in KEY_HASH_PREFIXES.items() if data.startswith(prefix))
+        encoded = b"\0" + bytes([tag]) + data[len(KEY_HASH_PREFIXES[tag]):]
+    return encoded + entrypoint.encode("utf-8")
+
+# The script expression hash of an address, which keys big map lookups over the RPC.
+def address_expr_hash(text):
+    return expr_hash(Bytes(address_bytes(text).hex()))
+
+# Flatten a pair value into as many components as its type has, folding n-ary forms into right combs.
+def _pair_values(value, count):
+    if isinstance(value, Seq):
+        items = list(value.items)
+    else:
+        items = list(value.args)
+    if len(items) > count:
+        items = items[:count - 1] + [Prim("Pair", tuple(items[count - 1:]), ())]
+    return items
+
+def _field_name(typeNode):
+    for annot in getattr(typeNode, "annots", ()):
+        if annot.startswith("%"):
+            return annot[1:]
+    return None
+
+# The named and positional leaves of a (possibly nested) pair value.
+def _pair_fields(typeNode, value):
+    fields = []
+    for argType, argValue in zip(typeNode.args, _pair_values(value, len(typeNode.args))):
+        name = _field_name(argType)
+        if name is None and argType.name == "pair":
+            fields.extend(_pair_fields(argType, argValue))
+        else:
+            fields.append((name, decode(argType, argValue)))
+    return fields
+
+# Decode a value against its type into plain Python data.
+#
+# Records become dicts keyed by field annotation, tuples become lists, `or`
+# values become a single-entry dict keyed by branch annotation (or "Left" /
+# "Right"), maps become lists of [key, value] and binary addresses are
+# converted to their base58 form.
+def decode(typeNode, value):
+    name = typeNode.name
+    if name == "pair":
+        fields = _pair_fields(typeNode, value)
+        if all(fieldName is not None for fieldName, _ in fields):
+            return dict(fields)
+        if all(fieldName is None for fieldName, _ in fields):
+            return [fieldValue for _, fieldValue in fields]
+        return dict((fieldName if fieldName is not None else str(index), fieldValue) for index, (fieldName, fieldValue) in enumerate(fields))
+    if name == "or":
+        branch = 0 if value.name == "Left" else 1
+        branchType = typeNode.args[branch]
+        return {_field_name(branchType) or value.name: decode(branchType, value.args[0])}
+    if name == "option":
+        return None if value.name == "None" else decode(typeNode.args[0], value.args[0])
+    if name in ("list", "set"):
+        return [decode(typeNode.args[0], item) for item in value.items]
+    if name in ("map", "big_map"):
+        if isinstance(value, Int):
+            return value.value
+        return [[decode(typeNode.args[0], item.args[0]), decode(typeNode.args[1], item.args[1])] for item in value.items]
+    if name in ("int", "nat", "mutez"):
+        return value.value
+    if name == "bool":
+        return value.name == "True"
+    if name == "unit":
+        return None
+    if name == "timestamp" and isinstance(value, Int):
+        return datetime.datetime.fromtimestamp(value.value, datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    if name in ("address", "contract") and isinstance(value, Bytes):
+        return _address(bytes.fromhex(value.value))
+    if name == "key_hash" and isinstance(value, Bytes):
+        return _key_hash(bytes.fromhex(value.value))
+    if isinstance(value, (String, Int)):
+        return value.value
+    if isinstance(value, Bytes):
+        return "0x" + value.value
+    return render(value)
+
+# The leaves of a (possibly nested) pair value, taken from a dict keyed by field
+# annotation or from a list in field order.
+def _encode_pair(typeNode, value):
+    args = []
+    for index, argType in enumerate(typeNode.args):
+        name = _field_name(argType)
+        if isinstance(value, dict):
+            if name is None and argType.name == "pair":
+                args.append(_encode_pair(argType, value))
+                continue
+            if name not in value:
+                raise ValueError("Missing field %s" % name)
+            args.append(encode(argType, value[name]))
+        else:
+            args.append(encode(argType, value[index]))
+    return Prim("Pair", tuple(args), ())
+
+# A sort key giving the order in which Michelson compares encoded values of a
+# comparable type. It is not the order of the Python values: addresses compare
+# by their binary form, so every tz1 comes before any KT1, and timestamps by time.
+def _comparable(typeNode, node):
+    name = typeNode.name
+    if name == "pair":
+        return tuple(_comparable(argType, argValue) for argType, argValue in zip(typeNode.args, _pair_values(node, len(typeNode.args))))
+    if name == "option":
+        return (0,) if node.name == "None" else (1, _comparable(typeNode.args[0], node.args[0]))
+    if name == "or":
+        branch = 0 if node.name == "Left" else 1
+        return (branch, _comparable(typeNode.args[branch], node.args[0]))
+    if name == "bool":
+        return node.name == "True"
+    if name == "unit":
+        return ()
+    if isinstance(node, Int):
+        return node.value
+    if isinstance(node, Bytes):
+        return bytes.fromhex(node.value)
+    if name == "timestamp":
+        return int(datetime.datetime.fromisoformat(node.value.replace("Z", "+00:00")).timestamp())
+    if name == "address":
+        return address_bytes(node.value)
+    if name == "key_hash":
+        return address_bytes(node.value)[1:]
+    if name == "string":
+        return node.value.encode("utf-8")
+    raise ValueError("Cannot order values of type %s" % name)
+
+# Encode plain Python data against a type, the inverse of `decode`.
+#
+# Records are dicts keyed by field annotation, `or` values a single-entry dict
+# keyed by branch annotation or "Left" / "Right", options None or the value,
+# maps dicts or lists of [key, value], an int standing for a big map id, and
+# bytes strings starting with "0x". Set items and map keys are listed in
+# Michelson's comparison order, as the protocol requires.
+def encode(typeNode, value):
+    name = typeNode.name
+    if name == "pair":
+        return _encode_pair(typeNode, value)
+    if name == "or":
+        (branchName, branchValue), = value.items()
+        branch = 0 if branchName in (_field_name(typeNode.args[0]), "Left") else 1
+        return Prim("Left" if branch == 0 else "Right", (encode(typeNode.args[branch], branchValue),), ())
+    if name == "option":
+        return Prim("None", (), ()) if value is None else Prim("Some", (encode(typeNode.args[0], value),), ())
+    if name == "list":
+        return Seq(tuple(encode(typeNode.args[0], item) for item in value))
+    if name == "set":
+        items = [encode(typeNode.args[0], item) for item in value]
+        return Seq(tuple(sorted(items, key = lambda item: _comparable(typeNode.args[0], item))))
+    if name in ("map", "big_map"):
+        if isinstance(value, int):
+            return Int(value)
+        entries = [(encode(typeNode.args[0], key), encode(typeNode.args[1], item)) for key, item in (value.items() if isinstance(value, dict) else value)]
+        entries.sort(key = lambda entry: _comparable(typeNode.args[0], entry[0]))
+        return Seq(tuple(Prim("Elt", entry, ()) for entry in entries))
+    if name in ("int", "nat", "mutez"):
+        return Int(int(value))
+    if name == "bool":
+        return Prim("True" if value else "False", (), ())
+    if name == "unit":
+        return Prim("Unit", (), ())
+    if name == "timestamp" and isinstance(value, int):
+        return Int(value)
+    if name == "bytes":
+        return Bytes(value[2:].lower() if value.startswith("0x") else value.lower())
+    return String(value)
+
+# Map of entrypoint name to type for the annotated branches of a parameter type.
+def entrypoints(parameterType):
+    found = {}
+
+    def walk(typeNode):
+        name = _field_name(typeNode)
+        if name is not None:
+            found[name] = typeNode
+        if typeNode.name == "or":
+            for arg in typeNode.args:
+                walk(arg)
+
+    walk(parameterType)
+    if "default" not in found:
+        found["default"] = parameterType
+    return found
+
+# Decode a call into (entrypoint name, decoded argument). Calls through the root
+# of the parameter follow `Left` / `Right` down to the named entrypoint.
+def decode_parameter(parameterType, entrypoint, value):
+    typeNode = entrypoints(parameterType).get(entrypoint)
+    if typeNode is None:
+        raise KeyError("Unknown entrypoint %r" % entrypoint)
+    if typeNode is parameterType:
+        while _field_name(typeNode) is None and typeNode.name == "or" and isinstance(value, Prim) and value.name in ("Left", "Right"):
+            typeNode, value = typeNode.args[0 if value.name == "Left" else 1], value.args[0]
+        entrypoint = _field_name(typeNode) or entrypoint
+    return entrypoint, decode(typeNode, value)
@@ -0,0 +1,155 @@
+import numpy
+
+# Reference models of the integer price math in the contracts.
+#
+# Each formula comes twice: a scalar transcription which follows the
+# contract's order of operations on Python integers, and a vectorized version
+# over NumPy arrays which evaluates rows in int64 where no intermediate value
+# can overflow and falls back to Python integers elsewhere.
+
+# The fixed point number representing 1 in the system, 10^18.
+PRECISION = 10 ** 18
+
+MUTEZ_PER_TEZ = 1_000_000
+
+# The largest amount of mutez Michelson can represent.
+MAX_MUTEZ = 2 ** 63 - 1
+
+INT64_MAX = numpy.iinfo(numpy.int64).max
+
+################################################################
+# Scalar transcriptions
+################################################################
+
+# MakerContract.tokenToTezPayment: the tokens traded and the minimum mutez out.
+# Raises ZeroDivisionError where the contract fails on a zero spot price.
+def maker_required_out(tokenAmount, spotPrice, spreadAmount):
+    tokensToTrade = tokenAmount * PRECISION
+    neutralOut = (tokensToTrade // spotPrice) // 1_000_000
+    percent = 1000 + spreadAmount
+    requiredOut = (neutralOut * percent) // 1000
+    return tokensToTrade, neutralOut, requiredOut
+
+# LiquidityFundContract.addLiquidity: the input price and its difference from Harbinger in percent.
+# Raises ZeroDivisionError where the contract fails on zero mutez or a zero Harbinger price.
+def fund_price_check(tokens, mutez, harbingerPrice):
+    inputPrice = tokens // mutez // 1_000_000
+    percentageDifference = abs(harbingerPrice - inputPrice) * 100 // harbingerPrice
+    return inputPrice, percentageDifference
+
+# MakerContract.updatedEma: the moving average after folding in a spot price.
+def maker_ema(spotPrice, emaPrice, emaWeight):
+    if emaPrice == 0:
+        return spotPrice
+    return (spotPrice * emaWeight + emaPrice * (1000 - emaWeight)) // 1000
+
+# MakerContract.tokenToTezPayment: whether the spot price is within tolerance of its moving average.
+def maker_within_tolerance(spotPrice, emaPrice, volatilityTolerance):
+    return abs(spotPrice - emaPrice) * 1000 <= emaPrice * volatilityTolerance
+
+# Harbinger Normalizer: the volume weighted average price after each candle of a
+# series, over the last `numDataPoints` candles, as test_helpers/harbinger_vwap_normalizer.py
+# computes it. Works on lists or NumPy arrays and returns Python integers.
+def harbinger_vwap(high, low, close, volume, numDataPoints):
+    priceVolume = (numpy.asarray(high, dtype = object) + numpy.asarray(low, dtype = object) + numpy.asarray(close, dtype = object)) // 3 * numpy.asarray(volume, dtype = object)
+    sumPriceVolume = numpy.concatenate([[0], numpy.cumsum(priceVolume)])
+    sumVolume = numpy.concatenate([[0], numpy.cumsum(numpy.asarray(volume, dtype = object))])
+    end = numpy.arange(1, len(priceVolume) + 1)
+    start = numpy.maximum(end - numDataPoints, 0)
+    return (sumPriceVolume[end] - sumPriceVolume[start]) // (sumVolume[end] - sumVolume[start])
+
+# Quipuswap tokenToTezPayment: the mutez paid out for `tokensIn` after the 0.3% fee.
+def quipuswap_tez_out(tokensIn, tezPool, tokenPool):
+    tokensInWithFee = tokensIn * 997
+    return tokensInWithFee * tezPool // (tokenPool * 1000 + tokensInWithFee)
+
+################################################################
+# Vectorized models
+################################################################
+
+# Evaluate `formula` row by row, in int64 where every column is within its bound
+# and on Python integers elsewhere. Rows where a divisor column is zero get a
+# divisor of one and are flagged in the returned mask instead.
+def _evaluate(formula, columns, bounds, divisors):
+    count = len(columns[0])
+    zeroDivisor = numpy.zeros(count, dtype = bool)
+    for index in divisors:
+        zeroDivisor |= columns[index] == 0
+    columns = [
+        numpy.where(zeroDivisor, 1, column) if index in divisors else column
+        for index, column in enumerate(columns)
+    ]
+
+    fits = numpy.ones(count, dtype = bool)
+    for column, bound in zip(columns, bounds):
+        fits &= column <= bound
+    if fits.all():
+        return formula(*[column.astype(numpy.int64) for column in columns]), zeroDivisor
+
+    fast = formula(*[column[fits].astype(numpy.int64) for column in columns])
+    slow = formula(*[column[~fits].astype(object) for column in columns])
+    outputs = []
+    for fastOutput, slowOutput in zip(fast, slow):
+        output = numpy.empty(count, dtype = object)
+        output[fits] = fastOutput.astype(object)
+        output[~fits] = slowOutput
+        outputs.append(output)
+    return tuple(outputs), zeroDivisor
+
+def _maker_formula(tokenAmount, spotPrice, spreadAmount):
+    # floor(floor(a / b) / c) == floor(a / (b * c)), so the two divisions collapse
+    # and the 10^18 upsample cancels against the 10^6 downsample.
+    neutralOut = tokenAmount * 10 ** 12 // spotPrice
+    # Split the spread multiplication so it stays within int64.
+    percent = 1000 + spreadAmount
+    requiredOut = neutralOut // 1000 * percent + neutralOut % 1000 * percent // 1000
+    return neutralOut, requiredOut
+
+# Vectorized maker_required_out: (neutralOut, requiredOut) and a mask of rows with a zero spot price.
+def maker_required_out_vector(tokenAmount, spotPrice, spreadAmount):
+    return _evaluate(
+        _maker_formula,
+        [tokenAmount, spotPrice, spreadAmount],
+        [10 ** 6, INT64_MAX, 8000],
+        [1],
+    )
+
+def _fund_formula(tokens, mutez, harbingerPrice):
+    inputPrice = tokens // (mutez * 1_000_000)
+    percentageDifference = abs(harbingerPrice - inputPrice) * 100 // harbingerPrice
+    return inputPrice, percentageDifference
+
+# Vectorized fund_price_check: (inputPrice, percentageDifference) and a mask of rows with a zero divisor.
+def fund_price_check_vector(tokens, mutez, harbingerPrice):
+    return _evaluate(
+        _fund_formula,
+        [tokens, mutez, harbingerPrice],
+        [INT64_MAX // 100, INT64_MAX // 1_000_000, INT64_MAX // 100],
+        [1, 2],
+    )
+
+# Vectorized maker_ema over int64 spot prices in 10^-6 USD, which cannot overflow.
+def maker_ema_vector(spotPrice, emaPrice, emaWeight):
+    return numpy.where(emaPrice == 0, spotPrice, (spotPrice * emaWeight + emaPrice * (1000 - emaWeight)) // 1000)
+
+# Vectorized maker_within_tolerance over int64 spot prices in 10^-6 USD.
+def maker_within_tolerance_vector(spotPrice, emaPrice, volatilityTolerance):
+    return numpy.abs(spotPrice - emaPrice) * 1000 <= emaPrice * volatilityTolerance
+
+# Vectorized quipuswap_tez_out, with tokens in units of 10^-6 token rather than
+# 10^-18: amounts of whole tokens are multiples of 10^12 units, and dividing
+# both sides of the floor division by it leaves the quotient unchanged.
+#
+# The quotient is estimated in floating point, which is off by at most one, and
+# corrected with the exact remainder. The remainder is small, so computing it
+# modulo 2^64 with wrapping unsigned products gives its exact value. Amounts
+# must stay below 10^13 mutez and pools below 9 * 10^9 tokens.
+def quipuswap_tez_out_vector(microTokensIn, tezPool, microTokenPool):
+    tokensInWithFee = microTokensIn.astype(numpy.int64) * 997
+    divisor = microTokenPool.astype(numpy.int64) * 1000 + tokensInWithFee
+    tezPool = tezPool.astype(numpy.int64)
+    quotient = numpy.floor(tokensInWithFee.astype(numpy.float64) * tezPool / divisor).astype(numpy.int64)
+    remainder = (tokensInWithFee.astype(numpy.uint64) * tezPool.astype(numpy.uint64) - quotient.astype(numpy.uint64) * divisor.astype(numpy.uint64)).view(numpy.int64)
+    quotient -= remainder < 0
+    quotient += remainder >= divisor
+    return quotient
@@ -0,0 +1,110 @@
+import json
+import os
+import re
+import urllib.error
+import urllib.request
+
+# A minimal Tezos node RPC client with an on-disk cache.
+#
+# Responses which can never change, blocks addressed by level once they are
+# final and anything below a block hash, are cached as JSON files laid out
+# like the RPC paths themselves. A cache directory is therefore also a fixture
+# directory for fixture_rpc.py.
+
+# Levels behind the head after which a block is final.
+FINALITY = 2
+
+IMMUTABLE_BLOCK = re.compile(r"^/chains/main/blocks/(\d+|B[1-9A-HJ-NP-Za-km-z]{50})(/|$)")
+
+class RpcError(Exception):
+    pass
+
+class RpcClient:
+    def __init__(self, url, cacheDirectory = None, timeout = 30):
+        self.url = url.rstrip("/")
+        self.cacheDirectory = cacheDirectory
+        self.timeout = timeout
+        self.finalLevel = None
+
+    def cache_path(self, path):
+        return os.path.join(self.cacheDirectory, path.strip("/") + ".json")
+
+    # Whether the response to `path` can be cached forever.
+    def is_immutable(self, path):
+        match = IMMUTABLE_BLOCK.match(path)
+        if match is None:
+            return False
+        block = match.group(1)
+        if not block.isdigit():
+            return True
+        if self.finalLevel is None or int(block) > self.finalLevel:
+            self.finalLevel = self.head_level() - FINALITY
+        return int(block) <= self.finalLevel
+
+    def fetch(self, path):
+        try:
+            with urllib.request.urlopen(self.url + path, timeout = self.timeout) as response:
+                return response.read()
+        except (urllib.error.URLError, OSError) as error:
+            raise RpcError("GET %s failed: %s" % (path, error))
+
+    # GET a path and return the decoded JSON.
+    def get(self, path):
+        if self.cacheDirectory is not None:
+            cached = self.cache_path(path)
+            if os.path.exists(cached):
+                with open(cached, "rb") as file:
+                    return json.loads(file.read())
+        body = self.fetch(path)
+        if self.cacheDirectory is not None and self.is_immutable(path):
+            cached = self.cache_path(path)
+            os.makedirs(os.path.dirname(cached), exist_ok = True)
+            with open(cached + ".tmp", "wb") as file:
+                file.write(body)
+            os.replace(cached + ".tmp", cached)
+        return json.loads(body)
+
+    # POST a JSON body and return the decoded JSON. Never cached.
+    def post(self, path, body):
+        request = urllib.request.Request(
+            self.url + path,
+            data = json.dumps(body).encode("utf-8"),
+            headers = {"Content-Type": "application/json"},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout = self.timeout) as response:
+                return json.loads(response.read())
+        except (urllib.error.URLError, OSError) as error:
+            raise RpcError("POST %s failed: %s" % (path, error))
+
+    # Yield the JSON values of a streaming RPC, such as `/monitor/heads/main`, as they arrive.
+    def stream(self, path):
+        decoder = json.JSONDecoder()
+        try:
+            with urllib.request.urlopen(self.url + path, timeout = None) as response:
+                buffer = ""
+                while True:
+                    chunk = response.read1(65536)
+                    if not chunk:
+                        return
+                    buffer += chunk.decode("utf-8")
+                    while True:
+                        buffer = buffer.lstrip()
+                        try:
+                            value, end = decoder.raw_decode(buffer)
+                        except ValueError:
+                            break
+                        buffer = buffer[end:]
+                        yield value
+        except (urllib.error.URLError, OSError) as error:
+            raise RpcError("Streaming %s failed: %s" % (path, error))
+
+    def head_level(self):
+        return self.get("/chains/main/blocks/head/header")["level"]
+
+    def block(self, level):
+        return self.get("/chains/main/blocks/%d" % level)
+
+    # The script of a contract as it was at `level`.
+    def script(self, address, level = "head"):
+        return self.get("/chains/main/blocks/%s/context/contracts/%s/script" % (level, address))
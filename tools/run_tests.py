@@ -0,0 +1,385 @@
+import argparse
+import ast
+import glob
+import json
+import math
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from xml.etree import ElementTree
+
+import sources
+
+# Runs the SmartPy test scenarios of the contract files in parallel.
+#
+# Every `sp.add_test` is discovered and run from a copy of its file with the
+# other scenarios removed. Scenarios of the same file are run in batches that
+# share one SmartPy process, so the compiler starts and the contract and helper
+# code is loaded once per batch rather than once per scenario. A batch that
+# fails is run again one scenario per process to find the failing ones. A
+# compilation scenario, named after a build.py target, also fails when its
+# outputs differ from the committed artifacts, so a contract change cannot land
+# without regenerating them.
+# Scenarios are skipped when neither they, the contract code in their file, nor
+# the helpers they use changed since their last passing run.
+#
+# Usage: python tools/run_tests.py [--all] [-j JOBS] [--batch SIZE] [--shard K/N] [-k PATTERN] [--junit FILE] [--json FILE]
+
+CONTRACT_FILES = [
+    "quipuswap_liquidity_proxy.py",
+    "quipuswap_maker_ceiling.py",
+]
+
+# Scenario outputs and the state used to skip unchanged scenarios.
+RUN_DIRECTORY = os.path.join(sources.ROOT, ".test-runs")
+STATE_FILE = os.path.join(RUN_DIRECTORY, "state.json")
+
+# Lines of output kept in reports for a failing scenario.
+OUTPUT_TAIL = 60
+
+# Most scenarios run in one SmartPy process.
+BATCH_SIZE = 8
+
+# A line which imports a module, rather than using it.
+IMPORT_LINE = re.compile(r"\s*(import\s|from\s+\S+\s+import\s|\w+\s*=\s*sp\.io\.import_script_from_url\()")
+
+################################################################
+# Discovery
+################################################################
+
+class Scenario:
+    def __init__(self, path, name, first, last, legacy, digest):
+        self.path = path
+        self.name = name
+        # 1-based line range of the test, decorators included.
+        self.first = first
+        self.last = last
+        self.legacy = legacy
+        self.digest = digest
+
+    @property
+    def key(self):
+        return "%s::%s" % (self.path, self.name)
+
+    @property
+    def slug(self):
+        return re.sub(r"[^A-Za-z0-9]+", "_", "%s_%s" % (os.path.splitext(self.path)[0], self.name)).strip("_")
+
+def _decorator_name(decorator):
+    target = decorator.func if isinstance(decorator, ast.Call) else decorator
+    return target.attr if isinstance(target, ast.Attribute) else None
+
+def _test_name(function, decorator):
+    if isinstance(decorator, ast.Call):
+        for keyword in decorator.keywords:
+            if keyword.arg == "name" and isinstance(keyword.value, ast.Constant):
+                return keyword.value.value
+    # `@sp.module` scenarios are named by `sp.test_scenario(name, ...)`.
+    for node in ast.walk(function):
+        if isinstance(node, ast.Call) and _decorator_name(node) == "test_scenario":
+            if node.args and isinstance(node.args[0], ast.Constant):
+                return node.args[0].value
+    return function.name
+
+# The line ranges of every test and compilation target in a file.
+def _test_regions(tree):
+    tests = []
+    targets = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.FunctionDef):
+            for decorator in node.decorator_list:
+                if _decorator_name(decorator) == "add_test":
+                    first = min(d.lineno for d in node.decorator_list)
+                    tests.append((_test_name(node, decorator), first, node.end_lineno))
+        elif isinstance(node, ast.Expr) and isinstance(node.value, ast.Call):
+            if _decorator_name(node.value) == "add_compilation_target":
+                targets.append((node.lineno, node.end_lineno))
+    tests.sort(key = lambda test: test[1])
+    return tests, targets
+
+# Replace the given line ranges by `pass` statements, keeping every other line where it was.
+def _blank(lines, regions):
+    lines = list(lines)
+    for first, last in regions:
+        indent = re.match(r"\s*", lines[first - 1]).group()
+        lines[first - 1] = indent + "pass\n"
+        for index in range(first, last):
+            lines[index] = "\n"
+    return lines
+
+def discover(paths = CONTRACT_FILES):
+    scenarios = []
+    for path in paths:
+        source = sources.read(path)
+        legacy = sources.is_legacy(source)
+        tests, targets = _test_regions(ast.parse(source))
+        lines = source.splitlines(True)
+
+        # The file without any scenario bodies: a change here affects every scenario.
+        shared = "".join(_blank(lines, [(first, last) for _, first, last in tests]))
+        imports = sources.file_imports(source)
+        version = sources.compiler_version(legacy)
+
+        # Module syntax files use shared modules outside the scenarios too, for example in a
+        # contract module or in the list of modules every scenario loads.
+        sharedUses = "".join(line for line in shared.splitlines(True) if not IMPORT_LINE.match(line))
+
+        for name, first, last in tests:
+            body = "".join(lines[first - 1:last])
+            helpers = [
+                dependency
+                for alias, helper in imports.items()
+                if re.search(r"\b%s\b" % re.escape(alias), body + sharedUses)
+                for dependency in sources.dependencies(helper)
+            ]
+            digest = sources.digest(set(helpers), shared, body, version)
+            scenarios.append(Scenario(path, name, first, last, legacy, digest))
+    return scenarios
+
+################################################################
+# Running
+################################################################
+
+# Write a copy of the file of a batch of scenarios that only runs those scenarios.
+def isolated_script(batch, outputDir):
+    source = sources.read(batch[0].path)
+    tests, targets = _test_regions(ast.parse(source))
+    kept = set(scenario.first for scenario in batch)
+    others = [(first, last) for name, first, last in tests if first not in kept]
+    lines = _blank(source.splitlines(True), others + targets)
+    script = os.path.join(outputDir, os.path.basename(batch[0].path))
+    with open(script, "w") as file:
+        file.writelines(lines)
+    return script
+
+# Committed artifacts of a compilation scenario: (output file pattern, committed file).
+def _artifacts(target):
+    return [("*_contract.tz", sources.TARGETS[target][1]), ("*metadata*.json", sources.METADATA_ARTIFACTS[target])]
+
+# The committed artifacts which differ from the outputs of the compilation scenarios of a batch.
+def _stale_artifacts(batch, outputDir):
+    stale = []
+    for scenario in batch:
+        target = sources.TARGETS.get(scenario.name)
+        if target is None or target[0] != scenario.path:
+            continue
+        for pattern, committed in _artifacts(scenario.name):
+            # Module syntax writes the outputs of a scenario under its name in the working directory.
+            matches = sorted(glob.glob(os.path.join(outputDir, "**", scenario.name, pattern), recursive = True))
+            committedPath = os.path.join(sources.ROOT, committed)
+            if not matches or not os.path.exists(committedPath):
+                stale.append(committed)
+                continue
+            with open(matches[0]) as compiled, open(committedPath) as file:
+                if sources.artifact_text(compiled.read()) != sources.artifact_text(file.read()):
+                    stale.append(committed)
+    return stale
+
+# Run a batch of scenarios of one file in a single process and return whether it passed, its output and its duration.
+def _run_script(batch, outputDir):
+    shutil.rmtree(outputDir, ignore_errors = True)
+    os.makedirs(outputDir)
+    script = isolated_script(batch, outputDir)
+
+    # Legacy `file:` imports resolve against the working directory, so those run from the root.
+    legacy = batch[0].legacy
+    command = sources.scenario_command(script, os.path.join(outputDir, "output"), legacy)
+    workingDir = sources.ROOT if legacy else outputDir
+    started = time.time()
+    try:
+        result = subprocess.run(
+            command,
+            cwd = workingDir,
+            env = sources.smartpy_environment(),
+            stdout = subprocess.PIPE,
+            stderr = subprocess.STDOUT,
+            text = True,
+        )
+        passed = result.returncode == 0
+        output = result.stdout
+        stale = _stale_artifacts(batch, outputDir) if passed else []
+        if stale:
+            passed = False
+            output += "\n%s differ from the compiled output, run tools/build.py to regenerate them\n" % ", ".join(stale)
+    except OSError as error:
+        passed = False
+        output = "Could not run %s: %s" % (command[0], error)
+    return passed, output, time.time() - started
+
+def _result(scenario, passed, output, seconds):
+    return {
+        "file": scenario.path,
+        "name": scenario.name,
+        "status": "passed" if passed else "failed",
+        "seconds": round(seconds, 3),
+        "output": "\n".join(output.splitlines()[-OUTPUT_TAIL:]) if not passed else "",
+        "digest": scenario.digest,
+    }
+
+def run_scenario(scenario):
+    passed, output, seconds = _run_script([scenario], os.path.join(RUN_DIRECTORY, scenario.slug))
+    return _result(scenario, passed, output, seconds)
+
+# Run a batch in one process. Its time is shared evenly between its scenarios,
+# and when it fails every scenario is run again on its own.
+def run_batch(batch):
+    if len(batch) == 1:
+        return [run_scenario(batch[0])]
+    passed, output, seconds = _run_script(batch, os.path.join(RUN_DIRECTORY, "%s_batch" % batch[0].slug))
+    if not passed:
+        return [run_scenario(scenario) for scenario in batch]
+    return [_result(scenario, True, "", seconds / len(batch)) for scenario in batch]
+
+# Split scenarios, already in the order they should start, into batches of one
+# file each. Batches are made smaller when needed to keep every worker busy.
+def make_batches(scenarios, batchSize, jobs):
+    size = max(1, min(batchSize, math.ceil(len(scenarios) / max(1, jobs))))
+    batches = []
+    for path in dict.fromkeys(scenario.path for scenario in scenarios):
+        inFile = [scenario for scenario in scenarios if scenario.path == path]
+        batches.extend(inFile[index:index + size] for index in range(0, len(inFile), size))
+    batches.sort(key = lambda batch: scenarios.index(batch[0]))
+    return batches
+
+def load_state():
+    if not os.path.exists(STATE_FILE):
+        return {}
+    with open(STATE_FILE) as file:
+        return json.load(file)
+
+def save_state(state):
+    os.makedirs(RUN_DIRECTORY, exist_ok = True)
+    with open(STATE_FILE, "w") as file:
+        json.dump(state, file, indent = 2, sort_keys = True)
+
+# Scenarios that changed, failed last time, or never ran.
+def is_stale(scenario, state):
+    previous = state.get(scenario.key)
+    return previous is None or previous["digest"] != scenario.digest or previous["status"] != "passed"
+
+################################################################
+# Reports
+################################################################
+
+def write_junit(path, results):
+    suites = ElementTree.Element("testsuites")
+    for file in sorted(set(result["file"] for result in results)):
+        fileResults = [result for result in results if result["file"] == file]
+        suite = ElementTree.SubElement(suites, "testsuite", {
+            "name": file,
+            "tests": str(len(fileResults)),
+            "failures": str(sum(1 for result in fileResults if result["status"] == "failed")),
+            "skipped": str(sum(1 for result in fileResults if result["status"] == "skipped")),
+            "time": "%.3f" % sum(result["seconds"] for result in fileResults),
+        })
+        for result in fileResults:
+            case = ElementTree.SubElement(suite, "testcase", {
+                "classname": file,
+                "name": result["name"],
+                "time": "%.3f" % result["seconds"],
+            })
+            if result["status"] == "failed":
+                failure = ElementTree.SubElement(case, "failure", {"message": "scenario failed"})
+                failure.text = result["output"]
+            elif result["status"] == "skipped":
+                ElementTree.SubElement(case, "skipped", {"message": "unchanged since last passing run"})
+    ElementTree.ElementTree(suites).write(path, encoding = "utf-8", xml_declaration = True)
+
+def write_json(path, results, seconds):
+    with open(path, "w") as file:
+        json.dump({
+            "seconds": round(seconds, 3),
+            "passed": sum(1 for result in results if result["status"] == "passed"),
+            "failed": sum(1 for result in results if result["status"] == "failed"),
+            "skipped": sum(1 for result in results if result["status"] == "skipped"),
+            "scenarios": results,
+        }, file, indent = 2)
+
+################################################################
+# Main
+################################################################
+
+def parse_shard(value):
+    index, count = (int(part) for part in value.split("/"))
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError("shard must be K/N with 1 <= K <= N")
+    return index, count
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Run the SmartPy test scenarios in parallel.")
+    parser.add_argument("files", nargs = "*", default = CONTRACT_FILES, help = "contract files to collect scenarios from")
+    parser.add_argument("-j", "--jobs", type = int, default = os.cpu_count(), help = "scenarios to run at once")
+    parser.add_argument("--batch", type = int, default = BATCH_SIZE, help = "most scenarios of one file to run in one process, 1 to isolate every scenario")
+    parser.add_argument("--shard", type = parse_shard, default = (1, 1), help = "only run shard K of N, e.g. 2/4")
+    parser.add_argument("-k", dest = "pattern", help = "only run scenarios whose name contains this text")
+    parser.add_argument("--all", action = "store_true", help = "run unchanged scenarios too")
+    parser.add_argument("--list", action = "store_true", help = "list the selected scenarios and exit")
+    parser.add_argument("--junit", help = "write a JUnit XML report here")
+    parser.add_argument("--json", help = "write a JSON report here")
+    args = parser.parse_args(argv)
+
+    scenarios = discover(args.files)
+    shardIndex, shardCount = args.shard
+    scenarios = [scenario for index, scenario in enumerate(scenarios) if index % shardCount == shardIndex - 1]
+    if args.pattern:
+        scenarios = [scenario for scenario in scenarios if args.pattern in scenario.name]
+
+    state = load_state()
+    selected = [scenario for scenario in scenarios if args.all or is_stale(scenario, state)]
+    if args.list:
+        for scenario in selected:
+            print(scenario.key)
+        return 0
+
+    # Longest first, using the last recorded timings, keeps the workers evenly loaded.
+    selected.sort(key = lambda scenario: -state.get(scenario.key, {}).get("seconds", float("inf")))
+
+    started = time.time()
+    results = []
+    batches = make_batches(selected, args.batch, args.jobs)
+    with ThreadPoolExecutor(max_workers = max(1, args.jobs)) as pool:
+        for result in (result for batchResults in pool.map(run_batch, batches) for result in batchResults):
+            results.append(result)
+            state["%s::%s" % (result["file"], result["name"])] = {
+                "digest": result["digest"],
+                "status": result["status"],
+                "seconds": result["seconds"],
+            }
+            print("%-6s %7.2fs  %s :: %s" % (result["status"].upper(), result["seconds"], result["file"], result["name"]))
+            if result["status"] == "failed":
+                print(result["output"])
+    seconds = time.time() - started
+    save_state(state)
+
+    selectedKeys = set(scenario.key for scenario in selected)
+    for scenario in scenarios:
+        if scenario.key not in selectedKeys:
+            results.append({
+                "file": scenario.path,
+                "name": scenario.name,
+                "status": "skipped",
+                "seconds": 0.0,
+                "output": "",
+                "digest": scenario.digest,
+            })
+
+    if args.junit:
+        write_junit(args.junit, results)
+    if args.json:
+        write_json(args.json, results, seconds)
+
+    failed = sum(1 for result in results if result["status"] == "failed")
+    print("%d passed, %d failed, %d skipped in %.2fs" % (
+        sum(1 for result in results if result["status"] == "passed"),
+        failed,
+        len(scenarios) - len(selected),
+        seconds,
+    ))
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+import hashlib
+import importlib.metadata
+import os
+import re
+import subprocess
+import sys
+
+# Helpers for locating the sources a SmartPy file depends on and for invoking the SmartPy compiler.
+
+# The repository root, which is also the directory SmartPy resolves `file:` imports against.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The legacy SmartPy CLI, used for files written against `sp.io` / `sp.entry_point`.
+SMARTPY_CLI = os.environ.get("SMARTPY_CLI", os.path.expanduser("~/smartpy-cli/SmartPy.sh"))
+
+# Compilation target name -> (source file, committed artifact).
+TARGETS = {
+    "liquidity-fund": ("quipuswap_liquidity_proxy.py", "quipuswap_liquidity_proxy.tz"),
+    "quipu_swapper": ("quipuswap_maker_ceiling.py", "quipuswap_maker_ceiling.tz"),
+}
+
+# Compilation target name -> committed TZIP-16 metadata, written by the compilation scenario.
+METADATA_ARTIFACTS = {
+    "liquidity-fund": "quipuswap_liquidity_proxy.metadata.json",
+    "quipu_swapper": "quipuswap_maker_ceiling.metadata.json",
+}
+
+IMPORT_PATTERN = re.compile(r'(\w+)\s*=\s*sp\.io\.import_script_from_url\(\s*"file:([^"]+)"\s*\)')
+
+# Python imports of modules in the repository, as module syntax files share code.
+FROM_IMPORT_PATTERN = re.compile(r'^[ \t]*from[ \t]+([\w.]+)[ \t]+import[ \t]+([\w \t,]+)$', re.M)
+IMPORT_AS_PATTERN = re.compile(r'^[ \t]*import[ \t]+([\w.]+)[ \t]+as[ \t]+(\w+)[ \t]*$', re.M)
+
+def _module_path(module):
+    return module.replace(".", "/") + ".py"
+
+# Map of module alias to repository relative path for every `file:` or Python import in the source.
+# Imports of modules outside the repository map to paths which do not exist.
+def file_imports(source):
+    imports = dict(IMPORT_PATTERN.findall(source))
+    for module, names in FROM_IMPORT_PATTERN.findall(source):
+        for name in names.split(","):
+            imports[name.split()[-1]] = _module_path(module)
+    for module, alias in IMPORT_AS_PATTERN.findall(source):
+        imports[alias] = _module_path(module)
+    return imports
+
+def read(path):
+    with open(os.path.join(ROOT, path)) as file:
+        return file.read()
+
+# The repository relative paths of `path` and everything it imports, transitively.
+# Imports of missing files are left for SmartPy to report.
+def dependencies(path):
+    seen = []
+    pending = [path]
+    while pending:
+        current = pending.pop()
+        if current in seen or not os.path.exists(os.path.join(ROOT, current)):
+            continue
+        seen.append(current)
+        pending.extend(file_imports(read(current)).values())
+    return sorted(seen)
+
+# Whether a file uses the legacy `sp.io` API rather than `@sp.module`.
+def is_legacy(source):
+    return "@sp.module" not in source
+
+# A compiler output as it is committed: ending in exactly one newline.
+def artifact_text(text):
+    return text.rstrip() + "\n"
+
+# A content hash over the named files plus any extra strings.
+def digest(paths, *extra):
+    hasher = hashlib.sha256()
+    for path in sorted(paths):
+        hasher.update(path.encode("utf-8") + b"\0")
+        hasher.update(read(path).encode("utf-8") + b"\0")
+    for value in extra:
+        hasher.update(value.encode("utf-8") + b"\0")
+    return hasher.hexdigest()
+
+_versions = {}
+
+# The version string of the compiler used for legacy or module syntax files.
+def compiler_version(legacy):
+    if legacy not in _versions:
+        if legacy:
+            try:
+                result = subprocess.run([SMARTPY_CLI, "--version"], capture_output = True, text = True, timeout = 60)
+                _versions[legacy] = result.stdout.strip() if result.returncode == 0 else "unavailable"
+            except (OSError, subprocess.TimeoutExpired):
+                _versions[legacy] = "unavailable"
+        else:
+            # Read from the package metadata: importing smartpy starts the compiler.
+            _versions[legacy] = "unavailable"
+            for distribution in ("smartpy-tezos", "smartpy"):
+                try:
+                    _versions[legacy] = importlib.metadata.version(distribution)
+                    break
+                except importlib.metadata.PackageNotFoundError:
+                    pass
+    return _versions[legacy]
+
+# The command that runs the scenarios of a SmartPy script, writing outputs under `outputDir`.
+def scenario_command(script, outputDir, legacy):
+    if legacy:
+        return [SMARTPY_CLI, "test", script, outputDir]
+    return [sys.executable, script]
+
+# The command that compiles the compilation targets of a SmartPy script into `outputDir`.
+def compile_command(script, outputDir, legacy):
+    if legacy:
+        return [SMARTPY_CLI, "compile", script, outputDir]
+    return [sys.executable, script]
+
+# Environment for running a SmartPy script: repository modules stay importable from any working directory.
+def smartpy_environment():
+    environment = dict(os.environ)
+    environment["PYTHONPATH"] = os.pathsep.join(filter(None, [ROOT, environment.get("PYTHONPATH")]))
+    return environment
@@ -0,0 +1,288 @@
+import argparse
+import json
+import math
+import sys
+import time
+
+import numpy
+
+import price_math
+
+# Runs a MakerContract's settings through many simulated crisis paths and
+# reports the distributions of XTZ recovered and inventory left.
+#
+# Every path draws an XTZ price following a geometric Brownian motion with
+# jumps, a kUSD premium on the Quipuswap pool that reverts to its mean, USDT
+# depeg shocks that recover over time, and gaps in the Youves oracle updates.
+# Arbitrage moves the pool towards the market price every block. A keeper acts
+# like keeper.py: it fires when the rate limit bucket will hold `--min-amount`
+# tokens on the next block, and the trade lands one block later unless it
+# misses inclusion. Landing trades go through the checks and the integer math
+# of `tokenToTezPayment`, in the contract's order, and fail or succeed as a
+# whole. The market is modelled in floating point; the contract and the pool
+# are evaluated with the exact integer formulas of price_math.py.
+#
+# Every spread amount is evaluated on the same paths.
+#
+# Usage: python tools/stress_maker.py [--paths N] [--hours H] [--seed S] [--spread-amount SPREAD ...] [-o report.json]
+
+DEFAULT_PATHS = 100_000
+
+SECONDS_PER_DAY = 86_400
+SECONDS_PER_YEAR = 365 * SECONDS_PER_DAY
+
+PERCENTILES = [1, 5, 25, 50, 75, 95, 99]
+
+# Reasons a landing trade fails, in the order the contract checks them.
+FAILURES = ["RATE_LIMITED", "USDT_PEG", "STALE_DATA", "VOLATILITY", "HIGH_MIN_OUT"]
+
+# Blocks after firing before the keeper reads the maker's storage again, as in keeper.py.
+INCLUSION_BLOCKS = 2
+
+# A time that never comes.
+NEVER = numpy.iinfo(numpy.int64).max // 2
+
+################################################################
+# Simulation
+################################################################
+
+# Indices of paths hit by an event happening with `probability` per path, drawn without a uniform per path.
+def _events(rng, count, probability):
+    hits = rng.poisson(count * probability)
+    return numpy.unique(rng.integers(0, count, hits)) if hits else numpy.empty(0, dtype = numpy.int64)
+
+def _summary(values):
+    summary = {"p%d" % percentile: value for percentile, value in zip(PERCENTILES, numpy.percentile(values, PERCENTILES).tolist())}
+    summary["mean"] = float(numpy.mean(values))
+    return summary
+
+def simulate(settings, spreadAmount, paths, seed):
+    rng = numpy.random.default_rng(seed)
+    blockSec = settings.block_sec
+    interval = settings.oracle_interval_sec
+    steps = int(settings.hours * 3600 // blockSec)
+    dt = interval / SECONDS_PER_YEAR
+    intervalDays = interval / SECONDS_PER_DAY
+
+    # The market moves and the oracle updates every interval, with the XTZ price,
+    # the kUSD premium and the pool kept as logarithms.
+    logPrice = numpy.full(paths, math.log(settings.xtz_price))
+    logPremium = numpy.full(paths, math.log1p(settings.premium_mean))
+    depeg = numpy.zeros(paths)
+    priceDrift = -0.5 * settings.volatility ** 2 * dt
+    priceShock = settings.volatility * math.sqrt(dt)
+    premiumReversion = 1 - math.exp(-interval / (settings.premium_reversion_hours * 3600))
+    premiumShock = settings.premium_std * math.sqrt(1 - (1 - premiumReversion) ** 2)
+    depegRecovery = 0.5 ** (interval / (settings.depeg_half_life_hours * 3600))
+    arbitrage = 1 - (1 - settings.arbitrage) ** (interval // blockSec)
+
+    # The pool holds mutez and 10^-6 tokens, starting at the market price. Arbitrage
+    # aims for (1 + premium) / price XTZ per token, which is also mutez per 10^-6 token.
+    tezPool = settings.pool_xtz * price_math.MUTEZ_PER_TEZ
+    logRatio = numpy.full(paths, math.log1p(settings.premium_mean) - math.log(settings.xtz_price))
+    logProduct = numpy.full(paths, 2 * math.log(tezPool) - logRatio[0])
+
+    # Youves, in 10^-6 USD and seconds.
+    initialSpot = round(settings.xtz_price * 10 ** 6)
+    oraclePrice = numpy.full(paths, initialSpot, dtype = numpy.int64)
+    oracleUsdt = numpy.full(paths, 10 ** 6, dtype = numpy.int64)
+    oracleTime = numpy.zeros(paths, dtype = numpy.int64)
+    gapUntil = numpy.zeros(paths, dtype = numpy.int64)
+
+    # The maker's storage.
+    bucketLevel = numpy.zeros(paths, dtype = numpy.int64)
+    lastRefillTime = numpy.zeros(paths, dtype = numpy.int64)
+    emaPrice = numpy.full(paths, initialSpot, dtype = numpy.int64)
+    emaSpotTime = numpy.zeros(paths, dtype = numpy.int64)
+    inventory = numpy.full(paths, settings.inventory, dtype = numpy.int64)
+    xtzRecovered = numpy.zeros(paths, dtype = numpy.int64)
+    trades = numpy.zeros(paths, dtype = numpy.int64)
+    failures = {reason: 0 for reason in FAILURES}
+
+    # The keeper: when it fires next, and the trade in flight.
+    fireAt = numpy.zeros(paths, dtype = numpy.int64)
+    firedAt = numpy.zeros(paths, dtype = numpy.int64)
+    landsAt = numpy.full(paths, NEVER, dtype = numpy.int64)
+    amountInFlight = numpy.zeros(paths, dtype = numpy.int64)
+
+    # Set when keeper.py, reading the storage from `readFrom`, next fires: on the
+    # block before the bucket holds `--min-amount` tokens, or what is left to sell.
+    def schedule(selected, readFrom):
+        need = numpy.minimum(settings.min_amount, inventory[selected])
+        missing = need - bucketLevel[selected]
+        if settings.refill_rate_per_sec:
+            readyAt = lastRefillTime[selected] + numpy.maximum(0, -(-missing // settings.refill_rate_per_sec))
+        else:
+            readyAt = numpy.where(missing <= 0, lastRefillTime[selected], NEVER)
+        nextFire = numpy.maximum(-(-(readyAt - blockSec) // blockSec) * blockSec, readFrom)
+        never = (need == 0) | (need > settings.bucket_capacity) | (readyAt == NEVER)
+        fireAt[selected] = numpy.where(never, NEVER, nextFire)
+
+    schedule(numpy.arange(paths), blockSec)
+
+    for step in range(1, steps + 1):
+        now = step * blockSec
+
+        if now % interval == 0:
+            # XTZ price with jumps, kUSD premium and USDT depeg.
+            logPrice += priceDrift + priceShock * rng.standard_normal(paths)
+            jumps = _events(rng, paths, settings.jump_rate * intervalDays)
+            logPrice[jumps] += rng.normal(settings.jump_mean, settings.jump_std, len(jumps))
+            logPremium += premiumReversion * (math.log1p(settings.premium_mean) - logPremium) + premiumShock * rng.standard_normal(paths)
+            depeg *= depegRecovery
+            shocks = _events(rng, paths, settings.depeg_rate * intervalDays)
+            depeg[shocks] += rng.exponential(settings.depeg_size, len(shocks))
+
+            # Arbitrage closes part of the gap between the pool and the market at constant product.
+            logRatio += arbitrage * (logPremium - logPrice - logRatio)
+
+            # Oracle updates, except during gaps.
+            gaps = _events(rng, paths, settings.gap_rate * intervalDays)
+            gapUntil[gaps] = now + rng.exponential(settings.gap_mean_sec, len(gaps)).astype(numpy.int64)
+            updating = numpy.flatnonzero(gapUntil <= now)
+            oraclePrice[updating] = numpy.rint(numpy.exp(logPrice[updating]) * 10 ** 6).astype(numpy.int64)
+            oracleUsdt[updating] = numpy.rint((1 - depeg[updating]) * 10 ** 6).astype(numpy.int64)
+            oracleTime[updating] = now
+
+        # Pokes by anyone: `poke` fails on stale data and counts each update once.
+        if settings.poke_sec and now % settings.poke_sec == 0:
+            poked = numpy.flatnonzero((now - oracleTime <= settings.max_data_delay_sec) & (oracleTime > emaSpotTime))
+            emaPrice[poked] = price_math.maker_ema_vector(oraclePrice[poked], emaPrice[poked], settings.ema_weight)
+            emaSpotTime[poked] = oracleTime[poked]
+
+        # Trades landing in this block run tokenToTezPayment.
+        landing = numpy.flatnonzero(landsAt == now)
+        if len(landing):
+            landsAt[landing] = NEVER
+            amount = amountInFlight[landing]
+            level = numpy.minimum(bucketLevel[landing] + (now - lastRefillTime[landing]) * settings.refill_rate_per_sec, settings.bucket_capacity)
+            spot = oraclePrice[landing]
+            usdt = oracleUsdt[landing]
+            failed = numpy.zeros(len(landing), dtype = bool)
+            checks = [
+                ("RATE_LIMITED", amount > level),
+                ("USDT_PEG", (usdt < 990000) | (usdt > 1010000)),
+                ("STALE_DATA", now - oracleTime[landing] > settings.max_data_delay_sec),
+                ("VOLATILITY", ~price_math.maker_within_tolerance_vector(spot, emaPrice[landing], settings.volatility_tolerance)),
+            ]
+            for reason, failing in checks:
+                failures[reason] += int(numpy.count_nonzero(failing & ~failed))
+                failed |= failing
+
+            tezPool = numpy.exp((logProduct[landing] + logRatio[landing]) / 2)
+            tokenPool = numpy.exp((logProduct[landing] - logRatio[landing]) / 2)
+            (_, requiredOut), _ = price_math.maker_required_out_vector(amount, spot, numpy.full(len(landing), spreadAmount))
+            tezOut = price_math.quipuswap_tez_out_vector(amount * 10 ** 6, tezPool, tokenPool)
+            failing = tezOut < requiredOut
+            failures["HIGH_MIN_OUT"] += int(numpy.count_nonzero(failing & ~failed))
+            failed |= failing
+
+            done = ~failed
+            traded = landing[done]
+            bucketLevel[traded] = level[done] - amount[done]
+            lastRefillTime[traded] = now
+            counted = oracleTime[traded] > emaSpotTime[traded]
+            emaPrice[traded] = numpy.where(counted, price_math.maker_ema_vector(spot[done], emaPrice[traded], settings.ema_weight), emaPrice[traded])
+            emaSpotTime[traded] = numpy.where(counted, oracleTime[traded], emaSpotTime[traded])
+            inventory[traded] -= amount[done]
+            xtzRecovered[traded] += tezOut[done]
+            trades[traded] += 1
+            logTez = numpy.log(tezPool[done] - tezOut[done])
+            logTokens = numpy.log(tokenPool[done] + amount[done] * 1e6)
+            logProduct[traded] = logTez + logTokens
+            logRatio[traded] = logTez - logTokens
+
+            # keeper.py re-reads the storage a few blocks after firing.
+            schedule(landing, numpy.maximum(firedAt[landing] + INCLUSION_BLOCKS * blockSec, now))
+
+        # The keeper fires for the next block, selling what the bucket will hold then.
+        fired = numpy.flatnonzero(fireAt == now)
+        if len(fired):
+            nextLevel = numpy.minimum(bucketLevel[fired] + (now + blockSec - lastRefillTime[fired]) * settings.refill_rate_per_sec, settings.bucket_capacity)
+            amountInFlight[fired] = numpy.minimum(nextLevel, inventory[fired])
+            missed = rng.geometric(1 - settings.miss_rate, len(fired)) - 1 if settings.miss_rate else 0
+            landsAt[fired] = now + blockSec * (1 + missed)
+            firedAt[fired] = now
+            fireAt[fired] = NEVER
+
+    return {
+        "spreadAmount": spreadAmount,
+        "xtzRecovered": _summary(xtzRecovered / price_math.MUTEZ_PER_TEZ),
+        "inventoryLeft": _summary(inventory),
+        "trades": _summary(trades),
+        "pathsWithoutTrades": float(numpy.mean(trades == 0)),
+        "failedTrades": failures,
+    }
+
+################################################################
+# Main
+################################################################
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Simulate a MakerContract's settings across random crisis paths.")
+    parser.add_argument("--paths", type = int, default = DEFAULT_PATHS, help = "price paths to simulate")
+    parser.add_argument("--seed", type = int, default = 0, help = "random seed")
+    parser.add_argument("--hours", type = float, default = 6, help = "length of each path")
+    parser.add_argument("--block-sec", type = int, default = 10, help = "seconds per block")
+    parser.add_argument("-o", "--output", help = "write the JSON report here instead of stdout")
+
+    maker = parser.add_argument_group("maker settings")
+    maker.add_argument("--spread-amount", type = int, nargs = "+", default = [6], help = "spread amounts to compare, in thousandths")
+    maker.add_argument("--refill-rate-per-sec", type = int, default = 1)
+    maker.add_argument("--bucket-capacity", type = int, default = 1000)
+    maker.add_argument("--max-data-delay-sec", type = int, default = 180)
+    maker.add_argument("--volatility-tolerance", type = int, default = 30, help = "in thousandths")
+    maker.add_argument("--ema-weight", type = int, default = 100, help = "in thousandths")
+    maker.add_argument("--inventory", type = int, default = 50_000, help = "normalized tokens the maker starts with")
+
+    market = parser.add_argument_group("market")
+    market.add_argument("--xtz-price", type = float, default = 1.0, help = "starting XTZ price in USD")
+    market.add_argument("--volatility", type = float, default = 1.0, help = "annualized XTZ volatility")
+    market.add_argument("--jump-rate", type = float, default = 2, help = "XTZ price jumps per day")
+    market.add_argument("--jump-mean", type = float, default = -0.02, help = "mean log size of a jump")
+    market.add_argument("--jump-std", type = float, default = 0.05, help = "standard deviation of the log size of a jump")
+    market.add_argument("--premium-mean", type = float, default = 0.01, help = "mean kUSD premium on the pool")
+    market.add_argument("--premium-std", type = float, default = 0.01, help = "standard deviation of the kUSD premium")
+    market.add_argument("--premium-reversion-hours", type = float, default = 6, help = "time scale of the premium's return to its mean")
+    market.add_argument("--depeg-rate", type = float, default = 0.2, help = "USDT depeg shocks per day")
+    market.add_argument("--depeg-size", type = float, default = 0.02, help = "mean size of a USDT depeg shock")
+    market.add_argument("--depeg-half-life-hours", type = float, default = 6, help = "half-life of a USDT depeg")
+    market.add_argument("--pool-xtz", type = int, default = 500_000, help = "XTZ in the Quipuswap pool")
+    market.add_argument("--arbitrage", type = float, default = 0.2, help = "share of the pool's gap to the market closed per block")
+
+    oracle = parser.add_argument_group("oracle and keeper")
+    oracle.add_argument("--oracle-interval-sec", type = int, default = 60, help = "seconds between market moves and Youves updates")
+    oracle.add_argument("--gap-rate", type = float, default = 1, help = "oracle outages per day")
+    oracle.add_argument("--gap-mean-sec", type = float, default = 600, help = "mean length of an oracle outage")
+    oracle.add_argument("--poke-sec", type = int, default = 300, help = "seconds between pokes of the moving average, 0 for none")
+    oracle.add_argument("--min-amount", type = int, default = 100, help = "tokens the keeper waits for before trading")
+    oracle.add_argument("--miss-rate", type = float, default = 0.1, help = "chance that a trade misses each block")
+    args = parser.parse_args(argv)
+
+    if not 0 <= args.miss_rate < 1:
+        parser.error("--miss-rate must be in [0, 1)")
+    if args.block_sec <= 0 or args.paths <= 0:
+        parser.error("--block-sec and --paths must be positive")
+    if args.oracle_interval_sec <= 0 or args.oracle_interval_sec % args.block_sec:
+        parser.error("--oracle-interval-sec must be a multiple of --block-sec")
+
+    started = time.time()
+    results = [simulate(args, spreadAmount, args.paths, args.seed) for spreadAmount in args.spread_amount]
+    report = {
+        "paths": args.paths,
+        "hours": args.hours,
+        "seed": args.seed,
+        "seconds": round(time.time() - started, 3),
+        "results": results,
+    }
+
+    text = json.dumps(report, indent = 2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
+    else:
+        sys.stdout.write(text + "\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+import json
+import os
+
+import pytest
+
+import global_constants
+import sources
+from michelson import Prim, Seq, binary_size, expr_hash, from_json, parse_expression, parse_script, to_json
+from rpc import RpcClient, RpcError
+
+ARTIFACTS = ["quipuswap_liquidity_proxy.tz", "quipuswap_maker_ceiling.tz"]
+
+def artifact_scripts():
+    scripts = {}
+    for artifact in ARTIFACTS:
+        with open(os.path.join(sources.ROOT, artifact)) as file:
+            scripts[artifact] = parse_script(file.read())
+    return scripts
+
+# Expand the constant references in a node, as the protocol does before type checking.
+def expand(node, constants):
+    if isinstance(node, Prim) and node.name == "constant":
+        return expand(constants[node.args[0].value], constants)
+    if isinstance(node, Seq):
+        return Seq(tuple(expand(item, constants) for item in node.items))
+    if isinstance(node, Prim):
+        return Prim(node.name, tuple(expand(arg, constants) for arg in node.args), node.annots)
+    return node
+
+# A run extracted from a sequence expands into a nested sequence, which runs the same instructions.
+def flatten(node):
+    if isinstance(node, Seq):
+        items = []
+        for item in node.items:
+            item = flatten(item)
+            items.extend(item.items if isinstance(item, Seq) else [item])
+        return Seq(tuple(items))
+    if isinstance(node, Prim):
+        return Prim(node.name, tuple(flatten(arg) for arg in node.args), node.annots)
+    return node
+
+@pytest.fixture(scope = "module")
+def extracted():
+    original = artifact_scripts()
+    rewritten, constants = global_constants.extract(original)
+    return original, rewritten, constants
+
+################################################################
+# Extraction
+################################################################
+
+def test_constants_are_named_by_their_expression_hash(extracted):
+    original, rewritten, constants = extracted
+    assert constants
+    for constantHash, value in constants.items():
+        assert constantHash == expr_hash(value)
+
+def test_expanding_the_constants_restores_the_scripts(extracted):
+    original, rewritten, constants = extracted
+    for name, sections in original.items():
+        assert len(rewritten[name]) == len(sections)
+        for before, after in zip(sections, rewritten[name]):
+            assert flatten(expand(after, constants)) == flatten(before)
+
+def test_parameter_and_storage_types_are_left_alone(extracted):
+    original, rewritten, constants = extracted
+    for name, sections in original.items():
+        for before, after in zip(sections, rewritten[name]):
+            if before.name in ("parameter", "storage"):
+                assert after == before
+
+def test_report_counts_the_bytes_saved(extracted):
+    original, rewritten, constants = extracted
+    report = global_constants.build_report(original, rewritten, constants)
+    for script in report["scripts"]:
+        assert script["savedBytes"] == script["bytes"] - script["bytesWithConstants"]
+        assert script["savedBytes"] > 0
+    assert report["savedBytesPerOrigination"] == sum(script["savedBytes"] for script in report["scripts"])
+    assert report["constantBytes"] == sum(binary_size(value) for value in constants.values())
+    for constant in report["constants"]:
+        assert constant["references"] >= 1
+
+def test_shared_code_below_the_threshold_is_kept():
+    # A failure shared by two scripts, which saves 10 bytes as a constant.
+    failure = '{PUSH string "%s"; FAILWITH}' % ("x" * 50)
+    scripts = dict(
+        (name, [Prim("code", (parse_expression("{CAR; IF %s {%s}}" % (failure, body)),), ())])
+        for name, body in [("a", "DROP"), ("b", "UNIT; DROP")]
+    )
+    rewritten, constants = global_constants.extract(scripts)
+    assert constants == {}
+    assert rewritten == scripts
+
+    rewritten, constants = global_constants.extract(scripts, minBytes = 1)
+    assert list(constants.values()) == [parse_expression(failure)]
+    report = global_constants.build_report(scripts, rewritten, constants)
+    assert report["savedBytesPerOrigination"] == 10
+    for name, sections in scripts.items():
+        assert expand(rewritten[name][0], constants) == sections[0]
+
+def test_write_saves_the_scripts_and_constants(tmp_path, extracted):
+    original, rewritten, constants = extracted
+    paths = [os.path.join(sources.ROOT, artifact) for artifact in ARTIFACTS]
+    report = global_constants.write(paths, str(tmp_path))
+    with open(tmp_path / global_constants.CONSTANTS_FILE) as file:
+        written = json.load(file)
+    assert [constant["hash"] for constant in written] == list(constants)
+    assert [from_json(constant["value"]) for constant in written] == list(constants.values())
+    for artifact in ARTIFACTS:
+        with open(tmp_path / artifact) as file:
+            assert parse_script(file.read()) == rewritten[artifact]
+    assert report["savedBytesPerOrigination"] > 0
+
+################################################################
+# Registration
+################################################################
+
+def test_register_skips_constants_already_on_chain(tmp_path, fixture_node):
+    url, directory = fixture_node
+    registered = Prim("Unit", (), ())
+    missing = parse_expression("{DUP; CAR}")
+    with open(tmp_path / global_constants.CONSTANTS_FILE, "w") as file:
+        json.dump([{"hash": expr_hash(value), "value": to_json(value)} for value in [registered, missing]], file)
+    onChain = os.path.join(directory, "chains", "main", "blocks", "1", "context", "constants", expr_hash(registered) + ".json")
+    os.makedirs(os.path.dirname(onChain))
+    with open(onChain, "w") as file:
+        json.dump(to_json(registered), file)
+
+    # `true` stands in for octez-client and accepts any registration.
+    hashes = global_constants.register(RpcClient(url), str(tmp_path), "keeper", octezClient = "true")
+    assert hashes == [expr_hash(missing)]
+
+def test_register_reports_a_failed_registration(tmp_path, fixture_node):
+    url, directory = fixture_node
+    value = parse_expression("{DUP; CAR}")
+    with open(tmp_path / global_constants.CONSTANTS_FILE, "w") as file:
+        json.dump([{"hash": expr_hash(value), "value": to_json(value)}], file)
+    with pytest.raises(RpcError, match = "Registering"):
+        global_constants.register(RpcClient(url), str(tmp_path), "keeper", octezClient = "false")
@@ -0,0 +1,180 @@
+import json
+import os
+
+import pytest
+
+import fixture_rpc
+from keeper import INCLUSION_HEADS, MANAGER_PASS, Injection, Keeper, seconds
+from rpc import RpcClient
+
+LAST_REFILL = "2024-01-01T00:10:00Z"
+
+def write_json(directory, path, value):
+    filePath = os.path.join(directory, *path.split("/")) + ".json"
+    os.makedirs(os.path.dirname(filePath), exist_ok = True)
+    with open(filePath, "w") as file:
+        json.dump(value, file)
+
+# A keeper of the fixture maker whose bucket held `bucketLevel` tokens at LAST_REFILL.
+def make_keeper(fixtureNode, bucketLevel, minAmount = 100):
+    url, directory = fixtureNode
+    client = RpcClient(url)
+    headLevel = fixture_rpc.fixture_head(directory)
+    write_json(directory, "chains/main/blocks/%d/context/contracts/%s/storage" % (headLevel, fixture_rpc.MAKER_ADDRESS), fixture_rpc.maker_storage(LAST_REFILL, bucketLevel))
+    fired = []
+    def fire(storage, amount, oracle):
+        injection = Injection()
+        fired.append((amount, oracle, injection))
+        return injection
+    keeper = Keeper(client, fixture_rpc.MAKER_ADDRESS, fire, minAmount = minAmount)
+    keeper.refresh()
+    return keeper, fired
+
+def header(level, timestamp = LAST_REFILL):
+    return {"hash": "B%d" % level, "level": level, "timestamp": timestamp}
+
+################################################################
+# Scheduling
+################################################################
+
+def test_keeper_reads_the_protocol_constants(fixture_node):
+    keeper, fired = make_keeper(fixture_node, 0)
+    assert keeper.blockDelay == fixture_rpc.BLOCK_TIME_SEC
+    assert keeper.operationTtl == 240
+
+def test_bucket_level_refills_up_to_the_capacity(fixture_node):
+    keeper, fired = make_keeper(fixture_node, 40)
+    start = seconds(LAST_REFILL)
+    assert keeper.bucket_level(start - 100) == 40
+    assert keeper.bucket_level(start) == 40
+    assert keeper.bucket_level(start + 10) == 40 + 10 * fixture_rpc.MAKER_REFILL_RATE_PER_SEC
+    assert keeper.bucket_level(start + 10 ** 6) == fixture_rpc.MAKER_BUCKET_CAPACITY
+
+def test_ready_time_of_a_full_enough_bucket_is_its_last_refill(fixture_node):
+    keeper, fired = make_keeper(fixture_node, 150)
+    assert keeper.ready_time() == seconds(LAST_REFILL)
+
+def test_ready_time_waits_for_the_missing_tokens(fixture_node):
+    keeper, fired = make_keeper(fixture_node, 40)
+    assert keeper.ready_time() == seconds(LAST_REFILL) + 60
+    keeper.storage["refillRatePerSec"] = 7
+    # 60 missing tokens take 8.6 seconds, so the bucket holds them after 9.
+    assert keeper.ready_time() == seconds(LAST_REFILL) + 9
+
+def test_ready_time_is_none_when_the_bucket_never_fills(fixture_node):
+    keeper, fired = make_keeper(fixture_node, 40)
+    keeper.storage["refillRatePerSec"] = 0
+    assert keeper.ready_time() is None
+    keeper, fired = make_keeper(fixture_node, 40, minAmount = fixture_rpc.MAKER_BUCKET_CAPACITY + 1)
+    assert keeper.ready_time() is None
+
+@pytest.mark.parametrize("secondsToReady, blocks", [
+    (-100, 1),
+    (0, 1),
+    (1, 1),
+    (15, 1),
+    (16, 2),
+    (45, 3),
+])
+def test_target_level_is_the_first_block_after_the_ready_time(fixture_node, secondsToReady, blocks):
+    keeper, fired = make_keeper(fixture_node, 0)
+    headTime = seconds(LAST_REFILL)
+    keeper.readyAt = headTime + secondsToReady
+    assert keeper.target_level(50, headTime) == 50 + blocks
+
+def test_on_head_fires_on_the_block_before_the_target(fixture_node):
+    keeper, fired = make_keeper(fixture_node, 40)
+    # The bucket holds 100 tokens 60 seconds after the refill, four blocks away.
+    assert keeper.on_head(header(50)) == "trade possible at level 54"
+    assert fired == []
+    assert keeper.on_head(header(53, "2024-01-01T00:10:45Z")) == "fired 100 tokens for level 54"
+    assert [(amount, oracle) for amount, oracle, injection in fired] == [(100, fixture_rpc.SPOT_ADDRESS)]
+    assert keeper.pendingLevel == 53
+
+################################################################
+# Pending trades
+################################################################
+
+def pending_keeper(fixtureNode, operationHash = "opPending", failed = False, pendingLevel = 50):
+    keeper, fired = make_keeper(fixtureNode, 0)
+    keeper.pending = Injection()
+    keeper.pending.hash = operationHash
+    keeper.pending.failed = failed
+    keeper.pendingLevel = pendingLevel
+    return keeper
+
+def write_operation_hashes(fixtureNode, level, hashes):
+    url, directory = fixtureNode
+    write_json(directory, "chains/main/blocks/B%d/operation_hashes/%d" % (level, MANAGER_PASS), hashes)
+
+def write_mempool(fixtureNode, mempool):
+    url, directory = fixtureNode
+    write_json(directory, "chains/main/mempool/pending_operations", mempool)
+
+def assert_done(keeper, level):
+    assert keeper.pending is None
+    assert keeper.pendingLevel is None
+    assert keeper.refreshLevel == level
+
+def test_a_trade_not_yet_injected_is_waited_for(fixture_node):
+    keeper = pending_keeper(fixture_node, operationHash = None)
+    assert keeper.follow_pending(header(60)) == "waiting for the trade fired at level 50 to be injected"
+
+def test_an_included_trade_is_done(fixture_node):
+    keeper = pending_keeper(fixture_node)
+    write_operation_hashes(fixture_node, 51, ["opOther", "opPending"])
+    assert keeper.follow_pending(header(51)) is None
+    assert_done(keeper, 51)
+
+def test_a_trade_is_waited_for_without_the_mempool_for_a_few_heads(fixture_node):
+    keeper = pending_keeper(fixture_node)
+    write_operation_hashes(fixture_node, 50 + INCLUSION_HEADS - 1, [])
+    # No mempool fixture, so looking there would fail.
+    assert keeper.follow_pending(header(50 + INCLUSION_HEADS - 1)) == "waiting for opPending injected at level 50"
+
+@pytest.mark.parametrize("mempool", [
+    {"validated": [{"hash": "opPending"}]},
+    {"branch_delayed": [{"hash": "opOther"}, {"hash": "opPending"}]},
+    {"unprocessed": [["opPending", {}]]},
+])
+def test_a_trade_in_the_mempool_is_waited_for(fixture_node, mempool):
+    keeper = pending_keeper(fixture_node)
+    write_operation_hashes(fixture_node, 60, [])
+    write_mempool(fixture_node, mempool)
+    assert keeper.follow_pending(header(60)) == "waiting for opPending injected at level 50"
+
+@pytest.mark.parametrize("mempool", [
+    {"validated": []},
+    {"refused": [{"hash": "opPending"}], "outdated": [{"hash": "opPending"}]},
+])
+def test_a_dropped_trade_is_done(fixture_node, mempool):
+    keeper = pending_keeper(fixture_node)
+    write_operation_hashes(fixture_node, 60, [])
+    write_mempool(fixture_node, mempool)
+    assert keeper.follow_pending(header(60)) is None
+    assert_done(keeper, 60)
+
+def test_a_failed_injection_is_done(fixture_node):
+    # Neither the block nor the mempool are looked at.
+    keeper = pending_keeper(fixture_node, failed = True)
+    assert keeper.follow_pending(header(51)) is None
+    assert_done(keeper, 51)
+
+def test_a_trade_past_its_time_to_live_is_done(fixture_node):
+    keeper = pending_keeper(fixture_node)
+    level = 50 + keeper.operationTtl
+    write_operation_hashes(fixture_node, level, [])
+    write_mempool(fixture_node, {"validated": [{"hash": "opPending"}]})
+    assert keeper.follow_pending(header(level)) == "waiting for opPending injected at level 50"
+    assert keeper.follow_pending(header(level + 1)) is None
+    assert_done(keeper, level + 1)
+
+def test_on_head_waits_for_the_pending_trade_before_firing_again(fixture_node):
+    keeper, fired = make_keeper(fixture_node, 40)
+    keeper.on_head(header(53, "2024-01-01T00:10:45Z"))
+    injection = fired[0][2]
+    assert keeper.on_head(header(54, "2024-01-01T00:11:00Z")) == "waiting for the trade fired at level 53 to be injected"
+    injection.failed = True
+    # The storage is read again, which still holds the untraded bucket.
+    assert keeper.on_head(header(55, "2024-01-01T00:11:15Z")) == "fired 130 tokens for level 56"
+    assert len(fired) == 2
@@ -0,0 +1,154 @@
+import os
+
+import pytest
+
+import fixture_rpc
+import sources
+from michelson import (
+    Bytes, Int, Prim, Seq, String,
+    address_bytes, binary, binary_size, decode, encode, from_json, parse_expression, parse_script, render, section, to_json,
+)
+
+ARTIFACTS = ["quipuswap_liquidity_proxy.tz", "quipuswap_maker_ceiling.tz"]
+
+def sections_of(artifact):
+    with open(os.path.join(sources.ROOT, artifact)) as file:
+        return parse_script(file.read())
+
+def storage_type(artifact):
+    return section(sections_of(artifact), "storage")
+
+################################################################
+# Binary size
+################################################################
+
+@pytest.mark.parametrize("node, size", [
+    (Int(0), 2),
+    (Int(63), 2),
+    (Int(64), 3),
+    (Int(-64), 3),
+    (Int(10 ** 18), 10),
+    (String("abc"), 8),
+    (Bytes("00ff"), 7),
+    (Prim("Unit", (), ()), 2),
+    (Prim("Pair", (Int(1), Int(2)), ()), 6),
+    (Prim("pair", (Prim("nat", (), ()), Prim("nat", (), ())), ("%a",)), 12),
+    (Seq((Int(1), Int(2))), 9),
+])
+def test_binary_size_of_values(node, size):
+    assert len(binary(node)) == size
+    assert binary_size(node) == size
+
+@pytest.mark.parametrize("artifact", ARTIFACTS)
+def test_binary_size_matches_the_encoding_of_each_artifact(artifact):
+    for node in sections_of(artifact):
+        assert binary_size(node) == len(binary(node))
+
+@pytest.mark.parametrize("value", [0, 1, -1, 63, 64, -64, 8191, 8192, 2 ** 64, -(10 ** 30)])
+def test_binary_size_matches_the_encoding_of_integers(value):
+    assert binary_size(Int(value)) == len(binary(Int(value)))
+
+################################################################
+# Parsing and rendering
+################################################################
+
+@pytest.mark.parametrize("text", [
+    "pair (address %spender) (nat %value)",
+    "{DUP; CAR; IF {PUSH int 1; FAILWITH} {}}",
+    'Pair "tz1YYnf7vGXqCmB1shNg4rHiTz5gwWTDYceB" 0x00ff -5',
+    "{Elt 1 (Some Unit); Elt 2 None}",
+])
+def test_render_parses_back(text):
+    node = parse_expression(text)
+    assert render(node) == text
+    assert parse_expression(render(node)) == node
+
+@pytest.mark.parametrize("artifact", ARTIFACTS)
+def test_json_round_trip_of_each_artifact(artifact):
+    for node in sections_of(artifact):
+        assert from_json(to_json(node)) == node
+
+################################################################
+# Decoding and encoding values
+################################################################
+
+def test_maker_storage_round_trips():
+    storageType = storage_type("quipuswap_maker_ceiling.tz")
+    node = from_json(fixture_rpc.maker_storage("2024-01-01T00:00:00Z", 1234))
+    storage = decode(storageType, node)
+    assert storage["bucketLevel"] == 1234
+    assert storage["bucketCapacity"] == fixture_rpc.MAKER_BUCKET_CAPACITY
+    assert storage["lastRefillTime"] == "2024-01-01T00:00:00Z"
+    assert storage["tokenAddress"] == fixture_rpc.TOKEN_ADDRESS
+    assert storage["paused"] is False
+    # The fixture writes the storage as one n-ary Pair, and encode as the equivalent right comb.
+    encoded = encode(storageType, storage)
+    assert encoded.args[0] == node.args[0]
+    assert decode(storageType, encoded) == storage
+
+@pytest.mark.parametrize("typeText, value", [
+    ("option nat", None),
+    ("option nat", 5),
+    ("or (nat %a) (string %b)", {"a": 1}),
+    ("or (nat %a) (string %b)", {"b": "x"}),
+    ("or nat string", {"Right": "x"}),
+    ("list (pair nat string)", [[1, "a"], [2, "b"]]),
+    ("pair (nat %a) (pair (string %b) (bool %c))", {"a": 1, "b": "x", "c": True}),
+    ("map string nat", [["a", 1], ["b", 2]]),
+    ("big_map nat bytes", 17),
+    ("bytes", "0x00ff"),
+    ("unit", None),
+])
+def test_values_round_trip(typeText, value):
+    typeNode = parse_expression(typeText)
+    assert decode(typeNode, encode(typeNode, value)) == value
+
+def test_integer_timestamps_decode_to_their_time():
+    typeNode = parse_expression("timestamp")
+    assert decode(typeNode, encode(typeNode, 100)) == "1970-01-01T00:01:40Z"
+
+def test_binary_addresses_decode_to_their_base58_form():
+    typeNode = parse_expression("address")
+    for address in [fixture_rpc.KEEPER_ADDRESS, fixture_rpc.MAKER_ADDRESS, fixture_rpc.MAKER_ADDRESS + "%transfer"]:
+        assert decode(typeNode, Bytes(address_bytes(address).hex())) == address
+
+################################################################
+# Michelson order of map keys and set items
+################################################################
+
+def keys(node):
+    return [render(item.args[0] if isinstance(item, Prim) else item) for item in node.items]
+
+def test_map_keys_are_ordered_by_their_binary_address():
+    typeNode = parse_expression("map address nat")
+    implicit = "tz1YYnf7vGXqCmB1shNg4rHiTz5gwWTDYceB"
+    secp256k1 = "tz2BFTyPeYRzxd5aiBchbXN3WCZhx7BqbMBq"
+    originated = fixture_rpc.MAKER_ADDRESS
+    # Python orders the strings KT1 < tz1 < tz2, Michelson orders implicit accounts first.
+    node = encode(typeNode, {originated: 1, secp256k1: 2, implicit: 3})
+    assert keys(node) == ['"%s"' % implicit, '"%s"' % secp256k1, '"%s"' % originated]
+
+def test_map_keys_with_an_entrypoint_follow_the_bare_address():
+    typeNode = parse_expression("map address nat")
+    address = fixture_rpc.MAKER_ADDRESS
+    node = encode(typeNode, [[address + "%a", 1], [address, 2]])
+    assert keys(node) == ['"%s"' % address, '"%s%%a"' % address]
+
+def test_map_keys_are_ordered_component_by_component():
+    typeNode = parse_expression("map (pair nat string) nat")
+    node = encode(typeNode, [[[10, "a"], 1], [[9, "b"], 2], [[9, "a"], 3]])
+    assert keys(node) == ['Pair 9 "a"', 'Pair 9 "b"', 'Pair 10 "a"']
+
+def test_map_keys_are_ordered_by_value_not_text():
+    node = encode(parse_expression("map int nat"), {10: 0, -2: 0, 9: 0})
+    assert keys(node) == ["-2", "9", "10"]
+    node = encode(parse_expression("map (option (or nat string)) nat"), [[{"Right": "a"}, 0], [None, 0], [{"Left": 5}, 0]])
+    assert keys(node) == ["None", "Some (Left 5)", 'Some (Right "a")']
+
+def test_set_items_are_ordered_by_time():
+    node = encode(parse_expression("set timestamp"), ["2021-01-01T00:00:00Z", 100, "1970-01-01T00:00:50Z"])
+    assert keys(node) == ['"1970-01-01T00:00:50Z"', "100", '"2021-01-01T00:00:00Z"']
+
+def test_map_keys_of_bytes_are_ordered_as_unsigned_bytes():
+    node = encode(parse_expression("map bytes nat"), {"0xff": 0, "0x00ff": 0, "0x01": 0})
+    assert keys(node) == ["0x00ff", "0x01", "0xff"]
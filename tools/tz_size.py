@@ -0,0 +1,201 @@
+import argparse
+import json
+import sys
+
+from michelson import Prim, Seq, binary_size, instruction_count, parse_script, render, section
+
+# Attributes the size of compiled Michelson scripts to entrypoints and reports
+# repeated instruction sequences, as a JSON document.
+#
+# Usage: python tools/tz_size.py quipuswap_liquidity_proxy.tz quipuswap_maker_ceiling.tz [-o report.json]
+
+# Duplicates smaller than this are not worth extracting.
+DEFAULT_MIN_BYTES = 16
+
+# Longest run of instructions considered when looking for duplicates.
+MAX_WINDOW = 40
+
+# Longest rendering of a duplicated sequence kept in the report.
+PREVIEW_LENGTH = 240
+
+################################################################
+# Entrypoint attribution
+################################################################
+
+# Name of an `or` branch, taken from its field annotation.
+def _branch_name(typeNode):
+    for annot in typeNode.annots:
+        if annot.startswith("%"):
+            return annot[1:]
+    return None
+
+# Find the IF_LEFT that dispatches on the parameter in a sequence.
+def _find_dispatch(items):
+    for index, item in enumerate(items):
+        if isinstance(item, Prim) and item.name == "IF_LEFT":
+            return index
+    return None
+
+# Walk the parameter `or` tree alongside the nested IF_LEFTs of the code and
+# collect the body of each entrypoint.
+def entrypoint_bodies(parameterType, code):
+    bodies = []
+
+    def walk(typeNode, body, path):
+        name = _branch_name(typeNode)
+        if typeNode.name == "or" and isinstance(body, Seq):
+            index = _find_dispatch(body.items)
+            if index is not None:
+                dispatch = body.items[index]
+                walk(typeNode.args[0], dispatch.args[0], path + "L")
+                walk(typeNode.args[1], dispatch.args[1], path + "R")
+                return
+        bodies.append((name or path, body))
+
+    walk(parameterType, code, "")
+    return bodies
+
+################################################################
+# Duplicates
+################################################################
+
+# Owner of the code outside every entrypoint: the dispatch and the private lambdas.
+DISPATCH_OWNER = "(dispatch)"
+
+# Every sequence in the code, labelled with the entrypoint that owns it.
+def _owned_sequences(code, bodies):
+    owners = {}
+    for name, body in bodies:
+        owners[id(body)] = name
+    sequences = []
+
+    def walk(node, owner):
+        if isinstance(node, Seq):
+            owner = owners.get(id(node), owner)
+            sequences.append((owner, node))
+            for item in node.items:
+                walk(item, owner)
+        elif isinstance(node, Prim):
+            for arg in node.args:
+                walk(arg, owner)
+
+    walk(code, DISPATCH_OWNER)
+    return sequences
+
+# Find runs of instructions that occur more than once across the given scripts.
+def find_duplicates(scripts, minBytes = DEFAULT_MIN_BYTES):
+    occurrences = {}
+    sizes = {}
+    for scriptName, sequences in scripts:
+        for sequenceIndex, (owner, sequence) in enumerate(sequences):
+            items = sequence.items
+            for start in range(len(items)):
+                for length in range(1, min(MAX_WINDOW, len(items) - start) + 1):
+                    window = items[start:start + length]
+                    if window not in sizes:
+                        sizes[window] = sum(binary_size(item) for item in window)
+                    if sizes[window] < minBytes:
+                        continue
+                    location = (scriptName, sequenceIndex, start, length, owner)
+                    occurrences.setdefault(window, []).append(location)
+
+    candidates = []
+    for window, locations in occurrences.items():
+        if len(locations) < 2:
+            continue
+        # Replacing every copy but one by a reference is the best case saving.
+        saving = (len(locations) - 1) * sizes[window]
+        candidates.append((saving, sizes[window], window, locations))
+    candidates.sort(key = lambda candidate: (-candidate[0], -candidate[1]))
+
+    # Keep only maximal runs: skip a window whose every occurrence sits inside one already reported.
+    covered = {}
+    duplicates = []
+    for saving, size, window, locations in candidates:
+        def is_covered(location):
+            scriptName, sequenceIndex, start, length, owner = location
+            for coveredStart, coveredLength in covered.get((scriptName, sequenceIndex), []):
+                if coveredStart <= start and start + length <= coveredStart + coveredLength:
+                    return True
+            return False
+
+        if all(is_covered(location) for location in locations):
+            continue
+        for scriptName, sequenceIndex, start, length, owner in locations:
+            covered.setdefault((scriptName, sequenceIndex), []).append((start, length))
+
+        preview = render(Seq(window))
+        if len(preview) > PREVIEW_LENGTH:
+            preview = preview[:PREVIEW_LENGTH - 3] + "..."
+        duplicates.append({
+            "bytes": size,
+            "instructions": sum(instruction_count(item) for item in window),
+            "occurrences": len(locations),
+            "potentialSavingBytes": saving,
+            "locations": sorted(set((location[0], location[4]) for location in locations)),
+            "michelson": preview,
+        })
+    return duplicates
+
+################################################################
+# Report
+################################################################
+
+def analyze_script(name, text):
+    sections = parse_script(text)
+    parameterType = section(sections, "parameter")
+    code = section(sections, "code")
+    bodies = entrypoint_bodies(parameterType, code)
+
+    entrypoints = []
+    for entrypoint, body in bodies:
+        entrypoints.append({
+            "name": entrypoint,
+            "bytes": binary_size(body),
+            "instructions": instruction_count(body),
+        })
+    entrypoints.sort(key = lambda entry: -entry["bytes"])
+
+    codeBytes = binary_size(code)
+    report = {
+        "file": name,
+        "sourceBytes": len(text.encode("utf-8")),
+        "totalBytes": sum(binary_size(node) for node in sections),
+        "sections": dict((node.name, binary_size(node)) for node in sections),
+        "codeBytes": codeBytes,
+        "codeInstructions": instruction_count(code),
+        "dispatchBytes": codeBytes - sum(entry["bytes"] for entry in entrypoints),
+        "entrypoints": entrypoints,
+    }
+    return report, _owned_sequences(code, bodies)
+
+def build_report(paths, minBytes = DEFAULT_MIN_BYTES):
+    reports = []
+    scripts = []
+    for path in paths:
+        with open(path) as file:
+            report, sequences = analyze_script(path, file.read())
+        reports.append(report)
+        scripts.append((path, sequences))
+    return {
+        "scripts": reports,
+        "duplicates": find_duplicates(scripts, minBytes),
+    }
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Report where the bytes of compiled Michelson scripts go.")
+    parser.add_argument("scripts", nargs = "+", help = "compiled .tz files")
+    parser.add_argument("-o", "--output", help = "write the JSON report here instead of stdout")
+    parser.add_argument("--min-bytes", type = int, default = DEFAULT_MIN_BYTES, help = "ignore duplicated runs smaller than this")
+    args = parser.parse_args(argv)
+
+    report = build_report(args.scripts, args.min_bytes)
+    text = json.dumps(report, indent = 2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
+    else:
+        sys.stdout.write(text + "\n")
+
+if __name__ == "__main__":
+    main()